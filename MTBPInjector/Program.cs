@@ -358,7 +358,7 @@ internal static class Program
     // Register N cells in a SINGLE Jeju_World load/save. Spec JSON is an array
     // of objects, each with the same keys as register-new-cell flags
     // (template-cell, new-cell-name, x, y, extent, grid, hier-level,
-    // grid-levels-index, cells-dir, mod-cells-dir).
+    // grid-levels-index, cells-dir, mod-cells-dir, package-root, world-name).
     private static int RegisterCellsBatch(string[] args)
     {
         var f = ParseFlags(args);
@@ -396,6 +396,10 @@ internal static class Program
         int gridLevelsIndex = int.Parse(f.TryGetValue("grid-levels-index", out var gli) ? gli : "0");
         string cellsDir = f["cells-dir"]; // vanilla cells source, e.g. D:\MT\...\_Generated_
         string modCellsDir = f["mod-cells-dir"]; // output _Generated_ dir in mod
+        // The main map's cell package folder and world name (maps.py); Jeju's
+        // when the spec predates multi-map.
+        string pkgRoot = (f.TryGetValue("package-root", out var pr) ? pr : "/Game/Maps/Jeju/Jeju_World/_Generated_").TrimEnd('/');
+        string worldName = f.TryGetValue("world-name", out var wn) ? wn : "Jeju_World";
 
         // Find the 3 template exports by name
         int tplCellIdx = -1, tplLevelStreamIdx = -1;
@@ -485,7 +489,7 @@ internal static class Program
                 wop.Value = new FPackageIndex(newCellNum);
             if (p is UAssetAPI.PropertyTypes.Objects.NamePropertyData np && p.Name.ToString() == "PackageNameToLoad")
             {
-                string pkgName = $"/Game/Maps/Jeju/Jeju_World/_Generated_/{newCell}";
+                string pkgName = $"{pkgRoot}/{newCell}";
                 EnsureName(asset, pkgName);
                 np.Value = FName.FromString(asset, pkgName);
             }
@@ -494,7 +498,7 @@ internal static class Program
                 // Rewrite only the PackageName field of the existing soft path;
                 // leave the rest (sub-path + asset name) alone so its internal
                 // shape matches what UE expects for a WP cell WorldAsset ref.
-                string newPkg = $"/Game/Maps/Jeju/Jeju_World/_Generated_/{newCell}";
+                string newPkg = $"{pkgRoot}/{newCell}";
                 EnsureName(asset, newPkg);
                 if (sopd.Value != null)
                 {
@@ -530,12 +534,13 @@ internal static class Program
                 ip.Value = hierLevel;
         }
 
-        // Also patch RCD Extras: vanilla had "<Jeju_World_MainGrid_L-1_X_Y>\0" ish string+null.
+        // Also patch RCD Extras: vanilla had "<World_MainGrid_L-1_X_Y>\0" ish string+null
+        // (e.g. Jeju_World_MainGrid_L-1_X_Y).
         // Easiest: derive a fresh label and write count(=len+1)+string+null.
         double cellWidth2 = extent * 2;
         int gridX = (int)Math.Floor(tx / cellWidth2);
         int gridY = (int)Math.Floor(ty / cellWidth2);
-        string rcdName = $"Jeju_World_{gridName}_L{hierLevel}_X{gridX}_Y{gridY}";
+        string rcdName = $"{worldName}_{gridName}_L{hierLevel}_X{gridX}_Y{gridY}";
         newRcdExp.Extras = MakeCStringExtras(rcdName);
 
         // Cell's own Extras: similar "cell name" string
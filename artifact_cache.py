@@ -0,0 +1,439 @@
+"""
+Local content-addressed cache for injector outputs.
+
+The injector verbs clone_bp_actors.py drives (mutate-cargos, mutate-bp-cdo,
+the byte-clone of mod BP classes) are pure functions of their inputs: the
+vanilla source .uasset/.uexp, the JSON spec we hand them, the .usmap
+mappings, and the injector build itself. Those inputs rarely change between
+pipeline runs, so instead of re-running the injector (and re-parsing the
+30 MB mappings) every time, each call site computes a cache key over ALL of
+its inputs and asks the cache first:
+
+    cache = ArtifactCache()
+    key = cache.key("mutate-cargos", spec, file_digest(src), tool_version)
+    if not cache.fetch(key, outputs):
+        ... run the injector ...
+        cache.store(key, outputs)
+
+Layout under CACHE_ROOT (default `.mtmi_cache/` next to this file,
+override with MTMI_CACHE_DIR):
+
+  artifacts/objects/<aa>/<sha256>   output file bodies, stored ONCE per
+                                    distinct content (two keys producing
+                                    the same bytes share one object)
+  artifacts/index.json              key -> [[dst-name, object digest, size]],
+                                    plus last-use time for LRU eviction
+  artifacts/index.json.lock         held while a process re-reads, merges
+                                    and rewrites the index
+  digests.json                      stat-keyed file digest memo (see
+                                    file_digest) so the 30 MB mappings file
+                                    is only hashed when it actually changes
+
+On a hit the stored objects are hardlinked into place (falling back to a
+copy across volumes, or always copying with MTMI_CACHE_LINK=copy). Because
+a hardlinked output shares its inode with the cache object, producers MUST
+unlink their outputs before writing them — `unlink_outputs()` does that —
+or an in-place truncate-and-write would corrupt the cached copy.
+
+The cache is size-bounded: after every store, least-recently-used entries
+are dropped until the unique object bytes fit MTMI_CACHE_MAX_MB (default
+2048). Objects no longer referenced by any entry are deleted with them.
+
+With MTMI_SHARED_CACHE set, a team-wide cache (a shared directory or an
+HTTP server, see shared_cache.py) backs this one. A local miss is looked
+up there, and verified objects are pulled into the local store before
+the hit is placed. Every fresh store is published to it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import shared_cache
+
+CACHE_ROOT = Path(os.environ.get("MTMI_CACHE_DIR", "").strip().strip('"')
+                  or Path(__file__).with_name(".mtmi_cache"))
+_DEFAULT_MAX_MB = 2048
+_STALE_LOCK_S = 30.0
+
+# One lock for every index/memo mutation in this process. Call sites may
+# run on worker threads (independent clone_bp_actors phases), and the
+# index is small enough that coarse locking costs nothing measurable.
+_LOCK = threading.RLock()
+
+
+# ----------------------------------------------------------------------
+# File digests
+# ----------------------------------------------------------------------
+_DIGEST_MEMO_PATH = CACHE_ROOT / "digests.json"
+_digest_memo: dict[str, list] | None = None
+_digest_memo_dirty = False
+
+
+def _load_digest_memo() -> dict[str, list]:
+    global _digest_memo
+    if _digest_memo is None:
+        try:
+            _digest_memo = json.loads(_DIGEST_MEMO_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _digest_memo = {}
+    return _digest_memo
+
+
+def save_digest_memo() -> None:
+    global _digest_memo_dirty
+    with _LOCK:
+        if not _digest_memo_dirty or _digest_memo is None:
+            return
+        _atomic_write_json(_DIGEST_MEMO_PATH, _digest_memo)
+        _digest_memo_dirty = False
+
+
+def file_digest(path: Path | str) -> str | None:
+    """sha256 of a file's bytes, or None if it doesn't exist. Memoized on
+    (size, mtime_ns) so unchanged files cost one stat() per run."""
+    global _digest_memo_dirty
+    p = Path(path)
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    k = str(p.resolve())
+    with _LOCK:
+        memo = _load_digest_memo()
+        hit = memo.get(k)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    d = h.hexdigest()
+    with _LOCK:
+        memo[k] = [st.st_size, st.st_mtime_ns, d]
+        _digest_memo_dirty = True
+    return d
+
+
+def tool_version(paths: list[Path | str]) -> str:
+    """Version stamp for an external tool build: digest over the digests of
+    its binaries. A missing binary contributes 'missing' so the stamp still
+    changes once it gets built."""
+    return digest_parts(*[(str(Path(p).name), file_digest(p) or "missing") for p in paths])
+
+
+def digest_parts(*parts) -> str:
+    """sha256 over a canonical JSON encoding of arbitrary key parts. Paths
+    are stringified; dict key order doesn't matter."""
+    blob = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def unlink_outputs(paths: list[Path]) -> None:
+    """Remove outputs before a producer rewrites them, so a hardlink into
+    the cache object store is broken instead of written through."""
+    for p in paths:
+        try:
+            Path(p).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def break_links(paths: list[Path]) -> None:
+    """Give each existing path its own inode. For outputs restored from the
+    cache that a tool outside our control later rewrites in place (UAssetGUI
+    fromjson, the injector's main-in == main-out mode) — unlink_outputs()
+    can't help when the writer also has to READ the file first."""
+    for p in paths:
+        p = Path(p)
+        try:
+            if p.stat().st_nlink <= 1:
+                continue
+        except OSError:
+            continue
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copy2(p, tmp)
+        os.replace(tmp, p)
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def file_lock(lock: Path):
+    """Hold lock file `lock` (across processes). Threads of one process
+    need their own lock on top; this one only excludes other processes."""
+    lock = Path(lock)
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                # Left behind by a killed process.
+                if time.time() - lock.stat().st_mtime > _STALE_LOCK_S:
+                    lock.unlink()
+            except OSError:
+                pass
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            lock.unlink()
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------------------------
+# Artifact cache
+# ----------------------------------------------------------------------
+class ArtifactCache:
+    """Content-addressed output cache with hit/miss stats and LRU eviction.
+    Cheap to construct; the index is loaded on first use."""
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None):
+        self.root = Path(root) if root else CACHE_ROOT / "artifacts"
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(os.environ.get("MTMI_CACHE_MAX_MB", _DEFAULT_MAX_MB)) * 1024 * 1024)
+            except ValueError:
+                max_bytes = _DEFAULT_MAX_MB * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.link_mode = os.environ.get("MTMI_CACHE_LINK", "hardlink").strip().lower()
+        self.enabled = os.environ.get("MTMI_CACHE", "1") != "0"
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.shared_hits = 0
+        self._index: dict[str, dict] | None = None
+
+    # -- keys ------------------------------------------------------------
+    @staticmethod
+    def key(*parts) -> str:
+        return digest_parts(*parts)
+
+    # -- index -----------------------------------------------------------
+    @property
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _load(self) -> dict[str, dict]:
+        if self._index is None:
+            try:
+                self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save(self) -> None:
+        _atomic_write_json(self._index_path, self._load())
+        save_digest_memo()
+
+    @contextmanager
+    def _updating(self):
+        """The index as it is on disk now, saved on exit, all under its lock
+        file: matrix_build and pipeline stages store into one cache from
+        several processes, and a read-modify-write from a stale copy would
+        drop the entries the others added."""
+        with _LOCK, file_lock(self.root / "index.json.lock"):
+            self._index = None
+            yield self._load()
+            self._save()
+
+    # -- fetch / store ---------------------------------------------------
+    def fetch(self, key: str, outputs: list[Path]) -> bool:
+        """On a hit, place every cached output at its destination and return
+        True. Outputs are matched by file name, so `outputs` must list the
+        same paths the entry was stored with (other directories are fine).
+        A partial or corrupt entry counts as a miss and is dropped."""
+        if not self.enabled:
+            with _LOCK:
+                self.misses += 1
+            return False
+        with _LOCK:
+            entry = self._load().get(key)
+        if entry is None:
+            entry = self._fetch_shared(key)
+        if entry is None:
+            with _LOCK:
+                self.misses += 1
+            return False
+        by_name = {Path(p).name: Path(p) for p in outputs}
+        files = entry["files"]
+        if not {name for name, _, _ in files} <= set(by_name):
+            return self._drop_miss(key)
+        for name, digest, size in files:
+            obj = self._object_path(digest)
+            try:
+                if obj.stat().st_size != size:
+                    return self._drop_miss(key)
+            except OSError:
+                return self._drop_miss(key)
+        # Outputs the producer didn't write last time mustn't linger from an
+        # older run either. Ones already holding the cached bytes are left
+        # alone, so an unchanged output keeps its inode and mtime.
+        keep = {name for name, digest, _ in files if file_digest(by_name[name]) == digest}
+        unlink_outputs([p for name, p in by_name.items() if name not in keep])
+        for name, digest, _ in files:
+            if name in keep:
+                continue
+            dst = by_name[name]
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            self._place(self._object_path(digest), dst)
+        with self._updating() as index:
+            if key in index:            # unless another process evicted it since
+                index[key]["used"] = time.time()
+            self.hits += 1
+        return True
+
+    def store(self, key: str, outputs: list[Path]) -> None:
+        """Record the producer's outputs under `key`. Missing outputs are
+        skipped (a verb that legitimately writes no .uexp still caches)."""
+        if not self.enabled:
+            return
+        files = []
+        for p in outputs:
+            p = Path(p)
+            d = file_digest(p)
+            if d is None:
+                continue
+            obj = self._object_path(d)
+            if not obj.exists():
+                obj.parent.mkdir(parents=True, exist_ok=True)
+                tmp = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                shutil.copyfile(p, tmp)
+                os.replace(tmp, obj)
+            files.append([p.name, d, p.stat().st_size])
+        with self._updating() as index:
+            index[key] = {"files": files, "used": time.time()}
+            self._evict()
+        remote = shared_cache.shared()
+        if remote is not None:
+            remote.publish(key, files, self._object_path)
+
+    def _fetch_shared(self, key: str) -> dict | None:
+        """Pull `key` from the shared cache into the local store; the new
+        local entry, or None on a shared miss."""
+        remote = shared_cache.shared()
+        files = remote.entry(key) if remote is not None else None
+        if files is None:
+            return None
+        for _, digest, size in files:
+            obj = self._object_path(digest)
+            try:
+                if obj.stat().st_size == size:
+                    continue
+            except OSError:
+                pass
+            if not remote.download(digest, size, obj):
+                return None
+        entry = {"files": files, "used": time.time()}
+        with self._updating() as index:
+            index[key] = entry
+            self.shared_hits += 1
+            self._evict()
+        return entry
+
+    def _drop_miss(self, key: str) -> bool:
+        with self._updating() as index:
+            index.pop(key, None)
+            self.misses += 1
+        return False
+
+    def _place(self, obj: Path, dst: Path) -> None:
+        if self.link_mode != "copy":
+            try:
+                os.link(obj, dst)
+                return
+            except OSError:
+                pass  # cross-volume, FAT, no permission — copy instead
+        shutil.copyfile(obj, dst)
+
+    # -- eviction --------------------------------------------------------
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the unique object bytes
+        fit max_bytes, then delete objects no remaining entry references."""
+        index = self._load()
+        sizes: dict[str, int] = {}
+        for e in index.values():
+            for _, d, sz in e["files"]:
+                sizes[d] = sz
+        total = sum(sizes.values())
+        if total > self.max_bytes:
+            for k in sorted(index, key=lambda k: index[k].get("used", 0)):
+                if total <= self.max_bytes:
+                    break
+                index.pop(k)
+                self.evicted += 1
+                live = {d for e in index.values() for _, d, _ in e["files"]}
+                total = sum(sz for d, sz in sizes.items() if d in live)
+        live = {d for e in index.values() for _, d, _ in e["files"]}
+        for d in set(sizes) - live:
+            try:
+                self._object_path(d).unlink()
+            except OSError:
+                pass
+
+    # -- reporting -------------------------------------------------------
+    def summary(self) -> str:
+        looked = self.hits + self.misses
+        rate = f"{100.0 * self.hits / looked:.0f}%" if looked else "n/a"
+        with _LOCK:
+            index = self._load()
+            stored = sum({d: sz for e in index.values() for _, d, sz in e["files"]}.values())
+        s = (f"[cache] {self.hits} hit(s), {self.misses} miss(es) ({rate} hit rate); "
+             f"{len(index)} entries, {stored / (1024 * 1024):.1f} MB of {self.max_bytes / (1024 * 1024):.0f} MB")
+        if self.shared_hits:
+            s += f", {self.shared_hits} from the shared cache"
+        if self.evicted:
+            s += f", evicted {self.evicted}"
+        return s
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect, clear or share the injector artifact cache.")
+    ap.add_argument("command", choices=("stats", "clear", "push"),
+                    help="push: publish every local entry to the shared cache (MTMI_SHARED_CACHE)")
+    args = ap.parse_args(argv)
+    cache = ArtifactCache()
+    remote = shared_cache.shared()
+    if args.command == "clear":
+        shutil.rmtree(cache.root, ignore_errors=True)
+        print(f"cleared {cache.root}")
+        return 0
+    if args.command == "push":
+        if remote is None:
+            print("MTMI_SHARED_CACHE is not set", file=sys.stderr)
+            return 1
+        remote.push = True
+        index = cache._load()
+        for key, entry in sorted(index.items()):
+            remote.publish(key, entry["files"], cache._object_path)
+        print(remote.summary())
+        return 0 if remote.enabled else 1
+    print(cache.summary())
+    print(f"shared cache: {remote.backend.describe() if remote else 'off (MTMI_SHARED_CACHE unset)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
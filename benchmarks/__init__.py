@@ -0,0 +1,7 @@
+"""
+Synthetic-fixture benchmarks for the map pipeline.
+
+The real inputs — the extracted game, Jeju_World.json, the .usmap — can't
+be shipped, so fixtures.py generates Jeju-scale stand-ins and run.py times
+the pipeline's pure-Python passes against them. See run.py for usage.
+"""
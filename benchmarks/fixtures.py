@@ -0,0 +1,294 @@
+"""
+Generators for synthetic pipeline inputs.
+
+Everything here is deterministic for a given scale and seed, so two runs of
+the benchmarks time the same bytes:
+
+  level_asset()      UAssetAPI-shaped Jeju_World.json: NameMap, Imports,
+                     Exports, DependsMap, Generations, and a RawExport
+                     PersistentLevel whose Data carries an actor list that
+                     convert2.patch_level_binary can find and grow
+  scene()            static_meshes.json as ue.py writes it: N placements
+                     over M meshes, plus registry markers and DP markers
+  mods()             map_work_changes.json for convert2 (meshes + dealers)
+  cargo_catalog()    CargoImport/cargos/catalog.json rows
+  delivery_points()  delivery_points.json: new_cargos + DP entries whose
+                     recipes mix known and unknown cargos
+  clone_plan()       clone_bp_actors entries plus a find-cells result
+
+write_workdir() lays all of them out as a fake game + repo tree and
+env() returns the MTMI_* variables that point the pipeline at it.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import random
+import struct
+from pathlib import Path
+
+# Jeju_World.json as extracted is ~40k names, ~7k imports and ~25k exports;
+# "jeju" keeps the shape at a size a benchmark run can afford to repeat.
+SCALES: dict[str, dict[str, int]] = {
+    "small": dict(names=3000, imports=600, exports=1500, actors=600,
+                  placements=300, meshes=60, markers=20, dealers=4,
+                  delivery_points=4, cargos=60, bp_entries=150),
+    "jeju": dict(names=20000, imports=4000, exports=10000, actors=4000,
+                 placements=3000, meshes=600, markers=120, dealers=20,
+                 delivery_points=60, cargos=400, bp_entries=1500),
+}
+
+# Jeju's playable area, in UE units; placements are spread over it.
+WORLD_MIN, WORLD_MAX = -1_200_000.0, 1_200_000.0
+_CARGO_TYPES = ("SmallPackage", "Box", "Fuel", "Liquid", "Log", "Container", "Car", "Sand")
+_RAW = "UAssetAPI.ExportTypes.RawExport, UAssetAPI"
+_NORMAL = "UAssetAPI.ExportTypes.NormalExport, UAssetAPI"
+_IMPORT = "UAssetAPI.Import, UAssetAPI"
+# Registry keys the benchmark scenes place markers for (bp_registry built-ins).
+MARKER_KEYS = ("Garage",)
+
+
+def _mesh_path(i: int) -> str:
+    return f"/Game/Models/Bench/Set{i % 17:02d}/SM_Bench_{i:04d}"
+
+
+def _dp_key(i: int) -> str:
+    return f"BenchDP{i:02d}"
+
+
+def _cargo(i: int) -> str:
+    return f"BenchCargo{i:03d}"
+
+
+def _export(name: str, outer: int, cls: int, tpl: int) -> dict:
+    return {
+        "$type": _NORMAL, "Data": [], "ObjectGuid": None,
+        "ObjectName": name, "OuterIndex": outer, "ClassIndex": cls,
+        "SuperIndex": 0, "TemplateIndex": tpl, "ObjectFlags": "RF_Transactional",
+        "SerialSize": 64, "SerialOffset": 0, "bForcedExport": False,
+        "bNotForClient": False, "bNotForServer": False, "IsInheritedInstance": False,
+        "PackageFlags": "PKG_None", "bIsAsset": False,
+        "SerializationBeforeSerializationDependencies": [],
+        "CreateBeforeSerializationDependencies": [],
+        "SerializationBeforeCreateDependencies": [],
+        "CreateBeforeCreateDependencies": [],
+    }
+
+
+def level_data(actors: list[int], seed: int = 0) -> bytes:
+    """PersistentLevel body: header, int32 count + actor export indices, the
+    `<i 7>unreal\\0` URL marker patch_level_binary anchors on, then tail."""
+    rng = random.Random(seed)
+    head = bytes(rng.randrange(256) for _ in range(40))
+    body = struct.pack("<i", len(actors)) + b"".join(struct.pack("<i", a) for a in actors)
+    tail = bytes(rng.randrange(256) for _ in range(256))
+    return head + body + struct.pack("<i", 7) + b"unreal\x00" + tail
+
+
+def level_asset(names: int, imports: int, exports: int, actors: int, seed: int = 0) -> dict:
+    """Jeju_World.json stand-in. The actor list names the last `actors`
+    exports: indices larger than the list is long, so the backwards count
+    probe can't stop on an actor index by accident."""
+    if exports < 2 * actors + 2:
+        raise ValueError(f"need at least {2 * actors + 2} exports for {actors} actors")
+    rng = random.Random(seed)
+    name_map = ["None", "/Script/Engine", "/Script/CoreUObject", "Package", "Class",
+                "PersistentLevel", "Level", "StaticMeshActor", "StaticMeshComponent"]
+    name_map += [f"BenchName_{i:05d}" for i in range(names - len(name_map))]
+
+    imp = [
+        {"$type": _IMPORT, "ObjectName": "/Script/CoreUObject", "OuterIndex": 0,
+         "ClassPackage": "/Script/CoreUObject", "ClassName": "Package", "bImportOptional": False},
+    ]
+    while len(imp) < imports:
+        # A package import followed by a couple of objects inside it, the
+        # way cooked maps list their mesh/material dependencies.
+        pkg = f"/Game/Bench/Pkg_{len(imp):05d}"
+        imp.append({"$type": _IMPORT, "ObjectName": pkg, "OuterIndex": 0,
+                    "ClassPackage": "/Script/CoreUObject", "ClassName": "Package",
+                    "bImportOptional": False})
+        outer = -len(imp)
+        for k in range(min(2, imports - len(imp))):
+            imp.append({"$type": _IMPORT, "ObjectName": f"Obj_{len(imp):05d}", "OuterIndex": outer,
+                        "ClassPackage": "/Script/Engine", "ClassName": "StaticMesh",
+                        "bImportOptional": False})
+
+    level_num = exports // 4
+    actor_nums = list(range(exports - actors + 1, exports + 1))
+    exp = []
+    for i in range(1, exports + 1):
+        if i == level_num:
+            exp.append({
+                "$type": _RAW, "ObjectName": "PersistentLevel", "OuterIndex": 0,
+                "ClassIndex": -1, "SuperIndex": 0, "TemplateIndex": 0,
+                "ObjectFlags": "RF_Transactional", "SerialSize": 0, "SerialOffset": 0,
+                "Data": base64.b64encode(level_data(actor_nums, seed)).decode("ascii"),
+                "CreateBeforeSerializationDependencies": list(actor_nums),
+            })
+        elif i >= actor_nums[0]:
+            exp.append(_export(f"StaticMeshActor_{i}", level_num,
+                               -rng.randrange(1, imports + 1), -rng.randrange(1, imports + 1)))
+        else:
+            exp.append(_export(f"StaticMeshComponent_{i}", rng.randrange(1, exports + 1),
+                               -rng.randrange(1, imports + 1), 0))
+    return {
+        "Info": "synthetic benchmark fixture",
+        "NameMap": name_map,
+        "Imports": imp,
+        "Exports": exp,
+        "DependsMap": [[] for _ in exp],
+        "Generations": [{"ExportCount": len(exp), "NameCount": len(name_map)}],
+    }
+
+
+def _pose(rng: random.Random) -> dict:
+    return {
+        "X": rng.uniform(WORLD_MIN, WORLD_MAX), "Y": rng.uniform(WORLD_MIN, WORLD_MAX),
+        "Z": rng.uniform(-25000.0, 40000.0),
+        "Pitch": 0.0, "Roll": 0.0, "Yaw": rng.choice((0.0, 90.0, rng.uniform(-180.0, 180.0))),
+    }
+
+
+def scene(placements: int, meshes: int, markers: int, delivery_points: int, seed: int = 0) -> dict:
+    """static_meshes.json: `placements` mesh instances drawn from `meshes`
+    distinct meshes (a few engine assets and a sky sphere among them, as in
+    real exports), `markers` registry markers, one marker per DP."""
+    rng = random.Random(seed)
+    items = [{"asset_path": "/Engine/EngineSky/SM_SkySphere.SM_SkySphere", "asset_key": "SM_SkySphere",
+              **_pose(rng), "ScaleX": 800.0, "ScaleY": 800.0, "ScaleZ": 800.0}]
+    for _ in range(placements):
+        m = rng.randrange(meshes)
+        path = _mesh_path(m) if m % 50 else f"/Engine/BasicShapes/Shape_{m:04d}"
+        key = path.rsplit("/", 1)[-1]
+        s = rng.choice((1.0, 1.0, rng.uniform(0.5, 3.0)))
+        items.append({"asset_path": f"{path}.{key}", "asset_key": key, **_pose(rng),
+                      "ScaleX": s, "ScaleY": s, "ScaleZ": s})
+    for i in range(markers):
+        key = MARKER_KEYS[i % len(MARKER_KEYS)]
+        items.append({"asset_path": f"/Game/DC/Actors/{key}.{key}", "asset_key": key, **_pose(rng)})
+    for i in range(delivery_points):
+        key = f"DeliveryPoint_{_dp_key(i)}"
+        items.append({"asset_path": f"/Game/DC/Actors/{key}.{key}", "asset_key": key, **_pose(rng)})
+    rng.shuffle(items)
+    return {"static_meshes": {"actors": items}}
+
+
+def mods(placements: int, meshes: int, dealers: int, seed: int = 0) -> dict:
+    """map_work_changes.json as convert2 reads it: world-space mesh
+    placements and dealership spawn points."""
+    rng = random.Random(seed)
+    static = []
+    for _ in range(placements):
+        path = _mesh_path(rng.randrange(meshes))
+        key = path.rsplit("/", 1)[-1]
+        s = rng.choice((1.0, rng.uniform(0.5, 3.0)))
+        static.append({"asset_path": path, "asset_key": key, **_pose(rng),
+                       "ScaleX": s, "ScaleY": s, "ScaleZ": 1.0})
+    dealer = [{"vehicle_path": f"/Game/Cars/Models/Bench/Car_{i % 5}", "vehicle_key": f"Car_{i % 5}",
+               **_pose(rng)} for i in range(dealers)]
+    return {"dealerships": {"bench": dealer}, "static_meshes": {"bench": static}}
+
+
+def cargo_catalog(cargos: int) -> list[dict]:
+    return [{"Name": _cargo(i), "CargoType": _CARGO_TYPES[i % len(_CARGO_TYPES)],
+             "VolumeSize": 1.0, "BasePayment": 0, "PaymentPer1Km": 100.0 + i,
+             "ExportPrice": 10, "ImportPrice": 10, "bAllowStacking": i % 3 == 0,
+             "MinDeliveryDistance": "+0", "MaxDeliveryDistance": "+0", "bDepcreated": False}
+            for i in range(cargos)]
+
+
+def delivery_points(count: int, cargos: int, seed: int = 0) -> dict:
+    """delivery_points.json with `count` DPs. Every fifth recipe names a
+    cargo the catalog doesn't have, so validation has something to drop."""
+    rng = random.Random(seed)
+    cfg: dict = {"_doc": "synthetic benchmark fixture",
+                 "new_cargos": [{"copy_from": _cargo(0), "new_id": "BenchCargoX2",
+                                 "safety_dps": [], "PaymentPer1Km": 400}]}
+    for i in range(count):
+        recipes = []
+        for r in range(3):
+            inputs = {_cargo(rng.randrange(cargos)): rng.randint(1, 4) for _ in range(2)}
+            if (i * 3 + r) % 5 == 0:
+                inputs["NoSuchCargo"] = 1
+            recipes.append({"inputs": inputs, "outputs": {_cargo(rng.randrange(cargos)): 1},
+                            "input_types": [_CARGO_TYPES[r]], "time_seconds": 30.0})
+        cfg[_dp_key(i)] = {"label": f"Bench DP {i}", "recipes": recipes}
+    return cfg
+
+
+def clone_plan(entries: int, delivery_points: int, vanilla_share: float = 0.7,
+               seed: int = 0) -> dict:
+    """clone_bp_actors input: BP entries clustered around a few homes (so
+    created cells spiral out into neighbour tiles) plus DP entries, and
+    the per-entry find-cells answer — a vanilla cell or None."""
+    rng = random.Random(seed)
+    homes = [(rng.uniform(WORLD_MIN, WORLD_MAX), rng.uniform(WORLD_MIN, WORLD_MAX))
+             for _ in range(max(1, entries // 25))]
+    out, resolved = [], []
+    for i in range(entries):
+        hx, hy = rng.choice(homes)
+        out.append({"X": round(hx + rng.uniform(-20000, 20000), 2),
+                    "Y": round(hy + rng.uniform(-20000, 20000), 2),
+                    "Z": round(rng.uniform(-22000, 30000), 2),
+                    "Pitch": 0.0, "Roll": 0.0, "Yaw": rng.choice((0.0, 90.0, 180.0)),
+                    "blueprint_path": "/Game/Objects/GarageActorBP",
+                    "blueprint_class": "GarageActorBP_C", "asset_key": "Garage"})
+        resolved.append(f"BENCHCELL{rng.randrange(entries // 4 + 1):06d}"
+                        if rng.random() < vanilla_share else None)
+    for i in range(delivery_points):
+        out.append({**_pose(rng), "asset_key": f"DeliveryPoint_{_dp_key(i)}",
+                    "blueprint_class": "Farm_Corn_C"})
+        resolved.append(None if i % 2 else "BENCHCELL000000")
+    return {"entries": out, "resolved_cells": resolved}
+
+
+def _dump(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+
+
+def write_workdir(root: Path, scale: dict[str, int], seed: int = 0) -> dict[str, Path]:
+    """Lay out every fixture under `root`: a fake game install (mesh
+    .uassets present so nothing is copied, an empty WP cell dir), the
+    CargoImport catalog, and the JSON inputs. Returns the notable paths."""
+    content = root / "game" / "MotorTown" / "Content"
+    cells = content / "Maps" / "Jeju" / "Jeju_World" / "_Generated_"
+    cells.mkdir(parents=True, exist_ok=True)
+    for i in range(scale["meshes"]):
+        f = content / (_mesh_path(i)[len("/Game/"):] + ".uasset")
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_bytes(b"")
+    (root / "game" / "Mappings.usmap").write_bytes(b"")
+    (root / "paks").mkdir(exist_ok=True)
+    (root / "cache").mkdir(exist_ok=True)
+
+    paths = {
+        "content": content,
+        "asset": root / "Jeju_World.json",
+        "mods": root / "mods.json",
+        "scene": root / "static_meshes.json",
+        "delivery_points": root / "delivery_points.json",
+        "clone_plan": root / "clone_plan.json",
+    }
+    _dump(root / "CargoImport" / "cargos" / "catalog.json", cargo_catalog(scale["cargos"]))
+    _dump(paths["delivery_points"], delivery_points(scale["delivery_points"], scale["cargos"], seed))
+    _dump(paths["scene"], scene(scale["placements"], scale["meshes"], scale["markers"],
+                                scale["delivery_points"], seed))
+    _dump(paths["mods"], mods(scale["placements"], scale["meshes"], scale["dealers"], seed))
+    _dump(paths["clone_plan"], clone_plan(scale["bp_entries"], scale["delivery_points"], seed=seed))
+    paths["asset"].write_text(json.dumps(level_asset(scale["names"], scale["imports"],
+                                                     scale["exports"], scale["actors"], seed)),
+                              encoding="utf-8")
+    return paths
+
+
+def env(root: Path) -> dict[str, str]:
+    """MTMI_* variables pointing the pipeline at a write_workdir() tree."""
+    return {
+        "MTMI_GAME_CONTENT": str(root / "game" / "MotorTown" / "Content"),
+        "MTMI_MAPPINGS": str(root / "game" / "Mappings.usmap"),
+        "MTMI_MAPPINGS_TAG": "bench",
+        "MTMI_GAME_PAKDIR": str(root / "paks"),
+        "MTMI_CACHE_DIR": str(root / "cache"),
+    }
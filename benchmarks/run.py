@@ -0,0 +1,325 @@
+"""
+Timed, repeatable benchmarks of the pipeline's Python passes.
+
+    python benchmarks/run.py                       # every benchmark, jeju scale
+    python benchmarks/run.py --scale small --repeat 3
+    python benchmarks/run.py --only convert2 --only clone-plan
+    python benchmarks/run.py --save-baseline       # accept these numbers
+
+Fixtures (see fixtures.py) are generated once into a temp dir laid out as
+a fake game install, and every run of every benchmark happens in a fresh
+interpreter pointed at it through the MTMI_* variables, so module import,
+the compiled registry and the OS file cache behave the way they do in a
+real pipeline step. Only the benchmark's own region is timed; one warm-up
+run per benchmark is discarded.
+
+  bp-registry-compile   import bp_registry + first REGISTRY access, with
+                        registry.json and the cargo index removed, 40
+                        fresh imports back to back
+  bp-registry-load      the same with both already compiled
+  import-meshes         import_meshes.main() on the synthetic scene, cold:
+                        map_work_changes.json emptied first, so the whole
+                        scene goes into a new placement store and out again
+  import-meshes-warm    the same with the store already imported and one
+                        placement of the scene moved (the common re-import)
+  convert2              convert2.main() on the synthetic Jeju_World.json
+  clone-plan            clone_bp_actors.plan_cells() + build_cell_specs()
+                        (the planning pass between find-cells and the
+                        register-and-clone injector call)
+
+Results go to .mtmi_cache/bench/last.json (or --out). Each benchmark's
+best run is also expressed in "units": its seconds divided by the best
+run of a fixed pure-Python calibration workload, timed the same way and
+interleaved with the benchmark's runs. Units are what get
+compared with benchmarks/baseline.json, so a baseline taken on one machine
+is still meaningful on another, and the best of --repeat runs keeps a busy
+machine from producing false alarms. A benchmark more than --tolerance
+percent (default 25) and more than --floor-ms (default 10) slower than its
+baseline is flagged and the exit status is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks import fixtures  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+_FORMAT = 1
+
+
+# ----------------------------------------------------------------------
+# Benchmarks. Each runs in its own interpreter with cwd = the fixture
+# dir, does its setup untimed and returns the seconds of the timed region.
+# ----------------------------------------------------------------------
+def _point_registry(work: Path):
+    """bp_registry reads delivery_points.json from next to itself; point it
+    at the fixture's before the registry is first touched."""
+    import bp_registry
+    bp_registry._DP_PATH = work / "delivery_points.json"
+    return bp_registry
+
+
+# A single bp_registry import is a few milliseconds once its dependencies
+# are loaded, well inside the noise a 10ms floor has to absorb, so the
+# registry benchmarks time this many fresh imports back to back.
+_REGISTRY_IMPORTS = 40
+
+
+def _time_registry_imports(work: Path, artifacts: tuple[Path, ...]) -> float:
+    len(_point_registry(work).REGISTRY)     # dependencies imported, untimed
+    total = 0.0
+    for _ in range(_REGISTRY_IMPORTS):
+        for p in artifacts:
+            p.unlink(missing_ok=True)
+        for mod in ("bp_registry", "cargo_index"):
+            sys.modules.pop(mod, None)
+        t0 = time.perf_counter()
+        bp_registry = _point_registry(work)
+        len(bp_registry.REGISTRY)
+        total += time.perf_counter() - t0
+    return total
+
+
+def _bench_registry_compile(work: Path) -> float:
+    return _time_registry_imports(work, (work / "cache" / "registry.json", work / "CargoImport" / "index.json"))
+
+
+def _bench_registry_load(work: Path) -> float:
+    return _time_registry_imports(work, ())
+
+
+def _import_meshes(work: Path):
+    len(_point_registry(work).REGISTRY)
+    import import_meshes
+    # main() reads its inputs and writes map_work_changes.json next to the
+    # script; make that the fixture dir.
+    import_meshes.__file__ = str(work / "import_meshes.py")
+    return import_meshes
+
+
+def _bench_import_meshes(work: Path) -> float:
+    import_meshes = _import_meshes(work)
+    (work / "map_work_changes.json").write_text("{}", encoding="utf-8")
+    t0 = time.perf_counter()
+    import_meshes.main()
+    return time.perf_counter() - t0
+
+
+def _bench_import_meshes_warm(work: Path) -> float:
+    import_meshes = _import_meshes(work)
+    import_meshes.main()                 # store in line with the scene
+    scene_path = work / "static_meshes.json"
+    original = scene_path.read_text(encoding="utf-8")
+    scene = json.loads(original)
+    group = next(g for g in scene["static_meshes"].values() if g)
+    group[0]["X"] = float(group[0].get("X", 0)) + 100.0
+    scene_path.write_text(json.dumps(scene), encoding="utf-8")
+    try:
+        t0 = time.perf_counter()
+        import_meshes.main()
+        return time.perf_counter() - t0
+    finally:
+        scene_path.write_text(original, encoding="utf-8")
+
+
+def _bench_convert2(work: Path) -> float:
+    import convert2
+    sys.argv = ["convert2.py", str(work / "Jeju_World.json"), str(work / "mods.json"),
+                str(work / "Jeju_WorldMOD.json")]
+    t0 = time.perf_counter()
+    convert2.main()
+    return time.perf_counter() - t0
+
+
+def _bench_clone_plan(work: Path) -> float:
+    len(_point_registry(work).REGISTRY)
+    import clone_bp_actors
+    import mt_paths
+    mt_paths.resolve()
+    clone_bp_actors.template_cell()      # builds the (empty) cell catalog
+    data = json.loads((work / "clone_plan.json").read_text(encoding="utf-8"))
+    t0 = time.perf_counter()
+    plan = clone_bp_actors.plan_cells(data["entries"], data["resolved_cells"], work / "gen")
+    clone_bp_actors.build_cell_specs(plan["grouped"])
+    return time.perf_counter() - t0
+
+
+def _calibrate(work: Path) -> float:
+    """Fixed pure-Python workload (dicts, JSON, hashing, sorting) — the mix
+    the benchmarks above spend their time in."""
+    t0 = time.perf_counter()
+    rows = [{"name": f"row_{i}", "x": i * 1.5, "tags": [i % 7, i % 11]} for i in range(60000)]
+    text = json.dumps(rows)
+    back = json.loads(text)
+    hashlib.sha1(text.encode()).hexdigest()
+    sorted(back, key=lambda r: (r["tags"][1], -r["x"]))
+    names: list[str] = []
+    for i in range(3000):
+        if f"n{i % 1500}" not in names:
+            names.append(f"n{i % 1500}")
+    return time.perf_counter() - t0
+
+
+BENCHMARKS = {
+    "bp-registry-compile": _bench_registry_compile,
+    "bp-registry-load": _bench_registry_load,
+    "import-meshes": _bench_import_meshes,
+    "import-meshes-warm": _bench_import_meshes_warm,
+    "convert2": _bench_convert2,
+    "clone-plan": _bench_clone_plan,
+}
+
+
+def _child(name: str, work: Path) -> int:
+    fn = _calibrate if name == "calibrate" else BENCHMARKS[name]
+    real_out = sys.stdout
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), \
+            contextlib.redirect_stderr(null):
+        secs = fn(work)
+    real_out.write(json.dumps({"seconds": secs}) + "\n")
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+def _spawn(name: str, work: Path) -> float:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("MTMI_")}
+    env.update(fixtures.env(work))
+    r = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--child", name,
+                        "--work", str(work)],
+                       cwd=work, env=env, capture_output=True, text=True)
+    lines = r.stdout.strip().splitlines()
+    if r.returncode != 0 or not lines:
+        raise RuntimeError(f"{name} failed (exit {r.returncode}):\n{r.stderr.strip()}")
+    return json.loads(lines[-1])["seconds"]
+
+
+def _measure(name: str, work: Path, repeat: int) -> tuple[list[float], float]:
+    """(timed runs, best calibration run). Calibration runs are interleaved
+    with the benchmark's so a burst of load on the machine skews both."""
+    _spawn(name, work)                      # warm-up: caches, page cache
+    runs, calib = [], []
+    for _ in range(repeat):
+        calib.append(_spawn("calibrate", work))
+        runs.append(_spawn(name, work))
+    return runs, min(calib)
+
+
+def _load_baseline(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("scales", {}) if data.get("format") == _FORMAT else {}
+
+
+def _save_baseline(path: Path, scale: str, run: dict) -> None:
+    """Merge this run's results into the scale's baseline: benchmarks left
+    out with --only keep their numbers."""
+    scales = _load_baseline(path)
+    results = scales.get(scale, {}).get("results", {})
+    results.update({k: {"min": v["min"], "calibration": v["calibration"], "units": v["units"]}
+                    for k, v in run["results"].items()})
+    scales[scale] = {"python": run["python"], "results": results}
+    path.write_text(json.dumps({"format": _FORMAT, "scales": scales}, indent=1, sort_keys=True) + "\n",
+                    encoding="utf-8")
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic Jeju-scale fixtures.")
+    ap.add_argument("--scale", choices=sorted(fixtures.SCALES), default="jeju")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (default 5)")
+    ap.add_argument("--only", action="append", choices=sorted(BENCHMARKS), metavar="NAME",
+                    help=f"run just this benchmark (repeatable): {', '.join(BENCHMARKS)}")
+    ap.add_argument("--tolerance", type=float, default=25.0,
+                    help="flag benchmarks this many percent slower than baseline (default 25)")
+    ap.add_argument("--floor-ms", type=float, default=10.0,
+                    help="...and at least this much slower in absolute terms (default 10)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true",
+                    help="write this run's numbers into --baseline for its scale")
+    ap.add_argument("--out", type=Path, help="results JSON (default .mtmi_cache/bench/last.json)")
+    ap.add_argument("--keep", action="store_true", help="keep the fixture dir and print its path")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--work", type=Path, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        return _child(args.child, args.work)
+
+    names = args.only or list(BENCHMARKS)
+    work = Path(tempfile.mkdtemp(prefix="mtmi_bench_"))
+    try:
+        t0 = time.perf_counter()
+        fixtures.write_workdir(work, fixtures.SCALES[args.scale])
+        print(f"[bench] {args.scale} fixtures in {time.perf_counter() - t0:.1f}s ({work})")
+        _spawn("calibrate", work)
+        results = {}
+        for name in names:
+            runs, calib = _measure(name, work, max(1, args.repeat))
+            results[name] = {"runs": runs, "min": min(runs), "median": statistics.median(runs),
+                             "calibration": calib, "units": min(runs) / calib}
+    except RuntimeError as e:
+        print(f"[bench] {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.keep:
+            print(f"[bench] fixtures kept in {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    run = {"format": _FORMAT, "scale": args.scale, "repeat": args.repeat,
+           "python": platform.python_version(), "platform": platform.platform(),
+           "results": results}
+    from artifact_cache import CACHE_ROOT
+    out = args.out or CACHE_ROOT / "bench" / "last.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(run, indent=1) + "\n", encoding="utf-8")
+
+    base = _load_baseline(args.baseline).get(args.scale, {}).get("results", {})
+    regressed = []
+    print(f"  {'benchmark':<22}{'min':>9}{'median':>9}{'units':>9}{'baseline':>10}{'change':>8}")
+    for name, r in results.items():
+        b = base.get(name)
+        change = ""
+        if b:
+            pct = 100 * (r["units"] / b["units"] - 1)
+            delta_ms = 1000 * (r["units"] - b["units"]) * r["calibration"]
+            change = f"{pct:+.0f}%"
+            if pct > args.tolerance and delta_ms > args.floor_ms:
+                regressed.append(name)
+                change += "  REGRESSED"
+        base_units = f"{b['units']:10.3f}" if b else f"{'-':>10}"
+        print(f"  {name:<22}{r['min']:8.3f}s{r['median']:8.3f}s{r['units']:9.3f}{base_units} {change}")
+    print(f"  results in {out}")
+
+    if args.save_baseline:
+        _save_baseline(args.baseline, args.scale, run)
+        print(f"[bench] baseline for {args.scale} written to {args.baseline}")
+        return 0
+    if regressed:
+        print(f"[bench] slower than baseline by more than {args.tolerance:g}%: {', '.join(regressed)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -8,7 +8,8 @@ the pipeline replaces each marker with the real BP actor at runtime by
 cloning from a vanilla in-game instance.
 
 Adding a new BP actor type:
-  1. Find a vanilla instance in Jeju (inspect-by-class / cells).
+  1. Find a vanilla instance in Jeju: `python cell_catalog.py find-class
+     SomeBp_C` lists cells + actor names (or inspect-by-class for the main map).
   2. Add an entry below:
         "MyAssetKey": {
             "bp_path":      "/Game/.../SomeBp",
@@ -26,74 +27,78 @@ Adding a new BP actor type:
 from __future__ import annotations
 from pathlib import Path
 
-from mt_paths import GAME_CONTENT, CELLS_DIR, JEJU_MAIN
-
-
-# asset_key -> template definition
-REGISTRY: dict[str, dict] = {
-    "Garage": {
-        "bp_path":      "/Game/Objects/GarageActorBP",
-        "bp_class":     "GarageActorBP_C",
-        "source_umap":  JEJU_MAIN,
-        "source_actor": "GarageActor2",
-        "preload_bp":   None,
-    },
-    # Lightweight refuel actor — pump + nozzle interaction only. Final-boss
-    # GasStation_C (delivery-point variant) pulls in mission/ownership state
-    # too heavy for a cloned cell; FuelPump_01A_C gives the same fueling
-    # UX without the transitive footprint.
-    # Container Export/Import endpoint — supports BOTH cargo pickup AND
-    # drop, unlike the drop-only ComonDrop. Cloned straight into the main
-    # map's persistent level so it gets the same load context as the four
-    # vanilla ContainerDropper instances already in Jeju.
-    "DeliveryPoint": {
-        "bp_path":          "/Game/Objects/Mission/Delivery/DeliveryPoint/Container_ExportImport",
-        "bp_class":         "Container_ExportImport_C",
-        "source_umap":      JEJU_MAIN,
-        "source_actor":     "ContainerDropper",
-        "preload_bp":       GAME_CONTENT / "Objects/Mission/Delivery/DeliveryPoint/Container_ExportImport.uasset",
-        "inject_into_main": True,
-    },
-    # Standalone farm endpoint — fully self-contained pickup + drop, no
-    # InputInventoryShare chaining to siblings (unlike Factory_*). Each
-    # placed instance is its own production loop.
-    "FarmCorn": {
-        "bp_path":          "/Game/Objects/Mission/Delivery/DeliveryPoint/Farm_Corn",
-        "bp_class":         "Farm_Corn_C",
-        "source_umap":      JEJU_MAIN,
-        "source_actor":     "CornFarm_2",
-        "preload_bp":       GAME_CONTENT / "Objects/Mission/Delivery/DeliveryPoint/Farm_Corn.uasset",
-        "inject_into_main": True,
-    },
-    # Diagnostic: clone of Farm_Corn with a per-instance ProductionConfigs
-    # override — accepts 50t transformers as input, 5x speed. If MT honors
-    # instance overrides for this property we can author custom recipes
-    # without touching the BP class.
-    "GasStation": {
-        "bp_path":      "/Game/Objects/Fuel/FuelPump_01A",
-        "bp_class":     "FuelPump_01A_C",
-        "source_umap":  JEJU_MAIN,
-        "source_actor": "FuelPump2",
-        "preload_bp":   GAME_CONTENT / "Objects/Fuel/FuelPump_01A.uasset",
-    },
-    "ParkingLarge": {
-        "bp_path":      "/Game/Objects/ParkingSpace/ParkingSpace_Large_01",
-        "bp_class":     "ParkingSpace_Large_01_C",
-        "source_umap":  CELLS_DIR / "0MYO9WO9JBZ10BIDLXVFRXAOG.umap",
-        "source_actor": "ParkingSpace_Large_01_UAID_2CF05D790A1CFFDB01_1915517403",
-        "preload_bp":   GAME_CONTENT / "Objects/ParkingSpace/Interaction_ParkingSpace_Large.uasset",
-    },
-    "ParkingSmall": {
-        # Use the direct Interaction BP (not the ChildActorComponent-wrapper
-        # ParkingSpace_Small_02_C). Same structural shape as ParkingLarge
-        # which already works — no inner-ChildActor refs to remap.
-        "bp_path":      "/Game/Objects/ParkingSpace/Interaction_ParkingSpace_Small",
-        "bp_class":     "Interaction_ParkingSpace_Small_C",
-        "source_umap":  CELLS_DIR / "0Y7AAM17BE5AI5AAH9BGUE9CG.umap",
-        "source_actor": "Interaction_ParkingSpace_Small_C_UAID_345A60416115A7A802_1236712312",
-        "preload_bp":   GAME_CONTENT / "Objects/ParkingSpace/Interaction_ParkingSpace_Small.uasset",
-    },
-}
+import mt_paths
+
+
+# asset_key -> template definition. Built-in entries; REGISTRY (below) is
+# these plus everything expanded from delivery_points.json. Built on
+# demand so the mt_paths roots are only resolved when the registry is.
+def _builtin() -> dict[str, dict]:
+    GAME_CONTENT, CELLS_DIR, JEJU_MAIN = mt_paths.GAME_CONTENT, mt_paths.CELLS_DIR, mt_paths.JEJU_MAIN
+    return {
+        "Garage": {
+            "bp_path":      "/Game/Objects/GarageActorBP",
+            "bp_class":     "GarageActorBP_C",
+            "source_umap":  JEJU_MAIN,
+            "source_actor": "GarageActor2",
+            "preload_bp":   None,
+        },
+        # Lightweight refuel actor — pump + nozzle interaction only. Final-boss
+        # GasStation_C (delivery-point variant) pulls in mission/ownership state
+        # too heavy for a cloned cell; FuelPump_01A_C gives the same fueling
+        # UX without the transitive footprint.
+        # Container Export/Import endpoint — supports BOTH cargo pickup AND
+        # drop, unlike the drop-only ComonDrop. Cloned straight into the main
+        # map's persistent level so it gets the same load context as the four
+        # vanilla ContainerDropper instances already in Jeju.
+        "DeliveryPoint": {
+            "bp_path":          "/Game/Objects/Mission/Delivery/DeliveryPoint/Container_ExportImport",
+            "bp_class":         "Container_ExportImport_C",
+            "source_umap":      JEJU_MAIN,
+            "source_actor":     "ContainerDropper",
+            "preload_bp":       GAME_CONTENT / "Objects/Mission/Delivery/DeliveryPoint/Container_ExportImport.uasset",
+            "inject_into_main": True,
+        },
+        # Standalone farm endpoint — fully self-contained pickup + drop, no
+        # InputInventoryShare chaining to siblings (unlike Factory_*). Each
+        # placed instance is its own production loop.
+        "FarmCorn": {
+            "bp_path":          "/Game/Objects/Mission/Delivery/DeliveryPoint/Farm_Corn",
+            "bp_class":         "Farm_Corn_C",
+            "source_umap":      JEJU_MAIN,
+            "source_actor":     "CornFarm_2",
+            "preload_bp":       GAME_CONTENT / "Objects/Mission/Delivery/DeliveryPoint/Farm_Corn.uasset",
+            "inject_into_main": True,
+        },
+        # Diagnostic: clone of Farm_Corn with a per-instance ProductionConfigs
+        # override — accepts 50t transformers as input, 5x speed. If MT honors
+        # instance overrides for this property we can author custom recipes
+        # without touching the BP class.
+        "GasStation": {
+            "bp_path":      "/Game/Objects/Fuel/FuelPump_01A",
+            "bp_class":     "FuelPump_01A_C",
+            "source_umap":  JEJU_MAIN,
+            "source_actor": "FuelPump2",
+            "preload_bp":   GAME_CONTENT / "Objects/Fuel/FuelPump_01A.uasset",
+        },
+        "ParkingLarge": {
+            "bp_path":      "/Game/Objects/ParkingSpace/ParkingSpace_Large_01",
+            "bp_class":     "ParkingSpace_Large_01_C",
+            "source_umap":  CELLS_DIR / "0MYO9WO9JBZ10BIDLXVFRXAOG.umap",
+            "source_actor": "ParkingSpace_Large_01_UAID_2CF05D790A1CFFDB01_1915517403",
+            "preload_bp":   GAME_CONTENT / "Objects/ParkingSpace/Interaction_ParkingSpace_Large.uasset",
+        },
+        "ParkingSmall": {
+            # Use the direct Interaction BP (not the ChildActorComponent-wrapper
+            # ParkingSpace_Small_02_C). Same structural shape as ParkingLarge
+            # which already works — no inner-ChildActor refs to remap.
+            "bp_path":      "/Game/Objects/ParkingSpace/Interaction_ParkingSpace_Small",
+            "bp_class":     "Interaction_ParkingSpace_Small_C",
+            "source_umap":  CELLS_DIR / "0Y7AAM17BE5AI5AAH9BGUE9CG.umap",
+            "source_actor": "Interaction_ParkingSpace_Small_C_UAID_345A60416115A7A802_1236712312",
+            "preload_bp":   GAME_CONTENT / "Objects/ParkingSpace/Interaction_ParkingSpace_Small.uasset",
+        },
+    }
 
 
 # ----------------------------------------------------------------------
@@ -101,15 +106,23 @@ REGISTRY: dict[str, dict] = {
 #
 # Scene placeholders named `Delivery_<NAME>` map to the entry under
 # `<NAME>` in delivery_points.json. Each entry is converted into a
-# normal REGISTRY entry under the key `Delivery_<NAME>` at import time
+# normal REGISTRY entry under the key `Delivery_<NAME>` on first access
 # so the rest of the pipeline picks it up unchanged. Missing entries
 # are logged and skipped (the placeholder is treated as an unknown).
 # ----------------------------------------------------------------------
+import contextlib as _contextlib
 import hashlib as _hashlib
+import io as _io
 import json as _json
+import os as _os
 import sys as _sys
+import threading as _threading
+from collections.abc import Mapping as _Mapping
 from pathlib import Path as _Path
 
+from artifact_cache import CACHE_ROOT as _CACHE_ROOT, digest_parts as _digest_parts, file_digest as _file_digest
+import cargo_index as _cargo_index
+
 _DP_PATH = _Path(__file__).with_name("delivery_points.json")
 _DP_BP_FOLDER = "Objects/Mission/Delivery/DeliveryPoint"
 
@@ -132,22 +145,16 @@ _TEMPLATES: dict[str, tuple[str, str]] = {
 _DEFAULT_TEMPLATE = "farm"
 _DEFAULT_SOURCE_CLASS, _DEFAULT_SOURCE_ACTOR = _TEMPLATES[_DEFAULT_TEMPLATE]
 
-# Cargo / cargo-type allowlists pulled from CargoImport so we can validate
-# recipe entries at registry-load time and surface bad data with a clear
-# log line instead of a silent in-game no-op.
-_CARGO_NAMES_PATH = _Path("CargoImport/cargos/cargo_names.txt")
-_CARGO_TYPES_PATH = _Path("CargoImport/cargos/types.txt")
-
-def _load_set(path: _Path) -> set[str]:
-    if not path.exists(): return set()
-    return {line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()}
-
-_VALID_CARGO_NAMES = _load_set(_CARGO_NAMES_PATH)
-_VALID_CARGO_TYPES = _load_set(_CARGO_TYPES_PATH)
+# Cargo / cargo-type allowlists pulled from the CargoImport index
+# (cargo_index.py) so we can validate recipe entries at registry-load time
+# and surface bad data with a clear log line instead of a silent in-game
+# no-op. Loaded by _compile() — only when the compiled registry is stale.
+_VALID_CARGO_NAMES: set[str] = set()
+_VALID_CARGO_TYPES: set[str] = set()
 
 # delivery_points.json `new_cargos` adds rows to Cargos_01.uasset; their
-# new_id values must be accepted by recipe validation. Populated lazily
-# at module-load time after the JSON is parsed (see _load_delivery_points).
+# new_id values must be accepted by recipe validation. Populated after
+# the JSON is parsed (see _load_delivery_points).
 _NEW_CARGO_IDS: set[str] = set()
 
 
@@ -190,7 +197,7 @@ def _expand_dp_entry(key: str, cfg: dict) -> dict | None:
     src_class = cfg.get("source_class", tpl_src_class)
     src_actor = cfg.get("source_actor", tpl_src_actor)
     src_short = src_class[:-2] if src_class.endswith("_C") else src_class
-    src_uasset = GAME_CONTENT / _DP_BP_FOLDER / (src_short + ".uasset")
+    src_uasset = mt_paths.GAME_CONTENT / _DP_BP_FOLDER / (src_short + ".uasset")
     tgt_class, tgt_path = _derive_target_class(key, src_class)
     tgt_short = tgt_class[:-2]
     mod_uasset = (_Path("MapChangeTest_P/MotorTown/Content") /
@@ -198,7 +205,7 @@ def _expand_dp_entry(key: str, cfg: dict) -> dict | None:
     entry = {
         "bp_path":          f"/Game/{_DP_BP_FOLDER}/{src_short}",
         "bp_class":         src_class,
-        "source_umap":      JEJU_MAIN,
+        "source_umap":      mt_paths.JEJU_MAIN,
         "source_actor":     src_actor,
         "preload_bp":       [src_uasset, mod_uasset],
         "inject_into_main": True,
@@ -252,7 +259,28 @@ def _validate_recipes(key: str, recipes: list) -> list:
     return cleaned
 
 
-def _load_delivery_points():
+def _check_safety_dps(nc: dict) -> None:
+    """Warn about a new_cargos entry whose safety_dps can't work — empty,
+    an unknown vanilla class, or a DP with no `inputs` recipe to extend —
+    and suggest consumers of its copy_from cargo from the index."""
+    idx = _cargo_index.load_index()
+    if not idx:
+        return
+    new_id = nc["new_id"]
+    listed = nc.get("safety_dps") or []
+    for cls in listed:
+        if idx.dp_example(cls) is None:
+            print(f"  [new_cargos] {new_id}: safety_dps '{cls}' is not a vanilla DP class", file=_sys.stderr)
+        elif not idx.has_inputs_recipe(cls):
+            print(f"  [new_cargos] {new_id}: safety_dps '{cls}' has no inputs recipe to attach to", file=_sys.stderr)
+    if not any(idx.has_inputs_recipe(c) for c in listed):
+        hint = idx.suggest_safety_dps(nc.get("copy_from") or "")
+        print(f"  [new_cargos] {new_id}: no usable safety_dps — MT crashes on world load "
+              f"without a vanilla consumer" + (f"; consumers of {nc.get('copy_from')}: {hint}" if hint else ""),
+              file=_sys.stderr)
+
+
+def _load_delivery_points(registry: dict[str, dict]) -> None:
     if not _DP_PATH.exists(): return
     try:
         cfg = _json.loads(_DP_PATH.read_text(encoding="utf-8"))
@@ -263,16 +291,162 @@ def _load_delivery_points():
     for nc in cfg.get("new_cargos") or []:
         if isinstance(nc, dict) and nc.get("new_id"):
             _NEW_CARGO_IDS.add(nc["new_id"])
+            _check_safety_dps(nc)
     for name, dp in cfg.items():
         if name.startswith("_"): continue   # skip _doc, _comment etc.
         # Top-level non-DP keys (new_cargos list, etc.) are consumed by
         # clone_bp_actors directly. Only dict values map to DP entries.
         if not isinstance(dp, dict): continue
         # Scene placeholder convention: DeliveryPoint_<key>
-        REGISTRY[f"DeliveryPoint_{name}"] = _expand_dp_entry(name, dp)
+        registry[f"DeliveryPoint_{name}"] = _expand_dp_entry(name, dp)
+
+
+# ----------------------------------------------------------------------
+# Compiled registry.
+#
+# Expanding delivery_points.json (validation against the cargo allowlists,
+# one sha1 per DP for its target class) used to run at import time in
+# every process that imports this module, and template_for_class was a
+# linear scan. The expanded registry is now compiled once into
+# .mtmi_cache/registry.json, keyed on the digests of everything that
+# shapes it — delivery_points.json, the CargoImport sources, this file, and
+# the mt_paths roots baked into entries — together with the lookup
+# indexes. REGISTRY loads it on first access; a stale or missing artifact
+# is recompiled and rewritten. Validation warnings are stored alongside
+# and replayed on every load so a bad recipe is still reported each run.
+# MTMI_CACHE=0 always recompiles.
+# ----------------------------------------------------------------------
+_COMPILED_PATH = _CACHE_ROOT / "registry.json"
+_COMPILED_FORMAT = 1
+
+
+def _inputs_key() -> str:
+    return _digest_parts(
+        "bp_registry", _COMPILED_FORMAT, _file_digest(__file__),
+        _file_digest(_DP_PATH), _cargo_index.sources_key(),
+        str(mt_paths.GAME_CONTENT), str(mt_paths.CELLS_DIR), str(mt_paths.JEJU_MAIN))
+
+
+def _encode(v):
+    if isinstance(v, _Path):
+        return {"$path": str(v)}
+    if isinstance(v, (list, tuple)):
+        return [_encode(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _encode(x) for k, x in v.items()}
+    return v
+
+
+def _decode(v):
+    if isinstance(v, dict):
+        if len(v) == 1 and "$path" in v:
+            return _Path(v["$path"])
+        return {k: _decode(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_decode(x) for x in v]
+    return v
 
 
-_load_delivery_points()
+def _build_indexes(registry: dict[str, dict]) -> dict[str, dict[str, str]]:
+    """bp_class -> FIRST key with that class (several entries can share one,
+    e.g. FarmCorn and every JSON delivery point are Farm_Corn_C — insertion
+    order keeps the built-ins first, as the old linear scan did), plus
+    target_bp_class -> key for mod-shipped classes."""
+    by_class: dict[str, str] = {}
+    by_target: dict[str, str] = {}
+    for key, entry in registry.items():
+        by_class.setdefault(entry["bp_class"], key)
+        if entry.get("target_bp_class"):
+            by_target.setdefault(entry["target_bp_class"], key)
+    return {"bp_class": by_class, "target_class": by_target}
+
+
+def _compile() -> tuple[dict[str, dict], list[str]]:
+    """Expand built-ins + delivery_points.json into a fresh registry.
+    Returns it with the warning lines validation printed."""
+    global _VALID_CARGO_NAMES, _VALID_CARGO_TYPES
+    idx = _cargo_index.load_index()
+    _VALID_CARGO_NAMES = idx.cargo_names()
+    _VALID_CARGO_TYPES = idx.cargo_types()
+    _NEW_CARGO_IDS.clear()
+    registry = _builtin()
+    buf = _io.StringIO()
+    with _contextlib.redirect_stderr(buf):
+        _load_delivery_points(registry)
+    return registry, buf.getvalue().splitlines()
+
+
+def _load_compiled() -> dict:
+    key = _inputs_key()
+    use_cache = _os.environ.get("MTMI_CACHE", "1") != "0"
+    if use_cache:
+        try:
+            data = _json.loads(_COMPILED_PATH.read_text(encoding="utf-8"))
+            if data.get("key") == key:
+                for line in data["warnings"]:
+                    print(line, file=_sys.stderr)
+                return {"registry": _decode(data["registry"]), "index": data["index"]}
+        except (OSError, ValueError, KeyError):
+            pass
+    registry, warnings = _compile()
+    for line in warnings:
+        print(line, file=_sys.stderr)
+    index = _build_indexes(registry)
+    if use_cache:
+        try:
+            _COMPILED_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _COMPILED_PATH.with_name(f"{_COMPILED_PATH.name}.{_os.getpid()}.tmp")
+            tmp.write_text(_json.dumps({"key": key, "warnings": warnings,
+                                        "registry": _encode(registry), "index": index}),
+                           encoding="utf-8")
+            _os.replace(tmp, _COMPILED_PATH)
+        except OSError as e:
+            print(f"  [bp_registry] could not write {_COMPILED_PATH}: {e}", file=_sys.stderr)
+    return {"registry": registry, "index": index}
+
+
+_compiled: dict | None = None
+_compiled_lock = _threading.Lock()
+
+
+def _get() -> dict:
+    global _compiled
+    if _compiled is None:
+        with _compiled_lock:
+            if _compiled is None:
+                _compiled = _load_compiled()
+    return _compiled
+
+
+def invalidate() -> None:
+    """Forget the loaded registry. The next access re-checks
+    registry.json against its inputs, recompiling if delivery_points.json
+    changed — for long-lived processes like watch.py."""
+    global _compiled
+    with _compiled_lock:
+        _compiled = None
+
+
+class _LazyRegistry(_Mapping):
+    """Read-only asset_key -> entry mapping, loaded on first access."""
+
+    def __getitem__(self, key: str) -> dict:
+        return _get()["registry"][key]
+
+    def __iter__(self):
+        return iter(_get()["registry"])
+
+    def __len__(self) -> int:
+        return len(_get()["registry"])
+
+    def __contains__(self, key) -> bool:
+        return key in _get()["registry"]
+
+    def __repr__(self) -> str:
+        return f"REGISTRY({len(self)} entries)"
+
+
+REGISTRY: _Mapping = _LazyRegistry()
 
 
 def asset_keys() -> set[str]:
@@ -281,7 +455,11 @@ def asset_keys() -> set[str]:
 
 
 def template_for_class(bp_class: str) -> dict | None:
-    for entry in REGISTRY.values():
-        if entry["bp_class"] == bp_class:
-            return entry
-    return None
+    key = _get()["index"]["bp_class"].get(bp_class)
+    return REGISTRY[key] if key else None
+
+
+def template_for_target_class(target_class: str) -> dict | None:
+    """Entry whose mod-shipped BP class (target_bp_class) is `target_class`."""
+    key = _get()["index"]["target_class"].get(target_class)
+    return REGISTRY[key] if key else None
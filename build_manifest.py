@@ -0,0 +1,229 @@
+"""
+Shared record of generated outputs, and orphan GC for the mod tree.
+
+fulltest.bat's clean stage used to `rd /s` DC/Actors and the whole
+DeliveryPoint folder every run, so every mod BP class and safety-net DP
+override was regenerated (or relinked from the artifact cache) and
+re-packed even when nothing changed — it was the only way to be sure a
+file from an older config didn't ship. Instead, every generating step now
+records what it wrote:
+
+    out = build_manifest.Outputs("clone_bp_actors")
+    out.add(*paths)            # from any thread, cache hit or fresh write
+    out.commit()               # after the step succeeded
+
+commit() replaces that step's previous claim set in
+.mtmi_cache/build_manifest.json with {path: sha256}. A step that fails
+doesn't commit, so its last good claims stand. The clean stage then
+deletes only orphans — files under MANAGED_DIRS that no step currently
+claims — and runs after the generating steps, right before packing, so
+a file a step stopped producing this run is already gone from the pak:
+
+    python build_manifest.py gc [--dry-run]    # delete orphans
+    python build_manifest.py orphans           # list them
+    python build_manifest.py verify            # claimed files missing/changed
+    python build_manifest.py show
+
+Only MANAGED_DIRS are collected. The rest of the mod tree can hold
+hand-placed assets, so claims there are recorded (and verified) but never
+garbage-collected. Each map's convert stage (maps.py) commits its own
+claims and they run side by side, so a commit holds a lock file next to
+the manifest for its read-modify-write.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import maps
+import mt_profile
+from artifact_cache import CACHE_ROOT, file_digest, file_lock, save_digest_memo
+
+REPO_ROOT = Path(__file__).resolve().parent
+MANIFEST_PATH = CACHE_ROOT / "build_manifest.json"
+_MANIFEST_FORMAT = 1
+MOD_CONTENT = Path("MapChangeTest_P") / "MotorTown" / "Content"
+# Folders wholly owned by pipeline steps — what the old clean stage wiped,
+# plus every map's _Generated_ (clone_bp_actors also sweeps orphan cells
+# itself).
+MANAGED_DIRS = (
+    MOD_CONTENT / "DC" / "Actors",
+    MOD_CONTENT / "Objects" / "Mission" / "Delivery" / "DeliveryPoint",
+    *(m["gen_dir"] for m in maps.table().values()),
+)
+_LOCK = threading.Lock()
+
+
+def _key(path: Path | str) -> str:
+    """Manifest key: repo-relative posix path (absolute outside the repo)."""
+    p = Path(str(path).replace("\\", "/"))
+    p = p if p.is_absolute() else REPO_ROOT / p
+    p = Path(os.path.normpath(p))
+    try:
+        return p.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+def _path(key: str) -> Path:
+    p = Path(key)
+    return p if p.is_absolute() else REPO_ROOT / p
+
+
+def load() -> dict[str, dict]:
+    """{step: {"time": float, "files": {key: sha256}}}."""
+    try:
+        data = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("steps", {}) if data.get("format") == _MANIFEST_FORMAT else {}
+
+
+def _save(steps: dict[str, dict]) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_name(f"{MANIFEST_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"format": _MANIFEST_FORMAT, "steps": steps}, indent=1, sort_keys=True),
+                   encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def _locked():
+    """Hold the manifest's lock file (across processes)."""
+    return file_lock(MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".lock"))
+
+
+def record(step: str, paths) -> dict[str, str]:
+    """Replace `step`'s claims with the existing files among `paths`."""
+    files = {}
+    for p in paths:
+        d = file_digest(_path(_key(p)))
+        if d is not None:
+            files[_key(p)] = d
+    with _LOCK, _locked():
+        steps = load()
+        steps[step] = {"time": time.time(), "files": dict(sorted(files.items()))}
+        _save(steps)
+    save_digest_memo()
+    return files
+
+
+class Outputs:
+    """Thread-safe collector for one step's outputs during a run."""
+
+    def __init__(self, step: str):
+        self.step = step
+        self._paths: set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, *paths) -> None:
+        with self._lock:
+            self._paths.update(_key(p) for p in paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def reset(self) -> None:
+        """Start a new run in the same process (watch.py)."""
+        with self._lock:
+            self._paths.clear()
+
+    def commit(self) -> dict[str, str]:
+        with self._lock:
+            paths = sorted(self._paths)
+        return record(self.step, paths)
+
+
+def claimed(steps: dict[str, dict] | None = None) -> dict[str, str]:
+    """{key: step} over every step's current claims."""
+    out = {}
+    for step, rec in sorted((steps if steps is not None else load()).items()):
+        for k in rec.get("files", {}):
+            out.setdefault(k, step)
+    return out
+
+
+def orphans(roots=MANAGED_DIRS) -> list[Path]:
+    """Files under `roots` that no step claims."""
+    owned = claimed()
+    out = []
+    for root in roots:
+        base = _path(_key(root))
+        if not base.is_dir():
+            continue
+        out += [p for p in sorted(base.rglob("*")) if p.is_file() and _key(p) not in owned]
+    return out
+
+
+def gc(roots=MANAGED_DIRS, dry_run: bool = False) -> list[Path]:
+    """Delete orphans (and directories left empty); returns what went."""
+    gone = orphans(roots)
+    if dry_run:
+        return gone
+    for p in gone:
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+    for root in roots:
+        base = _path(_key(root))
+        if not base.is_dir():
+            continue
+        for d in sorted((d for d in base.rglob("*") if d.is_dir()), key=lambda d: len(d.parts), reverse=True):
+            try:
+                d.rmdir()
+            except OSError:
+                pass     # not empty
+    return gone
+
+
+def verify() -> list[tuple[str, str, str]]:
+    """[(step, key, 'missing' | 'modified')] for claims that no longer hold."""
+    out = []
+    for step, rec in sorted(load().items()):
+        for k, d in rec.get("files", {}).items():
+            now = file_digest(_path(k))
+            if now != d:
+                out.append((step, k, "missing" if now is None else "modified"))
+    return out
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect the build manifest or delete orphaned outputs.")
+    ap.add_argument("command", choices=("gc", "orphans", "verify", "show"))
+    ap.add_argument("--dry-run", action="store_true", help="gc: list what would be deleted")
+    args = ap.parse_args(argv)
+    os.chdir(REPO_ROOT)
+
+    if args.command == "show":
+        for step, rec in sorted(load().items()):
+            print(f"{step}: {len(rec.get('files', {}))} file(s), "
+                  f"recorded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rec.get('time', 0)))}")
+        return 0
+    if args.command == "verify":
+        bad = verify()
+        for step, k, why in bad:
+            print(f"  {why:<8} {k}  ({step})")
+        print(f"{len(bad)} claimed file(s) differ from the manifest")
+        return 1 if bad else 0
+    if args.command == "orphans" or args.dry_run:
+        found = orphans()
+        for p in found:
+            print(f"  {_key(p)}")
+        print(f"{len(found)} orphaned file(s)")
+        return 0
+    gone = gc()
+    for p in gone:
+        print(f"  removed {_key(p)}")
+    save_digest_memo()
+    print(f"[clean] {len(gone)} orphaned file(s) removed, {len(claimed())} claimed file(s) kept")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("build_manifest", lambda: _main(sys.argv[1:])))
@@ -0,0 +1,263 @@
+"""
+Indexed view of CargoImport/ — cargo catalog + vanilla delivery-point
+examples — with a small query API.
+
+import_cargo_data.py writes one catalog.json and one
+<Class>.example.json per vanilla DP. Answering "which vanilla DPs consume
+Fuel?" or "where is Farm_Cabbage_C's example?" used to mean parsing all of
+them every run. This module compiles them once into CargoImport/index.json:
+
+  cargos           name -> catalog row
+  by_type          cargo type -> [cargo names]
+  by_flag          bAllowStacking / bDepcreated / CargoFlags:0x.. -> [names]
+  dps              source class -> {file, label, recipes, has_inputs}
+  consumers        cargo -> [DP classes taking it in a recipe's `inputs`]
+  producers        cargo -> [DP classes listing it in `outputs`]
+  type_consumers   cargo type -> [DP classes with it in `input_types`]
+  type_producers   cargo type -> [DP classes with it in `output_types`]
+
+The index records a digest of every source file (content, not mtime, so a
+fresh checkout doesn't look stale) and is rebuilt on load when any source
+changed or appeared/disappeared. import_cargo_data.py rebuilds it at the
+end of every import.
+
+    idx = load_index()
+    idx.consumers("Fuel")                 # direct + via Fuel's cargo type
+    idx.dp_example("Farm_Cabbage_C")      # the parsed example, or None
+    idx.suggest_safety_dps("Fuel")        # injection-ready consumers first
+
+CLI:  python cargo_index.py build | cargo <Name> | dp <Class>
+                          | consumers <Name> | suggest <Name>
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import mt_profile
+from artifact_cache import digest_parts, file_digest
+
+IMPORT_ROOT = Path("CargoImport")
+CATALOG_PATH = IMPORT_ROOT / "cargos" / "catalog.json"
+EXAMPLES_DIR = IMPORT_ROOT / "delivery_points"
+INDEX_PATH = IMPORT_ROOT / "index.json"
+_INDEX_FORMAT = 1
+_FLAG_FIELDS = ("bAllowStacking", "bDepcreated")
+
+
+def _sources() -> list[Path]:
+    out = [CATALOG_PATH] if CATALOG_PATH.exists() else []
+    if EXAMPLES_DIR.is_dir():
+        out += sorted(EXAMPLES_DIR.glob("*.example.json"))
+    return out
+
+
+def sources_key() -> str:
+    """Digest over every source file's path + content digest."""
+    return digest_parts("cargo_index", _INDEX_FORMAT,
+                        [[p.relative_to(IMPORT_ROOT).as_posix(), file_digest(p)] for p in _sources()])
+
+
+def _add(index: dict, key: str, value: str) -> None:
+    bucket = index.setdefault(key, [])
+    if value not in bucket:
+        bucket.append(value)
+
+
+def build_index() -> dict:
+    """Parse the CargoImport sources into the index dict (not written)."""
+    data: dict = {"format": _INDEX_FORMAT, "key": sources_key(),
+                  "cargos": {}, "by_type": {}, "by_flag": {}, "dps": {},
+                  "consumers": {}, "producers": {},
+                  "type_consumers": {}, "type_producers": {}}
+    try:
+        catalog = json.loads(CATALOG_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        catalog = []
+    for row in catalog:
+        name = row.get("Name")
+        if not name:
+            continue
+        data["cargos"][name] = row
+        _add(data["by_type"], str(row.get("CargoType") or "None"), name)
+        for f in _FLAG_FIELDS:
+            if row.get(f) is True:
+                _add(data["by_flag"], f, name)
+        bits = row.get("CargoFlags")
+        if isinstance(bits, int):
+            for b in range(bits.bit_length()):
+                if bits >> b & 1:
+                    _add(data["by_flag"], f"CargoFlags:{1 << b:#x}", name)
+
+    for path in sorted(EXAMPLES_DIR.glob("*.example.json")) if EXAMPLES_DIR.is_dir() else []:
+        try:
+            ex = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"  [cargo_index] skip {path.name}: {e}", file=sys.stderr)
+            continue
+        cls = ex.get("_source_class")
+        if not cls:
+            continue
+        recipes = [r for r in ex.get("recipes") or [] if isinstance(r, dict)]
+        data["dps"][cls] = {
+            "file": path.relative_to(IMPORT_ROOT).as_posix(),
+            "label": ex.get("label"),
+            "recipes": recipes,
+            "has_inputs": any(isinstance(r.get("inputs"), dict) for r in recipes),
+        }
+        for r in recipes:
+            for cargo in r.get("inputs") or {}:
+                _add(data["consumers"], cargo, cls)
+            for cargo in r.get("outputs") or {}:
+                _add(data["producers"], cargo, cls)
+            for t in r.get("input_types") or []:
+                _add(data["type_consumers"], t, cls)
+            for t in r.get("output_types") or []:
+                _add(data["type_producers"], t, cls)
+    return data
+
+
+def write_index(data: dict) -> None:
+    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(data, indent=1, sort_keys=True) + "\n"
+    try:
+        if INDEX_PATH.read_text(encoding="utf-8") == text:
+            return
+    except OSError:
+        pass
+    tmp = INDEX_PATH.with_name(f"{INDEX_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, INDEX_PATH)
+
+
+class CargoIndex:
+    """Lookups over a built index dict."""
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def __bool__(self) -> bool:
+        return bool(self.data["cargos"] or self.data["dps"])
+
+    @property
+    def key(self) -> str:
+        return self.data["key"]
+
+    def cargo(self, name: str) -> dict | None:
+        return self.data["cargos"].get(name)
+
+    def cargo_names(self) -> set[str]:
+        return set(self.data["cargos"])
+
+    def cargo_types(self) -> set[str]:
+        return set(self.data["by_type"])
+
+    def cargos_of_type(self, cargo_type: str) -> list[str]:
+        return list(self.data["by_type"].get(cargo_type, []))
+
+    def cargos_with_flag(self, flag: str) -> list[str]:
+        return list(self.data["by_flag"].get(flag, []))
+
+    def dp_classes(self) -> list[str]:
+        return list(self.data["dps"])
+
+    def dp_example(self, source_class: str) -> dict | None:
+        """The DP's example entry ({_source_class, label, recipes, ...})."""
+        dp = self.data["dps"].get(source_class)
+        if dp is None:
+            return None
+        return {"_source_class": source_class, "label": dp["label"], "recipes": dp["recipes"]}
+
+    def has_inputs_recipe(self, source_class: str) -> bool:
+        dp = self.data["dps"].get(source_class)
+        return bool(dp and dp["has_inputs"])
+
+    def consumers(self, cargo: str, by_type: bool = True) -> list[str]:
+        """DP classes that accept `cargo` — by name, then (optionally) via
+        its cargo type."""
+        out = list(self.data["consumers"].get(cargo, []))
+        row = self.cargo(cargo)
+        if by_type and row:
+            out += [c for c in self.data["type_consumers"].get(str(row.get("CargoType")), [])
+                    if c not in out]
+        return out
+
+    def producers(self, cargo: str, by_type: bool = True) -> list[str]:
+        out = list(self.data["producers"].get(cargo, []))
+        row = self.cargo(cargo)
+        if by_type and row:
+            out += [c for c in self.data["type_producers"].get(str(row.get("CargoType")), [])
+                    if c not in out]
+        return out
+
+    def suggest_safety_dps(self, cargo: str, limit: int = 3) -> list[str]:
+        """Vanilla DPs a clone of `cargo` could be attached to as safety
+        net. Only DPs with an `inputs` recipe qualify (that's what
+        inject_new_cargos_into_safety_dps extends); direct consumers of
+        the source cargo rank ahead of same-type consumers."""
+        return [c for c in self.consumers(cargo) if self.has_inputs_recipe(c)][:limit]
+
+
+_loaded: CargoIndex | None = None
+
+
+def load_index(rebuild: bool = False) -> CargoIndex:
+    """The index, rebuilt (and rewritten) when any source changed."""
+    global _loaded
+    if _loaded is not None and not rebuild:
+        return _loaded
+    key = sources_key()
+    data = None
+    if not rebuild:
+        try:
+            data = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+            if data.get("format") != _INDEX_FORMAT or data.get("key") != key:
+                data = None
+        except (OSError, ValueError):
+            data = None
+    if data is None:
+        data = build_index()
+        if data["cargos"] or data["dps"]:
+            try:
+                write_index(data)
+            except OSError as e:
+                print(f"  [cargo_index] could not write {INDEX_PATH}: {e}", file=sys.stderr)
+    _loaded = CargoIndex(data)
+    return _loaded
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Query the CargoImport index.")
+    ap.add_argument("command", choices=("build", "cargo", "dp", "consumers", "suggest"))
+    ap.add_argument("name", nargs="?")
+    args = ap.parse_args(argv)
+    idx = load_index(rebuild=args.command == "build")
+    if args.command == "build":
+        d = idx.data
+        print(f"{INDEX_PATH}: {len(d['cargos'])} cargos, {len(d['by_type'])} types, "
+              f"{len(d['dps'])} DP examples")
+        return 0
+    if not args.name:
+        ap.error(f"{args.command} needs a name")
+    if args.command == "cargo":
+        row = idx.cargo(args.name)
+        print(json.dumps(row, indent=2) if row else f"no cargo {args.name}")
+        return 0 if row else 1
+    if args.command == "dp":
+        ex = idx.dp_example(args.name)
+        print(json.dumps(ex, indent=2) if ex else f"no DP example for {args.name}")
+        return 0 if ex else 1
+    if args.command == "consumers":
+        print("consumers:", ", ".join(idx.consumers(args.name)) or "-")
+        print("producers:", ", ".join(idx.producers(args.name)) or "-")
+        return 0
+    print(json.dumps(idx.suggest_safety_dps(args.name)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("cargo_index", lambda: _main(sys.argv[1:])))
@@ -0,0 +1,370 @@
+"""
+Direct reader for cooked DataTables — Cargos.uasset / Cargos_01.uasset.
+
+The cargo catalog used to need a full UAssetGUI `tojson` dump of
+Cargos.uasset (a .NET process, the whole mappings file, a multi-MB JSON)
+just to read ~90 rows, and checking the generated Cargos_01 meant another
+injector call. This reads the .uasset/.uexp pair directly: the header via
+uasset_header, the row bodies by mmap, and the unversioned property layout
+from the cached usmap schema.
+
+    with DataTable(GAME_CONTENT / "DataAsset" / "Cargos.uasset") as t:
+        print(t.row_struct, len(t))
+        for name, row in t.rows(("CargoType", "BasePayment")):
+            ...
+        t.row("Fuel")                      # every field of one row
+
+Rows are decoded one at a time as they're iterated, and only the fields
+asked for are materialised — everything else is stepped over by size.
+Fields a row leaves at their zero value (the unversioned zero mask) come
+back as the type's zero: 0, 0.0, False, "", the enum's 0 entry, [] ...
+Enum values are the bare entry name ("SmallPackage"); object references
+are the referenced import/export name; floats are rounded to the shortest
+decimal that round-trips through float32, so 0.1 reads back as 0.1.
+
+Only layouts this module understands are decoded. Anything else — a
+struct missing from the mappings, an FText history other than
+none/base/string-table, a native struct not in _NATIVE_STRUCTS, a body
+that doesn't end where the export table says — raises UnsupportedLayout
+so callers can fall back to the UAssetGUI path instead of trusting a
+misaligned read.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+
+import uasset_header
+from usmap import Mappings, load_mappings, read_unversioned_header
+
+RF_CLASS_DEFAULT_OBJECT = 0x10
+
+
+class UnsupportedLayout(ValueError):
+    """The table uses a serialization this reader doesn't decode."""
+
+
+_SCALARS = {
+    "BoolProperty": "<?", "ByteProperty": "<B", "Int8Property": "<b",
+    "Int16Property": "<h", "UInt16Property": "<H", "IntProperty": "<i",
+    "UInt32Property": "<I", "Int64Property": "<q", "UInt64Property": "<Q",
+    "FloatProperty": "<f", "DoubleProperty": "<d",
+    "ObjectProperty": "<i", "WeakObjectProperty": "<i", "InterfaceProperty": "<i",
+}
+_OBJECT_REFS = {"ObjectProperty", "WeakObjectProperty", "InterfaceProperty"}
+_STRINGS = {"StrProperty", "Utf8StrProperty", "AnsiStrProperty"}
+
+# Structs with a native serializer: written as raw fields, not as an
+# unversioned property list. Sizes assume UE5 large-world coordinates.
+_NATIVE_STRUCTS = {
+    "Vector": "<3d", "Vector2D": "<2d", "Vector4": "<4d", "Rotator": "<3d",
+    "Quat": "<4d", "Plane": "<4d", "Sphere": "<4d", "TwoVectors": "<6d",
+    "Matrix": "<16d", "Box": "<6dB", "Box2D": "<4dB",
+    "Vector3f": "<3f", "Vector2f": "<2f", "Vector4f": "<4f",
+    "Vector_NetQuantize": "<3d", "Vector_NetQuantize10": "<3d",
+    "Vector_NetQuantize100": "<3d", "Vector_NetQuantizeNormal": "<3d",
+    "IntPoint": "<2i", "IntVector": "<3i", "IntVector4": "<4i",
+    "Color": "<4B", "LinearColor": "<4f", "Guid": "<4I",
+    "DateTime": "<q", "Timespan": "<q", "FrameNumber": "<i",
+    "PerPlatformFloat": "<if", "PerPlatformInt": "<ii",
+}
+
+
+def _f32(v: float) -> float:
+    """Shortest decimal that packs back to the same float32."""
+    raw = struct.pack("<f", v)
+    for digits in range(6, 10):
+        short = float(f"{v:.{digits}g}")
+        if struct.pack("<f", short) == raw:
+            return short
+    return v
+
+
+def _enum_entry(entries: dict[int, str] | None, value: int):
+    name = entries.get(value) if entries else None
+    if name is None:
+        return value
+    return name.split("::", 1)[1] if "::" in name else name
+
+
+class _Decoder:
+    """Cursor over one export body; reads typed values off the usmap schema."""
+
+    def __init__(self, buf, pos: int, end: int, pkg: dict, mappings, soft_paths: list[str]):
+        self.buf, self.pos, self.end = buf, pos, end
+        self.pkg, self.names, self.m = pkg, pkg["names"], mappings
+        self.soft_paths = soft_paths
+
+    def unpack(self, fmt: str):
+        v = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return v[0] if len(v) == 1 else v
+
+    def fstring(self) -> str:
+        n = self.unpack("<i")
+        if n == 0:
+            return ""
+        size = -2 * n if n < 0 else n
+        raw = bytes(self.buf[self.pos:self.pos + size])
+        self.pos += size
+        return raw.decode("utf-16-le" if n < 0 else "latin-1").rstrip("\0")
+
+    def fname(self) -> str:
+        idx, num = self.unpack("<ii")
+        if not 0 <= idx < len(self.names):
+            raise UnsupportedLayout(f"name index {idx} out of range at {self.pos - 8}")
+        base = self.names[idx]
+        return base if num == 0 else f"{base}_{num - 1}"
+
+    def text(self) -> str:
+        self.pos += 4                                       # flags
+        history = self.unpack("<b")
+        if history == -1:                                   # None
+            return self.fstring() if self.unpack("<i") else ""
+        if history == 0:                                    # Base: namespace, key, source
+            self.fstring(); self.fstring()
+            return self.fstring()
+        if history == 11:                                   # StringTableEntry
+            table = self.fname()
+            return f"{table}:{self.fstring()}"
+        raise UnsupportedLayout(f"FText history type {history}")
+
+    def soft_path(self) -> str:
+        if self.soft_paths:
+            i = self.unpack("<i")
+            return self.soft_paths[i] if 0 <= i < len(self.soft_paths) else ""
+        pkg, asset = self.fname(), self.fname()
+        sub = self.fstring()
+        path = "" if pkg == "None" else (pkg if asset == "None" else f"{pkg}.{asset}")
+        return f"{path}:{sub}" if sub else path
+
+    # --------------------------------------------------------------
+    def zero(self, t):
+        if isinstance(t, list):
+            kind = t[0]
+            if kind == "EnumProperty":
+                return _enum_entry(self.m.enums.get(t[2]), 0)
+            if kind == "StructProperty":
+                return {}
+            if kind == "OptionalProperty":
+                return None
+            return []
+        if t in ("FloatProperty", "DoubleProperty"):
+            return 0.0
+        if t == "BoolProperty":
+            return False
+        if t in _STRINGS or t == "TextProperty" or t == "SoftObjectProperty":
+            return ""
+        if t == "NameProperty":
+            return "None"
+        if t in _OBJECT_REFS:
+            return None
+        return 0
+
+    def value(self, t, want: bool = True):
+        """Read one value of usmap type `t`. With want=False the value is
+        stepped over and None returned."""
+        if isinstance(t, str):
+            fmt = _SCALARS.get(t)
+            if fmt is not None:
+                v = self.unpack(fmt)
+                if not want:
+                    return None
+                if t == "FloatProperty":
+                    return _f32(v)
+                if t in _OBJECT_REFS:
+                    return uasset_header.object_name(self.pkg, v)
+                return v
+            if t == "NameProperty":
+                return self.fname()
+            if t in _STRINGS:
+                return self.fstring()
+            if t == "TextProperty":
+                return self.text()
+            if t in ("SoftObjectProperty", "AssetObjectProperty"):
+                return self.soft_path()
+            if t == "LazyObjectProperty":
+                self.pos += 16
+                return None
+            if t == "DelegateProperty":
+                obj = self.unpack("<i")
+                return [uasset_header.object_name(self.pkg, obj), self.fname()]
+            if t == "MulticastDelegateProperty":
+                return [self.value("DelegateProperty", want) for _ in range(self.unpack("<i"))]
+            if t == "FieldPathProperty":
+                path = [self.fname() for _ in range(self.unpack("<i"))]
+                self.pos += 4                               # resolved owner
+                return ".".join(path)
+            raise UnsupportedLayout(f"property type {t}")
+
+        kind = t[0]
+        if kind == "StructProperty":
+            return self.struct(t[1], want=want)
+        if kind == "EnumProperty":
+            raw = self.value(t[1])
+            return _enum_entry(self.m.enums.get(t[2]), raw) if want else None
+        if kind in ("ArrayProperty", "SetProperty"):
+            if kind == "SetProperty":
+                for _ in range(self.unpack("<i")):          # elements to remove
+                    self.value(t[1], False)
+            n = self.unpack("<i")
+            if n < 0 or self.pos + n > self.end:
+                raise UnsupportedLayout(f"implausible {kind} length {n}")
+            items = [self.value(t[1], want) for _ in range(n)]
+            return items if want else None
+        if kind == "MapProperty":
+            for _ in range(self.unpack("<i")):              # keys to remove
+                self.value(t[1], False)
+            n = self.unpack("<i")
+            if n < 0 or self.pos + n > self.end:
+                raise UnsupportedLayout(f"implausible MapProperty length {n}")
+            pairs = [[self.value(t[1], want), self.value(t[2], want)] for _ in range(n)]
+            return pairs if want else None
+        if kind == "OptionalProperty":
+            return self.value(t[1], want) if self.unpack("<i") else None
+        raise UnsupportedLayout(f"property type {kind}")
+
+    def struct(self, name: str, fields=None, want: bool = True):
+        """Read a struct value. `fields` limits which properties are
+        decoded; the rest are stepped over."""
+        fmt = _NATIVE_STRUCTS.get(name)
+        if fmt is not None:
+            v = self.unpack(fmt)
+            return v if want else None
+        if name == "GameplayTag":
+            tag = self.fname()
+            return tag if want else None
+        if name == "GameplayTagContainer":
+            tags = [self.fname() for _ in range(self.unpack("<i"))]
+            return tags if want else None
+        if name in ("SoftObjectPath", "SoftClassPath"):
+            path = self.soft_path()
+            return path if want else None
+        if not self.m.has_struct(name):
+            raise UnsupportedLayout(f"struct {name} is not in the mappings")
+
+        header, self.pos = read_unversioned_header(self.buf, self.pos)
+        out = {} if want else None
+        for index, is_zero in header:
+            prop = self.m.property(name, index)
+            if prop is None:
+                raise UnsupportedLayout(f"{name} has no property at schema index {index}")
+            pname, dim, ptype = prop
+            keep = want and (fields is None or pname in fields)
+            if is_zero:
+                v = self.zero(ptype) if keep else None
+            else:
+                v = self.value(ptype, keep)
+            if keep:
+                out[f"{pname}[{dim}]" if dim else pname] = v
+        if self.pos > self.end:
+            raise UnsupportedLayout(f"{name} read past the end of the export")
+        return out
+
+
+def _read_soft_paths(uasset: Path, pkg: dict) -> list[str]:
+    s = pkg["summary"]
+    if not s.get("soft_object_paths_count"):
+        return []
+    buf = uasset.read_bytes()
+    d = _Decoder(buf, s["soft_object_paths_offset"], len(buf), pkg, None, [])
+    return [d.soft_path() for _ in range(s["soft_object_paths_count"])]
+
+
+class DataTable:
+    """Lazy view of a cooked DataTable .uasset/.uexp pair."""
+
+    def __init__(self, uasset: Path | str, mappings: Mappings | Path | str | None = None):
+        self.path = Path(uasset)
+        self.m = mappings if isinstance(mappings, Mappings) else load_mappings(mappings)
+        self.pkg = uasset_header.read_package(self.path)
+        export = next((e for e in self.pkg["exports"]
+                       if (uasset_header.class_name(self.pkg, e["class_index"]) or "").endswith("DataTable")
+                       and not e["object_flags"] & RF_CLASS_DEFAULT_OBJECT), None)
+        if export is None:
+            raise ValueError(f"{self.path.name}: no DataTable export")
+        self.export = export
+        self._file = open(self.path.with_suffix(".uexp"), "rb")
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = export["serial_offset"] - self.pkg["summary"]["total_header_size"]
+        end = start + export["serial_size"]
+        if start < 0 or end > len(self._buf):
+            self.close()
+            raise UnsupportedLayout(f"{self.path.name}: export body outside the .uexp")
+        soft_paths = _read_soft_paths(self.path, self.pkg)
+        self._dec = lambda pos: _Decoder(self._buf, pos, end, self.pkg, self.m, soft_paths)
+
+        try:
+            d = self._dec(start)
+            props = d.struct(uasset_header.class_name(self.pkg, export["class_index"]), ("RowStruct",))
+            if d.unpack("<i"):                              # UObject: bHasGuid
+                d.pos += 16
+            self.row_count = d.unpack("<i")
+        except struct.error as e:
+            self.close()
+            raise UnsupportedLayout(f"{self.path.name}: {e}") from None
+        except UnsupportedLayout:
+            self.close()
+            raise
+        self.row_struct = props.get("RowStruct")
+        if not self.row_struct or not 0 <= self.row_count < 1_000_000:
+            self.close()
+            raise UnsupportedLayout(f"{self.path.name}: no RowStruct / bad row count {self.row_count}")
+        self._first_row, self._end = d.pos, end
+        self._offsets: dict[str, int] | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def close(self) -> None:
+        buf, self._buf = getattr(self, "_buf", None), None
+        if buf is not None:
+            buf.close()
+        f, self._file = getattr(self, "_file", None), None
+        if f is not None:
+            f.close()
+
+    def rows(self, fields=None, want: bool = True):
+        """Yield (row name, {field: value}) in table order. `fields` (any
+        container of property names) limits what's decoded per row."""
+        d = self._dec(self._first_row)
+        offsets = {}
+        try:
+            for _ in range(self.row_count):
+                name = d.fname()
+                offsets[name] = d.pos
+                row = d.struct(self.row_struct, fields, want)
+                yield name, row
+        except struct.error as e:
+            raise UnsupportedLayout(f"{self.path.name}: {e}") from None
+        if d.pos != self._end:
+            raise UnsupportedLayout(f"{self.path.name}: rows end at {d.pos}, export ends at {self._end}")
+        self._offsets = offsets
+
+    def names(self) -> list[str]:
+        if self._offsets is None:
+            for _ in self.rows(want=False):
+                pass
+        return list(self._offsets)
+
+    def row(self, name: str, fields=None) -> dict | None:
+        """One row by name (case-insensitive, like the injector's lookup)."""
+        if self._offsets is None:
+            self.names()
+        pos = self._offsets.get(name)
+        if pos is None:
+            pos = next((p for n, p in self._offsets.items() if n.lower() == name.lower()), None)
+        if pos is None:
+            return None
+        try:
+            return self._dec(pos).struct(self.row_struct, fields)
+        except struct.error as e:
+            raise UnsupportedLayout(f"{self.path.name}: {e}") from None
@@ -0,0 +1,373 @@
+"""
+Queryable catalog of the vanilla World Partition cells.
+
+Picking a template cell, finding a vanilla instance of a BP class to clone
+from, and checking that a find-cells-batch owner actually exists on disk
+all used to poke at `_Generated_/*.umap` directly — magic bytes and file
+sizes for the template, a manual `MTBPInjector inspect-by-class` hunt for
+source actors, one stat() per owner candidate. This module indexes every
+vanilla cell once into a SQLite catalog and answers those as queries:
+
+    python cell_catalog.py build             # (re)index, parallel
+    python cell_catalog.py stats
+    python cell_catalog.py find-class Interaction_ParkingSpace_Small_C
+    python cell_catalog.py cell 0V18V8JBXKXUL8YILWZKCSMB4
+    python cell_catalog.py template          # what auto-pick would choose
+    python cell_catalog.py --map island stats
+
+Per cell the catalog stores .umap/.uexp sizes, the actors in its persistent
+level (export name + class + class package), the length of the level's
+Actors array ("slots" — created cells replace these in place, so it's the
+cell's capacity), and whether the package references data layers. All of
+it comes from the package header and the Level export's bytes via
+uasset_header.py (mmap, no mappings, no .NET).
+
+The catalog lives at .mtmi_cache/cell_catalog.sqlite and is keyed by a
+hash of the cell tree's (name, size, mtime) listing: an unchanged tree
+costs one directory scan; after a game update only cells whose files
+changed are re-read, fanned out over a process pool. Every query takes an
+optional cells_dir: the other maps in maps.py get a catalog each, next to
+the default one, so looking up an island cell never re-indexes Jeju.
+
+Two fields are heuristics, flagged as such in the schema:
+  - actor_slots is found by locating the FURL that ULevel::Serialize writes
+    right after the Actors array ("unreal" protocol string) and walking
+    back to the TArray count. NULL when the probe doesn't find it.
+  - has_data_layers is set when any name-map entry mentions DataLayer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import mt_profile
+from artifact_cache import CACHE_ROOT, digest_parts
+from uasset_header import class_name, export_body, read_package
+
+CATALOG_PATH = CACHE_ROOT / "cell_catalog.sqlite"
+# Bump when index_cell's output changes shape or meaning.
+_FORMAT = 1
+
+# Exports outered to the persistent level that aren't actors.
+_NON_ACTOR_CLASSES = {"Model", "Level", "LevelScriptBlueprint", "BookMark"}
+_URL_MARKER = struct.pack("<i", 7) + b"unreal\0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta   (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS cells  (
+    name            TEXT PRIMARY KEY,
+    sig             TEXT NOT NULL,      -- size/mtime of .umap + .uexp
+    umap_size       INTEGER,
+    uexp_size       INTEGER,
+    actor_count     INTEGER,
+    actor_slots     INTEGER,            -- heuristic, NULL if not probed
+    has_data_layers INTEGER,            -- heuristic (name map)
+    error           TEXT                -- set when the header didn't parse
+);
+CREATE TABLE IF NOT EXISTS actors (
+    cell          TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    class         TEXT,
+    class_package TEXT
+);
+CREATE INDEX IF NOT EXISTS actors_class ON actors(class);
+CREATE INDEX IF NOT EXISTS actors_cell  ON actors(cell);
+"""
+
+
+# ----------------------------------------------------------------------
+# Indexing one cell (runs in worker processes)
+# ----------------------------------------------------------------------
+def _probe_actor_slots(body: memoryview, actor_ids: set[int], n_exports: int) -> int | None:
+    """Length of ULevel::Actors, read backwards from the FURL after it."""
+    pos = bytes(body).find(_URL_MARKER)
+    if pos < 4:
+        return None
+    for n in range(0, pos // 4):
+        start = pos - 4 * (n + 1)
+        if struct.unpack_from("<i", body, start)[0] != n:
+            continue
+        vals = struct.unpack_from(f"<{n}i", body, start + 4)
+        if all(0 <= v <= n_exports for v in vals) and actor_ids <= set(vals):
+            return n
+    return None
+
+
+def index_cell(umap: str) -> dict:
+    """Catalog row + actors for one cell .umap. Never raises: a package the
+    header reader can't parse is recorded with `error` set."""
+    p = Path(umap)
+    uexp = p.with_suffix(".uexp")
+    row = {"name": p.stem, "umap_size": p.stat().st_size,
+           "uexp_size": uexp.stat().st_size if uexp.exists() else None,
+           "actor_count": 0, "actor_slots": None, "has_data_layers": 0,
+           "error": None, "actors": []}
+    try:
+        pkg = read_package(p)
+    except (ValueError, struct.error, OSError) as e:
+        row["error"] = str(e)
+        return row
+    row["has_data_layers"] = int(any("DataLayer" in n for n in pkg["names"]))
+    exports = pkg["exports"]
+    level = next((i + 1 for i, e in enumerate(exports)
+                  if class_name(pkg, e["class_index"]) == "Level"), None)
+    if level is None:
+        return row
+    actor_ids = set()
+    for i, e in enumerate(exports):
+        if e["outer_index"] != level:
+            continue
+        cls = class_name(pkg, e["class_index"])
+        if cls in _NON_ACTOR_CLASSES or (cls or "").endswith("Component"):
+            continue
+        pkg_name = None
+        if e["class_index"] < 0:
+            imp = pkg["imports"][-e["class_index"] - 1]
+            outer = imp["outer_index"]
+            pkg_name = pkg["imports"][-outer - 1]["name"] if outer < 0 else None
+        row["actors"].append({"name": e["name"], "class": cls, "class_package": pkg_name})
+        actor_ids.add(i + 1)
+    row["actor_count"] = len(row["actors"])
+    if uexp.exists() and uexp.stat().st_size:
+        with open(uexp, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            body = export_body(pkg, exports[level - 1], buf)
+            try:
+                row["actor_slots"] = _probe_actor_slots(body, actor_ids, len(exports))
+            finally:
+                body.release()
+    return row
+
+
+# ----------------------------------------------------------------------
+# Catalog maintenance
+# ----------------------------------------------------------------------
+def _default_cells_dir() -> Path:
+    from mt_paths import CELLS_DIR
+    return CELLS_DIR
+
+
+def db_path_for(cells_dir: Path) -> Path:
+    """CATALOG_PATH for mt_paths.CELLS_DIR, a sibling per other tree."""
+    resolved = Path(cells_dir).resolve()
+    if resolved == _default_cells_dir().resolve():
+        return CATALOG_PATH
+    return CATALOG_PATH.with_name(f"cell_catalog-{digest_parts(str(resolved))[:12]}.sqlite")
+
+
+def _scan(cells_dir: Path) -> dict[str, list]:
+    """{cell: [umap size, umap mtime_ns, uexp size, uexp mtime_ns]}."""
+    sig: dict[str, list] = {}
+    with os.scandir(cells_dir) as it:
+        for de in it:
+            stem, ext = os.path.splitext(de.name)
+            if ext not in (".umap", ".uexp") or not de.is_file():
+                continue
+            st = de.stat()
+            slot = sig.setdefault(stem, [None, None, None, None])
+            i = 0 if ext == ".umap" else 2
+            slot[i], slot[i + 1] = st.st_size, st.st_mtime_ns
+    return {k: v for k, v in sig.items() if v[0] is not None}
+
+
+def refresh(cells_dir: Path | None = None, db_path: Path | None = None,
+            jobs: int | None = None, rebuild: bool = False, verbose: bool = False) -> sqlite3.Connection:
+    """Bring the catalog in line with cells_dir and return a connection."""
+    cells_dir = Path(cells_dir or _default_cells_dir())
+    db_path = Path(db_path or db_path_for(cells_dir))
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path, check_same_thread=False)
+    con.executescript(_SCHEMA)
+    tree = _scan(cells_dir) if cells_dir.is_dir() else {}
+    tree_hash = digest_parts("cell-catalog", _FORMAT, str(cells_dir.resolve()), sorted(tree.items()))
+    cur = dict(con.execute("SELECT key, value FROM meta"))
+    if not rebuild and cur.get("tree_hash") == tree_hash:
+        return con
+
+    if rebuild or cur.get("format") != str(_FORMAT) or cur.get("cells_dir") != str(cells_dir.resolve()):
+        con.execute("DELETE FROM cells")
+        con.execute("DELETE FROM actors")
+    known = dict(con.execute("SELECT name, sig FROM cells"))
+    sigs = {name: ",".join(str(x) for x in s) for name, s in tree.items()}
+    todo = sorted(n for n, s in sigs.items() if known.get(n) != s)
+    gone = [n for n in known if n not in sigs]
+    if verbose or len(todo) > 50:
+        print(f"  [cell-catalog] indexing {len(todo)} cell(s), dropping {len(gone)} "
+              f"({len(tree)} in {cells_dir})", file=sys.stderr)
+    paths = [str(cells_dir / f"{n}.umap") for n in todo]
+    if len(paths) > 32 and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(index_cell, paths, chunksize=64))
+    else:
+        rows = [index_cell(p) for p in paths]
+
+    with con:
+        for name in gone + todo:
+            con.execute("DELETE FROM cells WHERE name = ?", (name,))
+            con.execute("DELETE FROM actors WHERE cell = ?", (name,))
+        for r in rows:
+            con.execute("INSERT INTO cells VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (r["name"], sigs[r["name"]], r["umap_size"], r["uexp_size"],
+                         r["actor_count"], r["actor_slots"], r["has_data_layers"], r["error"]))
+            con.executemany("INSERT INTO actors VALUES (?, ?, ?, ?)",
+                            [(r["name"], a["name"], a["class"], a["class_package"]) for a in r["actors"]])
+        con.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                        [("tree_hash", tree_hash), ("format", str(_FORMAT)),
+                         ("cells_dir", str(cells_dir.resolve()))])
+    return con
+
+
+_con: sqlite3.Connection | None = None
+_con_lock = threading.Lock()
+_cell_names: dict[str | None, frozenset[str]] = {}
+# Catalogs of the other maps' cell trees, by cells dir.
+_others: dict[str, sqlite3.Connection] = {}
+
+
+def _other(cells_dir: Path | None) -> str | None:
+    """None for the default tree, else cells_dir's resolved path."""
+    if cells_dir is None:
+        return None
+    key = Path(cells_dir).resolve()
+    return None if key == _default_cells_dir().resolve() else str(key)
+
+
+def catalog(cells_dir: Path | None = None) -> sqlite3.Connection:
+    """Process-wide connection to an up-to-date catalog of CELLS_DIR (or
+    of cells_dir). Safe to share across threads; refreshed once per
+    process."""
+    global _con
+    key = _other(cells_dir)
+    with _con_lock:
+        if key is None:
+            if _con is None:
+                _con = refresh()
+            return _con
+        if key not in _others:
+            _others[key] = refresh(Path(key))
+        return _others[key]
+
+
+def _query(sql: str, args: tuple = (), cells_dir: Path | None = None) -> list[tuple]:
+    con = catalog(cells_dir)
+    with _con_lock:
+        return con.execute(sql, args).fetchall()
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+def has_cell(name: str, cells_dir: Path | None = None) -> bool:
+    key = _other(cells_dir)
+    names = _cell_names.get(key)
+    if names is None:
+        names = _cell_names[key] = frozenset(r[0] for r in _query("SELECT name FROM cells", (), cells_dir))
+    return name in names
+
+
+def cell_info(name: str, cells_dir: Path | None = None) -> dict | None:
+    rows = _query("SELECT name, umap_size, uexp_size, actor_count, actor_slots, "
+                  "has_data_layers, error FROM cells WHERE name = ?", (name,), cells_dir)
+    if not rows:
+        return None
+    keys = ("name", "umap_size", "uexp_size", "actor_count", "actor_slots", "has_data_layers", "error")
+    info = dict(zip(keys, rows[0]))
+    info["actors"] = [{"name": n, "class": c, "class_package": p} for n, c, p in
+                      _query("SELECT name, class, class_package FROM actors WHERE cell = ? ORDER BY rowid",
+                             (name,), cells_dir)]
+    return info
+
+
+def find_actors(bp_class: str, limit: int = 20, cells_dir: Path | None = None) -> list[dict]:
+    """Vanilla instances of `bp_class` — candidate `source_umap` +
+    `source_actor` pairs for a new registry entry. Smallest cells first
+    (cheapest to load in the injector)."""
+    rows = _query("SELECT a.cell, a.name, a.class_package, c.umap_size FROM actors a "
+                  "JOIN cells c ON c.name = a.cell WHERE a.class = ? "
+                  "ORDER BY c.umap_size, a.cell, a.name LIMIT ?", (bp_class, limit), cells_dir)
+    return [{"cell": c, "actor": n, "class_package": p, "umap_size": s} for c, n, p, s in rows]
+
+
+def pick_template_cell(min_slots: int = 1, cells_dir: Path | None = None) -> str | None:
+    """Smallest parseable cell with no data-layer references and at least
+    `min_slots` Actors slots — the properties the hand-picked template was
+    chosen for (see clone_bp_actors._PREFERRED_TEMPLATE_CELL)."""
+    rows = _query("SELECT name FROM cells WHERE error IS NULL AND has_data_layers = 0 "
+                  "AND actor_slots >= ? ORDER BY umap_size, name LIMIT 1", (min_slots,), cells_dir)
+    return rows[0][0] if rows else None
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Index and query the vanilla WP cell catalog.")
+    ap.add_argument("--map", help="a map from maps.json (default: the default map's cells)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index new/changed cells (all with --rebuild)")
+    b.add_argument("--jobs", type=int, default=None)
+    b.add_argument("--rebuild", action="store_true")
+    sub.add_parser("stats")
+    f = sub.add_parser("find-class", help="vanilla instances of a BP class")
+    f.add_argument("bp_class")
+    f.add_argument("--limit", type=int, default=20)
+    c = sub.add_parser("cell", help="one cell's row + actors")
+    c.add_argument("name")
+    sub.add_parser("template", help="template cell auto-pick would choose")
+    args = ap.parse_args(argv)
+    cells_dir = None
+    if args.map:
+        import maps
+        try:
+            cells_dir = maps.cells_dir(maps.get(args.map))
+        except KeyError as e:
+            ap.error(e.args[0])
+
+    global _con
+    if args.cmd == "build":
+        con = refresh(cells_dir, jobs=args.jobs, rebuild=args.rebuild, verbose=True)
+        if _other(cells_dir) is None:
+            _con = con
+        else:
+            _others[_other(cells_dir)] = con
+        args.cmd = "stats"
+    if args.cmd == "stats":
+        (n, bad, actors, slots, dl), = _query(
+            "SELECT COUNT(*), SUM(error IS NOT NULL), SUM(actor_count), "
+            "SUM(actor_slots IS NOT NULL), SUM(has_data_layers) FROM cells", (), cells_dir)
+        classes = _query("SELECT class, COUNT(*) FROM actors GROUP BY class ORDER BY 2 DESC LIMIT 10",
+                         (), cells_dir)
+        print(f"{n} cell(s), {actors or 0} actor(s); slots probed for {slots or 0}, "
+              f"{dl or 0} with data layers, {bad or 0} unparsed")
+        for cls, k in classes:
+            print(f"  {k:6d}  {cls}")
+    elif args.cmd == "find-class":
+        hits = find_actors(args.bp_class, args.limit, cells_dir)
+        for h in hits:
+            print(f"{h['cell']}  {h['actor']}  ({h['umap_size']} b)")
+        if not hits:
+            print(f"no vanilla instance of {args.bp_class} in any cell", file=sys.stderr)
+            return 1
+    elif args.cmd == "cell":
+        info = cell_info(args.name, cells_dir)
+        if info is None:
+            print(f"no cell {args.name}", file=sys.stderr)
+            return 1
+        actors = info.pop("actors")
+        for k, v in info.items():
+            print(f"{k:16s} {v}")
+        for a in actors:
+            print(f"  {a['name']}  [{a['class']}]")
+    elif args.cmd == "template":
+        name = pick_template_cell(cells_dir=cells_dir)
+        print(name or "no candidate")
+        return 0 if name else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("cell_catalog", lambda: _main(sys.argv[1:])))
@@ -21,9 +21,8 @@ for %%F in ("%UMAP%") do set "AFTER=%%~tF"
 if "!AFTER!"=="!BEFORE!" goto wait_main
 echo   Main umap ready.
 
-echo [2/3] Cleaning and recreating mod _Generated_ ...
-if exist "%GENDIR%" rd /s /q "%GENDIR%"
-mkdir "%GENDIR%"
+echo [2/3] Ensuring mod _Generated_ exists ^(cells are rebuilt incrementally^)...
+if not exist "%GENDIR%" mkdir "%GENDIR%"
 
 echo [2b/3] Cloning BP actors from map_work_changes.json into auto-resolved WP cells...
 python clone_bp_actors.py ^
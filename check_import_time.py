@@ -0,0 +1,128 @@
+"""
+Import-time budget for the pipeline modules.
+
+Every script here is started many times per build (one per phase, one per
+worker, plus `--help` / cache-hit runs that do almost nothing), so work
+done at import — resolving game paths, expanding the BP registry, picking
+a template cell — is paid on every start and used by few. Those are lazy
+now (mt_paths.resolve(), bp_registry._builtin(), clone_bp_actors
+.template_cell()); this check keeps them that way.
+
+Each module is imported in a fresh interpreter under `python -X importtime`
+with the MTMI_* path variables removed from the environment, so a module
+that touches a game path at import fails outright instead of quietly
+reading the developer's install. The cumulative time of the module's own
+import line is compared against the budget:
+
+    python check_import_time.py                   # all modules, default budget
+    python check_import_time.py --budget-ms 80
+    python check_import_time.py clone_bp_actors bp_registry -v
+
+Exit status is 1 when any module fails to import or exceeds its budget.
+Timings are the best of --repeat runs to keep a busy machine from
+producing false alarms.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+MODULES = (
+    "mt_paths",
+    "artifact_cache",
+    "mt_trace",
+    "mt_profile",
+    "build_manifest",
+    "phase_runner",
+    "uassetgui",
+    "uasset_header",
+    "usmap",
+    "cargo_table",
+    "cell_catalog",
+    "cargo_index",
+    "bp_registry",
+    "placement_store",
+    "mesh_deps",
+    "import_cargo_data",
+    "import_meshes",
+    "convert2",
+    "payout_eval",
+    "clone_bp_actors",
+    "scene_report",
+    "pipeline",
+    "watch",
+    "matrix_build",
+    "maps",
+    "shared_cache",
+    "pak_builder",
+)
+DEFAULT_BUDGET_MS = 150.0
+# Per-module overrides (ms) for modules that legitimately pull in more.
+BUDGETS_MS: dict[str, float] = {}
+
+
+def _clean_env() -> dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("MTMI_")}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def import_time_us(module: str) -> tuple[int | None, str]:
+    """Cumulative import time of `module` in µs, or (None, error text)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, env=_clean_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        return None, "\n".join(lines[-5:]) or f"exit {proc.returncode}"
+    # "import time: self [us] | cumulative | imported package"
+    for line in reversed(proc.stderr.splitlines()):
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]), ""
+    return None, f"no importtime line for {module}"
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Fail when a pipeline module imports too slowly.")
+    ap.add_argument("modules", nargs="*", default=list(MODULES))
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                    help=f"default per-module budget (default {DEFAULT_BUDGET_MS:g})")
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs per module")
+    ap.add_argument("-v", "--verbose", action="store_true", help="print passing modules too")
+    args = ap.parse_args(argv)
+
+    failed = 0
+    for mod in args.modules:
+        budget = BUDGETS_MS.get(mod, args.budget_ms)
+        best, err = None, ""
+        for _ in range(max(1, args.repeat)):
+            us, err = import_time_us(mod)
+            if us is None:
+                break
+            best = us if best is None else min(best, us)
+        if best is None:
+            failed += 1
+            print(f"FAIL {mod}: import failed without MTMI_* set\n    {err}", file=sys.stderr)
+            continue
+        ms = best / 1000
+        if ms > budget:
+            failed += 1
+            print(f"FAIL {mod}: {ms:.1f} ms > {budget:g} ms budget", file=sys.stderr)
+        elif args.verbose:
+            print(f"ok   {mod}: {ms:.1f} ms")
+    print(f"{len(args.modules) - failed}/{len(args.modules)} module(s) within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -9,6 +9,11 @@ returns the smallest cell whose spatial bounds contain the coords).
 
 Add a new BP class by extending BP_TEMPLATES: point to a vanilla cell
 (or the main Jeju_World.umap) that contains a working instance.
+
+Entries go to the map their "map" key names (maps.py; the default map
+without one). Without --gen-dir every map in maps.json is done in one
+run: the cargo and BP-class phases once, then each map's find-cells and
+its cell/registration pass concurrently, all into the one mod tree.
 """
 
 import argparse
@@ -17,19 +22,56 @@ import json
 import os
 import re
 import shutil
-import subprocess
+import struct
 import sys
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+from artifact_cache import (CACHE_ROOT, ArtifactCache, break_links, digest_parts,
+                            file_digest, tool_version, unlink_outputs)
 from bp_registry import REGISTRY, template_for_class
-from mt_paths import GAME_CONTENT, CELLS_DIR, JEJU_MAIN, MAPPINGS, VANILLA_CARGOS_01
+import build_manifest
+import cargo_index
+import cargo_table
+import cell_catalog
+from phase_runner import run_phases
+import maps
+import mt_paths
+import mt_profile
+import mt_trace
+import placement_store
 
-MAPPINGS = str(MAPPINGS)
 INJECTOR = Path("MTBPInjector/bin/Release/net8.0/MTBPInjector.exe")
 MOD_CONTENT_ROOT = Path("MapChangeTest_P/MotorTown/Content")
 MOD_CARGOS        = MOD_CONTENT_ROOT / "DataAsset" / "Cargos.uasset"
 MOD_CARGOS_01     = MOD_CONTENT_ROOT / "DataAsset" / "Cargos_01.uasset"
 
+# Injector outputs (mod BP classes, Cargos_01, safety-net DP overrides) are
+# keyed on every input that shapes them and restored from here when nothing
+# changed — see artifact_cache.py.
+CACHE = ArtifactCache()
+# Everything this run ships into the mod tree, claimed in the build
+# manifest once the run succeeds; the clean stage deletes what isn't.
+OUTPUTS = build_manifest.Outputs("clone_bp_actors")
+CARGO_OUTPUTS = build_manifest.Outputs("mutate-cargos")
+
+
+@lru_cache(maxsize=None)
+def injector_version() -> str:
+    """Version stamp of the current injector build. MTBPInjector.exe is
+    only the apphost; the code that shapes outputs lives in the dlls."""
+    return tool_version([INJECTOR.with_suffix(".dll"), INJECTOR.parent / "UAssetAPI.dll"])
+
+
+def asset_digests(uasset: Path) -> list[str | None]:
+    """Digests of a package's .uasset/.uexp/.ubulk (None where missing)."""
+    return [file_digest(uasset.with_suffix(ext)) for ext in (".uasset", ".uexp", ".ubulk")]
+
+
+def asset_outputs(uasset: Path) -> list[Path]:
+    return [uasset.with_suffix(".uasset"), uasset.with_suffix(".uexp")]
+
 
 def load_new_cargos() -> list[dict]:
     """Read delivery_points.json's `new_cargos` list. Each entry is shipped
@@ -73,6 +115,7 @@ def materialize_new_cargos(new_cargos: list[dict]) -> bool:
             if p.exists():
                 p.unlink()
                 print(f"  cleaned stale {p.name}")
+        CARGO_OUTPUTS.commit()
         return True
     for p in stale:
         if p.exists(): p.unlink()
@@ -84,15 +127,26 @@ def materialize_new_cargos(new_cargos: list[dict]) -> bool:
         {k: v for k, v in c.items() if k != "safety_dps"}
         for c in new_cargos
     ]
+    outputs = asset_outputs(MOD_CARGOS_01)
+    key = CACHE.key("mutate-cargos", spec, asset_digests(mt_paths.VANILLA_CARGOS_01),
+                    file_digest(mt_paths.MAPPINGS), injector_version())
+    if CACHE.fetch(key, outputs):
+        print(f"  [cache] {MOD_CARGOS_01.name} restored ({len(spec)} new cargo row(s))")
+        if not verify_new_cargo_rows(spec):
+            return False
+        CARGO_OUTPUTS.add(*outputs)
+        CARGO_OUTPUTS.commit()
+        return True
+    unlink_outputs(outputs)
     import tempfile
     MOD_CARGOS_01.parent.mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
         json.dump(spec, tf); spec_path = tf.name
     try:
-        r = subprocess.run([
+        r = mt_trace.run([
             str(INJECTOR), "mutate-cargos",
-            "--mappings",   MAPPINGS,
-            "--src-uasset", str(VANILLA_CARGOS_01),
+            "--mappings",   str(mt_paths.MAPPINGS),
+            "--src-uasset", str(mt_paths.VANILLA_CARGOS_01),
             "--dst-uasset", str(MOD_CARGOS_01),
             "--spec",       spec_path,
         ], capture_output=True, text=True)
@@ -103,6 +157,52 @@ def materialize_new_cargos(new_cargos: list[dict]) -> bool:
     finally:
         try: os.unlink(spec_path)
         except OSError: pass
+    if not verify_new_cargo_rows(spec):
+        unlink_outputs(outputs)
+        return False
+    CACHE.store(key, outputs)
+    CARGO_OUTPUTS.add(*outputs)
+    CARGO_OUTPUTS.commit()
+    return True
+
+
+_CARGO_SPEC_KEYS = {"copy_from", "new_id", "display_source", "safety_dps"}
+
+
+def verify_new_cargo_rows(spec: list[dict]) -> bool:
+    """Read the generated Cargos_01 back with cargo_table.py and check every
+    new_id row is in it. A missing row fails the phase (recipes referencing
+    it would crash MT); a scalar override that reads back different only
+    warns, since mutate-cargos already reports truncations and unknown
+    fields. Skipped with a note when the table can't be decoded directly."""
+    try:
+        with cargo_table.DataTable(MOD_CARGOS_01, mt_paths.MAPPINGS) as t:
+            missing = []
+            for c in spec:
+                fields = {k: v for k, v in c.items()
+                          if k not in _CARGO_SPEC_KEYS and not k.startswith("_")
+                          and isinstance(v, (bool, int, float, str))}
+                row = t.row(c["new_id"], fields)
+                if row is None:
+                    missing.append(c["new_id"])
+                    continue
+                for k, want in fields.items():
+                    if k not in row:
+                        continue
+                    got = row[k]
+                    same = (got == want if isinstance(want, (bool, str)) or isinstance(got, bool)
+                            else isinstance(got, (int, float)) and abs(got - want) <= 1e-6 * max(1.0, abs(want)))
+                    if not same:
+                        print(f"  WARNING: {c['new_id']}.{k} reads back as {got!r}, spec says {want!r}",
+                              file=sys.stderr)
+    except (OSError, ValueError, RuntimeError, struct.error) as e:
+        print(f"  note: {MOD_CARGOS_01.name} not verified ({e})")
+        return True
+    if missing:
+        print(f"  ERROR: {MOD_CARGOS_01.name} is missing new cargo row(s): {', '.join(missing)}",
+              file=sys.stderr)
+        return False
+    print(f"  verified {len(spec)} new cargo row(s) in {MOD_CARGOS_01.name}")
     return True
 
 
@@ -123,21 +223,18 @@ def inject_new_cargos_into_safety_dps(new_cargos: list[dict]) -> bool:
     if not by_class:
         return True
     import copy, tempfile
-    examples_dir = Path("CargoImport/delivery_points")
-    if not examples_dir.exists():
-        print(f"  [boost] {examples_dir} missing — run import_cargo_data.py first", file=sys.stderr)
+    idx = cargo_index.load_index()
+    if not idx:
+        print(f"  [boost] {cargo_index.IMPORT_ROOT} missing — run import_cargo_data.py first", file=sys.stderr)
         return False
     dp_folder_rel = Path("Objects/Mission/Delivery/DeliveryPoint")
-    src_root = GAME_CONTENT
+    src_root = mt_paths.GAME_CONTENT
     dst_root = MOD_CONTENT_ROOT
     affected = 0
-    for ex_path in sorted(examples_dir.glob("*.example.json")):
-        try:
-            ex = json.loads(ex_path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        cls = ex.get("_source_class")
-        if cls not in by_class:
+    for cls in sorted(by_class):
+        ex = idx.dp_example(cls)
+        if ex is None:
+            print(f"  [boost] {cls}: no vanilla DP example — skipped", file=sys.stderr)
             continue
         recipes = ex.get("recipes") or []
         if not recipes:
@@ -158,12 +255,22 @@ def inject_new_cargos_into_safety_dps(new_cargos: list[dict]) -> bool:
         if not src_uasset.exists():
             print(f"  [boost] vanilla {src_uasset.name} missing — skipped", file=sys.stderr)
             continue
+        outputs = asset_outputs(dst_uasset)
+        key = CACHE.key("mutate-bp-cdo", cls, cls, full_recipes, asset_digests(src_uasset),
+                        file_digest(mt_paths.MAPPINGS), injector_version())
+        if CACHE.fetch(key, outputs):
+            print(f"    [cache] {dst_uasset.name} restored")
+            OUTPUTS.add(*outputs)
+            affected += 1
+            continue
+        unlink_outputs(outputs)
+        dst_uasset.parent.mkdir(parents=True, exist_ok=True)
         with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
             json.dump(full_recipes, tf); spec_path = tf.name
         try:
-            r = subprocess.run([
+            r = mt_trace.run([
                 str(INJECTOR), "mutate-bp-cdo",
-                "--mappings",   MAPPINGS,
+                "--mappings",   str(mt_paths.MAPPINGS),
                 "--src-uasset", str(src_uasset),
                 "--dst-uasset", str(dst_uasset),
                 "--src-class",  cls,
@@ -177,6 +284,8 @@ def inject_new_cargos_into_safety_dps(new_cargos: list[dict]) -> bool:
             print(r.stdout); print(r.stderr, file=sys.stderr); return False
         for line in r.stdout.splitlines():
             if line.strip(): print(f"    {line}")
+        CACHE.store(key, outputs)
+        OUTPUTS.add(*outputs)
         affected += 1
     print(f"  [boost] safety-net injection touched {affected} vanilla DP(s)")
     return True
@@ -189,8 +298,9 @@ def prepare_mod_bp_class(tpl: dict) -> bool:
           must be the SAME LENGTH so file offsets stay valid).
        2. If `production_recipes` is set, invoke MTBPInjector mutate-bp-cdo
           to swap ProductionConfigs in the new BP's CDO.
-       Idempotent: regenerates from source each call so registry edits take
-       effect immediately."""
+       Idempotent: output is keyed on the source BP bytes, class names, recipes
+       and injector build, and restored from the artifact cache when none of
+       them changed — registry edits still take effect immediately."""
     tgt_path  = tpl.get("target_bp_path")
     tgt_class = tpl.get("target_bp_class")
     if not tgt_path or not tgt_class:
@@ -212,6 +322,18 @@ def prepare_mod_bp_class(tpl: dict) -> bool:
     dst_uasset.parent.mkdir(parents=True, exist_ok=True)
 
     recipes = tpl.get("production_recipes")
+    outputs = asset_outputs(dst_uasset)
+    # The byte-clone path never touches the injector, so its key leaves the
+    # mappings + injector build out — a rebuild shouldn't invalidate it.
+    key = CACHE.key("mod-bp-class", src_class, tgt_class, recipes or None,
+                    asset_digests(src_uasset),
+                    *((file_digest(mt_paths.MAPPINGS), injector_version()) if recipes else ()))
+    if CACHE.fetch(key, outputs):
+        print(f"  [cache] mod BP class {tgt_class} restored at {tgt_path}")
+        OUTPUTS.add(*outputs)
+        return True
+    unlink_outputs(outputs)
+
     if recipes:
         # Mutate CDO + byte-rename in one step. Source schema is in mappings,
         # so the CDO parses correctly there; rename happens after save.
@@ -220,9 +342,9 @@ def prepare_mod_bp_class(tpl: dict) -> bool:
             json.dump(recipes, tf)
             recipes_path = tf.name
         try:
-            r = subprocess.run([
+            r = mt_trace.run([
                 str(INJECTOR), "mutate-bp-cdo",
-                "--mappings",   MAPPINGS,
+                "--mappings",   str(mt_paths.MAPPINGS),
                 "--src-uasset", str(src_uasset),
                 "--dst-uasset", str(dst_uasset),
                 "--src-class",  src_class,
@@ -245,6 +367,8 @@ def prepare_mod_bp_class(tpl: dict) -> bool:
             if not s.exists():
                 print(f"  ERROR: source BP missing {s}", file=sys.stderr); return False
             (dst_uasset.parent / (tgt_short + ext)).write_bytes(s.read_bytes().replace(needle, replace))
+    CACHE.store(key, outputs)
+    OUTPUTS.add(*outputs)
     print(f"  prepared mod BP class {tgt_class} at {tgt_path}")
     return True
 # Fallback template cell used when creating a new WP cell for far coords.
@@ -258,63 +382,67 @@ def prepare_mod_bp_class(tpl: dict) -> bool:
 #   - small enough that copying it per delivery point is cheap
 #   - no DataLayers in its main-map registration (those gate streaming)
 # `0V18V8JBXKXUL8YILWZKCSMB4` was hand-picked and meets all three.
-# `auto_pick_template_cell()` falls back to scanning the `_Generated_`
-# folder if the preferred cell is missing (e.g. game update renamed it).
+# `auto_pick_template_cell()` falls back to the cell catalog's pick if the
+# preferred cell is missing (e.g. game update renamed it).
 _PREFERRED_TEMPLATE_CELL = "0V18V8JBXKXUL8YILWZKCSMB4"
-_TEMPLATE_CACHE = Path(__file__).with_suffix(".template_cache")
-
-def auto_pick_template_cell() -> str:
-    """Return a usable vanilla WP cell name. Order:
-       1. Cached result from a prior auto-pick.
-       2. The preferred (hand-picked) cell if its .umap still exists.
-       3. First scanned cell in size band [4000, 7000] bytes whose byte
-          signature begins with a UE5 .umap magic (0xC1832A9E little-endian).
-       4. Hardcoded preferred name (will fail later if missing — let it).
+
+
+def auto_pick_template_cell(map_name: str | None = None) -> str:
+    """Return a usable vanilla WP cell name of a map (maps.py; the default
+    map for None). Order:
+       1. The map's template_cell, else the preferred (hand-picked) cell,
+          if the map's cell catalog has it.
+       2. The catalog's pick: smallest parseable cell with no data-layer
+          references and at least one Actors slot (see cell_catalog.py).
+       3. Hardcoded preferred name (will fail later if missing — let it).
     """
-    if _TEMPLATE_CACHE.exists():
-        cached = _TEMPLATE_CACHE.read_text(encoding="utf-8").strip()
-        if cached and (CELLS_DIR / f"{cached}.umap").exists():
-            return cached
-    pref = CELLS_DIR / f"{_PREFERRED_TEMPLATE_CELL}.umap"
-    if pref.exists():
-        _TEMPLATE_CACHE.write_text(_PREFERRED_TEMPLATE_CELL, encoding="utf-8")
-        return _PREFERRED_TEMPLATE_CELL
-    # Scan: small UE5 .umap files in the _Generated_ folder.
-    print(f"  [template-cell] preferred '{_PREFERRED_TEMPLATE_CELL}' missing; scanning...", file=sys.stderr)
-    UE5_UMAP_MAGIC = b"\x9e\x2a\x83\xc1"
-    for p in sorted(CELLS_DIR.glob("*.umap")):
-        sz = p.stat().st_size
-        if not (4000 <= sz <= 7000): continue
-        with open(p, "rb") as f:
-            head = f.read(4)
-        if head != UE5_UMAP_MAGIC: continue
-        name = p.stem
-        print(f"  [template-cell] picked '{name}' ({sz}b)", file=sys.stderr)
-        _TEMPLATE_CACHE.write_text(name, encoding="utf-8")
+    m = maps.get(map_name)
+    cells = maps.cells_dir(m)
+    preferred = m["template_cell"] or _PREFERRED_TEMPLATE_CELL
+    if cell_catalog.has_cell(preferred, cells):
+        return preferred
+    print(f"  [template-cell] preferred '{preferred}' missing in {m['name']}; querying cell catalog...", file=sys.stderr)
+    name = cell_catalog.pick_template_cell(cells_dir=cells)
+    if name:
+        info = cell_catalog.cell_info(name, cells)
+        print(f"  [template-cell] picked '{name}' ({info['umap_size']}b, {info['actor_slots']} slot(s))", file=sys.stderr)
         return name
-    print(f"  [template-cell] WARNING: no candidate found, falling back to '{_PREFERRED_TEMPLATE_CELL}'", file=sys.stderr)
-    return _PREFERRED_TEMPLATE_CELL
+    print(f"  [template-cell] WARNING: no candidate found, falling back to '{preferred}'", file=sys.stderr)
+    return preferred
+
 
+def template_cell(map_name: str | None = None) -> str:
+    """auto_pick_template_cell(), on first use — building the cell catalog
+    isn't free, and --help or a run with no cell work never needs it."""
+    return _template_cell(map_name)
 
-TEMPLATE_CELL = auto_pick_template_cell()
 
+@lru_cache(maxsize=None)
+def _template_cell(map_name: str | None) -> str:
+    # Positional only, so template_cell() and template_cell(None) share an
+    # entry (lru_cache keys them apart).
+    return auto_pick_template_cell(map_name)
 
-def _pick_owner(hits: list[dict]) -> str | None:
+
+def _pick_owner(hits: list[dict], cells_dir: Path | None = None) -> str | None:
     owners = [(int(h["level"]), h["grid"], h["owner"]) for h in hits]
     owners = [(lvl, grid, name) for (lvl, grid, name) in owners
-              if (CELLS_DIR / f"{name}.umap").exists() and lvl <= 2]
+              if cell_catalog.has_cell(name, cells_dir) and lvl <= 2]
     if not owners:
         return None
     owners.sort(key=lambda t: (t[0], 0 if t[1] == "MainGrid" else 1))
     return owners[0][2]
 
 
-def resolve_cells_batch(points: list[tuple[float, float]]) -> list[str | None]:
-    """Resolve all (x, y) points against vanilla WP cells in ONE injector
-    invocation. Previous per-point calls reloaded the 30 MB mappings + the
-    main Jeju_World.umap each time and dominated pipeline runtime."""
+def resolve_cells_batch(points: list[tuple[float, float]],
+                        map_name: str | None = None) -> list[str | None]:
+    """Resolve all (x, y) points against a map's vanilla WP cells in ONE
+    injector invocation. Previous per-point calls reloaded the 30 MB
+    mappings + the main Jeju_World.umap each time and dominated pipeline
+    runtime."""
     if not points:
         return []
+    m = maps.get(map_name)
     import tempfile
     with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
         json.dump([{"x": x, "y": y} for (x, y) in points], tf)
@@ -322,10 +450,10 @@ def resolve_cells_batch(points: list[tuple[float, float]]) -> list[str | None]:
     with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
         out_path = tf.name
     try:
-        r = subprocess.run(
+        r = mt_trace.run(
             [str(INJECTOR), "find-cells-batch",
-             "--main", str(JEJU_MAIN),
-             "--mappings", MAPPINGS,
+             "--main", str(maps.vanilla(m)),
+             "--mappings", str(mt_paths.MAPPINGS),
              "--spec", in_path,
              "--output", out_path],
             capture_output=True, text=True)
@@ -337,7 +465,7 @@ def resolve_cells_batch(points: list[tuple[float, float]]) -> list[str | None]:
         for p in (in_path, out_path):
             try: os.unlink(p)
             except OSError: pass
-    return [_pick_owner(entry.get("containing", [])) for entry in data]
+    return [_pick_owner(entry.get("containing", []), maps.cells_dir(m)) for entry in data]
 
 
 def resolve_cell(x: float, y: float) -> str | None:
@@ -361,13 +489,29 @@ def entry_seed(e: dict) -> str:
                      "blueprint_path", "blueprint_class"))
 
 
+def map_cell_fields(map_name: str | None = None) -> dict:
+    """The cell_spec() fields every cell of a map shares."""
+    m = maps.get(map_name)
+    return {
+        "template-cell": template_cell(map_name),
+        "cells-dir":     str(maps.cells_dir(m)),
+        # PackageNameToLoad / WorldAsset and the RuntimeCellData label.
+        "package-root":  maps.cells_package(m),
+        "world-name":    maps.world_name(m),
+    }
+
+
 def cell_spec(new_cell: str, x: float, y: float, mod_gen_dir: Path,
-              hier_level: int = -1, grid_levels_index: int = 0) -> dict:
+              hier_level: int = -1, grid_levels_index: int = 0,
+              map_name: str | None = None, shared: dict | None = None) -> dict:
     """Spec for one cell registration. Consumed by register-cells-batch so N
-    cells land in the main map via a single UAssetAPI load/save."""
+    cells land in the main map via a single UAssetAPI load/save. `shared`
+    is map_cell_fields(map_name), worked out once by callers that queue
+    many cells of one map."""
     extent = 6400 * (2 ** (hier_level + 1))
+    shared = shared or map_cell_fields(map_name)
     return {
-        "template-cell":     TEMPLATE_CELL,
+        "template-cell":     shared["template-cell"],
         "new-cell-name":     new_cell,
         "x":                 f"{x}",
         "y":                 f"{y}",
@@ -375,8 +519,10 @@ def cell_spec(new_cell: str, x: float, y: float, mod_gen_dir: Path,
         "grid":              "MainGrid",
         "hier-level":        str(hier_level),
         "grid-levels-index": str(grid_levels_index),
-        "cells-dir":         str(CELLS_DIR),
+        "cells-dir":         shared["cells-dir"],
         "mod-cells-dir":     str(mod_gen_dir),
+        "package-root":      shared["package-root"],
+        "world-name":        shared["world-name"],
     }
 
 
@@ -389,11 +535,11 @@ def register_cells_batch(main_in: str, main_out: str, specs: list[dict]) -> bool
         json.dump(specs, tf)
         spec_path = tf.name
     try:
-        r = subprocess.run([
+        r = mt_trace.run([
             str(INJECTOR), "register-cells-batch",
             "--main",     main_in,
             "--output",   main_out,
-            "--mappings", MAPPINGS,
+            "--mappings", str(mt_paths.MAPPINGS),
             "--spec",     spec_path,
         ], capture_output=True, text=True)
     finally:
@@ -408,15 +554,164 @@ def register_cells_batch(main_in: str, main_out: str, specs: list[dict]) -> bool
     return True
 
 
-def main():
+# ----------------------------------------------------------------------
+# Incremental cell rebuild
+# ----------------------------------------------------------------------
+# Every run used to re-seed and re-clone every vanilla and created cell and
+# re-register every new cell against its map's umap, even when only one
+# delivery point moved. Instead, each target cell gets a fingerprint over
+# everything that shapes its bytes (ordered clone specs, the vanilla or
+# template cell it's seeded from, the clone sources/preloads, mappings,
+# injector build). A cell is rebuilt only when its fingerprint or its
+# on-disk outputs differ from what the last successful run recorded;
+# everything else in _Generated_ is left untouched and files for cells no
+# entry maps to any more are deleted.
+#
+# The main map is handled the same way at whole-file granularity: the
+# registration + persistent-level clone pass is a pure function of the
+# pristine (pre-registration) map umap and its specs, so its output
+# is keyed in the artifact cache. The pristine map is cached too, because
+# with --main-in == --main-out the file on disk is our own output and a
+# re-apply must start from the unpatched bytes.
+_CELL_STATE = CACHE_ROOT / "cell_state.json"
+_PKG_EXTS = (".umap", ".uexp", ".ubulk")
+# Maps run their cell passes on threads of one process; each rewrites its
+# own gen_dir's slot of the shared state file.
+_STATE_LOCK = threading.Lock()
+
+
+def _load_cell_state(gen_dir: Path) -> dict:
+    try:
+        all_state = json.loads(_CELL_STATE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return all_state.get(str(gen_dir.resolve()), {})
+
+
+def _save_cell_state(gen_dir: Path, state: dict) -> None:
+    with _STATE_LOCK:
+        try:
+            all_state = json.loads(_CELL_STATE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            all_state = {}
+        all_state[str(gen_dir.resolve())] = state
+        _CELL_STATE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _CELL_STATE.with_name(_CELL_STATE.name + ".tmp")
+        tmp.write_text(json.dumps(all_state, indent=1), encoding="utf-8")
+        os.replace(tmp, _CELL_STATE)
+
+
+def created_cell_tiles(gen_dir: Path) -> dict[str, tuple[int, int]]:
+    """{cell: (tile_x, tile_y)} of the L-1 cells the last successful run
+    registered under gen_dir (scene_report.py)."""
+    created = _load_cell_state(gen_dir).get("created", {})
+    return {c: (int(t[0]), int(t[1])) for c, t in created.items()}
+
+
+def package_files(base: Path) -> list[Path]:
+    """.umap + .uexp of a map package, given the .umap (or extensionless) path."""
+    base = Path(base)
+    if base.suffix == ".umap":
+        base = base.with_suffix("")
+    return [base.with_name(base.name + ".umap"), base.with_name(base.name + ".uexp")]
+
+
+def files_sig(paths: list[Path]) -> list:
+    """Cheap change signature: (size, mtime_ns) per file, None if missing."""
+    sig = []
+    for p in paths:
+        try:
+            st = Path(p).stat()
+            sig.append([st.st_size, st.st_mtime_ns])
+        except OSError:
+            sig.append(None)
+    return sig
+
+
+def spec_input_digests(specs: list[dict]) -> list:
+    """Digests of the files a clone spec reads besides the target cell: the
+    source map holding the actor to copy and any preloaded BP schemas."""
+    out = []
+    for s in specs:
+        src = [file_digest(p) for p in package_files(Path(s["source_umap"]))]
+        pre = [asset_digests(Path(p)) for p in str(s.get("preload_bp", "")).split(";") if p]
+        out.append([src, pre])
+    return out
+
+
+def cell_fingerprint(cell: str, created: bool, specs: list[dict], map_name: str | None = None) -> str:
+    seed = template_cell(map_name) if created else cell
+    return digest_parts(
+        "cell", cell, created, seed,
+        [file_digest(p) for p in package_files(maps.cells_dir(maps.get(map_name)) / seed)],
+        specs, spec_input_digests(specs),
+        file_digest(mt_paths.MAPPINGS), injector_version())
+
+
+def seed_cell(cell: str, created: bool, gen_dir: Path, map_name: str | None = None) -> None:
+    """(Re)seed a cell's .umap/.uexp in gen_dir before cloning into it.
+    Vanilla cells are copied from the game's _Generated_; created cells are
+    copies of the template cell with its 25-char name byte-replaced by the
+    new one — the same transform register-new-cell applies (see
+    RegisterOneCell), done here so a created cell can be rebuilt without
+    re-registering it against the main map."""
+    dsts = package_files(gen_dir / cell)
+    unlink_outputs(dsts)
+    template = template_cell(map_name) if created else None
+    cells = maps.cells_dir(maps.get(map_name))
+    for src, dst in zip(package_files(cells / (template or cell)), dsts):
+        if not src.exists():
+            continue
+        if not created:
+            shutil.copy2(src, dst)
+            continue
+        if len(cell) != len(template):
+            raise ValueError(f"cell name length mismatch: template '{template}' vs '{cell}'")
+        dst.write_bytes(src.read_bytes().replace(template.encode("ascii"), cell.encode("ascii")))
+
+
+def sweep_orphan_cells(gen_dir: Path, keep: set[str]) -> list[str]:
+    """Delete package files in gen_dir that belong to no current cell.
+    gen_dir is wholly owned by this script, so anything else is stale."""
+    gone = set()
+    for p in gen_dir.iterdir():
+        if p.is_file() and p.suffix in _PKG_EXTS and p.stem not in keep:
+            p.unlink()
+            gone.add(p.stem)
+    return sorted(gone)
+
+
+def main(argv: list[str] | None = None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", required=True)
-    ap.add_argument("--gen-dir", required=True, help="Mod _Generated_ directory")
-    ap.add_argument("--main-in", help="Jeju_World.umap to modify for new cells")
-    ap.add_argument("--main-out", help="Output Jeju_World.umap after new-cell registrations")
-    args = ap.parse_args()
+    ap.add_argument("--gen-dir", help="Mod _Generated_ directory of one map "
+                                      "(default: every map's, with its mod umap as --main-in/--main-out)")
+    ap.add_argument("--main-in", help="map umap to modify for new cells (with --gen-dir)")
+    ap.add_argument("--main-out", help="output map umap after new-cell registrations (with --gen-dir)")
+    ap.add_argument("--map", action="append", default=[], metavar="NAME",
+                    help="only this map from maps.json (repeatable; with --gen-dir, the map it belongs to)")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="Max concurrent injector phases (default: MTMI_JOBS, else min(4, CPUs))")
+    args = ap.parse_args(argv)
+    if (args.main_in or args.main_out) and not args.gen_dir:
+        ap.error("--main-in / --main-out need --gen-dir")
+    if args.gen_dir and len(args.map) > 1:
+        ap.error("--gen-dir is one map's directory; pass at most one --map with it")
+    for name in args.map:
+        if name not in maps.table():
+            ap.error(f"unknown map {name!r} (maps: {', '.join(maps.names())})")
+    mt_paths.resolve()   # fail fast on missing MTMI_* vars, now that args are valid
+    if args.gen_dir:
+        targets = [{"map": args.map[0] if args.map else maps.default(), "gen_dir": Path(args.gen_dir),
+                    "main_in": args.main_in, "main_out": args.main_out or args.main_in}]
+    else:
+        targets = [{"map": name, "gen_dir": maps.get(name)["gen_dir"],
+                    "main_in": str(maps.get(name)["target"]), "main_out": str(maps.get(name)["target"])}
+                   for name in args.map or maps.names()]
 
-    cfg = json.loads(Path(args.config).read_text(encoding="utf-8"))
+    # Just the two sections this pass uses, from the placement store
+    # (re-imported first if the JSON was edited) — not the whole file.
+    cfg = placement_store.load(args.config, ("blueprint_actors", "delivery_points"))
     entries = []
     for group in cfg.get("blueprint_actors", {}).values():
         if isinstance(group, list):
@@ -424,7 +719,7 @@ def main():
 
     # Slim delivery_points section — placement data + delivery_key only.
     # The actual config (label, recipes, marker/icon, storage cap) lives in
-    # delivery_points.json and was loaded into REGISTRY at import time.
+    # delivery_points.json and is compiled into REGISTRY (see bp_registry).
     for dp in cfg.get("delivery_points", []) or []:
         if not isinstance(dp, dict): continue
         # Pure-comment entries: every key starts with '_' (e.g. just a
@@ -439,91 +734,86 @@ def main():
         if reg_key not in REGISTRY:
             print(f"  delivery_points: '{dp_key}' not in delivery_points.json — skipped")
             continue
-        entries.append({
+        entry = {
             "X": dp.get("X"), "Y": dp.get("Y"), "Z": dp.get("Z"),
             "Pitch": dp.get("Pitch", 0.0), "Roll": dp.get("Roll", 0.0), "Yaw": dp.get("Yaw", 0.0),
             "asset_key": reg_key,
             "blueprint_class": REGISTRY[reg_key]["bp_class"],
-        })
+        }
+        if dp.get("map"):
+            entry["map"] = dp["map"]
+        entries.append(entry)
 
-    if not entries:
+    by_map = maps.split(_debug_filter(entries), "BP actor")
+    for t in targets:
+        t["entries"] = by_map[t["map"]]
+    targets = [t for t in targets if t["entries"]]
+    if not targets:
         print("No blueprint_actors / delivery_points entries.")
+        OUTPUTS.commit()
         return 0
 
-    gen_dir = Path(args.gen_dir)
-    gen_dir.mkdir(parents=True, exist_ok=True)
-    seeded: set[str] = set()
+    try:
+        return _run(args, targets)
+    finally:
+        if CACHE.hits or CACHE.misses:
+            print(f"  {CACHE.summary()}")
+
+
+# One actor per cell. Template has 4 slots but spawning multiple BP actors
+# in the same cell has proven brittle (neighbor slots sometimes fail to
+# spawn). 1-per-cell gives reliable placement; we just register more L-1
+# tiles. User OK'd this explicitly.
+MAX_SLOTS_PER_CREATED_CELL = 1
+
+# Sentinel for entries injected directly into the persistent level of the
+# main map instead of into a WP cell. clone-batch can target Jeju_World.umap
+# the same way it targets a cell — the underlying actor-clone code only
+# cares about LevelExport semantics, not the package name.
+MAIN_LEVEL_KEY = "__MAIN_LEVEL__"
+
 
-    main_in = args.main_in
-    main_out = args.main_out or main_in
-    created_cells: dict[tuple[int, int], str] = {}
+# Auto-shard: when the home L-1 tile fills up, spill into adjacent L-1
+# tiles (same hier-level, neighbor grid coords). WP streams neighbor tiles
+# together with the home tile, so the actors spawn as if in one big cell —
+# without needing higher hierarchical levels (whose key math in
+# register-new-cell isn't verified).
+# Expanding ring of tile offsets around the home tile. Generated on demand
+# so there's no cap on how many actors can be placed at one island — each
+# extra shard adds MAX_SLOTS_PER_CREATED_CELL slots. Order: center, then
+# rings of increasing Chebyshev distance (1, 2, 3, ...).
+def tile_offset(idx: int) -> tuple[int, int]:
+    if idx == 0:
+        return (0, 0)
+    # Find ring r such that (2r-1)^2 <= idx < (2r+1)^2.
+    r = 1
+    while (2 * r + 1) ** 2 <= idx:
+        r += 1
+    local = idx - (2 * r - 1) ** 2       # 0..(8r-1)
+    side = 2 * r                          # length of each ring side
+    s = local // side                     # which side 0..3
+    t = local %  side                     # position along side
+    if s == 0: return ( r,     -r + t)    # right
+    if s == 1: return ( r - t,  r)        # top
+    if s == 2: return (-r,      r - t)    # left
+    return (-r + t, -r)                   # bottom
+
+
+def plan_cells(entries: list[dict], resolved_cells: list[str | None],
+               gen_dir: Path, map_name: str | None = None) -> dict | None:
+    """First pass: resolve/create the destination cell of every entry and
+    group entries by cell (the second pass runs ONE clone-batch call per
+    cell). `resolved_cells` is the find-cells result, one vanilla cell name
+    or None per entry. No injector calls happen here — created cells are
+    only queued — which is what lets benchmarks/ time this pass without
+    the game. Returns {grouped, pending_cells, registered_tiles, seeded},
+    or None when an entry can't be placed."""
+    grouped: dict[str, list] = {}   # cell_name -> list[(entry, tpl, is_created, slot)]
+    seeded: set[str] = set()
     # For created cells we replace template slots in-place (can't grow Actors
     # list without bloating per-actor metadata, which UE rejects). Count the
     # slot index per created cell so each actor goes into the next slot.
     slot_counter: dict[str, int] = {}
-    # One actor per cell. Template has 4 slots but spawning multiple BP actors
-    # in the same cell has proven brittle (neighbor slots sometimes fail to
-    # spawn). 1-per-cell gives reliable placement; we just register more L-1
-    # tiles. User OK'd this explicitly.
-    MAX_SLOTS_PER_CREATED_CELL = 1
-
-    # DEBUG: set MAX_BP=1 to clone only the first entry.
-    _max = int(os.environ.get("MAX_BP", "999999"))
-    if _max < len(entries):
-        print(f"  [debug] MAX_BP={_max} — limiting from {len(entries)} entries")
-        entries = entries[:_max]
-    # DEBUG: set BP_SKIP=ParkingSmall,Garage to skip specific BP classes
-    _skip = set(k.strip() for k in os.environ.get("BP_SKIP", "").split(",") if k.strip())
-    if _skip:
-        before = len(entries)
-        # Match on either blueprint_class or the short name derived from asset_key
-        def _match(e):
-            cls = e.get("blueprint_class", "")
-            return cls in _skip or any(k in cls for k in _skip)
-        entries = [e for e in entries if not _match(e)]
-        print(f"  [debug] BP_SKIP={sorted(_skip)} — {before} -> {len(entries)} entries")
-
-    # delivery_points.json `new_cargos` list: each entry clones a vanilla
-    # cargo row into a new id and applies arbitrary field overrides
-    # (PaymentPer1Km, BasePayment, SpawnProbability, ...). Recipes
-    # reference the new ids by name. Per-cargo `safety_dps` lists vanilla
-    # DP classes whose inputs the new cargo gets injected into — required
-    # because shipping a new cargo with zero vanilla consumers crashes
-    # MT on world load.
-    new_cargos = load_new_cargos()
-    if not materialize_new_cargos(new_cargos): return 1
-    if not inject_new_cargos_into_safety_dps(new_cargos): return 1
-
-    # First pass: resolve/create destination cell per entry, group entries by
-    # cell. Second pass: run ONE clone-batch call per cell (all clones into
-    # that cell happen in a single UAssetAPI load/save).
-    grouped: dict[str, list] = {}   # cell_name -> list[(entry, tpl, is_created)]
-
-    # Auto-shard state: when the home L-1 tile fills up, spill into adjacent
-    # L-1 tiles (same hier-level, neighbor grid coords). WP streams neighbor
-    # tiles together with the home tile, so the actors spawn as if in one
-    # big cell — without needing higher hierarchical levels (whose key math
-    # in register-new-cell isn't verified).
-    # Expanding ring of tile offsets around the home tile. Generated on demand
-    # so there's no cap on how many actors can be placed at one island — each
-    # extra shard adds MAX_SLOTS_PER_CREATED_CELL slots. Order: center, then
-    # rings of increasing Chebyshev distance (1, 2, 3, ...).
-    def tile_offset(idx: int) -> tuple[int, int]:
-        if idx == 0:
-            return (0, 0)
-        # Find ring r such that (2r-1)^2 <= idx < (2r+1)^2.
-        r = 1
-        while (2 * r + 1) ** 2 <= idx:
-            r += 1
-        local = idx - (2 * r - 1) ** 2       # 0..(8r-1)
-        side = 2 * r                          # length of each ring side
-        s = local // side                     # which side 0..3
-        t = local %  side                     # position along side
-        if s == 0: return ( r,     -r + t)    # right
-        if s == 1: return ( r - t,  r)        # top
-        if s == 2: return (-r,      r - t)    # left
-        return (-r + t, -r)                   # bottom
-
     # Absolute tile (gx, gy) -> cell_name already registered for it. Shared
     # across homes so two entries whose home tiles spill into the same
     # physical neighbor tile reuse the same cell instead of registering twice.
@@ -534,23 +824,12 @@ def main():
     # after the first pass; registering per-actor was re-serializing the huge
     # Jeju_World.umap N times and dominated pipeline runtime.
     pending_cells: list[dict] = []
+    shared: dict = {}               # map_cell_fields(), once a cell is queued
 
-    # Materialize any mod-shipped BP classes referenced by entries: byte-clone
-    # the source .uasset under the mod folder and (optionally) mutate its CDO.
-    # Done once up-front so all clone-batch work that follows uses the final
-    # state of the mod assets.
-    prepared_keys = set()
-    for e in entries:
-        k = e.get("asset_key")
-        tpl = REGISTRY.get(k) if k else None
-        if not tpl or not tpl.get("target_bp_path") or k in prepared_keys: continue
-        if not prepare_mod_bp_class(tpl): return 1
-        prepared_keys.add(k)
-
-    # Pre-resolve every entry's vanilla-cell membership in a single injector
-    # invocation. Previously this was a per-entry subprocess call that each
-    # reloaded mappings + Jeju_World.umap.
-    resolved_cells = resolve_cells_batch([(e["X"], e["Y"]) for e in entries])
+    def queue_cell(new_cell, cx, cy):
+        if not shared:
+            shared.update(map_cell_fields(map_name))
+        pending_cells.append(cell_spec(new_cell, cx, cy, gen_dir, shared=shared))
 
     def pick_cell_for_entry(e, i):
         # Returns (cell_name, is_created)
@@ -587,17 +866,11 @@ def main():
             cy = (tile[1] + 0.5) * 12800.0
             new_cell = make_cell_name(entry_seed(e))
             print(f"  [{entry_idx_ref[0]}] home {home} step {steps_taken}: queued L-1 cell '{new_cell}' at tile {tile}")
-            pending_cells.append(cell_spec(new_cell, cx, cy, gen_dir))
+            queue_cell(new_cell, cx, cy)
             registered_tiles[tile] = new_cell
             seeded.add(new_cell)
             return new_cell, True
 
-    # Sentinel for entries injected directly into the persistent level of the
-    # main map instead of into a WP cell. clone-batch can target Jeju_World.umap
-    # the same way it targets a cell — the underlying actor-clone code only
-    # cares about LevelExport semantics, not the package name.
-    MAIN_LEVEL_KEY = "__MAIN_LEVEL__"
-
     entry_idx_ref = [0]
     for i, e in enumerate(entries):
         entry_idx_ref[0] = i
@@ -615,7 +888,7 @@ def main():
 
         # Heavy BPs (delivery points etc.) crash the WP cell-streaming path
         # because cells validate stricter than persistent-level load. Route
-        # them straight into Jeju_World.umap — same context as vanilla
+        # them straight into the map's umap — same context as vanilla
         # instances of the class.
         if tpl_entry.get("inject_into_main"):
             print(f"  [{i}] {bp_class} @ ({e['X']}, {e['Y']}, {e['Z']}) -> MAIN persistent level")
@@ -632,7 +905,7 @@ def main():
                     cy = (home[1] + 0.5) * 12800.0
                     new_cell = make_cell_name(f"shadow_{home}")
                     print(f"        [shadow-cell] queuing WP cell '{new_cell}' at tile {home} so the persistent-level actor at ({e['X']}, {e['Y']}) gets streamed")
-                    pending_cells.append(cell_spec(new_cell, cx, cy, gen_dir))
+                    queue_cell(new_cell, cx, cy)
                     registered_tiles[home] = new_cell
                     seeded.add(new_cell)
             continue
@@ -640,15 +913,10 @@ def main():
         cell, needs_create = pick_cell_for_entry(e, i)
         if cell is None:
             print(f"  [{i}] failed to pick/create cell for ({e['X']},{e['Y']})", file=sys.stderr)
-            return 1
-        # Seed cell from vanilla once (for existing vanilla cells)
-        if not needs_create and cell not in seeded:
-            for ext in (".umap", ".uexp"):
-                src = CELLS_DIR / f"{cell}{ext}"
-                dst = gen_dir / f"{cell}{ext}"
-                if src.exists():
-                    shutil.copy2(src, dst)
-            seeded.add(cell)
+            return None
+        # Vanilla cells get seeded from the game's copy — but only if their
+        # fingerprint changed since the last run (see rebuild below).
+        seeded.add(cell)
 
         if os.environ.get("SKIP_BP_CLONE") == "1":
             print(f"  [{i}] SKIP_BP_CLONE=1 — cell registered, actor clone skipped")
@@ -663,13 +931,14 @@ def main():
 
         print(f"  [{i}] {bp_class} @ ({e['X']}, {e['Y']}, {e['Z']}) -> cell {cell}" + (f" slot={assigned_slot}" if assigned_slot is not None else ""))
         grouped.setdefault(cell, []).append((e, tpl_entry, needs_create, assigned_slot))
+    return {"grouped": grouped, "pending_cells": pending_cells,
+            "registered_tiles": registered_tiles, "seeded": seeded}
 
-    # Second pass: build a super-batch job list covering every target cell.
-    # Cell registrations AND clone jobs run in ONE injector invocation via
-    # register-and-clone so the 30 MB MotorTown.usmap is parsed exactly once
-    # for the entire BP phase.
-    import json as _json, tempfile
-    jobs = []
+
+def build_cell_specs(grouped: dict[str, list]) -> dict[str, list]:
+    """Second pass: the clone spec list for every target cell of a plan,
+    main-level entries under MAIN_LEVEL_KEY."""
+    cell_specs: dict[str, list] = {}
     for cell, items in grouped.items():
         specs = []
         for (e, tpl, is_created, assigned_slot) in items:
@@ -708,51 +977,225 @@ def main():
             if is_created and assigned_slot is not None:
                 spec["slot"] = assigned_slot
             specs.append(spec)
-        if not specs:
-            continue
-        # MAIN_LEVEL_KEY routes the clone batch at Jeju_World.umap itself so
-        # the cloned actor lands in the persistent level alongside the
-        # vanilla instances of its class.
-        if cell == MAIN_LEVEL_KEY:
-            jobs.append({
-                "dst-cell": main_out,  # main-in will already be patched by the
-                "output":   main_out,  # register phase by the time clone runs
-                "spec":     specs,
-            })
-        else:
+        if specs:
+            cell_specs[cell] = specs
+    return cell_specs
+
+
+def _debug_filter(entries: list[dict]) -> list[dict]:
+    # DEBUG: set MAX_BP=1 to clone only the first entry.
+    _max = int(os.environ.get("MAX_BP", "999999"))
+    if _max < len(entries):
+        print(f"  [debug] MAX_BP={_max} — limiting from {len(entries)} entries")
+        entries = entries[:_max]
+    # DEBUG: set BP_SKIP=ParkingSmall,Garage to skip specific BP classes
+    _skip = set(k.strip() for k in os.environ.get("BP_SKIP", "").split(",") if k.strip())
+    if _skip:
+        before = len(entries)
+        # Match on either blueprint_class or the short name derived from asset_key
+        def _match(e):
+            cls = e.get("blueprint_class", "")
+            return cls in _skip or any(k in cls for k in _skip)
+        entries = [e for e in entries if not _match(e)]
+        print(f"  [debug] BP_SKIP={sorted(_skip)} — {before} -> {len(entries)} entries")
+    return entries
+
+
+def _run(args, targets: list[dict]) -> int:
+    entries = [e for t in targets for e in t["entries"]]
+
+    # delivery_points.json `new_cargos` list: each entry clones a vanilla
+    # cargo row into a new id and applies arbitrary field overrides
+    # (PaymentPer1Km, BasePayment, SpawnProbability, ...). Recipes
+    # reference the new ids by name. Per-cargo `safety_dps` lists vanilla
+    # DP classes whose inputs the new cargo gets injected into — required
+    # because shipping a new cargo with zero vanilla consumers crashes
+    # MT on world load.
+    new_cargos = load_new_cargos()
+
+    # Up-front phases, all independent of each other: they read only vanilla
+    # inputs and write disjoint files, so they run concurrently (see
+    # phase_runner.py) and all finish before any clone-batch work starts.
+    #  - Cargos_01 + safety-net DP overrides from `new_cargos`.
+    #  - Any mod-shipped BP classes referenced by entries: byte-clone the
+    #    source .uasset under the mod folder and (optionally) mutate its CDO.
+    #  - Every entry's vanilla-cell membership, in a single injector
+    #    invocation. Previously this was a per-entry subprocess call that
+    #    each reloaded mappings + Jeju_World.umap.
+    phases = [
+        ("new-cargos", lambda: materialize_new_cargos(new_cargos)),
+        ("safety-dps", lambda: inject_new_cargos_into_safety_dps(new_cargos)),
+    ]
+    prepared_keys = set()
+    for e in entries:
+        k = e.get("asset_key")
+        tpl = REGISTRY.get(k) if k else None
+        if not tpl or not tpl.get("target_bp_path") or k in prepared_keys: continue
+        phases.append((f"bp-class:{k}", lambda tpl=tpl: prepare_mod_bp_class(tpl)))
+        prepared_keys.add(k)
+    for t in targets:
+        t["phase"] = maps.stage_name("find-cells", maps.get(t["map"]))
+        phases.append((t["phase"], lambda t=t: resolve_cells_batch(
+            [(e["X"], e["Y"]) for e in t["entries"]], t["map"])))
+    ok, results = run_phases(phases, jobs=args.jobs)
+    if not ok:
+        return 1
+    if len(targets) == 1:
+        t = targets[0]
+        rc = _run_map(t, results[t["phase"]])
+    else:
+        # Each map's pass is one injector process on its own files (its
+        # cells, its main map), so the maps overlap instead of queueing.
+        ok, _ = run_phases([(maps.stage_name("cells", maps.get(t["map"])),
+                             lambda t=t: _run_map(t, results[t["phase"]]) == 0) for t in targets],
+                           jobs=args.jobs, label="maps")
+        rc = 0 if ok else 1
+    if rc == 0:
+        OUTPUTS.commit()
+    return rc
+
+
+def _run_map(t: dict, resolved_cells: list[str | None]) -> int:
+    """Cells and main-map registrations of one map: plan, rebuild what
+    changed, record its state. Claims go into OUTPUTS; the caller commits."""
+    entries, map_name = t["entries"], t["map"]
+    gen_dir = Path(t["gen_dir"])
+    gen_dir.mkdir(parents=True, exist_ok=True)
+    main_in = t["main_in"]
+    main_out = t["main_out"]
+
+    plan = plan_cells(entries, resolved_cells, gen_dir, map_name)
+    if plan is None:
+        return 1
+    grouped, pending_cells = plan["grouped"], plan["pending_cells"]
+    registered_tiles, seeded = plan["registered_tiles"], plan["seeded"]
+
+    # Second pass: build the clone spec list for every target cell. Cell
+    # registrations AND clone jobs run in ONE injector invocation via
+    # register-and-clone so the 30 MB MotorTown.usmap is parsed exactly once
+    # per map for the entire BP phase — and only for the cells that actually
+    # changed.
+    import json as _json, tempfile
+    cell_specs = build_cell_specs(grouped)
+    main_specs = cell_specs.pop(MAIN_LEVEL_KEY, [])
+
+    # Decide which cells to rebuild. A cell is clean when its fingerprint
+    # matches the last successful run AND its files are still exactly what
+    # that run wrote (a wiped or hand-edited _Generated_ rebuilds itself).
+    state = _load_cell_state(gen_dir)
+    prev_cells = state.get("cells", {})
+    created = set(registered_tiles.values())
+    fingerprints = {c: cell_fingerprint(c, c in created, cell_specs.get(c, []), map_name) for c in seeded}
+    dirty = sorted(c for c in seeded
+                   if prev_cells.get(c, {}).get("hash") != fingerprints[c]
+                   or prev_cells[c].get("sig") != files_sig(package_files(gen_dir / c)))
+    for c in sweep_orphan_cells(gen_dir, seeded):
+        print(f"  [cells] removed orphan cell {c}")
+    print(f"  [cells] {len(seeded)} target cell(s): {len(dirty)} to rebuild, {len(seeded) - len(dirty)} unchanged")
+
+    jobs = []
+    for cell in dirty:
+        seed_cell(cell, cell in created, gen_dir, map_name)
+        if cell in cell_specs:
             jobs.append({
                 "dst-cell": str(gen_dir / f"{cell}.umap"),
                 "output":   str(gen_dir / f"{cell}.umap"),
-                "spec":     specs,
+                "spec":     cell_specs[cell],
             })
 
-    if pending_cells or jobs:
+    # Main map: registrations + persistent-level clones, all-or-nothing.
+    main_files = package_files(Path(main_in)) if main_in else []
+    out_files = package_files(Path(main_out)) if main_out else []
+    in_place = bool(main_in) and Path(main_in).resolve() == Path(main_out).resolve()
+    prev_main = state.get("main") or {}
+    ours_on_disk = bool(prev_main) and files_sig(out_files) == prev_main.get("out_sig")
+    if in_place and ours_on_disk:
+        # The map still holds our own output; its pristine bytes are cached.
+        pristine = prev_main["pristine"]
+    else:
+        pristine = [file_digest(p) for p in main_files]
+        ours_on_disk = ours_on_disk and pristine == prev_main.get("pristine")
+    main_state = None
+    main_work = bool(pending_cells or main_specs)
+    if main_work and in_place and not ours_on_disk:
+        # Fresh map from the map stage: keep its unpatched bytes so a later
+        # run can re-apply a changed registration set without rebuilding it.
+        CACHE.store(CACHE.key("main-pristine", pristine), main_files)
+    if main_work:
+        main_key = CACHE.key("register-and-clone:main", pristine, pending_cells, main_specs,
+                             spec_input_digests(main_specs), file_digest(mt_paths.MAPPINGS), injector_version())
+        if ours_on_disk and prev_main.get("key") == main_key:
+            print(f"  [main] registrations + {len(main_specs)} main-level clone(s) unchanged — {Path(main_out).name} left as is")
+            main_work = False
+        elif CACHE.fetch(main_key, out_files):
+            # Break the hardlink: UAssetGUI and the injector rewrite this map
+            # in place on later runs.
+            break_links(out_files)
+            print(f"  [cache] {Path(main_out).name} restored ({len(pending_cells)} registration(s), {len(main_specs)} main-level clone(s))")
+            main_work = False
+        elif in_place and ours_on_disk:
+            if not CACHE.fetch(CACHE.key("main-pristine", pristine), main_files):
+                print(f"  [main] {Path(main_in).name} already holds a previous run's registrations and its "
+                      f"unpatched copy is no longer cached — re-run the map stage first", file=sys.stderr)
+                return 1
+            break_links(main_files)
+        main_state = {"key": main_key, "pristine": pristine}
+    elif in_place and ours_on_disk and prev_main.get("key"):
+        # Nothing targets the main map any more — put the unpatched one back.
+        if CACHE.fetch(CACHE.key("main-pristine", pristine), main_files):
+            break_links(main_files)
+            print(f"  [main] no registrations left — restored unpatched {Path(main_in).name}")
+    if main_work:
+        # With no registrations the clone pass reads main-in directly.
+        jobs.insert(0, {
+            "dst-cell": main_out if pending_cells else main_in,
+            "output":   main_out,
+            "spec":     main_specs,
+        })
+
+    if main_work or jobs:
+        # register-new-cell also copies the template cell into mod-cells-dir;
+        # cells are seeded above instead, so that copy goes to a scratch dir
+        # and unchanged created cells aren't reset to the bare template.
+        scratch = tempfile.mkdtemp(prefix="mtmi_cells_")
         combined = {
             "main-in":  main_in,
             "main-out": main_out,
-            "register": pending_cells,
+            "register": [dict(c, **{"mod-cells-dir": scratch}) for c in pending_cells] if main_work else [],
             "clone":    jobs,
         }
         with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tf:
             _json.dump(combined, tf)
             spec_path = tf.name
         try:
-            r = subprocess.run([
+            r = mt_trace.run([
                 str(INJECTOR), "register-and-clone",
-                "--mappings", MAPPINGS,
+                "--mappings", str(mt_paths.MAPPINGS),
                 "--spec",     spec_path,
             ], capture_output=True, text=True)
         finally:
             try: os.unlink(spec_path)
             except OSError: pass
+            shutil.rmtree(scratch, ignore_errors=True)
         if r.returncode != 0:
             print(r.stdout)
             print(r.stderr, file=sys.stderr)
             return r.returncode
         for line in r.stdout.splitlines():
             if line.strip(): print(f"      {line}")
-    return 0
+        if main_work:
+            CACHE.store(main_state["key"], out_files)
 
+    if main_state:
+        main_state["out_sig"] = files_sig(out_files)
+    _save_cell_state(gen_dir, {
+        "cells": {c: {"hash": fingerprints[c], "sig": files_sig(package_files(gen_dir / c))}
+                  for c in sorted(seeded)},
+        "created": {c: list(t) for t, c in sorted(registered_tiles.items())},
+        "main": main_state,
+    })
+    OUTPUTS.add(*(p for c in seeded for p in package_files(gen_dir / c)), *out_files)
+    return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(mt_profile.run("clone_bp_actors", main))
@@ -7,9 +7,13 @@ Supports:
   - StaticMeshActor (static mesh props/objects)
 
 Usage:
-    python convert2.py <input.json> [map_work_changes.json] [output.json]
+    python convert2.py <input.json> [map_work_changes.json] [output.json] [--map NAME]
 
 If map_work_changes.json is not specified, looks for it in the script directory.
+Only its dealerships and static_meshes sections are read, from the
+placement store (placement_store.py) rather than by parsing the file.
+Only the entries of one map are injected: --map NAME (maps.py), else the
+default map. An entry's optional "map" key says which map it belongs to.
 
 Config format (map_work_changes.json):
 {
@@ -42,7 +46,6 @@ import uuid
 import struct
 import base64
 import os
-import shutil
 
 
 # ---------------------------------------------------------------------------
@@ -53,38 +56,29 @@ import shutil
 # ---------------------------------------------------------------------------
 # Asset file paths (for copying missing mesh assets into the mod pak)
 # ---------------------------------------------------------------------------
-from mt_paths import GAME_CONTENT as _GAME_CONTENT
-GAME_CONTENT = str(_GAME_CONTENT)
-import os as _os
-COOKED_CONTENT = _os.environ.get("MTMI_COOKED_CONTENT", "")  # optional editor-cooked path
+import mt_paths  # GAME_CONTENT resolves on first use
+import build_manifest
+import mt_profile
+import mt_trace
+import maps
+import mesh_deps
+import placement_store
 MOD_CONTENT = r"MapChangeTest_P\MotorTown\Content"
+# The output JSON + every mesh asset copied into the mod tree; claimed in
+# the build manifest at the end of a successful run. Each map other than
+# the default one has its own claim set, so the maps convert side by side.
+OUTPUTS = build_manifest.Outputs("convert2")
+_MAP_OUTPUTS: dict[str, build_manifest.Outputs] = {}
 
 
-def _copy_mesh_asset(game_path, script_dir):
-    """Copy mesh .uasset/.uexp/.ubulk to mod pak if not in game files."""
-    if not game_path.startswith("/Game/"):
-        return
-    rel = game_path[len("/Game/"):]
-    game_file = os.path.join(GAME_CONTENT, rel + ".uasset")
-    if os.path.exists(game_file):
-        return  # already in game, no copy needed
-    cooked_file = os.path.join(COOKED_CONTENT, rel + ".uasset")
-    if not os.path.exists(cooked_file):
-        return
-    mod_target = os.path.join(script_dir, MOD_CONTENT, rel)
-    os.makedirs(os.path.dirname(mod_target), exist_ok=True)
-    copied = []
-    for ext in [".uasset", ".uexp", ".ubulk"]:
-        src = os.path.join(COOKED_CONTENT, rel + ext)
-        dst = mod_target + ext
-        try:
-            if os.path.exists(src):
-                shutil.copy2(src, dst)
-                copied.append(ext)
-        except Exception:
-            pass
-    if copied:
-        print(f"  Copied {rel} ({', '.join(copied)})")
+def outputs_for(map_name: str | None) -> build_manifest.Outputs:
+    if map_name is None or map_name == maps.default():
+        return OUTPUTS
+    return _MAP_OUTPUTS.setdefault(map_name, build_manifest.Outputs(f"convert2:{map_name}"))
+
+# The map_work_changes.json sections this script reads (via the
+# placement store, see placement_store.py).
+MOD_KINDS = ("dealerships", "static_meshes")
 
 
 def ensure_name(name_map, name):
@@ -369,28 +363,48 @@ def patch_level_binary(level_export, new_actor_nums):
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python convert2.py <input.json> [map_work_changes.json] [output.json]")
-        sys.exit(1)
-
-    input_path = sys.argv[1]
+    argv = sys.argv[1:]
+    map_name = None
+    if "--map" in argv:
+        i = argv.index("--map")
+        map_name = argv[i + 1] if i + 1 < len(argv) else ""
+        del argv[i:i + 2]
+        if map_name not in maps.table():
+            print(f"Unknown map {map_name!r} (maps: {', '.join(maps.names())})")
+            return 1
+    if not argv:
+        print("Usage: python convert2.py <input.json> [map_work_changes.json] [output.json] [--map NAME]")
+        return 1
+    mt_paths.resolve()
+
+    input_path = argv[0]
     script_dir = os.path.dirname(os.path.abspath(__file__))
     mods_path = (
-        sys.argv[2]
-        if len(sys.argv) > 2
+        argv[1]
+        if len(argv) > 1
         else os.path.join(script_dir, "map_work_changes.json")
     )
-    if len(sys.argv) > 3:
-        output_path = sys.argv[3]
+    if len(argv) > 2:
+        output_path = argv[2]
     else:
         base, ext = os.path.splitext(input_path)
         output_path = f"{base}MOD{ext}"
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        asset = json.load(f)
-    with open(mods_path, "r", encoding="utf-8") as f:
-        mods = json.load(f)
-
+    with mt_trace.span("load json", file=os.path.basename(input_path)):
+        with open(input_path, "r", encoding="utf-8") as f:
+            asset = json.load(f)
+        mods = placement_store.load(mods_path, MOD_KINDS)
+    return inject(asset, mods, output_path, script_dir, map_name)
+
+
+def inject(asset: dict, mods: dict, output_path: str, script_dir: str,
+           map_name: str | None = None) -> int:
+    """Add the dealerships and static meshes in `mods` that belong to
+    map_name (the default map for None) to the parsed map `asset`
+    (modified in place) and write it to output_path. watch.py calls this
+    directly with a copy of the vanilla map it keeps parsed."""
+    outputs = outputs_for(map_name)
+    map_name = map_name or maps.default()
     name_map = asset["NameMap"]
     exports = asset["Exports"]
     imports = asset["Imports"]
@@ -404,7 +418,7 @@ def main():
             break
     if level_idx is None:
         print("Error: No PersistentLevel export found.")
-        sys.exit(1)
+        return 1
 
     level_export = exports[level_idx]
     level_num = level_idx + 1
@@ -421,7 +435,7 @@ def main():
     # ======================================================================
     # DEALERSHIPS
     # ======================================================================
-    dealer_spawns = gather_list(mods, "dealerships")
+    dealer_spawns = maps.split(gather_list(mods, "dealerships"), "dealership")[map_name]
     if dealer_spawns:
         for n in (
             "MTDealerVehicleSpawnPoint", "Default__MTDealerVehicleSpawnPoint",
@@ -843,7 +857,7 @@ def main():
     # ======================================================================
     # STATIC MESHES
     # ======================================================================
-    mesh_entries = gather_list(mods, "static_meshes")
+    mesh_entries = maps.split(gather_list(mods, "static_meshes"), "static mesh")[map_name]
     if mesh_entries:
         for n in (
             "StaticMeshActor", "Default__StaticMeshActor",
@@ -883,8 +897,9 @@ def main():
                 mesh_imp = find_or_add_import(imports, name_map, export_name, mesh_pkg,
                                               "/Script/Engine", "StaticMesh")
                 mesh_cache[pkg_path] = mesh_imp
-                # Copy asset files to mod if not in game
-                _copy_mesh_asset(pkg_path, script_dir)
+        # Meshes (and the materials / textures they pull in) that exist
+        # only in the editor's cooked output ship with the mod.
+        mesh_deps.ship(mesh_cache, os.path.join(script_dir, MOD_CONTENT), outputs)
 
         print(f"Injecting {len(mesh_entries)} static mesh actors ...")
         for i, entry in enumerate(mesh_entries):
@@ -922,25 +937,30 @@ def main():
                 depends_map.extend([[], []])
 
     # ---- Register all new actors in PersistentLevel -----------------------
-    if not all_new_actor_nums:
-        print("Nothing to inject.")
-        sys.exit(0)
-
-    patch_level_binary(level_export, all_new_actor_nums)
+    # A map with nothing to inject (e.g. only BP actors, maps.py) is still
+    # written: the map and actors stages build on it.
+    if all_new_actor_nums:
+        patch_level_binary(level_export, all_new_actor_nums)
+    else:
+        print("Nothing to inject; writing the map unchanged.")
 
     # ---- Bookkeeping ------------------------------------------------------
     if asset.get("Generations"):
         asset["Generations"][0]["ExportCount"] = len(exports)
         asset["Generations"][0]["NameCount"] = len(name_map)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(asset, f, indent=2, ensure_ascii=False)
+    with mt_trace.span("write json", file=os.path.basename(output_path)):
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(asset, f, indent=2, ensure_ascii=False)
+    outputs.add(output_path)
+    outputs.commit()
 
     n_dealers = len(dealer_spawns) if dealer_spawns else 0
     n_meshes = len(mesh_entries) if mesh_entries else 0
     print(f"Done!  {output_path}")
     print(f"  {n_dealers} dealers + {n_meshes} meshes  |  {len(exports)} exports  |  {len(imports)} imports  |  {len(name_map)} names")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(mt_profile.run("convert2", main))
@@ -68,29 +68,35 @@ if "%VALIDATION_FAILED%"=="1" (
 )
 
 rem ----- Mod-side derived paths (don't edit unless you rename the mod folder).
-set "UMAP=MapChangeTest_P\MotorTown\Content\Maps\Jeju\Jeju_World.umap"
-set "GENDIR=MapChangeTest_P\MotorTown\Content\Maps\Jeju\Jeju_World\_Generated_"
+rem Per-map paths (vanilla umap, cached JSON, mod umap, _Generated_) come
+rem from maps.json; `python maps.py --bat` prints one
+rem name^|vanilla^|cache_json^|map_json^|target^|gen_dir line per map.
 set "INJECTOR=MTBPInjector\bin\Release\net8.0\MTBPInjector.exe"
-set "VANILLA_MAP=%MTMI_GAME_CONTENT%\Maps\Jeju\Jeju_World.umap"
-set "CACHE_JSON=Jeju_Worldaa.json"
 
 rem ---- Per-step gating. Each step can be skipped independently. Set STEP_X
 rem ---- to "0" to skip that step. --skip-* flips it; --only-* runs just that
 rem ---- step (convenience for iterating on a single slow stage).
+set "STEP_CHECK=0"
 set "STEP_BUILD=1"
 set "STEP_CLEAN=1"
 set "STEP_MESHES=1"
 set "STEP_CONVERT=1"
 set "STEP_MAP=1"
 set "STEP_ACTORS=1"
+set "STEP_REPORT=1"
 set "STEP_PACK=1"
 set "PULL_MAP=0"
+set "TRACE=0"
 
 :parse_args
 if "%~1"=="" goto after_args
+if /i "%~1"=="--dag"          goto dag
+if /i "%~1"=="--watch"        goto watch
 if /i "%~1"=="--help"         goto usage
 if /i "%~1"=="-h"             goto usage
 if /i "%~1"=="--pull-map"     set "PULL_MAP=1"     & shift & goto parse_args
+if /i "%~1"=="--trace"        set "TRACE=1"        & shift & goto parse_args
+if /i "%~1"=="--check"        set "STEP_CHECK=1"   & shift & goto parse_args
 if /i "%~1"=="--skip-build"   set "STEP_BUILD=0"   & shift & goto parse_args
 if /i "%~1"=="--skip-clean"   set "STEP_CLEAN=0"   & shift & goto parse_args
 if /i "%~1"=="--skip-meshes"  set "STEP_MESHES=0"  & shift & goto parse_args
@@ -98,6 +104,7 @@ if /i "%~1"=="--skip-convert" set "STEP_CONVERT=0" & shift & goto parse_args
 if /i "%~1"=="--skip-map"     set "STEP_MAP=0"     & shift & goto parse_args
 if /i "%~1"=="--skip-actors"  set "STEP_ACTORS=0"  & shift & goto parse_args
 if /i "%~1"=="--skip_actors"  set "STEP_ACTORS=0"  & shift & goto parse_args
+if /i "%~1"=="--skip-report"  set "STEP_REPORT=0"  & shift & goto parse_args
 if /i "%~1"=="--skip-pack"    set "STEP_PACK=0"    & shift & goto parse_args
 if /i "%~1"=="--only-build"   call :only build   & shift & goto parse_args
 if /i "%~1"=="--only-clean"   call :only clean   & shift & goto parse_args
@@ -116,6 +123,7 @@ set "STEP_MESHES=0"
 set "STEP_CONVERT=0"
 set "STEP_MAP=0"
 set "STEP_ACTORS=0"
+set "STEP_REPORT=0"
 set "STEP_PACK=0"
 if /i "%~1"=="build"   set "STEP_BUILD=1"
 if /i "%~1"=="clean"   set "STEP_CLEAN=1"
@@ -123,109 +131,189 @@ if /i "%~1"=="meshes"  set "STEP_MESHES=1"
 if /i "%~1"=="convert" set "STEP_CONVERT=1"
 if /i "%~1"=="map"     set "STEP_MAP=1"
 if /i "%~1"=="actors"  set "STEP_ACTORS=1"
+if /i "%~1"=="report"  set "STEP_REPORT=1"
 if /i "%~1"=="pack"    set "STEP_PACK=1"
 exit /b 0
 
 :usage
 echo fulltest.bat [options]
 echo.
-echo   --pull-map       Cache vanilla Jeju_World.umap -^> %CACHE_JSON% and exit.
-echo                    Source: %VANILLA_MAP%
+echo   --pull-map       Cache every map's vanilla umap -^> its JSON ^(e.g.
+echo                    Jeju_World.umap -^> Jeju_Worldaa.json^) and exit.
+echo                    Maps and paths: python maps.py
 echo.
+echo   --check          First run check_import_time.py and stop if a module is
+echo                    over its import-time budget ^(for developers / CI^)
 echo   --skip-build     Skip MTBPInjector rebuild
-echo   --skip-clean     Skip mod _Generated_ + DC/Actors cleanup
+echo   --skip-clean     Skip orphan cleanup ^(build_manifest.py gc^)
 echo   --skip-meshes    Skip import_meshes.py
 echo   --skip-convert   Skip convert2.py
-echo   --skip-map       Skip UAssetGUI fromjson (regenerate Jeju_World.umap)
+echo   --skip-map       Skip UAssetGUI fromjson (regenerate each map's umap)
 echo   --skip-actors    Skip clone_bp_actors.py (BP injection)
+echo   --skip-report    Skip scene_report.py ^(per-tile budgets + heatmap^)
 echo   --skip-pack      Skip modp.bat pack/deploy
 echo.
 echo   --only-^<stage^>   Run only that stage. Stages: build, clean, meshes,
-echo                    convert, map, actors, pack
+echo                    convert, map, actors, report, pack
+echo.
+echo   --trace          Record every Python stage, sub-phase and injector /
+echo                    UAssetGUI call ^(wall/CPU time, peak RSS, I/O^) into
+echo                    .mtmi_cache\trace.json ^(Chrome trace format^).
+echo.
+echo   --dag [args]     Hand off to pipeline.py: runs only the stages whose
+echo                    inputs changed, independent ones in parallel. Every
+echo                    argument after --dag goes to pipeline.py ^(--dry-run,
+echo                    --only, --skip, --force, --jobs, --tool^).
+echo.
+echo   --watch [args]   Hand off to watch.py: rebuild and redeploy whatever a
+echo                    save of static_meshes.json / delivery_points.json /
+echo                    map_work_changes.json affects, until Ctrl+C. Every
+echo                    argument after --watch goes to watch.py ^(--dry-run,
+echo                    --no-deploy, --debounce, --jobs, --tool^).
 endlocal
 exit /b 0
 
+:dag
+shift
+set "DAG_ARGS="
+:dag_args
+if "%~1"=="" goto dag_run
+set "DAG_ARGS=!DAG_ARGS! %1"
+shift
+goto dag_args
+:dag_run
+python pipeline.py !DAG_ARGS!
+set "DAG_RC=!errorlevel!"
+endlocal & exit /b %DAG_RC%
+
+:watch
+shift
+set "WATCH_ARGS="
+:watch_args
+if "%~1"=="" goto watch_run
+set "WATCH_ARGS=!WATCH_ARGS! %1"
+shift
+goto watch_args
+:watch_run
+python watch.py !WATCH_ARGS!
+set "WATCH_RC=!errorlevel!"
+endlocal & exit /b %WATCH_RC%
+
 :after_args
 
+rem --trace: every Python step (and each process it starts) appends spans
+rem to MTMI_TRACE; they are merged into one Chrome trace at the end.
+if "%TRACE%"=="1" (
+    if defined MTMI_CACHE_DIR (
+        set "MTMI_TRACE=%MTMI_CACHE_DIR%\trace.json"
+    ) else (
+        set "MTMI_TRACE=%~dp0.mtmi_cache\trace.json"
+    )
+    python mt_trace.py reset
+)
+
 if "%PULL_MAP%"=="1" (
-    echo [%TIME%] Pulling vanilla map from extracted content...
-    if not exist "%VANILLA_MAP%" (
-        echo   ERROR: vanilla Jeju_World.umap not found at:
-        echo   %VANILLA_MAP%
-        echo   Extract the game's cooked content there first.
-        exit /b 1
+    echo [%TIME%] Pulling vanilla maps from extracted content...
+    for /f "usebackq tokens=1-6 delims=|" %%A in (`python maps.py --bat`) do (
+        if not exist "%%B" (
+            echo   ERROR: vanilla umap of map '%%A' not found at:
+            echo   %%B
+            echo   Extract the game's cooked content there first.
+            exit /b 1
+        )
+        call :wait_write "%%C" tojson "%%B" "%%C" VER_UE5_5 %MTMI_MAPPINGS_TAG%
+        if errorlevel 1 exit /b 1
+        echo [%TIME%] Cached %%C.
     )
-    call :wait_write "%CACHE_JSON%" tojson "%VANILLA_MAP%" "%CACHE_JSON%" VER_UE5_5 %MTMI_MAPPINGS_TAG%
-    if errorlevel 1 exit /b 1
-    echo [%TIME%] Cached %CACHE_JSON%. You can now run fulltest.bat normally.
+    echo You can now run fulltest.bat normally.
     endlocal
     exit /b 0
 )
 
+rem --check (developers / CI): a module that got slow to import, or reads a
+rem game path at import, fails the run here, before any work. Off by
+rem default: it is a wall-clock check and a busy machine can trip it.
+if "%STEP_CHECK%"=="1" (
+    echo [%TIME%] Checking import-time budgets...
+    python check_import_time.py
+    if errorlevel 1 exit /b 1
+)
+
 if "%STEP_BUILD%"=="1" (
-    echo [%TIME%] [0/6] Rebuilding MTBPInjector ^(no-op if up to date^)...
+    echo [%TIME%] [0/7] Rebuilding MTBPInjector ^(no-op if up to date^)...
     pushd MTBPInjector
     dotnet build -c Release --nologo -v quiet
     if errorlevel 1 ( popd & exit /b 1 )
     popd
-) else ( echo [%TIME%] [0/6] skipped )
-
-if "%STEP_CLEAN%"=="1" (
-    echo [%TIME%] [1/6] Cleaning mod _Generated_ + DC/Actors + DeliveryPoint folders...
-    if exist "%GENDIR%" rd /s /q "%GENDIR%"
-    mkdir "%GENDIR%"
-    rem DC/Actors ships only scene-only placeholder assets — the BP-clone pass
-    rem replaces them at runtime, so any stale copies from prior runs would
-    rem render as the raw placeholder mesh in-game. Wipe the folder each run.
-    if exist "MapChangeTest_P\MotorTown\Content\DC\Actors" rd /s /q "MapChangeTest_P\MotorTown\Content\DC\Actors"
-    rem DeliveryPoint folder holds BOTH our mod-shipped BP classes (ModXXXX)
-    rem AND any vanilla-DP overrides from past pipeline iterations (e.g.
-    rem Storage_Fuel, Refinery_Fuel from the now-removed wholesale boost
-    rem injection). The mod BPs are regenerated by prepare_mod_bp_class
-    rem each run, so a full wipe here is safe — and prevents stale vanilla
-    rem overrides from shipping in the new pak.
-    if exist "MapChangeTest_P\MotorTown\Content\Objects\Mission\Delivery\DeliveryPoint" rd /s /q "MapChangeTest_P\MotorTown\Content\Objects\Mission\Delivery\DeliveryPoint"
-) else ( echo [%TIME%] [1/6] skipped )
+) else ( echo [%TIME%] [0/7] skipped )
 
 if "%STEP_MESHES%"=="1" (
-    echo [%TIME%] [2/6] Importing meshes ^(static_meshes.json -^> map_work_changes.json^)...
+    echo [%TIME%] [1/7] Importing meshes ^(static_meshes.json -^> map_work_changes.json^)...
     python import_meshes.py
     if errorlevel 1 exit /b 1
-) else ( echo [%TIME%] [2/6] skipped )
+) else ( echo [%TIME%] [1/7] skipped )
 
+rem Steps 2, 3 and 5 run once per map in maps.json, one after another;
+rem --dag runs the maps side by side.
 if "%STEP_CONVERT%"=="1" (
-    echo [%TIME%] [3/6] Building main map JSON ^(dealerships + static meshes^)...
-    if not exist "%CACHE_JSON%" (
-        echo   ERROR: %CACHE_JSON% missing. Run: fulltest.bat --pull-map
-        exit /b 1
+    echo [%TIME%] [2/7] Building map JSON ^(dealerships + static meshes^)...
+    for /f "usebackq tokens=1-6 delims=|" %%A in (`python maps.py --bat`) do (
+        if not exist "%%C" (
+            echo   ERROR: %%C missing. Run: fulltest.bat --pull-map
+            exit /b 1
+        )
+        python convert2.py "%%C" map_work_changes.json "%%D" --map %%A
+        if errorlevel 1 exit /b 1
     )
-    python convert2.py %CACHE_JSON% map_work_changes.json Jeju_World.json
-    if errorlevel 1 exit /b 1
-) else ( echo [%TIME%] [3/6] skipped )
+) else ( echo [%TIME%] [2/7] skipped )
 
 if "%STEP_MAP%"=="1" (
-    echo [%TIME%] [4/6] UAssetGUI fromjson -^> Jeju_World.umap...
-    call :wait_write "%UMAP%" fromjson Jeju_World.json "%UMAP%" VER_UE5_5 %MTMI_MAPPINGS_TAG%
-    if errorlevel 1 exit /b 1
-    echo   Main umap ready.
-) else ( echo [%TIME%] [4/6] skipped )
+    echo [%TIME%] [3/7] UAssetGUI fromjson -^> mod map umaps...
+    for /f "usebackq tokens=1-6 delims=|" %%A in (`python maps.py --bat`) do (
+        call :wait_write "%%E" fromjson "%%D" "%%E" VER_UE5_5 %MTMI_MAPPINGS_TAG%
+        if errorlevel 1 exit /b 1
+        echo   %%A umap ready.
+    )
+) else ( echo [%TIME%] [3/7] skipped )
 
 if "%STEP_ACTORS%"=="1" (
-    echo [%TIME%] [5/6] BP actors -^> WP cells ^(auto-register new cells for far coords^)...
-    python clone_bp_actors.py ^
-        --config map_work_changes.json ^
-        --gen-dir "%GENDIR%" ^
-        --main-in "%UMAP%" ^
-        --main-out "%UMAP%"
+    echo [%TIME%] [4/7] BP actors -^> WP cells ^(auto-register new cells for far coords^)...
+    rem Every map: each into its own mod umap and _Generated_ ^(maps.py^).
+    python clone_bp_actors.py --config map_work_changes.json
     if errorlevel 1 exit /b 1
-) else ( echo [%TIME%] [5/6] skipped )
+) else ( echo [%TIME%] [4/7] skipped )
+
+if "%STEP_REPORT%"=="1" (
+    echo [%TIME%] [5/7] Per-tile scene budgets -^> .mtmi_cache\scene_report...
+    for /f "usebackq tokens=1-6 delims=|" %%A in (`python maps.py --bat`) do (
+        python scene_report.py --map %%A
+        if errorlevel 1 exit /b 1
+    )
+) else ( echo [%TIME%] [5/7] skipped )
+
+if "%STEP_CLEAN%"=="1" (
+    echo [%TIME%] [6/7] Removing orphaned outputs ^(files no pipeline step claims^)...
+    rem Every generating step (import_meshes, convert2, clone_bp_actors and
+    rem its cargo mutation) records what it wrote in the build manifest;
+    rem this deletes whatever else sits in DC/Actors, DeliveryPoint and
+    rem _Generated_ — placeholder copies, overrides or BP classes an older
+    rem config produced. It runs after the generating steps so a file they
+    rem stopped producing this run never reaches the pak, and unchanged
+    rem outputs are kept instead of being wiped and regenerated.
+    python build_manifest.py gc
+    if errorlevel 1 exit /b 1
+) else ( echo [%TIME%] [6/7] skipped )
 
 if "%STEP_PACK%"=="1" (
-    echo [%TIME%] [6/6] Packing and deploying...
+    echo [%TIME%] [7/7] Packing and deploying...
     call .\modp.bat MapChangeTest_P
     if errorlevel 1 exit /b 1
-) else ( echo [%TIME%] [6/6] skipped )
+) else ( echo [%TIME%] [7/7] skipped )
 
+if "%TRACE%"=="1" (
+    python mt_trace.py merge
+    python mt_trace.py summary --top 15
+)
 echo [%TIME%] Done.
 endlocal
 exit /b 0
@@ -23,40 +23,31 @@ Outputs (under CargoImport/):
                          tweak.
   README.md              what each file is, where to find your overrides.
 
-Run from repo root:  python import_cargo_data.py
-Re-run any time the game data updates.
+The cargo catalog is read straight from the cooked Cargos DataTable
+(cargo_table.py + the .usmap schema); UAssetGUI is only used for it when
+that read can't decode the table, and for the delivery-point BPs.
+
+Run from repo root:  python import_cargo_data.py [--full]
+Re-run any time the game data updates — only BPs that changed since the
+last run are reconverted (see the manifest notes above main()).
 """
 
 from __future__ import annotations
-import json, shutil, subprocess, sys, tempfile
+import argparse, json, os, shutil, struct, sys, tempfile
 from pathlib import Path
 
-from mt_paths import GAME_CONTENT, MAPPINGS, MAPPINGS_TAG  # validates env vars at import
-MAPPINGS  = str(MAPPINGS)
-UASSETGUI = "UAssetGUI.exe"
+from artifact_cache import CACHE_ROOT, digest_parts, file_digest
+import mt_paths  # env vars are checked on first use, in main()
+import mt_profile
+import mt_trace
+import cargo_index
+import cargo_table
+import uassetgui
 
-CARGOS_UASSET    = GAME_CONTENT / "DataAsset" / "Cargos.uasset"
-DELIVERY_FOLDER  = GAME_CONTENT / "Objects" / "Mission" / "Delivery" / "DeliveryPoint"
+DELIVERY_FOLDER_REL = Path("Objects") / "Mission" / "Delivery" / "DeliveryPoint"
 OUT_ROOT         = Path("CargoImport")
 
 
-def to_json(uasset: Path, dst: Path) -> bool:
-    """UAssetGUI tojson is async — wait for the file to be (re)written."""
-    if dst.exists(): dst.unlink()
-    proc = subprocess.Popen(
-        [UASSETGUI, "tojson", str(uasset), str(dst), "VER_UE5_5", MAPPINGS_TAG],
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-    import time
-    deadline = time.time() + 30
-    while time.time() < deadline:
-        if dst.exists() and dst.stat().st_size > 0:
-            time.sleep(0.3)  # let the writer flush
-            return True
-        time.sleep(0.2)
-    return False
-
-
 def prop_value(prop: dict):
     """Pull the simple Value field. For nested struct/array, return a
     summary string the user can hand-copy into delivery_points.json."""
@@ -64,32 +55,42 @@ def prop_value(prop: dict):
     return prop.get("Value")
 
 
-def extract_cargo_catalog(cargos_json: Path) -> dict:
-    d = json.loads(cargos_json.read_text(encoding="utf-8"))
-    rows = d["Exports"][0]["Table"]["Data"]
+CATALOG_FIELDS = ("CargoType", "CargoFlags", "VolumeSize", "BasePayment", "PaymentPer1Km",
+                  "PaymentSqrtRatio", "ExportPrice", "ImportPrice", "bAllowStacking",
+                  "MinDeliveryDistance", "MaxDeliveryDistance", "bDepcreated")
+
+
+def build_cargo_catalog(rows) -> dict:
+    """rows: (row name, {field: value}) pairs, from either source below."""
     catalog = []
     types_seen = set()
-    for r in rows:
-        name = r.get("Name")
-        fields = {p.get("Name"): p for p in r.get("Value", [])}
-        ctype = prop_value(fields.get("CargoType")) or "None"
+    for name, fields in rows:
+        ctype = fields.get("CargoType") or "None"
         types_seen.add(str(ctype))
-        catalog.append({
-            "Name":              name,
-            "CargoType":         str(ctype),
-            "VolumeSize":        prop_value(fields.get("VolumeSize")),
-            "BasePayment":       prop_value(fields.get("BasePayment")),
-            "PaymentPer1Km":     prop_value(fields.get("PaymentPer1Km")),
-            "ExportPrice":       prop_value(fields.get("ExportPrice")),
-            "ImportPrice":       prop_value(fields.get("ImportPrice")),
-            "bAllowStacking":    prop_value(fields.get("bAllowStacking")),
-            "MinDeliveryDistance": prop_value(fields.get("MinDeliveryDistance")),
-            "MaxDeliveryDistance": prop_value(fields.get("MaxDeliveryDistance")),
-            "bDepcreated":       prop_value(fields.get("bDepcreated")),
-        })
+        entry = {"Name": name}
+        entry.update({f: fields.get(f) for f in CATALOG_FIELDS})
+        entry["CargoType"] = str(ctype)
+        catalog.append(entry)
     return {"catalog": catalog, "types": sorted(types_seen)}
 
 
+def read_cargo_catalog(cargos_uasset: Path) -> dict:
+    """Catalog straight from the cooked DataTable (cargo_table.py) — no
+    UAssetGUI. Raises cargo_table.UnsupportedLayout if the table can't be
+    decoded with the current mappings."""
+    with cargo_table.DataTable(cargos_uasset, mt_paths.MAPPINGS) as t:
+        return build_cargo_catalog(t.rows(CATALOG_FIELDS))
+
+
+def extract_cargo_catalog(cargos_json: Path) -> dict:
+    """Catalog from a UAssetGUI tojson dump (fallback path)."""
+    d = json.loads(cargos_json.read_text(encoding="utf-8"))
+    rows = d["Exports"][0]["Table"]["Data"]
+    return build_cargo_catalog(
+        (r.get("Name"), {p.get("Name"): prop_value(p) for p in r.get("Value", [])})
+        for r in rows)
+
+
 def extract_recipes(cdo: dict) -> list[dict]:
     """Convert a Default__X_C ProductionConfigs into delivery_points.json
     recipe shape. Returns [] if CDO has no parsed ProductionConfigs (asset
@@ -157,50 +158,175 @@ def build_dp_example(class_name: str, cdo: dict) -> dict:
     }
 
 
+# ----------------------------------------------------------------------
+# Incremental import.
+#
+# Game content only changes on patches, so a manifest (local, under
+# .mtmi_cache/) records every source .uasset's size/mtime/sha256 and the
+# outputs generated from it. Unchanged sources — same stat, or same hash
+# after a touch — are not reconverted; outputs of BPs that disappeared
+# from the game are deleted; the catalog step is skipped outright when
+# Cargos.uasset is unchanged. Editing this script or switching mappings
+# invalidates everything. `--full` ignores the manifest.
+# ----------------------------------------------------------------------
+MANIFEST_PATH = CACHE_ROOT / "cargo_import_manifest.json"
+
+
+def _load_manifest(tool: str) -> dict:
+    try:
+        m = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        if m.get("tool") == tool:
+            return m
+    except (OSError, ValueError):
+        pass
+    return {"tool": tool, "sources": {}}
+
+
+def _save_manifest(m: dict) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    tmp.write_text(json.dumps(m, indent=1), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def _unchanged(src: Path, entry: dict | None) -> bool:
+    """True if `src` matches its manifest entry and every output it
+    produced last time is still on disk. A stat mismatch with identical
+    bytes (re-extracted game files) refreshes the entry in place."""
+    if not entry or not all((OUT_ROOT / o).exists() for o in entry["outputs"]):
+        return False
+    st = src.stat()
+    if [st.st_size, st.st_mtime_ns] == entry["stat"]:
+        return True
+    if file_digest(src) == entry["sha256"]:
+        entry["stat"] = [st.st_size, st.st_mtime_ns]
+        return True
+    return False
+
+
+def _record(src: Path, outputs: list[Path]) -> dict:
+    st = src.stat()
+    return {"stat": [st.st_size, st.st_mtime_ns], "sha256": file_digest(src),
+            "outputs": [o.relative_to(OUT_ROOT).as_posix() for o in outputs]}
+
+
+def _write_if_changed(path: Path, text: str) -> None:
+    """Leave identical files alone so their mtimes (and git status) don't churn."""
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except OSError:
+        pass
+    path.write_text(text, encoding="utf-8")
+
+
 def main() -> int:
+    ap = argparse.ArgumentParser(description="Stage vanilla cargo + delivery-point reference data into CargoImport/.")
+    ap.add_argument("--full", action="store_true", help="ignore the manifest; reconvert everything")
+    args = ap.parse_args()
+    CARGOS_UASSET = mt_paths.VANILLA_CARGOS
+    DELIVERY_FOLDER = mt_paths.GAME_CONTENT / DELIVERY_FOLDER_REL
+    MAPPINGS_TAG = mt_paths.MAPPINGS_TAG
+
     OUT_ROOT.mkdir(exist_ok=True)
     (OUT_ROOT / "cargos").mkdir(exist_ok=True)
     (OUT_ROOT / "delivery_points").mkdir(exist_ok=True)
 
-    print("[1/3] Extracting cargo catalog...")
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_json = Path(tmp) / "cargos.json"
-        if not to_json(CARGOS_UASSET, tmp_json):
-            print(f"  ERROR: failed to dump {CARGOS_UASSET}", file=sys.stderr); return 1
-        catalog_data = extract_cargo_catalog(tmp_json)
-    (OUT_ROOT / "cargos" / "catalog.json").write_text(
-        json.dumps(catalog_data["catalog"], indent=2), encoding="utf-8")
-    (OUT_ROOT / "cargos" / "types.txt").write_text(
-        "\n".join(catalog_data["types"]) + "\n", encoding="utf-8")
-    (OUT_ROOT / "cargos" / "cargo_names.txt").write_text(
-        "\n".join(sorted(c["Name"] for c in catalog_data["catalog"])) + "\n", encoding="utf-8")
-    print(f"  {len(catalog_data['catalog'])} cargos, "
-          f"{len(catalog_data['types'])} cargo types")
-
-    print("[2/3] Extracting delivery-point examples...")
+    tool = digest_parts("import_cargo_data", file_digest(__file__), file_digest(cargo_table.__file__),
+                        MAPPINGS_TAG, uassetgui.converter_cmd()[-1])
+    manifest = _load_manifest(tool)
+    sources = manifest["sources"]
+
+    cargo_outputs = [OUT_ROOT / "cargos" / n for n in ("catalog.json", "types.txt", "cargo_names.txt")]
+    cargos_key = CARGOS_UASSET.as_posix()
+    cargos_dirty = args.full or not _unchanged(CARGOS_UASSET, sources.get(cargos_key))
     bp_files = sorted(p for p in DELIVERY_FOLDER.glob("*.uasset"))
-    written = skipped = 0
+    bp_keys = {bp.as_posix(): bp for bp in bp_files}
+    dirty_bps = [bp for k, bp in bp_keys.items() if args.full or not _unchanged(bp, sources.get(k))]
+
+    # BPs gone from the game take their examples with them.
+    removed = 0
+    for k in [k for k in sources if k != cargos_key and k not in bp_keys]:
+        for o in sources.pop(k)["outputs"]:
+            try: (OUT_ROOT / o).unlink()
+            except FileNotFoundError: pass
+        removed += 1
+
+    # The cargo table is read directly; only if that can't decode it does
+    # Cargos.uasset join the UAssetGUI conversions.
+    catalog_data = None
+    if cargos_dirty:
+        try:
+            with mt_trace.span("read cargo table"):
+                catalog_data = read_cargo_catalog(CARGOS_UASSET)
+        except (OSError, ValueError, RuntimeError, struct.error) as e:   # UnsupportedLayout is a ValueError
+            print(f"  note: direct Cargos read failed ({e}); falling back to UAssetGUI",
+                  file=sys.stderr)
+
+    # Every UAssetGUI conversion (each changed DP BP, plus Cargos on the
+    # fallback) goes through one pool up-front; the extract steps below
+    # just read the JSON back.
     with tempfile.TemporaryDirectory() as tmp:
-        for bp in bp_files:
-            tmp_json = Path(tmp) / (bp.stem + ".json")
-            if not to_json(bp, tmp_json):
-                print(f"  skip {bp.name}: dump failed", file=sys.stderr); skipped += 1; continue
-            try:
-                d = json.loads(tmp_json.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
-                skipped += 1; continue
-            class_name = bp.stem + "_C"
-            cdo = next((e for e in d["Exports"] if e.get("ObjectName") == f"Default__{class_name}"), None)
-            if cdo is None:
-                skipped += 1; continue
-            example = build_dp_example(class_name, cdo)
-            (OUT_ROOT / "delivery_points" / f"{bp.stem}.example.json").write_text(
-                json.dumps(example, indent=2), encoding="utf-8")
-            written += 1
-    print(f"  {written} examples written, {skipped} skipped")
-
-    print("[3/3] Writing README...")
-    (OUT_ROOT / "README.md").write_text(
+        cargos_json = Path(tmp) / "cargos.json"
+        bp_jsons = {bp: Path(tmp) / "bp" / (bp.stem + ".json") for bp in dirty_bps}
+        (Path(tmp) / "bp").mkdir()
+        convert_cargos = cargos_dirty and catalog_data is None
+        pairs = ([(CARGOS_UASSET, cargos_json)] if convert_cargos else []) + list(bp_jsons.items())
+        if pairs:
+            print(f"[0/3] Converting {len(pairs)} changed asset(s) with "
+                  f"{min(uassetgui.default_jobs(), len(pairs))} UAssetGUI process(es)...")
+        with mt_trace.span("uassetgui pool", assets=len(pairs)):
+            done = uassetgui.to_json_many(pairs, MAPPINGS_TAG)
+
+        if not cargos_dirty:
+            print("[1/3] Cargo catalog unchanged (Cargos.uasset matches manifest)")
+        else:
+            print("[1/3] Extracting cargo catalog...")
+            if convert_cargos:
+                if not done[cargos_json]:
+                    print(f"  ERROR: failed to dump {CARGOS_UASSET}", file=sys.stderr); return 1
+                catalog_data = extract_cargo_catalog(cargos_json)
+            _write_if_changed(cargo_outputs[0], json.dumps(catalog_data["catalog"], indent=2))
+            _write_if_changed(cargo_outputs[1], "\n".join(catalog_data["types"]) + "\n")
+            _write_if_changed(cargo_outputs[2],
+                              "\n".join(sorted(c["Name"] for c in catalog_data["catalog"])) + "\n")
+            sources[cargos_key] = _record(CARGOS_UASSET, cargo_outputs)
+            print(f"  {len(catalog_data['catalog'])} cargos, "
+                  f"{len(catalog_data['types'])} cargo types")
+
+        print("[2/3] Extracting delivery-point examples...")
+        written = skipped = 0
+        with mt_trace.span("extract dp examples", bps=len(bp_jsons)):
+            for bp, tmp_json in bp_jsons.items():
+                # A failed conversion stays out of the manifest so the next run
+                # retries it; a BP that converts but has no usable CDO is
+                # recorded with no outputs so it isn't reconverted every run.
+                if not done[tmp_json]:
+                    print(f"  skip {bp.name}: dump failed", file=sys.stderr); skipped += 1; continue
+                outputs = []
+                try:
+                    d = json.loads(tmp_json.read_text(encoding="utf-8"))
+                except json.JSONDecodeError:
+                    d = {"Exports": []}
+                class_name = bp.stem + "_C"
+                cdo = next((e for e in d["Exports"] if e.get("ObjectName") == f"Default__{class_name}"), None)
+                if cdo is None:
+                    skipped += 1
+                else:
+                    example = build_dp_example(class_name, cdo)
+                    out = OUT_ROOT / "delivery_points" / f"{bp.stem}.example.json"
+                    _write_if_changed(out, json.dumps(example, indent=2))
+                    outputs.append(out)
+                    written += 1
+                sources[bp.as_posix()] = _record(bp, outputs)
+        print(f"  {written} examples written, {skipped} skipped, "
+              f"{len(bp_files) - len(dirty_bps)} unchanged, {removed} removed")
+
+    manifest["sources"] = sources
+    _save_manifest(manifest)
+
+    print("[3/3] Writing README + index...")
+    _write_if_changed(OUT_ROOT / "README.md",
         "# CargoImport\n\n"
         "Generated by `import_cargo_data.py` — re-run any time game data updates.\n\n"
         "## cargos/\n"
@@ -215,11 +341,18 @@ def main() -> int:
         "scene placeholder is `DeliveryPoint_<KEY>`) and adjust.\n\n"
         "`visuals_seen` shows whatever marker/color/icon-shaped fields the CDO\n"
         "actually exposes — use it to identify which knobs the framework can\n"
-        "expose next.\n",
-        encoding="utf-8")
+        "expose next.\n\n"
+        "## index.json\n"
+        "Lookup index over the two folders above (cargos by name/type/flag, DP\n"
+        "examples by class, which DPs consume/produce each cargo and type).\n"
+        "Query it with `python cargo_index.py consumers <Cargo>` or\n"
+        "`python cargo_index.py suggest <Cargo>` when picking `safety_dps`.\n")
+    with mt_trace.span("cargo index"):
+        idx = cargo_index.load_index()
+    print(f"  index: {len(idx.data['cargos'])} cargos, {len(idx.data['dps'])} DP examples")
     print(f"\nDone. See {OUT_ROOT.resolve()}")
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(mt_profile.run("import_cargo_data", main))
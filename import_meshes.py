@@ -2,7 +2,13 @@
 """
 import_meshes.py - Imports static meshes from static_meshes.json into
 map_work_changes.json["static_meshes"]["imported"], applying offsets.
-Skips SM_SkySphere. Copies missing assets into the mod pak directory.
+Skips SM_SkySphere. Copies meshes missing from the game, with the
+materials and textures they depend on, into the mod pak directory
+(mesh_deps.py).
+
+The groups are upserted into the placement store (placement_store.py):
+only changed entries are written, and map_work_changes.json is
+re-exported only when something changed.
 
 Usage:
     python import_meshes.py
@@ -10,48 +16,50 @@ Usage:
 
 import json
 import os
-import shutil
 
 # ---------------------------------------------------------------------------
 # Paths — pulled from env (see mt_paths.py and fulltest.bat)
 # ---------------------------------------------------------------------------
-from mt_paths import GAME_CONTENT as _GAME_CONTENT
-GAME_CONTENT = str(_GAME_CONTENT)
-# COOKED_CONTENT is the UE editor's cooked output for THIS mod's Unreal
-# project (where editor-cooked .uasset/.ubulk files land before they're
-# copied into the mod tree). Optional — only needed when authoring meshes
-# in-editor and re-running import_meshes.py to refresh them. Set the env
-# var MTMI_COOKED_CONTENT if you use this path; otherwise leave unset.
-COOKED_CONTENT = os.environ.get("MTMI_COOKED_CONTENT", "")
+import mt_paths  # GAME_CONTENT resolves on first use
+import build_manifest
+import mesh_deps
+import mt_profile
+import placement_store
+# Assets missing from the game are taken from MTMI_COOKED_CONTENT, the UE
+# editor's cooked output for this mod's project (see mesh_deps.py).
 MOD_CONTENT = r"MapChangeTest_P\MotorTown\Content"
+# map_work_changes.json + any assets copied into the mod tree, claimed in
+# the build manifest at the end of a successful run.
+OUTPUTS = build_manifest.Outputs("import_meshes")
 
 # ---------------------------------------------------------------------------
-# Offsets applied to every imported mesh (edit these as needed)
+# Offsets applied to every imported mesh. Each profile places the scene
+# export somewhere else in the world; OFFSET_PROFILE picks the one a
+# plain run uses (matrix_build.py builds several of them side by side).
 # ---------------------------------------------------------------------------
+OFFSET_PROFILES = {
+    "jeju":        {"X": -39800.86, "Y": -195000.17, "Z": -22450.35},   # Jeju imports
+    # -70 => 118130.0 // -393803 -118200 = -512003
+    "new_map":     {"X": -512003.0, "Y": 123148.0, "Z": -22180.0},
+    "paddy_track": {"X": -39800.0, "Y": -195000.0, "Z": -24450.0},
+    "origin":      {"X": 0.0, "Y": 0.0, "Z": 0.0},
+}
+# Unnamed older placement:
+# OFFSET_X = 242898.812
+# OFFSET_Y = -177002.594
+# OFFSET_Z = -22079.715
+OFFSET_PROFILE = "new_map"
 
-# Jeju imports
-# OFFSET_X = -39800.86
-# OFFSET_Y = -195000.17
-# OFFSET_Z = -22450.35
-
-# New map
-OFFSET_X = -512003.0
-OFFSET_Y = 123148.0
-OFFSET_Z = -22180.0
-# -70 => 118130.0 // -393803 -118200 = -512003
 
-# Paddy Track
-# OFFSET_X = -39800.0
-# OFFSET_Y = -195000.0
-# OFFSET_Z = -24450.0
+def use_profile(name):
+    """Make `name` from OFFSET_PROFILES the active offset."""
+    global OFFSET_PROFILE, OFFSET_X, OFFSET_Y, OFFSET_Z
+    profile = OFFSET_PROFILES[name]
+    OFFSET_PROFILE = name
+    OFFSET_X, OFFSET_Y, OFFSET_Z = profile["X"], profile["Y"], profile["Z"]
 
 
-# OFFSET_X = 242898.812
-# OFFSET_Y = -177002.594
-# OFFSET_Z = -22079.715
-# OFFSET_X = 0
-# OFFSET_Y = 0
-# OFFSET_Z = 0
+use_profile(OFFSET_PROFILE)
 
 OFFSET_PITCH = 0.0
 OFFSET_ROLL = 0.0
@@ -67,11 +75,13 @@ SKIP_KEYS = {"SM_SkySphere"}
 
 # Placeholder asset_keys (from bp_registry) become blueprint_actors entries
 # instead of static meshes. Registry keys are the single source of truth.
-BP_CLASS_FROM_KEY = {
-    key: {"blueprint_path": entry["bp_path"], "blueprint_class": entry["bp_class"]}
-    for key, entry in _BP_REGISTRY.items()
-}
-PARKING_KEYS = _bp_asset_keys()
+# Built in main(): the registry compiles (and resolves game paths) on first
+# use, not at import.
+def bp_class_from_key():
+    return {
+        key: {"blueprint_path": entry["bp_path"], "blueprint_class": entry["bp_class"]}
+        for key, entry in _BP_REGISTRY.items()
+    }
 
 SRC = "static_meshes.json"
 DST = "map_work_changes.json"
@@ -95,68 +105,31 @@ def game_path_to_disk(asset_path):
     return None
 
 
-def copy_asset_to_mod(relative_path, script_dir):
-    """
-    If the asset doesn't exist in extracted game files, copy it from
-    cooked content (or game content) into the mod pak directory.
-    Copies .uasset, .uexp, .ubulk — skips silently if any don't exist.
-    """
-    game_file = os.path.join(GAME_CONTENT, relative_path + ".uasset")
-    mod_target = os.path.join(script_dir, MOD_CONTENT, relative_path)
-
-    if os.path.exists(game_file):
-        return  # exists in game, no need to copy
-
-    # Asset isn't in extracted vanilla content — try the user's editor
-    # cooked output. Only relevant when authoring meshes in UE; vanilla-
-    # only mods never hit this path.
-    if not COOKED_CONTENT:
-        print(f"  Warning: asset not in game and MTMI_COOKED_CONTENT unset — skipping {relative_path}")
-        return
-    cooked_file = os.path.join(COOKED_CONTENT, relative_path + ".uasset")
-    if not os.path.exists(cooked_file):
-        print(f"  Warning: asset not found in game or cooked: {relative_path}")
-        return
-
-    mod_dir = os.path.dirname(mod_target)
-    os.makedirs(mod_dir, exist_ok=True)
-
-    copied = []
-    for ext in [".uasset", ".uexp", ".ubulk"]:
-        src = os.path.join(COOKED_CONTENT, relative_path + ext)
-        dst = mod_target + ext
-        try:
-            if os.path.exists(src):
-                shutil.copy2(src, dst)
-                copied.append(ext)
-        except Exception:
-            pass
-
-    # Silenced: per-asset copy log is noisy; summary is printed at end.
-    # if copied:
-    #     print(f"  Copied {relative_path} ({', '.join(copied)})")
-    pass
-
-
-def main():
+def main(work_dir=None):
+    """Import into the checkout, or into `work_dir` (matrix_build.py): its
+    delivery_points.json is read, and its map_work_changes.json and mod
+    tree are written. static_meshes.json always comes from the checkout."""
+    mt_paths.resolve()
+    parking_keys = _bp_asset_keys()
+    bp_classes = bp_class_from_key()
     script_dir = os.path.dirname(os.path.abspath(__file__))
+    work_dir = work_dir or script_dir
     src_path = os.path.join(script_dir, SRC)
-    dst_path = os.path.join(script_dir, DST)
+    dst_path = os.path.join(work_dir, DST)
 
     with open(src_path, "r", encoding="utf-8") as f:
         src = json.load(f)
-    with open(dst_path, "r", encoding="utf-8") as f:
-        dst = json.load(f)
+    store = placement_store.open_store(dst_path)
 
     imported = []
     parking = []
     delivery = []
     skipped = 0
-    copied_paths = set()
+    mesh_packages = set()
     # Pull current delivery_points.json so each placed instance includes the
     # full config inline. Makes map_work_changes.json self-describing — no
     # need to cross-reference a separate file at deploy time.
-    dp_cfg_path = os.path.join(script_dir, "delivery_points.json")
+    dp_cfg_path = os.path.join(work_dir, "delivery_points.json")
     dp_cfg: dict = {}
     if os.path.exists(dp_cfg_path):
         try:
@@ -169,20 +142,19 @@ def main():
         if not isinstance(items, list):
             continue
         for entry in items:
-            # SKIP_KEYS: completely ignore (unless also in PARKING_KEYS)
-            if entry.get("asset_key") in SKIP_KEYS and entry.get("asset_key") not in PARKING_KEYS:
+            # SKIP_KEYS: completely ignore (unless also in parking_keys)
+            if entry.get("asset_key") in SKIP_KEYS and entry.get("asset_key") not in parking_keys:
                 skipped += 1
                 continue
 
-            # Copy missing assets to mod (once per unique path). Skip DC/Actors
-            # placeholders — they're scene-only markers that the BP-clone pass
-            # replaces at runtime, so shipping their .uasset adds nothing.
+            # Missing assets are copied to the mod once, after the loop. Skip
+            # DC/Actors placeholders — they're scene-only markers that the
+            # BP-clone pass replaces at runtime, so shipping their .uasset
+            # adds nothing.
             raw_path = entry.get("asset_path", "")
             rel_path = game_path_to_disk(raw_path)
-            if (rel_path and rel_path not in copied_paths
-                    and not rel_path.startswith("DC/Actors")):
-                copy_asset_to_mod(rel_path, script_dir)
-                copied_paths.add(rel_path)
+            if rel_path and not rel_path.startswith("DC/Actors"):
+                mesh_packages.add(raw_path)
 
             # Scene-export coords from ue.py are editor-local — apply the
             # global OFFSETs to get world coords. Hand-authored entries can
@@ -199,6 +171,10 @@ def main():
                 "Roll": round(float(entry.get("Roll", 0)) + orr, 4),
                 "Yaw": round(float(entry.get("Yaw", 0)) + oy_, 4),
             }
+            # Placements for a map other than the default one (maps.py)
+            # carry its name through to every later step.
+            if entry.get("map"):
+                base_entry["map"] = entry["map"]
 
             key = entry.get("asset_key")
             # Accept either prefix form: DeliveryPoint_<KEY> or
@@ -221,8 +197,8 @@ def main():
                     dp_entry = dict(base_entry)
                     dp_entry["delivery_key"] = dp_key
                     delivery.append(dp_entry)
-            elif key in PARKING_KEYS:
-                base_entry.update(BP_CLASS_FROM_KEY[key])
+            elif key in parking_keys:
+                base_entry.update(bp_classes[key])
                 # Carry the registry key through so clone_bp_actors can look
                 # up the exact entry — multiple entries may share the same
                 # blueprint_class (e.g. FarmCorn + FarmTransformer both use
@@ -237,25 +213,33 @@ def main():
                 base_entry["ScaleZ"] = float(entry.get("ScaleZ", 1.0))
                 imported.append(base_entry)
 
+    # Cooked-only meshes plus the materials / textures they import
+    # (mesh_deps.py), copied in one parallel pass.
+    mesh_deps.ship(mesh_packages, os.path.join(work_dir, MOD_CONTENT), OUTPUTS)
+
     # Always clear and set — never append
-    dst.setdefault("static_meshes", {})[TARGET_GROUP] = imported
-    dst.setdefault("blueprint_actors", {})[TARGET_GROUP] = parking
+    changed = placement_store.replace_group(store, "static_meshes", TARGET_GROUP, imported)
+    changed += placement_store.replace_group(store, "blueprint_actors", TARGET_GROUP, parking)
     # Preserve hand-authored comment entries (dicts whose keys all start
     # with '_') across import_meshes runs. Anyone editing the file by
     # hand to annotate a placement keeps those notes after the next pull.
     prior_comments = [
-        x for x in (dst.get("delivery_points") or [])
+        x for x in placement_store.rows(store, "delivery_points")
         if isinstance(x, dict) and x and all(k.startswith("_") for k in x.keys())
     ]
-    dst["delivery_points"] = prior_comments + delivery
+    changed += placement_store.replace_group(store, "delivery_points", placement_store.FLAT,
+                                             prior_comments + delivery)
 
-    with open(dst_path, "w", encoding="utf-8") as f:
-        json.dump(dst, f, indent=4, ensure_ascii=False)
+    if (changed or not os.path.exists(dst_path)) and placement_store.export(store, dst_path):
+        print(f"{changed} placement(s) changed — {DST} rewritten")
+    store.close()
+    OUTPUTS.add(dst_path)
+    OUTPUTS.commit()
 
     print(f"Imported {len(imported)} meshes + {len(parking)} parking lots + {len(delivery)} delivery points, skipped {skipped}")
-    print(f"Offsets: X={OFFSET_X}, Y={OFFSET_Y}, Z={OFFSET_Z}")
+    print(f"Offsets ({OFFSET_PROFILE}): X={OFFSET_X}, Y={OFFSET_Y}, Z={OFFSET_Z}")
     print(f"Target: {TARGET_GROUP} (cleared and set)")
 
 
 if __name__ == "__main__":
-    main()
+    mt_profile.run("import_meshes", main)
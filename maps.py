@@ -0,0 +1,235 @@
+"""
+The maps the mod injects into.
+
+Everything used to assume Jeju_World. mt_paths had JEJU_MAIN / CELLS_DIR,
+and pipeline.py, build_manifest.py and fulltest.bat had the Jeju umap and
+_Generated_ paths. There was one Jeju_Worldaa.json / Jeju_World.json
+pair. The maps are now a table, maps.json:
+
+    {
+      "jeju":   {"umap": "Maps/Jeju/Jeju_World"},
+      "island": {"umap": "Maps/Island/Island_World"}
+    }
+
+`umap` is the map's package path under Content, without extension. The
+rest is derived from it, and any of it can be set per map:
+
+  vanilla        <MTMI_GAME_CONTENT>/<umap>.umap
+  cells_dir      <MTMI_GAME_CONTENT>/<umap>/_Generated_
+  cache_json     <stem>aa.json          (pull: the vanilla map as JSON)
+  map_json       <stem>.json            (convert's output)
+  target         <mod Content>/<umap>.umap
+  gen_dir        <mod Content>/<umap>/_Generated_
+  template_cell  vanilla cell that created cells are cloned from
+                 (default: clone_bp_actors' preferred cell if the map
+                 has it, else the cell catalog's pick)
+
+The first map is the default. A placement in map_work_changes.json (a
+mesh, dealer, BP actor or delivery point) goes to the map named by its
+"map" key. Without one it goes to the default map, so existing files need
+no edit. Without maps.json the table is Jeju alone.
+
+Cells clone_bp_actors.py creates for a map are registered in that map's
+umap under its own package folder and world name (cells_package,
+world_name), so they stream from the map's gen_dir.
+
+pipeline.py runs pull, convert and map once per map, as independent
+stages that overlap on its worker pool. clone_bp_actors.py does every
+map's cells in one run, each map's injector pass on its own thread, into
+the one mod tree.
+
+    python maps.py              # the table, and placements per map
+    python maps.py --bat        # name|vanilla|cache_json|map_json|target|gen_dir
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import mt_paths
+import mt_profile
+
+MAPS_PATH = Path(__file__).resolve().parent / "maps.json"
+MOD_CONTENT = Path("MapChangeTest_P") / "MotorTown" / "Content"
+_BUILTIN = {"jeju": {"umap": "Maps/Jeju/Jeju_World"}}
+_KEYS = ("umap", "vanilla", "cells_dir", "cache_json", "map_json", "target", "gen_dir", "template_cell")
+
+
+def _derive(name: str, spec) -> dict:
+    if not isinstance(spec, dict) or not isinstance(spec.get("umap"), str) or not spec["umap"].strip("/"):
+        raise ValueError(f"map {name!r} needs a \"umap\" path under Content (e.g. Maps/Jeju/Jeju_World)")
+    unknown = sorted(k for k in spec if k not in _KEYS and not k.startswith("_"))
+    if unknown:
+        raise ValueError(f"map {name!r}: unknown key(s) {', '.join(unknown)}")
+    umap = spec["umap"].replace("\\", "/").strip("/")
+    if umap.endswith(".umap"):
+        umap = umap[:-len(".umap")]
+    stem = umap.rsplit("/", 1)[-1]
+    m = {
+        "name": name,
+        "umap": umap,
+        "cache_json": Path(spec.get("cache_json") or f"{stem}aa.json"),
+        "map_json": Path(spec.get("map_json") or f"{stem}.json"),
+        "target": Path(spec["target"]) if spec.get("target") else MOD_CONTENT / f"{umap}.umap",
+        "gen_dir": Path(spec["gen_dir"]) if spec.get("gen_dir") else MOD_CONTENT / umap / "_Generated_",
+        "template_cell": spec.get("template_cell"),
+    }
+    # Game-side paths need MTMI_GAME_CONTENT: left for vanilla() / cells_dir().
+    for k in ("vanilla", "cells_dir"):
+        if spec.get(k):
+            m[k] = Path(spec[k])
+    return m
+
+
+@lru_cache(maxsize=4)
+def _load(stamp) -> dict[str, dict]:
+    if stamp is None:
+        raw = _BUILTIN
+    else:
+        try:
+            raw = json.loads(MAPS_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            sys.exit(f"{MAPS_PATH.name}: cannot read the map table: {e}")
+    try:
+        if not isinstance(raw, dict) or not any(not k.startswith("_") for k in raw):
+            raise ValueError("expected an object of {name: {\"umap\": ...}}, with at least one map")
+        table = {name: _derive(name, spec) for name, spec in raw.items() if not name.startswith("_")}
+    except ValueError as e:
+        sys.exit(f"{MAPS_PATH.name}: {e}")
+    outs = Counter(str(p) for m in table.values() for p in (m["cache_json"], m["map_json"], m["target"]))
+    clash = sorted(p for p, n in outs.items() if n > 1)
+    if clash:
+        sys.exit(f"{MAPS_PATH.name}: two maps write the same file(s): {', '.join(clash)}")
+    return table
+
+
+def table() -> dict[str, dict]:
+    """{name: map} in maps.json order (default map first). Re-read when
+    maps.json changes."""
+    try:
+        st = MAPS_PATH.stat()
+        stamp = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        stamp = None
+    return _load(stamp)
+
+
+def names() -> list[str]:
+    return list(table())
+
+
+def default() -> str:
+    return next(iter(table()))
+
+
+def get(name: str | None = None) -> dict:
+    """The map called `name` (the default map for None)."""
+    t = table()
+    if name is None:
+        return next(iter(t.values()))
+    try:
+        return t[name]
+    except KeyError:
+        raise KeyError(f"unknown map {name!r} (maps: {', '.join(t)})") from None
+
+
+def vanilla(m: dict) -> Path:
+    """The map's vanilla .umap in the extracted game."""
+    return m.get("vanilla") or mt_paths.GAME_CONTENT / f"{m['umap']}.umap"
+
+
+def cells_dir(m: dict) -> Path:
+    """The map's vanilla World Partition cells."""
+    return m.get("cells_dir") or mt_paths.GAME_CONTENT / m["umap"] / "_Generated_"
+
+
+def cells_package(m: dict) -> str:
+    """Package folder of the map's mod cells (/Game/Maps/Jeju/Jeju_World/
+    _Generated_): where a cell clone_bp_actors creates is streamed from.
+    Follows gen_dir when it lies under the mod's Content."""
+    try:
+        return "/Game/" + Path(m["gen_dir"]).relative_to(MOD_CONTENT).as_posix()
+    except ValueError:
+        return f"/Game/{m['umap']}/_Generated_"
+
+
+def world_name(m: dict) -> str:
+    """The map's world (package) name, e.g. Jeju_World."""
+    return m["umap"].rsplit("/", 1)[-1]
+
+
+def stage_name(stage: str, m: dict) -> str:
+    """pipeline.py stage name of a per-map stage: 'convert' for the
+    default map, 'convert:<map>' for the others."""
+    return stage if m["name"] == default() else f"{stage}:{m['name']}"
+
+
+def of(entry: dict) -> str:
+    """The map a placement belongs to."""
+    return entry.get("map") or default()
+
+
+def split(entries, what: str = "placement") -> dict[str, list]:
+    """{map: [entry, ...]} for every map in the table (in entry order).
+    Entries tagged with a map that isn't in the table are reported and
+    left out."""
+    out: dict[str, list] = {name: [] for name in table()}
+    stray: Counter = Counter()
+    for e in entries:
+        name = of(e) if isinstance(e, dict) else default()
+        if name in out:
+            out[name].append(e)
+        else:
+            stray[name] += 1
+    for name, n in sorted(stray.items()):
+        print(f"  Warning: {n} {what}(s) tagged \"map\": {name!r}, which is not in "
+              f"{MAPS_PATH.name} — skipped", file=sys.stderr)
+    return out
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="List the maps the mod injects into.")
+    ap.add_argument("--bat", action="store_true",
+                    help="one name|vanilla|cache_json|map_json|target|gen_dir line per map (fulltest.bat)")
+    ap.add_argument("--config", default="map_work_changes.json", help="placements to count per map")
+    args = ap.parse_args(argv)
+    t = table()
+    if args.bat:
+        for m in t.values():
+            print("|".join(str(v) for v in (m["name"], vanilla(m), m["cache_json"], m["map_json"],
+                                             m["target"], m["gen_dir"])))
+        return 0
+
+    import placement_store
+    counts: dict[str, Counter] = {name: Counter() for name in t}
+    if Path(args.config).exists():
+        cfg = placement_store.load(args.config, ("static_meshes", "dealerships",
+                                                 "blueprint_actors", "delivery_points"))
+        for kind, section in cfg.items():
+            groups = section.values() if isinstance(section, dict) else [section]
+            for group in groups:
+                if not isinstance(group, list):
+                    continue
+                for e in group:
+                    if isinstance(e, dict) and not all(k.startswith("_") for k in e):
+                        counts.setdefault(of(e), Counter())[kind] += 1
+    for name, c in counts.items():
+        m = t.get(name)
+        tag = " (default)" if name == default() else "" if m else " (NOT IN THE TABLE)"
+        print(f"{name}{tag}")
+        if m:
+            print(f"    vanilla   {vanilla(m)}")
+            print(f"    cells     {cells_dir(m)}")
+            print(f"    json      {m['cache_json']} -> {m['map_json']}")
+            print(f"    target    {m['target']}")
+        print("    placements " + (", ".join(f"{k} {n}" for k, n in sorted(c.items())) or "none"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("maps", lambda: _main(sys.argv[1:])))
@@ -0,0 +1,449 @@
+"""
+Build several variants of the mod in one run.
+
+We ship more than one pak: the scene export placed at different offsets
+(import_meshes.OFFSET_PROFILES), different delivery_points.json /
+new_cargos tunings, and builds with some content switched off. Each one
+used to be a full serial pipeline run. A matrix config names the axes,
+and every combination is one variant:
+
+    {
+      "offsets":    ["new_map", "paddy_track"],
+      "dp_configs": {"base": "delivery_points.json",
+                     "tight": "variants/delivery_points_tight.json"},
+      "flags":      {"full": {}, "lite": {"new_cargos": false, "dealerships": false}}
+    }
+
+That config gives four variants, new_map-base-full through
+paddy_track-tight-lite. Flags, all on by default:
+
+  new_cargos        ship the DP config's new_cargos (off: the list is dropped)
+  dealerships       placement sections kept in the variant's
+  blueprint_actors  map_work_changes.json (off: the section is emptied)
+  delivery_points
+  report            run scene_report.py on the variant
+
+    python matrix_build.py                       # matrix.json, every variant
+    python matrix_build.py --variant new_map-base-full --variant new_map-tight-full
+    python matrix_build.py --list
+
+Each variant gets a workspace, matrix/<variant>/. It holds the variant's
+delivery_points.json, map_work_changes.json (the checkout's, with that
+offset's import), Jeju_World.json and its own MapChangeTest_P tree. The
+tree is seeded from the checkout's hand-made assets; pipeline outputs
+are never copied. The pak goes to matrix/MapChangeTest_P-<variant>.pak.
+Paks are written, not deployed (see pak_builder.py deploy).
+
+What is shared is done once, before any variant starts:
+
+  - the pull and build stages (pipeline.py)
+  - parsing each map's vanilla JSON (Jeju_Worldaa.json, see maps.py),
+    pickled to .mtmi_cache/matrix/ so every variant gets a private copy
+    at pickle speed instead of json speed
+  - the registry, compiled once per distinct DP config
+  - the cell catalog and the cargo index
+
+The variants then run on a process pool, --jobs at a time. Each worker
+keeps its imports and its unpickled map bytes across the variants it
+runs. In a variant, meshes, convert and actors run in-process the way
+watch.py runs them; map runs UAssetGUI, and pack runs pak_builder.
+Per-variant state (build manifest, cell state, scene report) lives in
+.mtmi_cache/matrix/<variant>/, so variants never see each other's
+claims. Each variant's output goes to matrix/<variant>/build.log.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import maps
+import mt_paths
+import mt_profile
+from artifact_cache import CACHE_ROOT, file_digest
+
+REPO = Path(__file__).resolve().parent
+CONFIG_PATH = Path("matrix.json")
+OUT_DIR = Path("matrix")
+STATE_ROOT = CACHE_ROOT / "matrix"
+FLAGS = {"new_cargos": True, "dealerships": True, "blueprint_actors": True,
+         "delivery_points": True, "report": True}
+_SECTION_FLAGS = ("dealerships", "blueprint_actors", "delivery_points")
+# Checkout directories a variant workspace reads through a link: the
+# cwd-relative inputs of clone_bp_actors / cargo_index.
+_SHARED_DIRS = ("CargoImport", "MTBPInjector")
+
+
+# ----------------------------------------------------------------------
+# Config
+# ----------------------------------------------------------------------
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.]+", "_", name).strip("_") or "x"
+
+
+def expand(cfg: dict) -> list[dict]:
+    """Every offset x DP config x flag set combination, as
+    {name, offset, dp_name, dp_path, flags_name, flags}. Raises ValueError
+    on a config that names an unknown profile or flag."""
+    import import_meshes
+    offsets = cfg.get("offsets") or [import_meshes.OFFSET_PROFILE]
+    dps = cfg.get("dp_configs") or {"base": "delivery_points.json"}
+    flag_sets = cfg.get("flags") or {"full": {}}
+    for o in offsets:
+        if o not in import_meshes.OFFSET_PROFILES:
+            raise ValueError(f"unknown offset profile {o!r} "
+                             f"(import_meshes.OFFSET_PROFILES: {', '.join(import_meshes.OFFSET_PROFILES)})")
+    for fname, fs in flag_sets.items():
+        bad = set(fs) - set(FLAGS)
+        if bad:
+            raise ValueError(f"flag set {fname!r}: unknown flag(s) {', '.join(sorted(bad))}")
+    out = []
+    for o, (dname, dpath), (fname, fs) in itertools.product(offsets, dps.items(), flag_sets.items()):
+        out.append({"name": "-".join(_slug(x) for x in (o, dname, fname)),
+                    "offset": o, "dp_name": dname, "dp_path": str(dpath),
+                    "flags_name": fname, "flags": {**FLAGS, **fs}})
+    return out
+
+
+def _dp_text(variant: dict) -> str:
+    cfg = json.loads(Path(variant["dp_path"]).read_text(encoding="utf-8"))
+    if not variant["flags"]["new_cargos"]:
+        cfg.pop("new_cargos", None)
+    return json.dumps(cfg, indent=2) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Shared state, built once in the parent
+# ----------------------------------------------------------------------
+def _write_if_changed(path: Path, text: str) -> None:
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _link_dir(src: Path, dst: Path) -> None:
+    if os.path.lexists(dst):
+        return
+    if os.name == "nt":
+        import _winapi                          # a junction needs no privileges
+        _winapi.CreateJunction(str(src), str(dst))
+    else:
+        os.symlink(src, dst, target_is_directory=True)
+
+
+def vanilla_blob(m: dict) -> Path:
+    """A map's Jeju_Worldaa.json parsed once and pickled; re-parsed only
+    when its digest changes."""
+    src = m["cache_json"]
+    blob = STATE_ROOT / f"vanilla-{m['name']}.pickle"
+    stamp = blob.with_suffix(".digest")
+    digest = file_digest(src)
+    try:
+        if blob.exists() and stamp.read_text(encoding="utf-8") == digest:
+            return blob
+    except OSError:
+        pass
+    t0 = time.perf_counter()
+    asset = json.loads(src.read_text(encoding="utf-8"))
+    STATE_ROOT.mkdir(parents=True, exist_ok=True)
+    tmp = blob.with_name(f"{blob.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(pickle.dumps(asset, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp, blob)
+    stamp.write_text(digest, encoding="utf-8")
+    print(f"[matrix] parsed {src} once ({time.perf_counter() - t0:.1f}s)")
+    return blob
+
+
+def registry_path(dp_digest: str) -> Path:
+    return STATE_ROOT / "registry" / f"{dp_digest[:20]}.json"
+
+
+def seed_files() -> list[str]:
+    """Mod-tree files a variant starts from: everything in the checkout's
+    tree that no pipeline step claims, outside the managed dirs."""
+    import build_manifest
+    import pipeline
+    claimed = build_manifest.claimed()
+    managed = [build_manifest._key(d) + "/" for d in build_manifest.MANAGED_DIRS]
+    umap = {build_manifest._key(m["target"].with_suffix(ext))
+            for m in maps.table().values() for ext in (".umap", ".uexp", ".ubulk")}
+    out = []
+    for p in sorted(Path(pipeline.MOD_NAME).rglob("*")):
+        if not p.is_file() or p.suffix.lower() == ".bak":
+            continue
+        key = build_manifest._key(p)
+        if key in claimed or key in umap or any(key.startswith(m) for m in managed):
+            continue
+        out.append(p.as_posix())
+    return out
+
+
+def prepare(variants: list[dict], out_dir: Path) -> None:
+    """Workspaces, DP configs and one compiled registry per distinct DP
+    config, plus the cell catalog."""
+    import bp_registry
+    import clone_bp_actors
+    base_changes = Path("map_work_changes.json").read_text(encoding="utf-8")
+    dp_path, compiled_path = bp_registry._DP_PATH, bp_registry._COMPILED_PATH
+    compiled = set()
+    for v in variants:
+        ws = out_dir / v["name"]
+        ws.mkdir(parents=True, exist_ok=True)
+        for d in _SHARED_DIRS:
+            _link_dir(REPO / d, ws / d)
+        _write_if_changed(ws / "delivery_points.json", _dp_text(v))
+        _write_if_changed(ws / "map_work_changes.json", base_changes)
+        digest = file_digest(ws / "delivery_points.json")
+        v["registry"] = str(registry_path(digest))
+        if digest not in compiled:
+            bp_registry._DP_PATH = (ws / "delivery_points.json").resolve()
+            bp_registry._COMPILED_PATH = registry_path(digest)
+            bp_registry.invalidate()
+            len(bp_registry.REGISTRY)
+            compiled.add(digest)
+    bp_registry._DP_PATH, bp_registry._COMPILED_PATH = dp_path, compiled_path
+    bp_registry.invalidate()
+    for name in maps.names():
+        clone_bp_actors.template_cell(name)
+
+
+# ----------------------------------------------------------------------
+# One variant, in a worker process
+# ----------------------------------------------------------------------
+_vanilla: dict[str, bytes] = {}
+
+
+def _init(blobs: dict[str, str]) -> None:
+    import bp_registry, build_manifest, clone_bp_actors, convert2, import_meshes  # noqa: E401,F401
+    import pak_builder, scene_report, uassetgui                                  # noqa: E401,F401
+    for name, blob in blobs.items():
+        _vanilla[name] = Path(blob).read_bytes()
+
+
+def _enter(ws: Path, state: Path, registry: Path) -> None:
+    """Point this process at one variant. Everything cwd-relative (the mod
+    tree, delivery_points.json for clone_bp_actors, the linked
+    CargoImport/ and MTBPInjector/) now resolves in the workspace; the few
+    paths anchored elsewhere are repointed."""
+    import bp_registry
+    import build_manifest
+    import clone_bp_actors
+    import convert2
+    import import_meshes
+    os.chdir(ws)
+    build_manifest.REPO_ROOT = ws
+    build_manifest.MANIFEST_PATH = state / "build_manifest.json"
+    clone_bp_actors._CELL_STATE = state / "cell_state.json"
+    bp_registry._DP_PATH = ws / "delivery_points.json"
+    bp_registry._COMPILED_PATH = registry
+    bp_registry.invalidate()
+    for outputs in (import_meshes.OUTPUTS, convert2.OUTPUTS, clone_bp_actors.OUTPUTS,
+                    clone_bp_actors.CARGO_OUTPUTS):
+        outputs.reset()
+
+
+def _seed(ws: Path, files: list[str]) -> int:
+    import mesh_deps
+    n = 0
+    for rel in files:
+        n += mesh_deps._copy(str(REPO / rel), str(ws / rel))
+    return n
+
+
+def _strip_sections(path: Path, flags: dict) -> None:
+    off = [s for s in _SECTION_FLAGS if not flags[s]]
+    if not off:
+        return
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for s in off:
+        if s in data:
+            data[s] = [] if isinstance(data[s], list) else {}
+    _write_if_changed(path, json.dumps(data, indent=4))
+
+
+def build_variant(v: dict, out_dir: str, seed: list[str], uassetgui_cmd: list[str], jobs: int) -> dict:
+    """Run one variant start to finish; {name, ok, failed, steps, pak, log}."""
+    import build_manifest
+    import clone_bp_actors
+    import convert2
+    import import_meshes
+    import pak_builder
+    import pipeline
+    import placement_store
+    import scene_report
+    import uassetgui
+
+    cwd = os.getcwd()
+    ws = (Path(out_dir) / v["name"]).resolve()
+    state = STATE_ROOT / v["name"]
+    state.mkdir(parents=True, exist_ok=True)
+    pak = ws.parent / f"{pipeline.MOD_NAME}-{v['name']}.pak"
+    result = {"name": v["name"], "ok": False, "failed": None, "steps": {},
+              "pak": str(pak), "log": str(ws / "build.log")}
+
+    def seed_tree():
+        _seed(ws, seed)
+        return True
+
+    def meshes():
+        import_meshes.use_profile(v["offset"])
+        import_meshes.main(str(ws))
+        _strip_sections(ws / pipeline.WORK_CHANGES, v["flags"])
+        return True
+
+    def convert():
+        mods = placement_store.load(ws / pipeline.WORK_CHANGES, convert2.MOD_KINDS)
+        return all(convert2.inject(pickle.loads(_vanilla[m["name"]]), mods, str(ws / m["map_json"]),
+                                   str(ws), m["name"]) == 0
+                   for m in maps.table().values())
+
+    def umap():
+        for m in maps.table().values():
+            m["target"].parent.mkdir(parents=True, exist_ok=True)
+            if not uassetgui.convert("fromjson", m["map_json"], m["target"], mt_paths.MAPPINGS_TAG,
+                                     pipeline.MAP_TIMEOUT, cmd=uassetgui_cmd):
+                return False
+        return True
+
+    def actors():
+        if clone_bp_actors.main(pipeline.CLONE_ARGS + ["--jobs", str(jobs)]) != 0:
+            return False
+        build_manifest.gc()
+        return True
+
+    def report():
+        return all(scene_report._main(["--map", name, "--out", str(state / "scene_report" / name)]) == 0
+                   for name in maps.names())
+
+    def pack():
+        stats = pak_builder.build_pak(Path(pipeline.MOD_NAME), pak, jobs=1)
+        result["bytes"] = stats["bytes"]
+        return True
+
+    steps = [("seed", seed_tree), ("meshes", meshes), ("convert", convert), ("map", umap),
+             ("actors", actors)]
+    if v["flags"]["report"]:
+        steps.append(("report", report))
+    steps.append(("pack", pack))
+    try:
+        _enter(ws, state, Path(v["registry"]))
+        with open(ws / "build.log", "w", encoding="utf-8") as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            print(f"[matrix] {v['name']}: offset {v['offset']}, DP config {v['dp_path']}, "
+                  f"flags {json.dumps(v['flags'], sort_keys=True)}")
+            for name, fn in steps:
+                t0 = time.perf_counter()
+                try:
+                    ok = fn()
+                except Exception:
+                    traceback.print_exc()
+                    ok = False
+                result["steps"][name] = time.perf_counter() - t0
+                print(f"[matrix] {name}: {'ok' if ok else 'FAILED'} ({result['steps'][name]:.1f}s)")
+                if not ok:
+                    result["failed"] = name
+                    return result
+        result["ok"] = True
+        return result
+    finally:
+        os.chdir(cwd)
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+def _main(argv: list[str]) -> int:
+    import pipeline
+    ap = argparse.ArgumentParser(description="Build every variant of a matrix config from one shared parse.")
+    ap.add_argument("--config", type=Path, default=CONFIG_PATH, help=f"matrix config (default {CONFIG_PATH})")
+    ap.add_argument("--variant", action="append", default=[], metavar="NAME",
+                    help="build just this variant (repeatable)")
+    ap.add_argument("--out", type=Path, default=OUT_DIR, help=f"workspaces + paks (default {OUT_DIR})")
+    ap.add_argument("--list", action="store_true", help="print the variants and exit")
+    ap.add_argument("--jobs", type=int, default=None, help="variants built at once (default: CPU count)")
+    ap.add_argument("--tool", action="append", default=[], metavar="NAME=CMD",
+                    help=f"override an external tool ({', '.join(pipeline.TOOL_NAMES)})")
+    args = ap.parse_args(argv)
+
+    try:
+        variants = expand(json.loads(args.config.read_text(encoding="utf-8")))
+    except (OSError, ValueError) as e:
+        print(f"[matrix] cannot use {args.config}: {e}", file=sys.stderr)
+        return 2
+    if args.variant:
+        unknown = set(args.variant) - {v["name"] for v in variants}
+        if unknown:
+            ap.error(f"unknown variant(s) {', '.join(sorted(unknown))}")
+        variants = [v for v in variants if v["name"] in args.variant]
+    if args.list:
+        for v in variants:
+            off = [k for k, on in v["flags"].items() if not on]
+            print(f"  {v['name']:<40} {v['offset']:<12} {v['dp_path']}"
+                  + (f"  (off: {', '.join(off)})" if off else ""))
+        return 0
+    mt_paths.resolve()
+
+    tools = pipeline.default_tools()
+    for spec in args.tool:
+        name, sep, cmd = spec.partition("=")
+        if not sep or name not in pipeline.TOOL_NAMES or not cmd.strip():
+            ap.error(f"--tool expects NAME=CMD with NAME in {', '.join(pipeline.TOOL_NAMES)}, got {spec!r}")
+        tools[name] = pipeline._tool_cmd(cmd)
+    # Workers run inside the variant workspaces; keep tool paths valid there.
+    uassetgui_cmd = [str(Path(a).resolve()) if Path(a).is_file() else a for a in tools["uassetgui"]]
+
+    t0 = time.perf_counter()
+    graph = pipeline.stages(tools)
+    if not pipeline.run(graph, pipeline.load_state(), ["pull", "build"], [], [], None):
+        return 1
+    blobs = {m["name"]: str(vanilla_blob(m)) for m in maps.table().values()}
+    prepare(variants, args.out)
+    seed = seed_files()
+    shared = time.perf_counter() - t0
+
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(variants)))
+    inner = max(1, (os.cpu_count() or 1) // workers)
+    print(f"[matrix] shared state ready in {shared:.1f}s; {len(variants)} variant(s), {workers} at a time")
+    results = []
+    # spawn everywhere: Windows has nothing else, and a forked worker
+    # would inherit the path overrides prepare() made in this process.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init,
+                             initargs=(blobs,)) as pool:
+        futures = [pool.submit(build_variant, v, str(args.out.resolve()), seed, uassetgui_cmd, inner)
+                   for v in variants]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            took = sum(r["steps"].values())
+            if r["ok"]:
+                print(f"  {r['name']:<40} ok     {took:6.1f}s  {r['pak']} ({r['bytes'] / (1 << 20):.1f} MB)")
+            else:
+                print(f"  {r['name']:<40} FAILED {took:6.1f}s  at {r['failed']}, see {r['log']}",
+                      file=sys.stderr)
+    wall = time.perf_counter() - t0
+    serial = shared + sum(sum(r["steps"].values()) for r in results)
+    print(f"[matrix] {len(results)} variant(s) in {wall:.1f}s wall "
+          f"({serial:.1f}s of variant + shared work)")
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("matrix_build", lambda: _main(sys.argv[1:])))
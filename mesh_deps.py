@@ -0,0 +1,282 @@
+"""
+Dependency closure of the cooked mesh packages the mod has to ship.
+
+import_meshes.py and convert2.py used to copy only the mesh package
+(.uasset/.uexp/.ubulk) out of MTMI_COOKED_CONTENT. A custom mesh whose
+material instances, parent materials or textures were also authored in
+the mod's Unreal project then rendered with the default material in game.
+Each missing package turned up one full pipeline run at a time.
+
+This follows the import table instead. Every `/Game/...` Package import
+of a cooked package is a dependency. Starting from the meshes the
+placements reference, the walk is breadth-first:
+
+  in the extracted game     vanilla: nothing to ship, and not walked
+                            further (its own imports are vanilla too)
+  only in the cooked tree   shipped, and its imports walked in turn
+  in neither                reported as unresolved
+
+Only the package header is read (uasset_header, mmap'd); the .uexp is
+never opened. Each package's direct imports are memoized in
+.mtmi_cache/mesh_deps.json keyed by its size and mtime, so an unchanged
+package costs one stat. Closures are memoized per package for the run,
+so meshes sharing a master material walk it once. The vanilla check is
+an index of the game directories the walk touches, each listed once,
+rather than one stat per candidate file. The whole missing set is then
+copied in one pass on a thread pool. Files whose mod-tree copy already
+matches in size and mtime are skipped.
+
+    python mesh_deps.py /Game/Models/Foo/SM_Bar        # closure of one mesh
+    python mesh_deps.py --imports /Game/Models/Foo/SM_Bar
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import mt_paths
+import mt_profile
+from artifact_cache import CACHE_ROOT
+
+COOKED_CONTENT = os.environ.get("MTMI_COOKED_CONTENT", "").strip().strip('"')
+EXTS = (".uasset", ".uexp", ".ubulk")
+MEMO_PATH = CACHE_ROOT / "mesh_deps.json"
+_FORMAT = 1
+
+_LOCK = threading.Lock()
+# collect() resets the per-run state below; watch.py converts maps on threads.
+_WALK_LOCK = threading.Lock()
+_memo: dict[str, list] | None = None
+_memo_dirty = False
+# package -> (cooked-only packages, unresolved packages); cleared per collect().
+_closures: dict[str, tuple[frozenset[str], frozenset[str]]] = {}
+
+
+def package_of(game_path: str) -> str | None:
+    """'/Game/A/B.B' -> '/Game/A/B' (None outside /Game)."""
+    if not game_path.startswith("/Game/"):
+        return None
+    dot = game_path.find(".", game_path.rfind("/"))
+    return game_path if dot == -1 else game_path[:dot]
+
+
+def _file(root: str, package: str, ext: str = ".uasset") -> str:
+    return os.path.join(root, *package[len("/Game/"):].split("/")) + ext
+
+
+# ----------------------------------------------------------------------
+# Where a package lives
+# ----------------------------------------------------------------------
+def _scan(directory: str) -> frozenset[str]:
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(os.path.normcase(e.name) for e in it)
+    except OSError:
+        return frozenset()
+
+
+# The extracted game never changes under a running process; the cooked
+# tree is re-listed by every collect().
+_game_listing = lru_cache(maxsize=None)(_scan)
+_cooked_listing = lru_cache(maxsize=None)(_scan)
+
+
+def _present(listing, root: str, package: str) -> bool:
+    path = _file(root, package)
+    return os.path.normcase(os.path.basename(path)) in listing(os.path.dirname(path))
+
+
+def is_vanilla(package: str) -> bool:
+    return _present(_game_listing, str(mt_paths.GAME_CONTENT), package)
+
+
+def is_cooked(package: str) -> bool:
+    return bool(COOKED_CONTENT) and _present(_cooked_listing, COOKED_CONTENT, package)
+
+
+# ----------------------------------------------------------------------
+# Import tables
+# ----------------------------------------------------------------------
+def _load_memo() -> dict[str, list]:
+    global _memo
+    if _memo is None:
+        try:
+            data = json.loads(MEMO_PATH.read_text(encoding="utf-8"))
+            _memo = data["packages"] if data.get("format") == _FORMAT else {}
+        except (OSError, ValueError, KeyError):
+            _memo = {}
+    return _memo
+
+
+def save_memo() -> None:
+    global _memo_dirty
+    with _LOCK:
+        if not _memo_dirty:
+            return
+        MEMO_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = MEMO_PATH.with_name(f"{MEMO_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"format": _FORMAT, "packages": _memo}), encoding="utf-8")
+        os.replace(tmp, MEMO_PATH)
+        _memo_dirty = False
+
+
+def direct_imports(path: str) -> list[str]:
+    """/Game packages imported by the package file at `path`."""
+    global _memo_dirty
+    from uasset_header import read_package
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    memo = _load_memo()
+    hit = memo.get(path)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    try:
+        pkg = read_package(path, want_exports=False)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        print(f"  [deps] cannot read the import table of {path}: {e}", file=sys.stderr)
+        return []
+    deps = sorted({imp["name"] for imp in pkg["imports"]
+                   if imp["class_name"] == "Package" and imp["name"].startswith("/Game/")})
+    with _LOCK:
+        memo[path] = [stamp, deps]
+        _memo_dirty = True
+    return deps
+
+
+# ----------------------------------------------------------------------
+# Closure
+# ----------------------------------------------------------------------
+def closure(package: str) -> tuple[frozenset[str], frozenset[str]]:
+    """(cooked-only packages to ship, packages found nowhere) reachable
+    from `package`, itself included."""
+    done = _closures.get(package)
+    if done is not None:
+        return done
+    ship: set[str] = set()
+    missing: set[str] = set()
+    seen = {package}
+    queue = deque([package])
+    while queue:
+        pkg = queue.popleft()
+        sub = _closures.get(pkg) if pkg != package else None
+        if sub is not None:
+            ship |= sub[0]
+            missing |= sub[1]
+            continue
+        if is_vanilla(pkg):
+            continue
+        if not is_cooked(pkg):
+            missing.add(pkg)
+            continue
+        ship.add(pkg)
+        for dep in direct_imports(_file(COOKED_CONTENT, pkg)):
+            if dep not in seen:
+                seen.add(dep)
+                queue.append(dep)
+    done = _closures[package] = (frozenset(ship), frozenset(missing))
+    return done
+
+
+def collect(packages) -> tuple[list[str], list[str]]:
+    """(sorted cooked-only packages, sorted unresolved packages) over the
+    closures of `packages`. The cooked tree is re-listed every call; it
+    changes whenever the editor re-cooks."""
+    ship: set[str] = set()
+    missing: set[str] = set()
+    with _WALK_LOCK:
+        _cooked_listing.cache_clear()
+        _closures.clear()
+        for p in packages:
+            s, m = closure(p)
+            ship |= s
+            missing |= m
+    save_memo()
+    return sorted(ship), sorted(missing)
+
+
+# ----------------------------------------------------------------------
+# Copy
+# ----------------------------------------------------------------------
+def _copy(src: str, dst: str) -> bool:
+    s = os.stat(src)
+    try:
+        d = os.stat(dst)
+        if d.st_size == s.st_size and d.st_mtime_ns == s.st_mtime_ns:
+            return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # Never write through dst: it may be a hardlink into the artifact cache.
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+    return True
+
+
+def copy_packages(packages, mod_content: str, outputs, jobs: int | None = None) -> int:
+    """Copy every file of `packages` from the cooked tree into
+    `mod_content`, claiming them in `outputs`. Returns files written."""
+    files = [(_file(COOKED_CONTENT, p, ext), _file(mod_content, p, ext))
+             for p in packages for ext in EXTS]
+    files = [(src, dst) for src, dst in files if os.path.exists(src)]
+    if not files:
+        return 0
+    with ThreadPoolExecutor(max_workers=jobs or min(8, 2 * (os.cpu_count() or 1))) as pool:
+        written = sum(pool.map(lambda f: _copy(*f), files))
+    for _, dst in files:
+        outputs.add(dst)
+    return written
+
+
+def ship(packages, mod_content: str, outputs, jobs: int | None = None) -> list[str]:
+    """Copy the cooked-only closure of `packages` (/Game paths; anything
+    else is ignored) into `mod_content`. Returns the unresolved packages,
+    already reported."""
+    packages = sorted({q for q in map(package_of, packages) if q})
+    todo, missing = collect(packages)
+    written = copy_packages(todo, mod_content, outputs, jobs) if todo else 0
+    if todo:
+        print(f"  [deps] {len(todo)} cooked package(s) reachable from {len(packages)} mesh(es), "
+              f"{written} file(s) copied")
+    if missing:
+        hint = "" if COOKED_CONTENT else " (MTMI_COOKED_CONTENT is unset)"
+        print(f"  Warning: {len(missing)} package(s) in neither the game nor the cooked tree{hint}:",
+              file=sys.stderr)
+        for p in missing[:20]:
+            print(f"    {p}", file=sys.stderr)
+        if len(missing) > 20:
+            print(f"    ... {len(missing) - 20} more", file=sys.stderr)
+    return missing
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Cooked-only dependency closure of mesh packages.")
+    ap.add_argument("packages", nargs="+", help="/Game/... mesh paths")
+    ap.add_argument("--imports", action="store_true", help="also print each shipped package's direct imports")
+    args = ap.parse_args(argv)
+    mt_paths.resolve()
+    roots = [p for p in (package_of(a) for a in args.packages) if p]
+    todo, missing = collect(roots)
+    for p in todo:
+        print(p)
+        if args.imports:
+            for dep in direct_imports(_file(COOKED_CONTENT, p)):
+                tag = "vanilla" if is_vanilla(dep) else "cooked" if is_cooked(dep) else "MISSING"
+                print(f"    {tag:<8} {dep}")
+    for p in missing:
+        print(f"MISSING {p}")
+    print(f"[deps] {len(todo)} to ship, {len(missing)} unresolved", file=sys.stderr)
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("mesh_deps", lambda: _main(sys.argv[1:])))
@@ -31,6 +31,21 @@ if not exist "%PAKDIR%" (
     exit /b 2
 )
 
+REM MTMI_PAK_BUILDER=python: build and deploy with pak_builder.py instead of
+REM repak. It leaves *.bak out of the pak rather than deleting them, reuses
+REM unchanged entries from the previous pak, and skips the copy when the
+REM deployed pak is already identical. Its status is tested with `if errorlevel`:
+REM the errorlevel variable would be expanded when cmd parses the block,
+REM before python has run.
+if /I "%MTMI_PAK_BUILDER%"=="python" (
+    python "%~dp0pak_builder.py" ".\%MODNAME%" --out "%PAKFILE%" --pakdir "%PAKDIR%" %MTMI_PAK_ARGS%
+    if errorlevel 1 (
+        echo Error: pak_builder.py failed!
+        exit /b 1
+    )
+    exit /b 0
+)
+
 REM Recursively remove all .bak files in the current directory and subdirectories
 echo Cleaning up old .bak files...
 del /S /Q "*.bak"
@@ -31,9 +31,14 @@ Required environment variables (set in fulltest.bat or your shell):
                         .pak gets copied. Usually
                         'C:/SteamLibrary/steamapps/common/Motor Town/MotorTown/Content/Paks'.
 
-If a script is invoked without one of these set, mt_paths exits
-immediately with a multi-line error explaining what is missing, where
-to obtain the content, and which env var to set.
+Resolution is lazy: importing mt_paths costs nothing, and the env vars
+are read and checked on the first access to any path below (module
+__getattr__), so `--help`, argument errors and dry runs never touch the
+filesystem. If a path is used without one of these set, mt_paths exits
+right then with a multi-line error explaining what is missing, where
+to obtain the content, and which env var to set. `from mt_paths import
+GAME_CONTENT` is a first access, so scripts that need their paths
+checked up-front still get that by importing names at module level.
 """
 from __future__ import annotations
 
@@ -128,15 +133,44 @@ def _resolve() -> dict[str, object]:
     return out
 
 
-_RESOLVED = _resolve()
+GAME_CONTENT: Path
+MAPPINGS: Path
+MAPPINGS_TAG: str
+GAME_PAKDIR: Path
+JEJU_MAIN: Path
+CELLS_DIR: Path
+VANILLA_CARGOS: Path
+VANILLA_CARGOS_01: Path
+
+
+def resolve() -> dict[str, object]:
+    """Validate the env vars (exiting on a problem) and bind every public
+    path as a plain module global. Idempotent; later accesses never come
+    back through __getattr__."""
+    g = globals()
+    if "GAME_CONTENT" in g:
+        return {k: g[k] for k in __all__}
+    r = _resolve()
+    content: Path = r["MTMI_GAME_CONTENT"]                 # type: ignore[assignment]
+    g.update(
+        GAME_CONTENT=content,
+        MAPPINGS=r["MTMI_MAPPINGS"],
+        MAPPINGS_TAG=r["MTMI_MAPPINGS_TAG"],
+        GAME_PAKDIR=r["MTMI_GAME_PAKDIR"],
+        # Convenience derived paths used across scripts.
+        JEJU_MAIN=content / "Maps" / "Jeju" / "Jeju_World.umap",
+        CELLS_DIR=content / "Maps" / "Jeju" / "Jeju_World" / "_Generated_",
+        VANILLA_CARGOS=content / "DataAsset" / "Cargos.uasset",
+        VANILLA_CARGOS_01=content / "DataAsset" / "Cargos_01.uasset",
+    )
+    return {k: g[k] for k in __all__}
+
+
+__all__ = ["GAME_CONTENT", "MAPPINGS", "MAPPINGS_TAG", "GAME_PAKDIR",
+           "JEJU_MAIN", "CELLS_DIR", "VANILLA_CARGOS", "VANILLA_CARGOS_01"]
 
-GAME_CONTENT: Path = _RESOLVED["MTMI_GAME_CONTENT"]      # type: ignore[assignment]
-MAPPINGS: Path     = _RESOLVED["MTMI_MAPPINGS"]          # type: ignore[assignment]
-MAPPINGS_TAG: str  = _RESOLVED["MTMI_MAPPINGS_TAG"]      # type: ignore[assignment]
-GAME_PAKDIR: Path  = _RESOLVED["MTMI_GAME_PAKDIR"]       # type: ignore[assignment]
 
-# Convenience derived paths used across scripts.
-JEJU_MAIN: Path     = GAME_CONTENT / "Maps" / "Jeju" / "Jeju_World.umap"
-CELLS_DIR: Path     = GAME_CONTENT / "Maps" / "Jeju" / "Jeju_World" / "_Generated_"
-VANILLA_CARGOS: Path    = GAME_CONTENT / "DataAsset" / "Cargos.uasset"
-VANILLA_CARGOS_01: Path = GAME_CONTENT / "DataAsset" / "Cargos_01.uasset"
+def __getattr__(name: str):
+    if name in __all__:
+        return resolve()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
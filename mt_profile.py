@@ -0,0 +1,314 @@
+"""
+Opt-in profiling for the pipeline entry points.
+
+Until now, finding out why a stage got slower meant wrapping it in
+cProfile by hand. Every entry point now starts through
+mt_profile.run(), and that call also opens the script's mt_trace stage
+span:
+
+    if __name__ == "__main__":
+        sys.exit(mt_profile.run("convert2", main))
+
+Turn profiling on with `--profile` on any of those scripts (run() strips
+it before the script parses its own arguments), or with the environment:
+
+    set MTMI_PROFILE=1                     # every stage
+    set MTMI_PROFILE=convert2,clone_bp_actors
+    python convert2.py Jeju_Worldaa.json --profile
+    python pipeline.py --profile           # every stage it runs
+
+--profile also exports MTMI_PROFILE=1, so stages started by
+pipeline.py are profiled too. A profiled run writes the following under
+.mtmi_cache/profile/<stage>/:
+
+  last.prof         cProfile stats (deterministic: exact call counts),
+                    every thread's merged into one: phase_runner and
+                    pool workers are profiled alongside the main thread
+                    (whose wait for them shows as lock acquire)
+  last.collapsed    sampled stacks, one "frame;frame;... count" line per
+                    distinct stack: flamegraph.pl, speedscope and
+                    inferno read it as is. Samples come from a
+                    background thread every MTMI_PROFILE_INTERVAL ms
+                    (default 5), across all threads.
+  last.txt          the top MTMI_PROFILE_TOP (default 25) functions by own
+                    time, plus the diff against the baseline
+  baseline.json     saved with `python mt_profile.py baseline <stage>`
+
+Functions are keyed by file name and function name, not line number, so a
+baseline survives unrelated edits. The diff compares each function's share
+of the run, not absolute seconds, which keeps a baseline from one machine
+usable on another. It flags functions whose share grew by more than
+MTMI_PROFILE_DIFF_PCT points (default 5), or that are new in the top list.
+An `ensure_name` or `find_import_index` taking over a convert2 run shows up
+at the top of that list.
+
+    python mt_profile.py show convert2
+    python mt_profile.py baseline convert2          # accept the last run
+    python mt_profile.py diff convert2
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import mt_trace
+from artifact_cache import CACHE_ROOT
+
+ENV = "MTMI_PROFILE"
+PROFILE_ROOT = CACHE_ROOT / "profile"
+FLAG = "--profile"
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    return int(raw) if raw.isdigit() and int(raw) > 0 else default
+
+
+def enabled(stage: str) -> bool:
+    raw = os.environ.get(ENV, "").strip().lower()
+    if raw in ("", "0", "no", "off"):
+        return False
+    if raw in ("1", "yes", "on", "all"):
+        return True
+    return stage.lower() in {s.strip() for s in raw.split(",")}
+
+
+def run(stage: str, fn, *args):
+    """Run an entry point as `stage`: inside an mt_trace stage span, and
+    under the profiler when asked to. Returns what fn returns."""
+    if FLAG in sys.argv[1:]:
+        sys.argv[1:] = [a for a in sys.argv[1:] if a != FLAG]
+        if not enabled(stage):
+            os.environ[ENV] = "1"
+    with mt_trace.span(stage, cat="stage"):
+        if not enabled(stage):
+            return fn(*args)
+        prof = cProfile.Profile()
+        sampler = _Sampler(_env_int("MTMI_PROFILE_INTERVAL", 5) / 1000)
+        sampler.start()
+        threads = _ThreadProfiles()
+        t0 = time.perf_counter()
+        try:
+            with threads:
+                return prof.runcall(fn, *args)
+        finally:
+            wall = time.perf_counter() - t0
+            sampler.stop()
+            try:
+                _write(stage, threads.merged(prof), sampler.stacks, wall)
+            except OSError as e:
+                print(f"  [profile] cannot write {PROFILE_ROOT / stage}: {e}", file=sys.stderr)
+
+
+class _ThreadProfiles:
+    """cProfile only sees the thread that enables it, and clone_bp_actors,
+    pipeline and watch do their work on phase_runner / pool threads. While
+    active, every thread started through `threading` gets a Profile of its
+    own, merged into the main one at the end."""
+
+    def __init__(self):
+        self.profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def _start(self, frame, event, arg) -> None:
+        # Runs as the new thread's first profile event; enable() replaces it.
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Python 3.12+ profiles through sys.monitoring, which already
+            # covers every thread and allows one active profiler.
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self.profiles.append(prof)
+
+    def __enter__(self):
+        threading.setprofile(self._start)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        threading.setprofile(None)
+
+    def merged(self, prof: cProfile.Profile) -> pstats.Stats:
+        stats = pstats.Stats(prof, stream=io.StringIO())
+        with self._lock:
+            for p in self.profiles:
+                p.create_stats()
+                if p.stats:
+                    stats.add(p)
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Sampling
+# ----------------------------------------------------------------------
+class _Sampler(threading.Thread):
+    """Collects collapsed stacks of every other thread."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="mt_profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._halt.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+# ----------------------------------------------------------------------
+# Reports
+# ----------------------------------------------------------------------
+def _table(stats: pstats.Stats) -> dict[str, dict]:
+    """{'file.py:func': {own, cum, calls}} with line numbers folded away."""
+    out: dict[str, dict] = {}
+    for (filename, _line, func), (_cc, nc, tt, ct, _callers) in stats.stats.items():
+        key = f"{Path(filename).name}:{func}" if filename != "~" else func
+        row = out.setdefault(key, {"own": 0.0, "cum": 0.0, "calls": 0})
+        row["own"] += tt
+        row["cum"] = max(row["cum"], ct)
+        row["calls"] += nc
+    return out
+
+
+def summarize(stats: pstats.Stats, wall: float) -> dict:
+    table = _table(stats)
+    total = sum(r["own"] for r in table.values()) or 1e-9
+    return {"wall": wall, "total": total, "functions": table}
+
+
+def top_lines(summary: dict, n: int) -> list[str]:
+    total = summary["total"]
+    rows = sorted(summary["functions"].items(), key=lambda kv: -kv[1]["own"])[:n]
+    lines = [f"{'own s':>8} {'own %':>6} {'cum s':>8} {'calls':>9}  function"]
+    for key, r in rows:
+        lines.append(f"{r['own']:8.3f} {100 * r['own'] / total:5.1f}% {r['cum']:8.3f} {r['calls']:9d}  {key}")
+    return lines
+
+
+def diff_lines(current: dict, baseline: dict, n: int, threshold_pct: float) -> list[str]:
+    """Functions whose share of the run grew past the threshold, or that
+    entered the top n without being in the baseline's."""
+    cur_t, base_t = current["total"], baseline["total"] or 1e-9
+    base_top = {k for k, _ in sorted(baseline["functions"].items(), key=lambda kv: -kv[1]["own"])[:n]}
+    lines = [f"vs baseline: {current['wall']:.2f}s wall (was {baseline['wall']:.2f}s), "
+             f"{cur_t:.2f}s profiled (was {base_t:.2f}s)"]
+    flagged = []
+    for key, r in sorted(current["functions"].items(), key=lambda kv: -kv[1]["own"])[:n]:
+        share = 100 * r["own"] / cur_t
+        b = baseline["functions"].get(key)
+        was = 100 * b["own"] / base_t if b else 0.0
+        if share - was > threshold_pct or key not in base_top and share > threshold_pct:
+            calls = f", calls {b['calls']} -> {r['calls']}" if b else ", new"
+            flagged.append(f"  {share:5.1f}% (was {was:4.1f}%)  {key}{calls}")
+    lines += flagged or [f"  no function grew by more than {threshold_pct:g} points"]
+    return lines
+
+
+def _dir(stage: str) -> Path:
+    return PROFILE_ROOT / stage
+
+
+def _load(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _report(stage: str, summary: dict) -> tuple[list[str], list[str]]:
+    """(header + top table, baseline diff or [])."""
+    n = _env_int("MTMI_PROFILE_TOP", 25)
+    top = [f"[profile] {stage}: {summary['wall']:.2f}s wall"] + top_lines(summary, n)
+    baseline = _load(_dir(stage) / "baseline.json")
+    if not baseline:
+        return top, []
+    return top, diff_lines(summary, baseline, n, float(_env_int("MTMI_PROFILE_DIFF_PCT", 5)))
+
+
+def _write(stage: str, stats: pstats.Stats, stacks: Counter, wall: float) -> None:
+    d = _dir(stage)
+    d.mkdir(parents=True, exist_ok=True)
+    stats.dump_stats(str(d / "last.prof"))
+    summary = summarize(stats, wall)
+    (d / "last.json").write_text(json.dumps(summary), encoding="utf-8")
+    (d / "last.collapsed").write_text("".join(f"{s} {c}\n" for s, c in sorted(stacks.items())),
+                                      encoding="utf-8")
+    top, diff = _report(stage, summary)
+    (d / "last.txt").write_text("\n".join(top + diff) + "\n", encoding="utf-8")
+    # The console gets the ten hottest functions; last.txt has the rest.
+    print("\n".join(top[:12] + diff), file=sys.stderr)
+    print(f"  [profile] {d}/last.txt, last.collapsed ({sum(stacks.values())} samples)",
+          file=sys.stderr)
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    import shutil
+    ap = argparse.ArgumentParser(description="Show, diff or baseline the last profile of a stage.")
+    ap.add_argument("command", choices=("show", "diff", "baseline", "list"))
+    ap.add_argument("stage", nargs="?")
+    ap.add_argument("--top", type=int, default=_env_int("MTMI_PROFILE_TOP", 25))
+    ap.add_argument("--threshold", type=float, default=float(_env_int("MTMI_PROFILE_DIFF_PCT", 5)),
+                    help="diff: flag functions whose share grew by more than this many points")
+    args = ap.parse_args(argv)
+
+    if args.command == "list":
+        for d in sorted(p for p in PROFILE_ROOT.glob("*") if p.is_dir()):
+            last, base = _load(d / "last.json"), (d / "baseline.json").exists()
+            wall = f"{last['wall']:.2f}s" if last else "-"
+            print(f"  {d.name:<20} last {wall:>8}  {'baseline' if base else ''}")
+        return 0
+    if not args.stage:
+        ap.error(f"{args.command} needs a stage")
+    d = _dir(args.stage)
+    last = _load(d / "last.json")
+    if last is None:
+        print(f"[profile] no profile for {args.stage!r} — run it with --profile first", file=sys.stderr)
+        return 1
+    if args.command == "baseline":
+        shutil.copyfile(d / "last.json", d / "baseline.json")
+        print(f"[profile] {args.stage}: baseline set from the last run ({last['wall']:.2f}s)")
+        return 0
+    if args.command == "show":
+        print("\n".join(top_lines(last, args.top)))
+        return 0
+    baseline = _load(d / "baseline.json")
+    if baseline is None:
+        print(f"[profile] {args.stage}: no baseline — `python mt_profile.py baseline {args.stage}`",
+              file=sys.stderr)
+        return 1
+    lines = diff_lines(last, baseline, args.top, args.threshold)
+    print("\n".join(lines))
+    return 1 if len(lines) > 1 and not lines[1].startswith("  no function") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
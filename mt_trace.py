@@ -0,0 +1,420 @@
+"""
+Pipeline-wide tracing, written as Chrome trace-event JSON.
+
+All fulltest.bat gave us was `[%TIME%]` between stages: nothing said
+which injector call inside a stage took the time, and nothing recorded
+memory. With MTMI_TRACE set to a file, every script that imports this
+module records spans into it, and so does every child process, since it
+inherits the variable:
+
+    with mt_trace.span("extract catalog"):             # a sub-phase
+        ...
+    r = mt_trace.run([INJECTOR, "mutate-cargos", ...],  # a subprocess
+                     capture_output=True, text=True)
+
+Each span carries wall time (its length), CPU seconds, peak RSS and bytes
+read/written. For an in-process span these come from the process itself,
+measured at the span's start and end. For a subprocess they come from the
+child: os.wait4's rusage on POSIX (its I/O counts are 512-byte blocks that
+actually hit the disk), and the process handle's times, memory and I/O
+counters on Windows. mt_trace.run() returns the subprocess.run() result,
+and when tracing is off it simply is subprocess.run().
+
+Every process appends its own events to <trace>.parts/<pid>.jsonl (on
+exit, and whenever a top-level span closes), so parallel phases and
+worker pools never share a file. `merge` joins the parts into the one
+JSON file chrome://tracing, Perfetto or speedscope open:
+
+    set MTMI_TRACE=%CD%\\.mtmi_cache\\trace.json
+    fulltest.bat --trace           # sets MTMI_TRACE, merges at the end
+    python pipeline.py --trace .mtmi_cache\\trace.json
+    python mt_trace.py merge .mtmi_cache\\trace.json
+    python mt_trace.py summary .mtmi_cache\\trace.json     # slowest spans
+
+Timestamps are wall-clock microseconds, so spans from different
+processes line up on one timeline. Each process is labelled with its
+script name and each thread with its name, which puts phase_runner
+phases on separate rows.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ENV = "MTMI_TRACE"
+_ARGV_CHARS = 160
+
+_lock = threading.Lock()
+_events: list[dict] = []
+_local = threading.local()
+_named_threads: set[int] = set()
+_started = False
+
+
+def trace_path() -> Path | None:
+    raw = os.environ.get(ENV, "").strip().strip('"')
+    return Path(raw) if raw else None
+
+
+def enabled() -> bool:
+    return trace_path() is not None
+
+
+def _parts_dir(path: Path) -> Path:
+    return path.with_name(path.name + ".parts")
+
+
+def _now_us() -> float:
+    return time.time_ns() / 1000
+
+
+def _summary(argv) -> str:
+    if isinstance(argv, (str, bytes)):
+        s = argv if isinstance(argv, str) else argv.decode(errors="replace")
+    else:
+        s = subprocess.list2cmdline([str(a) for a in argv])
+    return s if len(s) <= _ARGV_CHARS else s[:_ARGV_CHARS - 3] + "..."
+
+
+def _span_name(argv) -> str:
+    """'<tool> <verb>' for an argv: the executable's stem plus the first
+    argument (after the script for an interpreter), e.g. 'MTBPInjector
+    mutate-cargos', 'uagui.py tojson'."""
+    if isinstance(argv, (str, bytes)):
+        return _summary(argv).split(" ", 1)[0]
+    parts = [str(a) for a in argv]
+    if len(parts) > 1 and Path(parts[0]).stem.lower().startswith("python"):
+        parts = parts[1:]
+    head = Path(parts[0]).name if parts else "?"
+    if head.lower().endswith(".exe"):
+        head = head[:-4]
+    verb = next((p for p in parts[1:2] if not p.startswith("-")), "")
+    return f"{head} {verb}".strip()
+
+
+# ----------------------------------------------------------------------
+# Resource counters
+# ----------------------------------------------------------------------
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _IO(ctypes.Structure):
+        _fields_ = [(n, ctypes.c_ulonglong) for n in
+                    ("ReadOps", "WriteOps", "OtherOps", "ReadBytes", "WriteBytes", "OtherBytes")]
+
+    class _MEM(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                   [(n, ctypes.c_size_t) for n in
+                    ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                     "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                     "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    _k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _k32.GetCurrentProcess.restype = wintypes.HANDLE
+
+    def _handle_stats(handle) -> dict:
+        h = wintypes.HANDLE(int(handle))
+        out = {}
+        ft = [wintypes.FILETIME() for _ in range(4)]
+        if _k32.GetProcessTimes(h, *(ctypes.byref(f) for f in ft)):
+            ticks = sum((f.dwHighDateTime << 32 | f.dwLowDateTime) for f in ft[2:])
+            out["cpu_s"] = ticks / 1e7                        # 100 ns units
+        mem = _MEM()
+        mem.cb = ctypes.sizeof(mem)
+        if _k32.K32GetProcessMemoryInfo(h, ctypes.byref(mem), mem.cb):
+            out["peak_rss"] = mem.PeakWorkingSetSize
+        io = _IO()
+        if _k32.GetProcessIoCounters(h, ctypes.byref(io)):
+            out["read"], out["write"] = io.ReadBytes, io.WriteBytes
+        return out
+
+    def _self_stats() -> dict:
+        return _handle_stats(_k32.GetCurrentProcess())
+else:
+    import resource
+
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    _RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+    def _self_stats() -> dict:
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        out = {"cpu_s": ru.ru_utime + ru.ru_stime, "peak_rss": ru.ru_maxrss * _RSS_UNIT}
+        try:
+            with open("/proc/self/io", "rb") as f:
+                io = dict(line.split(b":") for line in f.read().splitlines())
+            out["read"], out["write"] = int(io[b"rchar"]), int(io[b"wchar"])
+        except (OSError, KeyError, ValueError):
+            out["read"], out["write"] = ru.ru_inblock * 512, ru.ru_oublock * 512
+        return out
+
+    def _rusage_stats(ru) -> dict:
+        return {"cpu_s": ru.ru_utime + ru.ru_stime, "peak_rss": ru.ru_maxrss * _RSS_UNIT,
+                "read": ru.ru_inblock * 512, "write": ru.ru_oublock * 512}
+
+
+def _args(stats: dict, before: dict | None = None) -> dict:
+    """Span args from counters (deltas against `before` for cpu/io)."""
+    b = before or {}
+    out = {}
+    if "cpu_s" in stats:
+        out["cpu_ms"] = round((stats["cpu_s"] - b.get("cpu_s", 0.0)) * 1000, 1)
+    if "peak_rss" in stats:
+        out["peak_rss_mb"] = round(stats["peak_rss"] / (1024 * 1024), 1)
+    for k in ("read", "write"):
+        if k in stats:
+            out[f"{k}_mb"] = round((stats[k] - b.get(k, 0)) / (1024 * 1024), 2)
+    return out
+
+
+# ----------------------------------------------------------------------
+# Events
+# ----------------------------------------------------------------------
+def _start() -> None:
+    global _started
+    _started = True
+    atexit.register(flush)
+    script = Path(sys.argv[0]).name if sys.argv and sys.argv[0] else "python"
+    _events.append({"ph": "M", "name": "process_name", "pid": os.getpid(), "tid": 0,
+                    "args": {"name": f"{script} {_summary(sys.argv[1:])}".strip()}})
+
+
+def _emit(ev: dict) -> None:
+    tid = threading.get_native_id()
+    ev.update(pid=os.getpid(), tid=tid)
+    with _lock:
+        if not _started:
+            _start()
+        if tid not in _named_threads:
+            _named_threads.add(tid)
+            _events.append({"ph": "M", "name": "thread_name", "pid": ev["pid"], "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+        _events.append(ev)
+
+
+def flush() -> None:
+    """Append this process's buffered events to its part file."""
+    path = trace_path()
+    with _lock:
+        if path is None or not _events:
+            return
+        events, _events[:] = list(_events), []
+    parts = _parts_dir(path)
+    try:
+        parts.mkdir(parents=True, exist_ok=True)
+        with open(parts / f"{os.getpid()}.jsonl", "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(e) + "\n" for e in events)
+    except OSError as e:
+        print(f"  [trace] cannot write {parts}: {e}", file=sys.stderr)
+
+
+@contextmanager
+def span(name: str, cat: str = "phase", **args):
+    """Record the enclosed block as a complete ('X') event."""
+    if not enabled():
+        yield
+        return
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    before = _self_stats()
+    t0 = _now_us()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        _emit({"ph": "X", "name": name, "cat": cat, "ts": t0, "dur": _now_us() - t0,
+               "args": {**args, **_args(_self_stats(), before)}})
+        if depth == 0:
+            flush()
+
+
+def instant(name: str, cat: str = "mark", **args) -> None:
+    if enabled():
+        _emit({"ph": "i", "s": "p", "name": name, "cat": cat, "ts": _now_us(), "args": args})
+
+
+def _communicate_posix(proc: subprocess.Popen, input, timeout: float | None):
+    """communicate() that reaps with os.wait4 to get the child's rusage."""
+    out: dict[str, object] = {}
+
+    def drain(key, stream):
+        out[key] = stream.read()
+        stream.close()
+
+    readers = [threading.Thread(target=drain, args=(k, s), daemon=True)
+               for k, s in (("stdout", proc.stdout), ("stderr", proc.stderr)) if s is not None]
+    for t in readers:
+        t.start()
+    if proc.stdin is not None:
+        try:
+            if input:
+                proc.stdin.write(input)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    deadline = None if timeout is None else time.monotonic() + timeout
+    timed_out = False
+    while True:
+        pid, status, ru = os.wait4(proc.pid, 0 if deadline is None or timed_out else os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() >= deadline:
+            proc.kill()
+            timed_out = True
+            continue
+        time.sleep(0.01)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    for t in readers:
+        t.join()
+    return out.get("stdout"), out.get("stderr"), ru, timed_out
+
+
+def run(args, *, input=None, timeout: float | None = None, check: bool = False,
+        capture_output: bool = False, name: str | None = None, **kw) -> subprocess.CompletedProcess:
+    """subprocess.run(), recorded as a span with the child's resources."""
+    if not enabled():
+        return subprocess.run(args, input=input, timeout=timeout, check=check,
+                              capture_output=capture_output, **kw)
+    if capture_output:
+        kw["stdout"] = kw["stderr"] = subprocess.PIPE
+    if input is not None:
+        kw["stdin"] = subprocess.PIPE
+    t0 = _now_us()
+    timed_out = False
+    stats: dict = {}
+    proc = subprocess.Popen(args, **kw)
+    try:
+        if sys.platform == "win32":
+            try:
+                out, err = proc.communicate(input, timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                out, err = proc.communicate()
+                timed_out = True
+            stats = _handle_stats(proc._handle)
+        else:
+            out, err, ru, timed_out = _communicate_posix(proc, input, timeout)
+            stats = _rusage_stats(ru)
+    finally:
+        if proc.returncode is None:        # interrupted: don't leave it running
+            proc.kill()
+            proc.wait()
+        span_args = {"argv": _summary(args), "exit": proc.returncode, **_args(stats)}
+        if timed_out:
+            span_args["timeout_s"] = timeout
+        _emit({"ph": "X", "name": name or _span_name(args), "cat": "subprocess", "ts": t0,
+               "dur": _now_us() - t0, "args": span_args})
+        if getattr(_local, "depth", 0) == 0:
+            flush()
+    if timed_out:
+        raise subprocess.TimeoutExpired(args, timeout, output=out, stderr=err)
+    result = subprocess.CompletedProcess(args, proc.returncode, out, err)
+    if check:
+        result.check_returncode()
+    return result
+
+
+# ----------------------------------------------------------------------
+# Trace files
+# ----------------------------------------------------------------------
+def reset(path: Path) -> None:
+    """Start a new trace at `path`: drop old parts and the merged file."""
+    parts = _parts_dir(path)
+    if parts.is_dir():
+        for p in parts.glob("*.jsonl"):
+            p.unlink()
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def merge(path: Path) -> int:
+    """Join every part file into `path` (the trace so far included);
+    returns the number of events written."""
+    events: list[dict] = []
+    if path.is_file():
+        try:
+            events = json.loads(path.read_text(encoding="utf-8")).get("traceEvents", [])
+        except (OSError, ValueError):
+            events = []
+    parts = _parts_dir(path)
+    used = sorted(parts.glob("*.jsonl")) if parts.is_dir() else []
+    for p in used:
+        for line in p.read_text(encoding="utf-8").splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                pass      # a process killed mid-write
+    events.sort(key=lambda e: (e.get("ph") != "M", e.get("ts", 0)))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    os.replace(tmp, path)
+    for p in used:
+        p.unlink()
+    try:
+        parts.rmdir()
+    except OSError:
+        pass
+    return len(events)
+
+
+def summary(path: Path, top: int = 25) -> list[str]:
+    events = json.loads(path.read_text(encoding="utf-8")).get("traceEvents", [])
+    procs = {e["pid"]: e["args"]["name"] for e in events if e.get("name") == "process_name"}
+    spans = [e for e in events if e.get("ph") == "X"]
+    if not spans:
+        return ["(no spans)"]
+    start = min(e["ts"] for e in spans)
+    end = max(e["ts"] + e["dur"] for e in spans)
+    lines = [f"{len(spans)} span(s) across {len(procs)} process(es), {(end - start) / 1e6:.1f}s end to end"]
+    peak = max(spans, key=lambda e: e["args"].get("peak_rss_mb", 0))
+    if peak["args"].get("peak_rss_mb"):
+        lines.append(f"peak RSS {peak['args']['peak_rss_mb']:.0f} MB in {peak['name']}")
+    lines.append(f"{'wall s':>8} {'cpu s':>8} {'rss MB':>7} {'r MB':>8} {'w MB':>8}  span")
+    for e in sorted(spans, key=lambda e: -e["dur"])[:top]:
+        a = e["args"]
+        lines.append(f"{e['dur'] / 1e6:8.2f} {a.get('cpu_ms', 0) / 1000:8.2f} {a.get('peak_rss_mb', 0):7.0f} "
+                     f"{a.get('read_mb', 0):8.1f} {a.get('write_mb', 0):8.1f}  "
+                     f"{e['name']}  [{procs.get(e['pid'], e['pid'])}]")
+    return lines
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Start, merge or summarize a pipeline trace.")
+    ap.add_argument("command", choices=("reset", "merge", "summary"))
+    ap.add_argument("trace", nargs="?", type=Path, help=f"trace file (default ${ENV})")
+    ap.add_argument("--top", type=int, default=25, help="summary: spans to list")
+    args = ap.parse_args(argv)
+    path = args.trace or trace_path()
+    if path is None:
+        print(f"[trace] no trace file given and {ENV} is not set", file=sys.stderr)
+        return 2
+    if args.command == "reset":
+        reset(path)
+        return 0
+    if args.command == "merge":
+        n = merge(path)
+        print(f"[trace] {n} event(s) -> {path}  (open in chrome://tracing or ui.perfetto.dev)")
+        return 0
+    try:
+        lines = summary(path, args.top)
+    except (OSError, ValueError) as e:
+        print(f"[trace] cannot read {path}: {e}", file=sys.stderr)
+        return 1
+    print("\n".join(lines))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,477 @@
+"""
+Build and deploy the mod pak without repak.
+
+modp.bat shells out to `repak pack` over the whole MapChangeTest_P tree
+every run, deletes every *.bak under the repo first, and copies the
+result into the game's Paks folder even when it's byte-identical to what
+is already there. This writes the pak itself:
+
+    python pak_builder.py MapChangeTest_P                    # build + deploy
+    python pak_builder.py MapChangeTest_P --compression zlib
+    python pak_builder.py MapChangeTest_P --no-deploy
+    python pak_builder.py --list MapChangeTest_P.pak
+
+Format: UE 5.5's pak version 11 (Fnv64BugFix), the same layout repak
+writes: each entry's record header + data, then the primary index with
+bit-packed encoded entries, the path-hash index and the full directory
+index, then the footer. Mount point "../../../", entries uncompressed
+(repak's default, what modp.bat shipped) or zlib in 64 KiB blocks. No
+encryption, no signing, no iostore.
+
+Speed:
+  - Entries go in sorted path order and nothing time-dependent is
+    written, so the same tree always gives the same bytes.
+  - Changed files are hashed and compressed on a process pool
+    (--jobs, default min(8, CPUs)).
+  - A record header + data is position-independent (block offsets are
+    relative to the entry, v5+), so an entry whose source file is
+    unchanged is copied straight out of the previous pak. What the
+    previous pak holds is remembered in
+    .mtmi_cache/pak/<name>.json, keyed by the pak's own digest.
+  - Deploy replaces zzzz_<mod>.pak in MTMI_GAME_PAKDIR atomically and is
+    skipped when the deployed pak already has the same digest.
+
+*.bak files (UAssetGUI backups) are left out of the pak, not deleted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import mt_profile
+import mt_trace
+from artifact_cache import CACHE_ROOT, file_digest, save_digest_memo
+
+PAK_MAGIC = 0x5A6F12E1
+PAK_VERSION = 11
+MOUNT_POINT = "../../../"
+BLOCK_SIZE = 0x10000
+COMPRESSION_SLOTS = 5            # v8b+ footer: five 32-byte method names
+_FOOTER_SIZE = 16 + 1 + 4 + 4 + 8 + 8 + 20 + 32 * COMPRESSION_SLOTS
+METHODS = {"none": None, "zlib": "Zlib"}
+EXCLUDE_SUFFIXES = (".bak",)
+STATE_DIR = CACHE_ROOT / "pak"
+_STATE_FORMAT = 1
+
+
+class PakError(ValueError):
+    pass
+
+
+def default_jobs() -> int:
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+# ----------------------------------------------------------------------
+# Encoding helpers
+# ----------------------------------------------------------------------
+def _fstring(s: str) -> bytes:
+    if s.isascii():
+        b = s.encode("ascii") + b"\0"
+        return struct.pack("<i", len(b)) + b
+    b = s.encode("utf-16-le") + b"\0\0"
+    return struct.pack("<i", -(len(b) // 2)) + b
+
+
+def _read_fstring(buf: bytes, pos: int) -> tuple[str, int]:
+    (n,) = struct.unpack_from("<i", buf, pos)
+    pos += 4
+    if n == 0:
+        return "", pos
+    if n > 0:
+        return buf[pos:pos + n - 1].decode("ascii", "replace"), pos + n
+    n = -n * 2
+    return buf[pos:pos + n - 2].decode("utf-16-le", "replace"), pos + n
+
+
+def path_hash(path: str, seed: int) -> int:
+    """FNV-64 over the lowercased UTF-16LE path, offset by the index seed
+    (FPakFile::HashPath as of the v11 Fnv64BugFix)."""
+    h = (0xCBF29CE484222325 + seed) & 0xFFFFFFFFFFFFFFFF
+    for b in path.lower().encode("utf-16-le"):
+        h ^= b
+        h = (h * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def _header_size(compressed: bool, blocks: int) -> int:
+    """Size of the in-data FPakEntry record for v11."""
+    return 8 + 8 + 8 + 4 + 20 + ((4 + 16 * blocks) if compressed else 0) + 1 + 4
+
+
+def build_record(data: bytes, method: str, level: int = 6) -> tuple[bytes, dict]:
+    """One entry's record header + stored data, and the index fields."""
+    if METHODS[method] is None:
+        sha1 = hashlib.sha1(data).digest()
+        head = struct.pack("<QQQI", 0, len(data), len(data), 0) + sha1 + struct.pack("<BI", 0, 0)
+        return head + data, {"slot": 0, "compressed": len(data), "uncompressed": len(data),
+                             "block_size": 0, "blocks": [], "sha1": sha1.hex()}
+    chunks = [zlib.compress(data[i:i + BLOCK_SIZE], level) for i in range(0, len(data), BLOCK_SIZE)]
+    stored = b"".join(chunks)
+    if len(stored) >= len(data):
+        # Empty or incompressible: store it as is, like UnrealPak does.
+        return build_record(data, "none")
+    sha1 = hashlib.sha1(stored).digest()
+    start = _header_size(True, len(chunks))
+    table = b""
+    for c in chunks:
+        table += struct.pack("<QQ", start, start + len(c))
+        start += len(c)
+    head = (struct.pack("<QQQI", 0, len(stored), len(data), 1) + sha1
+            + struct.pack("<I", len(chunks)) + table + struct.pack("<BI", 0, BLOCK_SIZE))
+    return head + stored, {"slot": 1, "compressed": len(stored), "uncompressed": len(data),
+                           "block_size": BLOCK_SIZE, "blocks": [len(c) for c in chunks],
+                           "sha1": sha1.hex()}
+
+
+def _record_job(args: tuple[str, str, int]) -> tuple[bytes, dict]:
+    path, method, level = args
+    return build_record(Path(path).read_bytes(), method, level)
+
+
+def encode_entry(offset: int, meta: dict) -> bytes:
+    """The index's bit-packed FPakEntry (FPakFile::EncodePakEntry)."""
+    bs = meta["block_size"]
+    packed_bs = (bs >> 11) & 0x3F
+    if packed_bs << 11 != bs:
+        packed_bs = 0x3F
+    nblocks = len(meta["blocks"]) if meta["slot"] else 0
+    size32 = meta["compressed"] < 0xFFFFFFFF
+    usize32 = meta["uncompressed"] < 0xFFFFFFFF
+    off32 = offset < 0xFFFFFFFF
+    flags = (packed_bs | nblocks << 6 | meta["slot"] << 23
+             | size32 << 29 | usize32 << 30 | off32 << 31)
+    out = struct.pack("<I", flags)
+    if packed_bs == 0x3F:
+        out += struct.pack("<I", bs)
+    out += struct.pack("<I" if off32 else "<Q", offset)
+    out += struct.pack("<I" if usize32 else "<Q", meta["uncompressed"])
+    if meta["slot"]:
+        out += struct.pack("<I" if size32 else "<Q", meta["compressed"])
+        if nblocks > 1:
+            out += b"".join(struct.pack("<I", b) for b in meta["blocks"])
+    return out
+
+
+def decode_entry(buf: bytes, pos: int) -> tuple[dict, int]:
+    (flags,) = struct.unpack_from("<I", buf, pos)
+    pos += 4
+    bs = (flags & 0x3F) << 11
+    if flags & 0x3F == 0x3F:
+        (bs,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+    nblocks = (flags >> 6) & 0xFFFF
+    if flags >> 22 & 1:
+        raise PakError("encrypted entries are not supported")
+    slot = (flags >> 23) & 0x3F
+
+    def num(bit: int) -> int:
+        nonlocal pos
+        fmt = "<I" if flags >> bit & 1 else "<Q"
+        (v,) = struct.unpack_from(fmt, buf, pos)
+        pos += struct.calcsize(fmt)
+        return v
+
+    offset = num(31)
+    usize = num(30)
+    csize = num(29) if slot else usize
+    blocks = []
+    if slot and nblocks > 1:
+        blocks = list(struct.unpack_from(f"<{nblocks}I", buf, pos))
+        pos += 4 * nblocks
+    elif slot:
+        blocks = [csize]
+    return {"offset": offset, "slot": slot, "compressed": csize, "uncompressed": usize,
+            "block_size": bs, "blocks": blocks}, pos
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+def _directory_index(entries: list[tuple[str, int]]) -> dict[str, list[tuple[str, int]]]:
+    dirs: dict[str, list[tuple[str, int]]] = {"/": []}
+    for path, enc in entries:
+        parent, _, name = path.rpartition("/")
+        d = parent + "/" if parent else "/"
+        # Every ancestor directory is listed, even without files of its own.
+        parts = parent.split("/") if parent else []
+        for i in range(1, len(parts) + 1):
+            dirs.setdefault("/".join(parts[:i]) + "/", [])
+        dirs[d].append((name, enc))
+    return dirs
+
+
+def write_index(f, index_offset: int, pak_name: str,
+                entries: list[tuple[str, int, dict]]) -> None:
+    """Primary index + path-hash index + full directory index + footer,
+    written at `index_offset`. entries: (path, record offset, meta)."""
+    seed = zlib.crc32(pak_name.lower().encode("utf-16-le"))
+    encoded = b""
+    located = []
+    for path, offset, meta in entries:
+        located.append((path, len(encoded)))
+        encoded += encode_entry(offset, meta)
+
+    phi = struct.pack("<I", len(located))
+    for path, enc in located:
+        phi += struct.pack("<Qi", path_hash(path, seed), enc)
+    phi += struct.pack("<I", 0)
+
+    fdi_dirs = _directory_index(located)
+    fdi = struct.pack("<I", len(fdi_dirs))
+    for d in sorted(fdi_dirs):
+        fdi += _fstring(d) + struct.pack("<I", len(fdi_dirs[d]))
+        for name, enc in fdi_dirs[d]:
+            fdi += _fstring(name) + struct.pack("<i", enc)
+
+    # The primary index's size doesn't depend on the two offsets it holds.
+    def primary(phi_offset: int, fdi_offset: int) -> bytes:
+        return (_fstring(MOUNT_POINT) + struct.pack("<IQ", len(located), seed)
+                + struct.pack("<IQQ", 1, phi_offset, len(phi)) + hashlib.sha1(phi).digest()
+                + struct.pack("<IQQ", 1, fdi_offset, len(fdi)) + hashlib.sha1(fdi).digest()
+                + struct.pack("<I", len(encoded)) + encoded + struct.pack("<I", 0))
+
+    size = len(primary(0, 0))
+    index = primary(index_offset + size, index_offset + size + len(phi))
+    f.write(index)
+    f.write(phi)
+    f.write(fdi)
+    names = b"".join(n.encode("ascii").ljust(32, b"\0") for n in
+                     (["Zlib"] + [""] * (COMPRESSION_SLOTS - 1)))
+    f.write(b"\0" * 16 + b"\0" + struct.pack("<IIQQ", PAK_MAGIC, PAK_VERSION, index_offset, len(index))
+            + hashlib.sha1(index).digest() + names)
+
+
+def read_pak(path: Path) -> dict:
+    """Footer + index of a v11 pak: {mount, seed, methods, entries:
+    {path: meta with offset}}. Enough to list a pak and to check one of
+    ours before reusing its records."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end < _FOOTER_SIZE:
+            raise PakError(f"{path}: too small for a pak")
+        f.seek(end - _FOOTER_SIZE)
+        foot = f.read(_FOOTER_SIZE)
+        magic, version, index_offset, index_size = struct.unpack_from("<IIQQ", foot, 17)
+        if magic != PAK_MAGIC:
+            raise PakError(f"{path}: no pak footer (magic {magic:#x})")
+        if version != PAK_VERSION:
+            raise PakError(f"{path}: pak version {version}, only {PAK_VERSION} is supported")
+        if foot[16]:
+            raise PakError(f"{path}: encrypted index")
+        methods = [foot[61 + 32 * i:93 + 32 * i].rstrip(b"\0").decode("ascii", "replace")
+                   for i in range(COMPRESSION_SLOTS)]
+        f.seek(index_offset)
+        index = f.read(index_size)
+        mount, pos = _read_fstring(index, 0)
+        count, seed = struct.unpack_from("<IQ", index, pos)
+        pos += 12
+        (has_phi,) = struct.unpack_from("<I", index, pos)
+        pos += 4 + (8 + 8 + 20 if has_phi else 0)
+        (has_fdi,) = struct.unpack_from("<I", index, pos)
+        pos += 4
+        if not has_fdi:
+            raise PakError(f"{path}: no full directory index")
+        fdi_offset, fdi_size = struct.unpack_from("<QQ", index, pos)
+        pos += 16 + 20
+        (enc_size,) = struct.unpack_from("<I", index, pos)
+        pos += 4
+        encoded = index[pos:pos + enc_size]
+        f.seek(fdi_offset)
+        fdi = f.read(fdi_size)
+    entries = {}
+    (ndirs,) = struct.unpack_from("<I", fdi, 0)
+    p = 4
+    for _ in range(ndirs):
+        d, p = _read_fstring(fdi, p)
+        (nfiles,) = struct.unpack_from("<I", fdi, p)
+        p += 4
+        for _ in range(nfiles):
+            name, p = _read_fstring(fdi, p)
+            (enc,) = struct.unpack_from("<i", fdi, p)
+            p += 4
+            rel = name if d == "/" else d + name
+            entries[rel], _ = decode_entry(encoded, enc)
+    if len(entries) != count:
+        raise PakError(f"{path}: directory index lists {len(entries)} of {count} entries")
+    return {"mount": mount, "seed": seed, "methods": methods, "entries": entries}
+
+
+# ----------------------------------------------------------------------
+# Build
+# ----------------------------------------------------------------------
+def collect(root: Path) -> list[tuple[str, Path]]:
+    """(pak path, file) for every file under root, in pak order."""
+    out = []
+    for p in root.rglob("*"):
+        if p.is_file() and p.suffix.lower() not in EXCLUDE_SUFFIXES:
+            out.append((p.relative_to(root).as_posix(), p))
+    return sorted(out, key=lambda e: e[0])
+
+
+def _state_path(pak: Path) -> Path:
+    return STATE_DIR / f"{pak.name}.json"
+
+
+def _load_state(pak: Path, settings: list) -> dict:
+    """Records of the previous pak at `pak`, if it is still the one we wrote
+    with the same settings."""
+    try:
+        state = json.loads(_state_path(pak).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if (state.get("format") != _STATE_FORMAT or state.get("settings") != settings
+            or state.get("pak_digest") != file_digest(pak)):
+        return {}
+    return state.get("entries", {})
+
+
+def build_pak(root: Path, out: Path, method: str = "none", level: int = 6,
+              jobs: int | None = None) -> dict:
+    """Write the pak for `root` to `out`; returns build stats."""
+    if method not in METHODS:
+        raise PakError(f"unknown compression {method!r} (choose from {', '.join(METHODS)})")
+    settings = [PAK_VERSION, method, level if method != "none" else None, BLOCK_SIZE]
+    with mt_trace.span("hash sources"):
+        files = collect(root)
+        prev = _load_state(out, settings)
+        src = {rel: file_digest(p) for rel, p in files}
+
+    reuse = {rel for rel, _ in files if rel in prev and prev[rel]["src"] == src[rel]}
+    todo = [(rel, p) for rel, p in files if rel not in reuse]
+    records: dict[str, tuple[bytes, dict]] = {}
+    jobs = jobs or default_jobs()
+    args = [(str(p), method, level) for _, p in todo]
+    with mt_trace.span("build records", files=len(todo), compression=method):
+        if jobs > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+                built = list(pool.map(_record_job, args, chunksize=max(1, len(todo) // (jobs * 4))))
+        else:
+            built = [_record_job(a) for a in args]
+    for (rel, _), rec in zip(todo, built):
+        records[rel] = rec
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    entries: list[tuple[str, int, dict]] = []
+    new_state: dict[str, dict] = {}
+    old = open(out, "rb") if reuse else None
+    try:
+        with mt_trace.span("write pak", reused=len(reuse)), open(tmp, "wb") as f:
+            for rel, _ in files:
+                offset = f.tell()
+                if rel in reuse:
+                    meta = prev[rel]["meta"]
+                    old.seek(prev[rel]["offset"])
+                    f.write(old.read(prev[rel]["length"]))
+                else:
+                    blob, meta = records.pop(rel)
+                    f.write(blob)
+                entries.append((rel, offset, meta))
+                new_state[rel] = {"src": src[rel], "offset": offset,
+                                  "length": f.tell() - offset, "meta": meta}
+            write_index(f, f.tell(), out.name, entries)
+    finally:
+        if old:
+            old.close()
+    os.replace(tmp, out)
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    _state_path(out).write_text(json.dumps({"format": _STATE_FORMAT, "settings": settings,
+                                            "pak_digest": file_digest(out), "entries": new_state}),
+                                encoding="utf-8")
+    save_digest_memo()
+    return {"files": len(files), "reused": len(reuse), "built": len(todo),
+            "bytes": out.stat().st_size, "digest": file_digest(out)}
+
+
+def deploy(pak: Path, pakdir: Path, name: str, legacy: list[str] = ()) -> bool:
+    """Atomically place `pak` at pakdir/name; False when it was already
+    there byte-for-byte. `legacy` names are removed from pakdir."""
+    for n in legacy:
+        try:
+            (pakdir / n).unlink()
+            print(f"  removed old {n}")
+        except FileNotFoundError:
+            pass
+    dst = pakdir / name
+    if dst.exists() and file_digest(dst) == file_digest(pak):
+        return False
+    tmp = pakdir / f".{name}.{os.getpid()}.tmp"
+    shutil.copyfile(pak, tmp)
+    os.replace(tmp, dst)
+    return True
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Build (and deploy) a UE 5.5 v11 pak from a mod folder.")
+    ap.add_argument("mod", nargs="?", default="MapChangeTest_P", help="folder to pack (default MapChangeTest_P)")
+    ap.add_argument("--out", type=Path, help="pak to write (default <mod>.pak)")
+    ap.add_argument("--compression", choices=sorted(METHODS), default="none")
+    ap.add_argument("--level", type=int, default=6, help="zlib level")
+    ap.add_argument("--jobs", type=int, default=None, help=f"compression processes (default {default_jobs()})")
+    ap.add_argument("--no-deploy", action="store_true", help="build only")
+    ap.add_argument("--pakdir", help="deploy target (default MTMI_GAME_PAKDIR)")
+    ap.add_argument("--deploy-name", help="name in the Paks folder (default zzzz_<mod>.pak)")
+    ap.add_argument("--list", type=Path, metavar="PAK", help="list a pak's entries and exit")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        try:
+            pak = read_pak(args.list)
+        except (OSError, PakError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        for rel, m in sorted(pak["entries"].items()):
+            print(f"  {m['uncompressed']:>10} {m['compressed']:>10} {rel}")
+        print(f"{len(pak['entries'])} entries, mount {pak['mount']}")
+        return 0
+
+    root = Path(args.mod)
+    if not root.is_dir():
+        print(f"[pak] {root} is not a directory", file=sys.stderr)
+        return 1
+    mod_name = root.resolve().name
+    out = args.out or Path(f"{mod_name}.pak")
+    t0 = time.perf_counter()
+    try:
+        stats = build_pak(root, out, args.compression, args.level, args.jobs)
+    except (OSError, PakError) as e:
+        print(f"[pak] build failed: {e}", file=sys.stderr)
+        return 1
+    print(f"[pak] {out}: {stats['files']} file(s), {stats['reused']} reused from the previous pak, "
+          f"{stats['built']} (re)built, {stats['bytes'] / (1024 * 1024):.1f} MB "
+          f"in {time.perf_counter() - t0:.2f}s")
+    if args.no_deploy:
+        return 0
+
+    # Only the deploy target is needed here, not the whole mt_paths set.
+    pakdir = args.pakdir or os.environ.get("MTMI_GAME_PAKDIR", "").strip().strip('"')
+    if not pakdir or not Path(pakdir).is_dir():
+        print(f"[pak] deploy target does not exist: {pakdir!r} — set MTMI_GAME_PAKDIR "
+              "to the game's MotorTown/Content/Paks folder (or pass --no-deploy)", file=sys.stderr)
+        return 2
+    pakdir = Path(pakdir)
+    name = args.deploy_name or f"zzzz_{mod_name}.pak"
+    try:
+        with mt_trace.span("deploy"):
+            placed = deploy(out, pakdir, name, legacy=[f"{mod_name}.pak"])
+    except OSError as e:
+        print(f"[pak] deploy failed: {e}", file=sys.stderr)
+        return 1
+    print(f"[pak] {'deployed' if placed else 'unchanged, not redeployed:'} {pakdir / name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("pak_builder", lambda: _main(sys.argv[1:])))
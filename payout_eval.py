@@ -0,0 +1,236 @@
+"""
+Offline payout tables for new_cargos tuning.
+
+Balancing a `new_cargos` variant (PaymentPer1Km, BasePayment,
+PaymentSqrtRatio, ...) used to mean a full pipeline run and a play
+session per guess. This evaluates every vanilla cargo and every new_cargos
+variant over a distance x multiplier grid in one pass, compares each
+variant against its `copy_from` source, and flags outliers:
+
+    python payout_eval.py                               # summary table
+    python payout_eval.py --distances 1,5,20,50 --multipliers 1,2,3
+    python payout_eval.py --csv payouts.csv --json payouts.json
+
+Inputs: the cargo catalog via cargo_index.py (run import_cargo_data.py
+first) and `new_cargos` from delivery_points.json — each variant is its
+source row with the entry's overrides applied, exactly what mutate-cargos
+ships.
+
+Payout model (per unit, one delivery of `d` km, PaymentPer1Km scaled by
+multiplier `m`):
+
+    BasePayment + m * PaymentPer1Km * d ** (0.5 + 0.5 * PaymentSqrtRatio)
+
+PaymentSqrtRatio = 1 is linear in distance; below 1 flattens long routes,
+above 1 amplifies them, as the field reference describes. It is an
+approximation of MT's mission payout — good for comparing cargos against
+each other, not for predicting the exact in-game number. payout_model()
+is the one place to change when it gets calibrated. Rows missing a field
+fall back to _DEFAULTS.
+
+Outliers: a variant is flagged when its payout at any grid point (m = 1)
+is more than --max-boost times its source's, or when its log-payout sits
+more than --threshold robust z-scores (median / MAD) above the vanilla
+cargos at that distance. NumPy is used when installed; without it the
+same grid is computed in plain Python (a few thousand cells — still well
+under a second).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import sys
+from pathlib import Path
+
+import cargo_index
+import mt_profile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DP_PATH = Path(__file__).with_name("delivery_points.json")
+DEFAULT_DISTANCES = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+DEFAULT_MULTIPLIERS = (1.0, 1.5, 2.0, 3.0)
+_DEFAULTS = {"BasePayment": 0.0, "PaymentPer1Km": 0.0, "PaymentSqrtRatio": 1.0}
+_SPEC_KEYS = {"copy_from", "new_id", "display_source", "safety_dps"}
+
+
+def _num(v, default: float) -> float:
+    if isinstance(v, bool) or v is None:
+        return default
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default          # e.g. UAssetGUI's "+0" for a zero float
+
+
+def payout_model(base, per_km, ratio, distance, multiplier):
+    """Scalar or NumPy-broadcast payout; see the module docstring."""
+    exponent = 0.5 + 0.5 * ratio
+    # A zero-length route pays the base: with PaymentSqrtRatio < -1 the
+    # exponent is negative and 0 ** exponent would divide by zero.
+    if np is not None and isinstance(distance, np.ndarray):
+        away = distance > 0
+        return base + multiplier * per_km * np.where(away, np.power(np.where(away, distance, 1.0), exponent), 0.0)
+    if distance <= 0:
+        return base
+    return base + multiplier * per_km * distance ** exponent
+
+
+def load_new_cargos(path: Path = DP_PATH) -> list[dict]:
+    try:
+        cfg = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return [c for c in cfg.get("new_cargos") or [] if isinstance(c, dict) and c.get("new_id")]
+
+
+def build_rows(catalog: dict[str, dict], new_cargos: list[dict]) -> list[dict]:
+    """One row per vanilla cargo plus one per variant:
+    {name, source, type, params: {BasePayment, PaymentPer1Km, PaymentSqrtRatio}}."""
+    def params(row: dict) -> dict:
+        return {k: _num(row.get(k), d) for k, d in _DEFAULTS.items()}
+
+    rows = [{"name": n, "source": None, "type": r.get("CargoType"), "params": params(r)}
+            for n, r in catalog.items()]
+    for c in new_cargos:
+        src = catalog.get(c.get("copy_from"))
+        if src is None:
+            print(f"  [payout] {c['new_id']}: copy_from '{c.get('copy_from')}' not in the catalog — skipped",
+                  file=sys.stderr)
+            continue
+        merged = dict(src)
+        merged.update({k: v for k, v in c.items() if k not in _SPEC_KEYS and not k.startswith("_")})
+        rows.append({"name": c["new_id"], "source": c["copy_from"],
+                     "type": merged.get("CargoType"), "params": params(merged)})
+    return rows
+
+
+def payout_surface(rows: list[dict], distances, multipliers):
+    """[cargo][distance][multiplier] payouts — an ndarray with NumPy,
+    nested lists without."""
+    if np is not None:
+        p = {k: np.array([r["params"][k] for r in rows], dtype=float) for k in _DEFAULTS}
+        d = np.asarray(distances, dtype=float)[None, :, None]
+        m = np.asarray(multipliers, dtype=float)[None, None, :]
+        return payout_model(p["BasePayment"][:, None, None], p["PaymentPer1Km"][:, None, None],
+                            p["PaymentSqrtRatio"][:, None, None], d, m)
+    return [[[payout_model(r["params"]["BasePayment"], r["params"]["PaymentPer1Km"],
+                           r["params"]["PaymentSqrtRatio"], dist, mult)
+              for mult in multipliers] for dist in distances] for r in rows]
+
+
+def _median(xs: list[float]) -> float:
+    xs = sorted(xs)
+    n = len(xs)
+    return (xs[n // 2] if n % 2 else (xs[n // 2 - 1] + xs[n // 2]) / 2) if n else 0.0
+
+
+def evaluate(rows: list[dict], distances, multipliers,
+             max_boost: float = 5.0, threshold: float = 3.5) -> dict:
+    """Surface + per-variant comparison against its source + outlier flags."""
+    surface = payout_surface(rows, distances, multipliers)
+    grid = surface.tolist() if np is not None else surface
+    index = {r["name"]: i for i, r in enumerate(rows)}
+    m1 = min(range(len(multipliers)), key=lambda j: abs(multipliers[j] - 1.0))
+
+    # Vanilla distribution of log-payout per distance, for the robust z-score.
+    vanilla = [i for i, r in enumerate(rows) if r["source"] is None]
+    stats = []
+    for k in range(len(distances)):
+        logs = [math.log1p(max(grid[i][k][m1], 0.0)) for i in vanilla]
+        med = _median(logs)
+        mad = _median([abs(x - med) for x in logs]) or 1e-9
+        stats.append((med, mad))
+
+    variants = []
+    for i, r in enumerate(rows):
+        if r["source"] is None:
+            continue
+        s = index[r["source"]]
+        # None where the source pays nothing at that distance.
+        ratios = [grid[i][k][m1] / grid[s][k][m1] if grid[s][k][m1] else None
+                  for k in range(len(distances))]
+        boost = max((x for x in ratios if x is not None), default=0.0)
+        zs = [0.6745 * (math.log1p(max(grid[i][k][m1], 0.0)) - stats[k][0]) / stats[k][1]
+              for k in range(len(distances))]
+        flags = []
+        if boost > max_boost:
+            flags.append(f"pays {boost:.1f}x its source (> {max_boost:g}x)")
+        if vanilla and max(zs) > threshold:
+            k = max(range(len(zs)), key=zs.__getitem__)
+            flags.append(f"z={zs[k]:.1f} vs vanilla cargos at {distances[k]:g} km")
+        variants.append({"name": r["name"], "source": r["source"], "params": r["params"],
+                         "vs_source": [None if x is None else round(x, 3) for x in ratios],
+                         "zscore": [round(z, 2) for z in zs], "flags": flags})
+    return {"distances": list(distances), "multipliers": list(multipliers),
+            "rows": rows, "surface": grid, "variants": variants}
+
+
+def write_csv(result: dict, path: Path) -> None:
+    src = {v["name"]: v["source"] for v in result["variants"]}
+    names = [r["name"] for r in result["rows"]]
+    idx = {n: i for i, n in enumerate(names)}
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["cargo", "source", "distance_km", "multiplier", "payout", "vs_source"])
+        for i, name in enumerate(names):
+            s = src.get(name)
+            for k, dist in enumerate(result["distances"]):
+                for j, mult in enumerate(result["multipliers"]):
+                    p = result["surface"][i][k][j]
+                    base = result["surface"][idx[s]][k][j] if s else None
+                    w.writerow([name, s or "", dist, mult, round(p, 2),
+                                round(p / base, 4) if base else ""])
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Evaluate cargo payouts over a distance x multiplier grid.")
+    ap.add_argument("--distances", default=",".join(f"{d:g}" for d in DEFAULT_DISTANCES),
+                    help="comma-separated km values")
+    ap.add_argument("--multipliers", default=",".join(f"{m:g}" for m in DEFAULT_MULTIPLIERS),
+                    help="comma-separated PaymentPer1Km multipliers")
+    ap.add_argument("--max-boost", type=float, default=5.0,
+                    help="flag variants paying more than this many times their source")
+    ap.add_argument("--threshold", type=float, default=3.5,
+                    help="robust z-score above the vanilla cargos that counts as an outlier")
+    ap.add_argument("--config", type=Path, default=DP_PATH, help="delivery_points.json with new_cargos")
+    ap.add_argument("--csv", type=Path, help="write the full surface (long format) here")
+    ap.add_argument("--json", type=Path, help="write surface + comparisons here")
+    args = ap.parse_args(argv)
+
+    distances = [float(x) for x in args.distances.split(",") if x.strip()]
+    multipliers = [float(x) for x in args.multipliers.split(",") if x.strip()]
+    idx = cargo_index.load_index()
+    if not idx:
+        print("no cargo catalog — run import_cargo_data.py first", file=sys.stderr)
+        return 1
+    rows = build_rows(idx.data["cargos"], load_new_cargos(args.config))
+    result = evaluate(rows, distances, multipliers, args.max_boost, args.threshold)
+
+    print(f"{len(rows)} cargo(s) x {len(distances)} distance(s) x {len(multipliers)} multiplier(s)"
+          f"{'' if np is not None else ' (no NumPy: pure-Python grid)'}")
+    if not result["variants"]:
+        print("no new_cargos variants in delivery_points.json")
+    for v in result["variants"]:
+        ratios = ", ".join(f"{d:g}km " + ("-" if x is None else f"{x:g}x")
+                           for d, x in zip(distances, v["vs_source"]))
+        print(f"  {v['name']:<24} vs {v['source']:<20} {ratios}")
+        for f in v["flags"]:
+            print(f"    ! {f}")
+    if args.csv:
+        write_csv(result, args.csv)
+        print(f"wrote {args.csv}")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=1), encoding="utf-8")
+        print(f"wrote {args.json}")
+    return 1 if any(v["flags"] for v in result["variants"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("payout_eval", lambda: _main(sys.argv[1:])))
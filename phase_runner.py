@@ -0,0 +1,191 @@
+"""
+Run independent pipeline phases concurrently with ordered output.
+
+clone_bp_actors.py front-loads several injector calls that don't depend on
+each other — mutate-cargos for Cargos_01, mutate-bp-cdo per safety-net DP,
+one mod BP class per registry key, find-cells-batch — each a separate .NET
+process that spends most of its time parsing the mappings and the source
+asset. Running them back to back left every core but one idle. This module
+runs them on a bounded thread pool instead:
+
+    ok, results = run_phases([
+        ("cargos", lambda: materialize_new_cargos(new_cargos)),
+        ("cells",  lambda: resolve_cells_batch(points)),
+        ("report", lambda: write_report(), ["cargos"]),   # optional deps
+    ], jobs=4)
+
+A phase fails when it raises or returns exactly False; the first failure
+stops any phase that hasn't started yet (running ones are allowed to finish
+so no half-written asset is left behind) and run_phases returns ok=False.
+
+Output stays readable: everything a phase prints to stdout/stderr is
+buffered per thread and replayed as one block, in declaration order, once
+every earlier phase has been replayed too — so the log reads exactly like a
+sequential run. The closing summary lists each phase's wall time, the total
+wall time vs. the summed phase time, and the critical path (the
+longest-duration chain through the dependencies — with no dependencies,
+the single slowest phase), which is the floor no amount of extra --jobs
+can beat.
+
+Parallelism defaults to MTMI_JOBS, else min(4, cpu count): each phase is a
+.NET process holding the mappings in memory, so more isn't free.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+import mt_trace
+
+
+def default_jobs() -> int:
+    raw = os.environ.get("MTMI_JOBS", "").strip()
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            print(f"  [phases] ignoring MTMI_JOBS={raw!r} (not an integer)", file=sys.stderr)
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+class _ThreadRouter:
+    """sys.stdout/sys.stderr stand-in that sends writes from a capturing
+    thread into that thread's buffer and everything else to the real stream."""
+
+    def __init__(self, real, name: str, local: threading.local):
+        self._real = real
+        self._name = name
+        self._local = local
+
+    def write(self, s: str) -> int:
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            return self._real.write(s)
+        buf.append((self._name, s))
+        return len(s)
+
+    def flush(self) -> None:
+        if getattr(self._local, "buf", None) is None:
+            self._real.flush()
+
+    def __getattr__(self, attr):
+        return getattr(self._real, attr)
+
+
+def _critical_path(order: list[str], deps: dict[str, list[str]],
+                   wall: dict[str, float]) -> tuple[float, list[str]]:
+    best: dict[str, tuple[float, list[str]]] = {}
+    for name in order:  # declaration order is a topological order
+        t, path = max((best[d] for d in deps[name] if d in best),
+                      default=(0.0, []), key=lambda b: b[0])
+        best[name] = (t + wall.get(name, 0.0), path + [name])
+    return max(best.values(), default=(0.0, []), key=lambda b: b[0])
+
+
+def run_phases(phases: list[tuple], jobs: int | None = None,
+               label: str = "phases") -> tuple[bool, dict[str, object]]:
+    """Run `phases` — (name, fn) or (name, fn, deps) tuples, deps naming
+    earlier phases — on up to `jobs` threads. Returns (ok, {name: result})
+    for every phase that completed."""
+    jobs = jobs or default_jobs()
+    order = [p[0] for p in phases]
+    fns: dict[str, Callable[[], object]] = {p[0]: p[1] for p in phases}
+    deps: dict[str, list[str]] = {p[0]: list(p[2]) if len(p) > 2 else [] for p in phases}
+    if len(set(order)) != len(order):
+        raise ValueError(f"duplicate phase names: {order}")
+    for name, ds in deps.items():
+        bad = [d for d in ds if d not in fns or order.index(d) >= order.index(name)]
+        if bad:
+            raise ValueError(f"phase {name!r}: deps {bad} must name earlier phases")
+
+    local = threading.local()
+    real_out, real_err = sys.stdout, sys.stderr
+    streams = {"out": real_out, "err": real_err}
+
+    def call(name: str):
+        local.buf = []
+        t0 = time.perf_counter()
+        try:
+            with mt_trace.span(name, cat=label):
+                result = fns[name]()
+            failed = result is False
+        except Exception:
+            local.buf.append(("err", traceback.format_exc()))
+            result, failed = None, True
+        finally:
+            buf, local.buf = local.buf, None
+        return result, failed, time.perf_counter() - t0, buf
+
+    results: dict[str, object] = {}
+    wall: dict[str, float] = {}
+    logs: dict[str, list] = {}
+    failed: list[str] = []
+    replayed = 0
+
+    def replay() -> None:
+        nonlocal replayed
+        while replayed < len(order) and order[replayed] in logs:
+            for stream, s in logs.pop(order[replayed]):
+                streams[stream].write(s)
+            replayed += 1
+        real_out.flush()
+
+    t_start = time.perf_counter()
+    sys.stdout = _ThreadRouter(real_out, "out", local)
+    sys.stderr = _ThreadRouter(real_err, "err", local)
+    try:
+        with ThreadPoolExecutor(max_workers=min(jobs, max(1, len(order)))) as pool:
+            pending = list(order)
+            running: dict = {}
+            while pending or running:
+                if not failed:
+                    for name in [n for n in pending if all(d in results for d in deps[n])]:
+                        if len(running) >= jobs:
+                            break
+                        pending.remove(name)
+                        running[pool.submit(call, name)] = name
+                if not running:
+                    break  # failed, or deps of what's left can never finish
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    result, bad, secs, buf = fut.result()
+                    wall[name] = secs
+                    if bad:
+                        failed.append(name)
+                    else:
+                        results[name] = result
+                    logs[name] = buf
+                replay()
+            for name in pending:
+                logs.setdefault(name, [])
+    finally:
+        sys.stdout, sys.stderr = real_out, real_err
+    # Phases skipped after a failure have no log; replay whatever finished
+    # past the gap so nothing printed is lost.
+    for name in order:
+        if name in logs:
+            for stream, s in logs.pop(name):
+                streams[stream].write(s)
+
+    total = time.perf_counter() - t_start
+    crit_t, crit = _critical_path([n for n in order if n in wall], deps, wall)
+    print(f"  [{label}] {len(wall)}/{len(order)} phase(s), {total:.2f}s wall "
+          f"({sum(wall.values()):.2f}s summed, jobs={jobs})")
+    for name in order:
+        if name in wall:
+            mark = "FAILED" if name in failed else ("*" if name in crit else "")
+            print(f"    {wall[name]:7.2f}s  {name} {mark}".rstrip())
+        else:
+            print(f"          -   {name} (not run)")
+    if crit:
+        print(f"    critical path {crit_t:.2f}s: {' -> '.join(crit)}")
+    if failed:
+        print(f"  [{label}] failed: {', '.join(failed)}", file=sys.stderr)
+    return not failed, results
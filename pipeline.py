@@ -0,0 +1,571 @@
+"""
+Dependency-driven replacement for fulltest.bat's step sequencing.
+
+fulltest.bat runs build -> clean -> meshes -> convert -> map -> actors ->
+pack strictly in order every time; --skip-* / --only-* are the only way to
+avoid rework, and picking the right ones is on whoever runs it. This
+runner models each stage's inputs and outputs instead:
+
+  pull     Jeju_World.umap (vanilla)          -> Jeju_Worldaa.json
+  build    MTBPInjector sources               -> bin/Release/net8.0
+  meshes   static_meshes.json, registry       -> map_work_changes.json
+  convert  Jeju_Worldaa.json, map_work_changes -> Jeju_World.json
+  map      Jeju_World.json                    -> mod Jeju_World.umap
+  actors   map_work_changes, delivery_points,
+           CargoImport, injector, mod maps    -> mod content tree
+  report   placements, created cells          -> per-tile budget report
+  pack     mod tree                           -> deployed zzzz_ pak
+
+Every input is hashed by content (artifact_cache.file_digest, so unchanged
+files cost one stat()), together with the stage's command and the tools it
+runs. A stage re-runs only when that key differs from the last successful
+run or its outputs are missing or were changed by hand; a stage whose
+upstream re-ran but produced the same bytes is still skipped. Stages that
+don't depend on each other (build vs. pull/meshes/convert/map) run
+concurrently on phase_runner, with the same per-stage log blocks and
+timing summary as clone_bp_actors' phases. State lives in
+.mtmi_cache/pipeline.json.
+
+pull, convert and map are per map (maps.py): the default map's are named
+as above, every other map's get its name as a suffix (convert:island).
+They only depend on their own map's chain, so a second map's pull and
+convert overlap the first's on the worker pool rather than adding to the
+wall time. actors does every map in one clone_bp_actors.py run, after
+all of them. --only / --skip / --force take either form; a bare name
+means that stage of every map.
+
+The old "clean" step is folded into actors: once clone_bp_actors.py has
+recorded its outputs, build_manifest.gc() deletes the orphans in the
+folders it owns, so clean never runs without the stage that decides what
+those folders should hold. actors edits the map stage's Jeju_World.umap in
+place; clone_bp_actors.py keeps the unpatched bytes cached, so it doesn't
+force the map stage to re-run.
+
+    python pipeline.py                   # run whatever is stale
+    python pipeline.py --dry-run         # print the plan and why
+    python pipeline.py --force actors    # re-run actors (and what it changes)
+    python pipeline.py --only map actors --skip pack
+
+External tools are injectable, so the runner can be exercised on Linux
+with stand-ins: --tool NAME=CMD or MTMI_TOOL_<NAME>=CMD, for NAME in
+python, dotnet, uassetgui (default: MTMI_UASSETGUI / UAssetGUI.exe) and
+modp (default: cmd /c modp.bat). A CMD ending in .py runs under the
+current interpreter, like MTMI_UASSETGUI.
+
+pull and map are the slow conversions, and their outputs depend only on
+the bytes they read and the converter build. They go through the
+artifact cache (artifact_cache.py), keyed on those digests rather than on
+paths. With MTMI_SHARED_CACHE set (shared_cache.py), a map one teammate
+has already pulled or rebuilt is fetched instead of converted again. A
+stale stage tries the cache first and runs only on a miss; --force
+always runs it.
+
+--trace FILE records every stage, sub-phase and subprocess (wall/CPU
+time, peak RSS, I/O) as Chrome trace JSON; see mt_trace.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+import build_manifest
+import maps
+import mt_paths
+import mt_profile
+import mt_trace
+import uassetgui
+from artifact_cache import (CACHE_ROOT, ArtifactCache, break_links, digest_parts, file_digest,
+                            save_digest_memo, tool_version)
+from phase_runner import default_jobs, run_phases
+
+MOD_NAME = "MapChangeTest_P"
+MOD_CONTENT = Path(MOD_NAME) / "MotorTown" / "Content"
+# The default map's paths (maps.py has every map's).
+UMAP = maps.get()["target"]
+GEN_DIR = maps.get()["gen_dir"]
+CACHE_JSON = maps.get()["cache_json"]
+MAP_JSON = maps.get()["map_json"]
+WORK_CHANGES = Path("map_work_changes.json")
+INJECTOR_DIR = Path("MTBPInjector/bin/Release/net8.0")
+STATE_PATH = CACHE_ROOT / "pipeline.json"
+REPORT_DIR = CACHE_ROOT / "scene_report"
+_STATE_FORMAT = 1
+MAP_TIMEOUT = 600.0      # a full Jeju_World tojson/fromjson is far slower than one BP
+
+TOOL_NAMES = ("python", "dotnet", "uassetgui", "modp")
+# clone_bp_actors.py's arguments for the actors stage (watch.py runs it
+# in-process with the same ones): every map, each into its own mod umap
+# and _Generated_.
+CLONE_ARGS = ["--config", str(WORK_CHANGES)]
+# Outputs of the stages that declare "cache" (pull, map).
+CACHE = ArtifactCache()
+
+
+# ----------------------------------------------------------------------
+# Tools
+# ----------------------------------------------------------------------
+def _tool_cmd(spec: str) -> list[str]:
+    parts = shlex.split(spec, posix=os.name != "nt")
+    if parts and parts[0].lower().endswith(".py"):
+        return [sys.executable] + parts
+    return parts
+
+
+def default_tools() -> dict[str, list[str]]:
+    tools = {
+        "python": [sys.executable],
+        "dotnet": ["dotnet"],
+        "uassetgui": uassetgui.converter_cmd(),
+        "modp": ["cmd", "/c", "modp.bat"],
+    }
+    for name in TOOL_NAMES:
+        raw = os.environ.get(f"MTMI_TOOL_{name.upper()}", "").strip()
+        if raw:
+            tools[name] = _tool_cmd(raw)
+    return tools
+
+
+def _tool_stamp(cmd: list[str]) -> list:
+    """A tool's argv plus the digest of any stand-in script in it, so
+    editing a stand-in invalidates the stages it drives."""
+    return [[a, file_digest(a)] if a.lower().endswith(".py") else a for a in cmd]
+
+
+def _tool_version(cmd: list[str]) -> str:
+    """Where-installed-independent version of a tool: the digests of its
+    program and any script it runs, so the same build keys the same on
+    every machine."""
+    return tool_version([shutil.which(a) or a for a in cmd])
+
+
+def _run(cmd: list, cwd: Path | str | None = None) -> bool:
+    argv = [str(a) for a in cmd]
+    print(f"  $ {subprocess.list2cmdline(argv)}")
+    try:
+        proc = mt_trace.run(argv, cwd=cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors="replace")
+    except OSError as e:
+        print(f"  cannot start {argv[0]}: {e}", file=sys.stderr)
+        return False
+    if proc.stdout:
+        print(proc.stdout.rstrip("\n"))
+    if proc.returncode != 0:
+        print(f"  exit {proc.returncode}", file=sys.stderr)
+    return proc.returncode == 0
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+def stages(tools: dict[str, list[str]]) -> list[dict]:
+    """The stage graph, in a topological (declaration) order. Each stage:
+    name, deps, inputs, outputs (paths, directories or globs), cmd (what
+    goes into the key and the plan) and run() -> bool. Per-map stages
+    also carry their map's name under "map". A stage whose output files
+    depend only on its inputs' bytes declares "cache": the tool stamp
+    its cache key adds and the files an entry holds."""
+    py, tag = tools["python"], mt_paths.MAPPINGS_TAG
+    converter = _tool_version(tools["uassetgui"])
+    clone_args = ["clone_bp_actors.py"] + CLONE_ARGS
+    table = maps.table()
+
+    def pull(m: dict) -> bool:
+        vanilla, cache_json = maps.vanilla(m), m["cache_json"]
+        if not vanilla.exists() and cache_json.exists():
+            print(f"  {vanilla} not found — keeping the existing {cache_json}", file=sys.stderr)
+            return True
+        if uassetgui.convert("tojson", vanilla, cache_json, tag, MAP_TIMEOUT, cmd=tools["uassetgui"]):
+            return True
+        print(f"  tojson {vanilla} -> {cache_json} failed or timed out", file=sys.stderr)
+        return False
+
+    def umap(m: dict) -> bool:
+        m["target"].parent.mkdir(parents=True, exist_ok=True)
+        if uassetgui.convert("fromjson", m["map_json"], m["target"], tag, MAP_TIMEOUT, cmd=tools["uassetgui"]):
+            return True
+        print(f"  fromjson {m['map_json']} -> {m['target']} failed or timed out", file=sys.stderr)
+        return False
+
+    def actors() -> bool:
+        if not _run(py + clone_args):
+            return False
+        gone = build_manifest.gc()
+        print(f"  [clean] {len(gone)} orphaned file(s) removed")
+        return True
+
+    def per_map(m: dict) -> list[dict]:
+        name = m["name"]
+        vanilla = maps.vanilla(m)
+        convert = ["convert2.py", str(m["cache_json"]), str(WORK_CHANGES), str(m["map_json"]), "--map", name]
+        return [
+            {"name": maps.stage_name("pull", m), "map": name, "deps": [],
+             "inputs": [vanilla, vanilla.with_suffix(".uexp"), mt_paths.MAPPINGS],
+             "outputs": [m["cache_json"]],
+             "cmd": _tool_stamp(tools["uassetgui"]) + ["tojson", tag],
+             "cache": {"key": ["tojson", tag, converter], "files": [m["cache_json"]]},
+             "run": lambda: pull(m)},
+            {"name": maps.stage_name("convert", m), "map": name,
+             "deps": [maps.stage_name("pull", m), "meshes"],
+             "inputs": [m["cache_json"], WORK_CHANGES, "convert2.py", "placement_store.py", "mesh_deps.py",
+                        "maps.py", maps.MAPS_PATH.name, "mt_paths.py"],
+             "outputs": [m["map_json"]],
+             "cmd": _tool_stamp(py) + convert,
+             "run": lambda: _run(py + convert)},
+            {"name": maps.stage_name("map", m), "map": name, "deps": [maps.stage_name("convert", m)],
+             "inputs": [m["map_json"], mt_paths.MAPPINGS],
+             "outputs": [m["target"]],
+             "cmd": _tool_stamp(tools["uassetgui"]) + ["fromjson", tag],
+             "cache": {"key": ["fromjson", tag, converter],
+                       "files": [m["target"], m["target"].with_suffix(".uexp")]},
+             "run": lambda: umap(m)},
+        ]
+
+    def report_cmd(m: dict) -> list:
+        out = REPORT_DIR if m["name"] == maps.default() else REPORT_DIR / m["name"]
+        return ["scene_report.py", "--map", m["name"], "--gen-dir", str(m["gen_dir"]), "--out", str(out)]
+
+    def report() -> bool:
+        ok = True
+        for m in table.values():
+            ok = _run(py + report_cmd(m)) and ok
+        return ok
+
+    graph = [
+        {"name": "build", "deps": [],
+         "inputs": ["MTBPInjector/*.cs", "MTBPInjector/*.csproj",
+                    "MTBPInjector/UAssetAPI/UAssetAPI/**/*.cs",
+                    "MTBPInjector/UAssetAPI/UAssetAPI/*.csproj"],
+         "outputs": [INJECTOR_DIR],
+         "cmd": _tool_stamp(tools["dotnet"]) + ["build", "-c", "Release"],
+         "run": lambda: _run(tools["dotnet"] + ["build", "-c", "Release", "--nologo", "-v", "quiet"],
+                             cwd="MTBPInjector")},
+        {"name": "meshes", "deps": [],
+         "inputs": ["static_meshes.json", "delivery_points.json", WORK_CHANGES,
+                    "import_meshes.py", "bp_registry.py", "cargo_index.py", "placement_store.py",
+                    "mesh_deps.py", "mt_paths.py"],
+         "outputs": [WORK_CHANGES],
+         "cmd": _tool_stamp(py) + ["import_meshes.py"],
+         "run": lambda: _run(py + ["import_meshes.py"])},
+    ]
+    # Pull first: it is the slowest stage and depends on nothing.
+    chains = [per_map(m) for m in table.values()]
+    graph[:0] = [c[0] for c in chains]
+    graph += [st for c in chains for st in c[1:]]
+    graph += [
+        {"name": "actors", "deps": ["build"] + [c[2]["name"] for c in chains],
+         "inputs": [WORK_CHANGES, "delivery_points.json", "CargoImport/cargos/catalog.json",
+                    "CargoImport/delivery_points",
+                    "clone_bp_actors.py", "bp_registry.py", "cargo_index.py", "cargo_table.py",
+                    "cell_catalog.py", "usmap.py", "uasset_header.py", "artifact_cache.py",
+                    "phase_runner.py", "mt_paths.py", "build_manifest.py", "placement_store.py",
+                    "maps.py", maps.MAPS_PATH.name,
+                    INJECTOR_DIR, mt_paths.MAPPINGS, mt_paths.JEJU_MAIN,
+                    mt_paths.VANILLA_CARGOS, mt_paths.VANILLA_CARGOS_01]
+                   + [p for m in table.values() for p in (maps.vanilla(m), m["target"])],
+         "outputs": [MOD_CONTENT],
+         "cmd": _tool_stamp(py) + clone_args + ["gc"] + [str(d) for d in build_manifest.MANAGED_DIRS],
+         "run": actors},
+        {"name": "report", "deps": ["actors"],
+         "inputs": [WORK_CHANGES, "delivery_points.json", CACHE_ROOT / "cell_state.json",
+                    "scene_report.py", "placement_store.py", "maps.py", maps.MAPS_PATH.name, "mt_paths.py"],
+         "outputs": [REPORT_DIR],
+         "cmd": _tool_stamp(py) + [report_cmd(m) for m in table.values()],
+         "run": report},
+        {"name": "pack", "deps": ["actors", "report"],
+         "inputs": [Path(MOD_NAME), "modp.bat"],
+         "outputs": [Path(f"{MOD_NAME}.pak"), mt_paths.GAME_PAKDIR / f"zzzz_{MOD_NAME}.pak"],
+         "cmd": _tool_stamp(tools["modp"]) + [MOD_NAME],
+         "run": lambda: _run(tools["modp"] + [MOD_NAME])},
+    ]
+    return graph
+
+
+# ----------------------------------------------------------------------
+# Hashing
+# ----------------------------------------------------------------------
+def _is_glob(entry) -> bool:
+    return any(c in str(entry) for c in "*?[")
+
+
+def _root(entry) -> Path:
+    """The literal directory part of a glob (the entry itself otherwise)."""
+    parts = Path(entry).parts
+    for i, part in enumerate(parts):
+        if _is_glob(part):
+            return Path(*parts[:i]) if i else Path(".")
+    return Path(entry)
+
+
+def _files(entry) -> list[Path]:
+    if _is_glob(entry):
+        return sorted(p for p in Path(".").glob(str(entry)) if p.is_file())
+    p = Path(entry)
+    if p.is_dir():
+        return sorted(q for q in p.rglob("*") if q.is_file())
+    return [p] if p.is_file() else []
+
+
+def entry_digest(entry) -> str | None:
+    """Content digest of a file, a directory tree or a glob; None when
+    nothing exists there."""
+    if not _is_glob(entry) and Path(entry).is_file():
+        return file_digest(entry)
+    files = _files(entry)
+    if not files and not Path(entry).is_dir():
+        return None
+    root = _root(entry)
+    return digest_parts([[p.relative_to(root).as_posix(), file_digest(p)] for p in files])
+
+
+def _within(entry, others) -> bool:
+    """`entry` is one of `others` or lies inside one of them."""
+    parts = Path(_root(entry)).resolve().parts
+    for o in others:
+        op = Path(_root(o)).resolve().parts
+        if parts[:len(op)] == op:
+            return True
+    return False
+
+
+def _overlaps(a, b) -> bool:
+    return any(_within(x, b) for x in a) or any(_within(y, a) for y in b)
+
+
+def stage_key(st: dict, by_name: dict[str, dict], keys: dict[str, str]) -> tuple[str, dict, dict]:
+    """(key, {input: digest}, {dep: key}). Inputs the stage rewrites in
+    place are keyed by the upstream stage that produces them, not by
+    their bytes (which are this stage's own output)."""
+    inputs = {str(e): entry_digest(e) for e in st["inputs"] if not _within(e, st["outputs"])}
+    inplace = [e for e in st["inputs"] if _within(e, st["outputs"])]
+    deps = {d: keys.get(d) for d in st["deps"]
+            if any(_within(e, by_name[d]["outputs"]) for e in inplace)}
+    return digest_parts("pipeline", _STATE_FORMAT, st["name"], st["cmd"], inputs, deps), inputs, deps
+
+
+def cache_key(st: dict) -> str | None:
+    """Artifact-cache key of a "cache" stage's outputs: its tool stamp,
+    the digests of its inputs in declaration order and the output file
+    names (entries are matched by name), but not their directories,
+    which differ between machines. None when an input is missing."""
+    if not st.get("cache"):
+        return None
+    digests = [entry_digest(e) for e in st["inputs"]]
+    if None in digests:
+        return None
+    return CACHE.key("pipeline", _STATE_FORMAT, st["name"].partition(":")[0], st["cache"]["key"], digests,
+                     [Path(f).name for f in st["cache"]["files"]])
+
+
+def stale_reason(st: dict, key: str, inputs: dict, deps: dict, rec: dict | None) -> str | None:
+    """Why `st` has to run, or None when its last run still stands."""
+    if rec is None:
+        return "no previous run"
+    if rec.get("key") != key:
+        old = rec.get("inputs") or {}
+        changed = [p for p in inputs if old.get(p) != inputs[p]] + [p for p in old if p not in inputs]
+        if changed:
+            return "inputs changed: " + ", ".join(changed)
+        moved = [d for d in deps if (rec.get("deps") or {}).get(d) != deps[d]]
+        if moved:
+            return "upstream re-ran: " + ", ".join(moved)
+        return "command or tools changed"
+    outs = {str(o): entry_digest(o) for o in st["outputs"]}
+    missing = [o for o, d in outs.items() if d is None]
+    if missing:
+        return "outputs missing: " + ", ".join(missing)
+    touched = [o for o, d in outs.items() if (rec.get("outputs") or {}).get(o) != d]
+    if touched:
+        return "outputs modified: " + ", ".join(touched)
+    return None
+
+
+# ----------------------------------------------------------------------
+# State
+# ----------------------------------------------------------------------
+def load_state() -> dict:
+    try:
+        state = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state.get("stages", {}) if state.get("format") == _STATE_FORMAT else {}
+
+
+def save_state(records: dict) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_name(f"{STATE_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"format": _STATE_FORMAT, "stages": records}, indent=1), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+
+# ----------------------------------------------------------------------
+# Plan / run
+# ----------------------------------------------------------------------
+def _named(name: str, names: list[str]) -> bool:
+    """`name` is in `names`, itself or (convert:island) by its bare stage."""
+    return name in names or name.partition(":")[0] in names
+
+
+def _selected(name: str, only: list[str], skip: list[str]) -> bool:
+    return (not only or _named(name, only)) and not _named(name, skip)
+
+
+def plan(graph: list[dict], records: dict, only: list[str], skip: list[str],
+         force: list[str]) -> list[tuple[str, str, str | None]]:
+    """[(stage, action, reason)] from what's on disk now. A stage
+    downstream of one that will run is 'pending': whether it runs depends
+    on the bytes its upstream produces."""
+    by_name = {st["name"]: st for st in graph}
+    keys = {n: (r or {}).get("key") for n, r in records.items()}
+    will_run: list[str] = []
+    out = []
+    for st in graph:
+        name = st["name"]
+        if not _selected(name, only, skip):
+            out.append((name, "skip", "not selected"))
+            continue
+        key, inputs, deps = stage_key(st, by_name, keys)
+        upstream = [d for d in will_run if _overlaps(st["inputs"], by_name[d]["outputs"])]
+        if "all" in force or _named(name, force):
+            action, reason = "run", "forced"
+        elif upstream:
+            action, reason = "pending", "after " + ", ".join(upstream)
+        else:
+            reason = stale_reason(st, key, inputs, deps, records.get(name))
+            action = "run" if reason else "fresh"
+        if action != "fresh":
+            will_run.append(name)
+        out.append((name, action, reason))
+    return out
+
+
+def run(graph: list[dict], records: dict, only: list[str], skip: list[str],
+        force: list[str], jobs: int | None = None) -> bool:
+    by_name = {st["name"]: st for st in graph}
+    keys = {n: (r or {}).get("key") for n, r in records.items()}
+    ran: list[str] = []
+    checked: list[str] = []
+    lock = threading.Lock()
+
+    def stage_fn(st: dict) -> Callable[[], object]:
+        def go():
+            name = st["name"]
+            if not _selected(name, only, skip):
+                print(f"  [{name}] not selected")
+                return "skipped"
+            key, inputs, deps = stage_key(st, by_name, keys)
+            forced = "all" in force or _named(name, force)
+            reason = "forced" if forced else stale_reason(st, key, inputs, deps, records.get(name))
+            if reason is None:
+                print(f"  [{name}] up to date")
+                with lock:
+                    keys[name] = key
+                    checked.append(name)
+                return "fresh"
+            print(f"  [{name}] {reason}")
+            with lock:
+                records.pop(name, None)     # a failed run must not look fresh next time
+            ckey = cache_key(st)
+            files = st["cache"]["files"] if ckey else []
+            if ckey and not forced and CACHE.fetch(ckey, files):
+                # Later stages rewrite these in place (actors -> map).
+                break_links(files)
+                print(f"  [{name}] restored from the artifact cache")
+            elif not st["run"]():
+                return False
+            elif ckey:
+                CACHE.store(ckey, files)
+            with lock:
+                keys[name] = key
+                records[name] = {"key": key, "inputs": inputs, "deps": deps}
+                ran.append(name)
+            return "ran"
+        return go
+
+    ok, _ = run_phases([(st["name"], stage_fn(st), st["deps"]) for st in graph],
+                       jobs=jobs, label="pipeline")
+
+    # Record outputs as they stand at the end of the run: a later stage
+    # may have rewritten an earlier one's output in place (actors -> map).
+    # Stages sharing outputs with one that failed or never finished are
+    # forgotten so they re-run.
+    done = set(ran) | set(checked)
+    incomplete = [st for st in graph
+                  if _selected(st["name"], only, skip) and st["name"] not in done]
+    for st in graph:
+        name = st["name"]
+        if name not in records:
+            continue
+        if not ok and any(_overlaps(st["outputs"], b["outputs"]) for b in incomplete):
+            records.pop(name)
+            continue
+        if name in done or any(_overlaps(st["outputs"], by_name[r]["outputs"]) for r in ran):
+            records[name]["outputs"] = {str(o): entry_digest(o) for o in st["outputs"]}
+    save_state(records)
+    save_digest_memo()
+    if CACHE.hits or CACHE.misses:
+        print(f"  {CACHE.summary()}")
+    return ok
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Run the stale pipeline stages in dependency order.")
+    ap.add_argument("--dry-run", action="store_true", help="print the plan and exit")
+    ap.add_argument("--only", nargs="+", default=[], metavar="STAGE", help="run just these stages")
+    ap.add_argument("--skip", nargs="+", default=[], metavar="STAGE", help="never run these stages")
+    ap.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                    help="run these stages even when fresh ('all' for every stage)")
+    ap.add_argument("--tool", action="append", default=[], metavar="NAME=CMD",
+                    help=f"override an external tool ({', '.join(TOOL_NAMES)})")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help=f"stages run at once (default MTMI_JOBS or {default_jobs()})")
+    ap.add_argument("--trace", type=Path, metavar="FILE",
+                    help="record a Chrome trace of every stage and subprocess into FILE")
+    args = ap.parse_args(argv)
+    mt_paths.resolve()
+
+    tools = default_tools()
+    for spec in args.tool:
+        name, sep, cmd = spec.partition("=")
+        if not sep or name not in TOOL_NAMES or not cmd.strip():
+            ap.error(f"--tool expects NAME=CMD with NAME in {', '.join(TOOL_NAMES)}, got {spec!r}")
+        tools[name] = _tool_cmd(cmd)
+    graph = stages(tools)
+    names = [st["name"] for st in graph]
+    names += sorted({n.partition(":")[0] for n in names} - set(names))
+    for s in args.only + args.skip + [f for f in args.force if f != "all"]:
+        if s not in names:
+            ap.error(f"unknown stage {s!r} (stages: {', '.join(names)})")
+
+    records = load_state()
+    if args.dry_run:
+        by_name = {st["name"]: st for st in graph}
+        width = max(8, *(len(n) for n in by_name))
+        for name, action, reason in plan(graph, records, args.only, args.skip, args.force):
+            cmd = " ".join(a[0] if isinstance(a, list) else str(a) for a in by_name[name]["cmd"])
+            print(f"  {action:<8} {name:<{width}} {reason or ''}")
+            if action in ("run", "pending"):
+                print(f"           {cmd}")
+        return 0
+    if args.trace:
+        # Exported so every stage's script (and what it starts) records too.
+        os.environ[mt_trace.ENV] = str(args.trace.resolve())
+        mt_trace.reset(args.trace)
+    try:
+        return 0 if run(graph, records, args.only, args.skip, args.force, args.jobs) else 1
+    finally:
+        if args.trace:
+            mt_trace.flush()
+            print(f"  [trace] {mt_trace.merge(args.trace)} event(s) -> {args.trace}")
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("pipeline", lambda: _main(sys.argv[1:])))
@@ -0,0 +1,439 @@
+"""
+Indexed store of the placements in map_work_changes.json.
+
+map_work_changes.json holds every mesh, dealer, BP actor and delivery
+point the mod places, as {kind: {group: [entry, ...]}} (delivery_points
+is a flat list). At ~1.5 MB it was parsed in full by convert2.py and
+clone_bp_actors.py to pull out their own sections, and import_meshes.py
+rewrote all of it, indented, on every run. The entries now live in a
+SQLite store, one row per entry, indexed by kind/group, by asset_key and
+by 12800-unit tile (the WP L-1 tile clone_bp_actors homes actors on):
+
+  - import_meshes.py upserts its groups: only rows whose content changed
+    are written, and the JSON is re-exported only when something did.
+    Rows hold their entry already rendered at indent=4, so an export
+    splices stored text together instead of re-encoding the file.
+  - convert2.py and clone_bp_actors.py stream just the kinds they use
+    (load()).
+  - map_work_changes.json stays the file you edit by hand, diff and
+    commit. Whenever its bytes differ from what the store last imported
+    or exported, the next open re-imports it. A hand edit, a git
+    checkout or a merge is picked up without a separate step.
+
+The store lives in .mtmi_cache/placements/, one per JSON file (keyed by
+its absolute path), and can always be rebuilt from the JSON. Group order,
+key order inside entries and any non-placement top-level keys are kept,
+so an export of an unedited import is byte-identical.
+
+    python placement_store.py stats
+    python placement_store.py near 120000 -35000 --radius 5000
+    python placement_store.py asset DeliveryPoint_TransformerFarm
+    python placement_store.py export            # store -> map_work_changes.json
+    python placement_store.py import --force    # re-read the JSON now
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from artifact_cache import CACHE_ROOT, digest_parts, file_digest
+
+JSON_PATH = Path("map_work_changes.json")
+STORE_ROOT = CACHE_ROOT / "placements"
+TILE_SIZE = 12800.0
+# Bump when the schema or the import changes meaning; a store of another
+# format is dropped and re-imported.
+_FORMAT = 2
+# Group name of a list-shaped kind (delivery_points).
+FLAT = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta   (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS layout (
+    pos   INTEGER PRIMARY KEY,      -- top-level key order in the JSON
+    key   TEXT NOT NULL UNIQUE,
+    shape TEXT NOT NULL,            -- 'groups', 'list' or 'value'
+    value TEXT                      -- the JSON of a 'value' key, verbatim
+);
+CREATE TABLE IF NOT EXISTS groups (
+    kind  TEXT NOT NULL,
+    grp   TEXT NOT NULL,
+    pos   INTEGER NOT NULL,
+    value TEXT,                     -- non-list group values, verbatim
+    PRIMARY KEY (kind, grp)
+);
+CREATE TABLE IF NOT EXISTS placements (
+    kind      TEXT NOT NULL,
+    grp       TEXT NOT NULL,
+    seq       INTEGER NOT NULL,     -- position within the group
+    asset_key TEXT,
+    tile_x    INTEGER,
+    tile_y    INTEGER,
+    data      TEXT NOT NULL,        -- the entry as export writes it (indent=4, nested)
+    PRIMARY KEY (kind, grp, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS placements_asset ON placements(asset_key);
+CREATE INDEX IF NOT EXISTS placements_tile  ON placements(tile_x, tile_y);
+"""
+_TABLES = ("meta", "layout", "groups", "placements")
+_INDENT = "    "
+
+
+def store_path(json_path: Path | str = JSON_PATH) -> Path:
+    src = Path(json_path).resolve()
+    return STORE_ROOT / f"{src.stem}-{digest_parts(str(src))[:12]}.sqlite"
+
+
+_COMPACT = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_PRETTY = json.JSONEncoder(ensure_ascii=False, indent=4)
+# How deep a list-shaped kind's entries sit in the file, and a group's.
+_LIST_DEPTH, _GROUP_DEPTH = 2, 3
+
+
+def _dump(v) -> str:
+    return _COMPACT.encode(v)
+
+
+def _pretty(v) -> str:
+    return _PRETTY.encode(v)
+
+
+def _nested(text: str, depth: int) -> str:
+    """`text` (a value rendered at indent=4) as it reads `depth` levels in."""
+    return text.replace("\n", "\n" + _INDENT * depth)
+
+
+_CONTAINERS = frozenset((dict, list, tuple))
+
+
+def _flat(entry) -> bool:
+    # Exact types: entries are JSON-shaped (json.loads or plain literals).
+    return type(entry) is dict and bool(entry) and _CONTAINERS.isdisjoint(map(type, entry.values()))
+
+
+@lru_cache(maxsize=None)
+def _flat_encoder(depth: int) -> json.JSONEncoder:
+    return json.JSONEncoder(ensure_ascii=False, separators=(",\n" + _INDENT * (depth + 1), ": "))
+
+
+def _texts(entries: list, depth: int) -> list[str]:
+    """Each entry at indent=4, as it reads `depth` levels into the file:
+    what export splices in, and what a row stores (json.loads doesn't mind
+    the indentation)."""
+    if entries and all(_flat(e) for e in entries):
+        # indent=4 goes through json's pure-Python encoder. For a list of
+        # dicts of scalars (every placement so far), one C-encoder call
+        # with these separators lays the items out identically. A JSON
+        # string holds no raw newline, and a key always follows an item
+        # separator inside an entry, so "},<newline><pad>{" only ever
+        # falls between two entries.
+        pad, inner = _INDENT * depth, _INDENT * (depth + 1)
+        body = _flat_encoder(depth).encode(entries)[2:-2]
+        return [f"{{\n{inner}{t}\n{pad}}}" for t in body.split(f"}},\n{inner}{{")]
+    return [_nested(_pretty(e), depth) for e in entries]
+
+
+def _tile(entry) -> tuple[int | None, int | None]:
+    if not isinstance(entry, dict):
+        return None, None
+    x, y = entry.get("X"), entry.get("Y")
+    if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        return None, None
+    return math.floor(x / TILE_SIZE), math.floor(y / TILE_SIZE)
+
+
+def _row(kind: str, grp: str, seq: int, entry, data: str) -> tuple:
+    key = entry.get("asset_key") if isinstance(entry, dict) else None
+    return (kind, grp, seq, key if isinstance(key, str) else None, *_tile(entry), data)
+
+
+def _rows(kind: str, grp: str, entries: list, depth: int) -> list[tuple]:
+    return [_row(kind, grp, i, e, t) for i, (e, t) in enumerate(zip(entries, _texts(entries, depth)))]
+
+
+# ----------------------------------------------------------------------
+# JSON bridge
+# ----------------------------------------------------------------------
+def _import(con: sqlite3.Connection, cfg: dict) -> None:
+    """Replace the whole store with `cfg` (inside the caller's transaction)."""
+    for table in ("layout", "groups", "placements"):
+        con.execute(f"DELETE FROM {table}")
+    rows = []
+    for pos, (key, value) in enumerate(cfg.items()):
+        if isinstance(value, list):
+            con.execute("INSERT INTO layout VALUES (?, ?, 'list', NULL)", (pos, key))
+            con.execute("INSERT INTO groups VALUES (?, ?, 0, NULL)", (key, FLAT))
+            rows += _rows(key, FLAT, value, _LIST_DEPTH)
+        elif isinstance(value, dict):
+            con.execute("INSERT INTO layout VALUES (?, ?, 'groups', NULL)", (pos, key))
+            for gpos, (grp, items) in enumerate(value.items()):
+                con.execute("INSERT INTO groups VALUES (?, ?, ?, ?)",
+                            (key, grp, gpos, None if isinstance(items, list) else _dump(items)))
+                if isinstance(items, list):
+                    rows += _rows(key, grp, items, _GROUP_DEPTH)
+        else:
+            con.execute("INSERT INTO layout VALUES (?, ?, 'value', ?)", (pos, key, _dump(value)))
+    con.executemany("INSERT INTO placements VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def _set_meta(con: sqlite3.Connection, json_path: Path) -> None:
+    con.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("format", str(_FORMAT)), ("json_digest", file_digest(json_path) or ""),
+                     ("json_path", str(json_path.resolve()))])
+
+
+def _prepare(con: sqlite3.Connection) -> None:
+    # The store is a cache of the JSON: skip the fsyncs, they cost more than
+    # the import itself on a warm run.
+    con.execute("PRAGMA synchronous = OFF")
+    con.executescript(_SCHEMA)
+
+
+def open_store(json_path: Path | str = JSON_PATH, force: bool = False) -> sqlite3.Connection:
+    """Connection to the store of `json_path`, re-imported first when the
+    JSON changed since the store last read or wrote it (or with force)."""
+    json_path = Path(json_path)
+    db = store_path(json_path)
+    db.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db, timeout=30)
+    try:
+        _prepare(con)
+        meta = dict(con.execute("SELECT key, value FROM meta"))
+    except sqlite3.OperationalError:
+        con.close()
+        raise                           # locked, read-only, ...: not damage
+    except sqlite3.DatabaseError:
+        # Writes aren't synced, so a crash can leave the file damaged; the
+        # JSON still has everything, rebuild from it.
+        con.close()
+        for stale in (db, db.with_name(db.name + "-journal")):
+            stale.unlink(missing_ok=True)
+        con = sqlite3.connect(db, timeout=30)
+        _prepare(con)
+        meta = {}
+    if meta.get("format") != str(_FORMAT):
+        con.executescript("".join(f"DROP TABLE IF EXISTS {t};" for t in _TABLES) + _SCHEMA)
+        meta = {}
+    digest = file_digest(json_path)
+    if not force and meta.get("format") == str(_FORMAT) and meta.get("json_digest") == (digest or ""):
+        return con
+    if digest is None:
+        if meta.get("format") == str(_FORMAT) and not force:
+            return con                  # JSON deleted: keep what the store has
+        cfg = {}
+    else:
+        cfg = json.loads(json_path.read_text(encoding="utf-8"))
+        if not isinstance(cfg, dict):
+            raise ValueError(f"{json_path}: top level is not an object")
+    with con:
+        _import(con, cfg)
+        _set_meta(con, json_path)
+    return con
+
+
+def to_json(con: sqlite3.Connection, kinds=None) -> dict:
+    """The store as map_work_changes.json's structure: every top-level key
+    in order, or only `kinds` (those that exist)."""
+    out: dict = {}
+    for key, shape, value in con.execute("SELECT key, shape, value FROM layout ORDER BY pos"):
+        if kinds is not None and key not in kinds:
+            continue
+        if shape == "value":
+            out[key] = json.loads(value)
+        elif shape == "list":
+            out[key] = _group(con, key, FLAT)
+        else:
+            out[key] = {}
+            for grp, gvalue in con.execute("SELECT grp, value FROM groups WHERE kind = ? ORDER BY pos",
+                                           (key,)).fetchall():
+                out[key][grp] = json.loads(gvalue) if gvalue is not None else _group(con, key, grp)
+    return out
+
+
+def _group(con: sqlite3.Connection, kind: str, grp: str) -> list:
+    # One json.loads per group rather than per row: several times faster
+    # on the 3000-entry imported group.
+    (joined,), = con.execute("SELECT group_concat(data, ',') FROM (SELECT data FROM placements "
+                             "WHERE kind = ? AND grp = ? ORDER BY seq)", (kind, grp))
+    return json.loads(f"[{joined}]") if joined else []
+
+
+def _block(open_: str, close: str, items: list[str], depth: int) -> str:
+    if not items:
+        return open_ + close
+    pad = _INDENT * (depth + 1)
+    return f"{open_}\n{pad}" + f",\n{pad}".join(items) + f"\n{_INDENT * depth}{close}"
+
+
+def _render_group(con: sqlite3.Connection, kind: str, grp: str, depth: int) -> str:
+    texts = con.execute("SELECT data FROM placements WHERE kind = ? AND grp = ? ORDER BY seq", (kind, grp))
+    return _block("[", "]", [t for (t,) in texts], depth)
+
+
+def render(con: sqlite3.Connection) -> str:
+    """The store as map_work_changes.json's text: the same bytes as
+    json.dumps(to_json(con), indent=4), built from the rows' stored text."""
+    def key(k: str) -> str:
+        return json.dumps(k, ensure_ascii=False) + ": "
+
+    items = []
+    for k, shape, value in con.execute("SELECT key, shape, value FROM layout ORDER BY pos").fetchall():
+        if shape == "value":
+            body = _nested(_pretty(json.loads(value)), 1)
+        elif shape == "list":
+            body = _render_group(con, k, FLAT, 1)
+        else:
+            body = _block("{", "}", [
+                key(grp) + (_nested(_pretty(json.loads(gvalue)), 2) if gvalue is not None
+                            else _render_group(con, k, grp, 2))
+                for grp, gvalue in con.execute("SELECT grp, value FROM groups WHERE kind = ? ORDER BY pos",
+                                               (k,)).fetchall()], 1)
+        items.append(key(k) + body)
+    return _block("{", "}", items, 0)
+
+
+def export(con: sqlite3.Connection, json_path: Path | str = JSON_PATH) -> bool:
+    """Write the store to `json_path` (indent=4, like the hand-edited file
+    always was). False when the file already had those bytes."""
+    json_path = Path(json_path)
+    text = render(con)
+    try:
+        same = json_path.read_text(encoding="utf-8") == text
+    except OSError:
+        same = False
+    if not same:
+        tmp = json_path.with_name(f"{json_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, json_path)
+    with con:
+        _set_meta(con, json_path)
+    return not same
+
+
+def load(json_path: Path | str, kinds) -> dict:
+    """{kind: section} for just `kinds`, in map_work_changes.json's shape —
+    what convert2.py and clone_bp_actors.py read instead of the whole
+    file."""
+    con = open_store(json_path)
+    try:
+        return to_json(con, set(kinds))
+    finally:
+        con.close()
+
+
+# ----------------------------------------------------------------------
+# Rows
+# ----------------------------------------------------------------------
+def rows(con: sqlite3.Connection, kind: str, grp: str | None = None) -> Iterator:
+    """Entries of one kind (one group of it when grp is given), in order."""
+    if grp is None:
+        cur = con.execute("SELECT p.data FROM placements p JOIN groups g ON g.kind = p.kind AND g.grp = p.grp "
+                          "WHERE p.kind = ? ORDER BY g.pos, p.seq", (kind,))
+    else:
+        cur = con.execute("SELECT data FROM placements WHERE kind = ? AND grp = ? ORDER BY seq", (kind, grp))
+    for (data,) in cur:
+        yield json.loads(data)
+
+
+def replace_group(con: sqlite3.Connection, kind: str, grp: str, entries: list) -> int:
+    """Make kind/grp hold exactly `entries` (grp FLAT for a list-shaped
+    kind), writing only the rows that differ. Returns how many did."""
+    shape = "list" if grp == FLAT else "groups"
+    data = _texts(entries, _LIST_DEPTH if shape == "list" else _GROUP_DEPTH)
+    with con:
+        if not con.execute("SELECT 1 FROM layout WHERE key = ?", (kind,)).fetchone():
+            con.execute("INSERT INTO layout VALUES ((SELECT COALESCE(MAX(pos) + 1, 0) FROM layout), ?, ?, NULL)",
+                        (kind, shape))
+        if not con.execute("SELECT 1 FROM groups WHERE kind = ? AND grp = ?", (kind, grp)).fetchone():
+            con.execute("INSERT INTO groups VALUES (?, ?, (SELECT COALESCE(MAX(pos) + 1, 0) FROM groups "
+                        "WHERE kind = ?), NULL)", (kind, grp, kind))
+            changed = 1
+        else:
+            changed = con.execute("UPDATE groups SET value = NULL WHERE kind = ? AND grp = ? "
+                                  "AND value IS NOT NULL", (kind, grp)).rowcount
+        old = dict(con.execute("SELECT seq, data FROM placements WHERE kind = ? AND grp = ?", (kind, grp)))
+        diff = [_row(kind, grp, i, e, d) for i, (e, d) in enumerate(zip(entries, data)) if old.get(i) != d]
+        con.executemany("INSERT OR REPLACE INTO placements VALUES (?, ?, ?, ?, ?, ?, ?)", diff)
+        gone = con.execute("DELETE FROM placements WHERE kind = ? AND grp = ? AND seq >= ?",
+                           (kind, grp, len(entries))).rowcount
+    return changed + len(diff) + gone
+
+
+def near(con: sqlite3.Connection, x: float, y: float, radius: float,
+         kind: str | None = None) -> list[dict]:
+    """Entries within `radius` of (x, y), via the tile index. Each carries
+    its kind/group/seq under '_store'."""
+    tx0, ty0 = math.floor((x - radius) / TILE_SIZE), math.floor((y - radius) / TILE_SIZE)
+    tx1, ty1 = math.floor((x + radius) / TILE_SIZE), math.floor((y + radius) / TILE_SIZE)
+    sql = ("SELECT kind, grp, seq, data FROM placements "
+           "WHERE tile_x BETWEEN ? AND ? AND tile_y BETWEEN ? AND ?")
+    args: tuple = (tx0, tx1, ty0, ty1)
+    if kind:
+        sql += " AND kind = ?"
+        args += (kind,)
+    out = []
+    for k, g, s, data in con.execute(sql + " ORDER BY kind, grp, seq", args):
+        e = json.loads(data)
+        if math.hypot(e["X"] - x, e["Y"] - y) <= radius:
+            out.append({"_store": [k, g, s], **e})
+    return out
+
+
+def by_asset(con: sqlite3.Connection, asset_key: str) -> list[dict]:
+    return [{"_store": [k, g, s], **json.loads(d)} for k, g, s, d in con.execute(
+        "SELECT kind, grp, seq, data FROM placements WHERE asset_key = ? ORDER BY kind, grp, seq",
+        (asset_key,))]
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Query the placement store or sync it with its JSON.")
+    ap.add_argument("--json", type=Path, default=JSON_PATH, help=f"the JSON bridge (default {JSON_PATH})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    i = sub.add_parser("import", help="re-read the JSON (only if it changed, unless --force)")
+    i.add_argument("--force", action="store_true")
+    sub.add_parser("export", help="write the store back to the JSON")
+    n = sub.add_parser("near", help="entries within --radius of a world position")
+    n.add_argument("x", type=float)
+    n.add_argument("y", type=float)
+    n.add_argument("--radius", type=float, default=TILE_SIZE)
+    n.add_argument("--kind")
+    a = sub.add_parser("asset", help="entries with this asset_key")
+    a.add_argument("asset_key")
+    args = ap.parse_args(argv)
+
+    try:
+        con = open_store(args.json, force=args.cmd == "import" and args.force)
+    except (OSError, ValueError) as e:
+        print(f"[placements] cannot read {args.json}: {e}", file=sys.stderr)
+        return 1
+    if args.cmd in ("stats", "import"):
+        print(f"  {store_path(args.json)}")
+        for kind, grp, n_rows, n_assets in con.execute(
+                "SELECT g.kind, g.grp, COUNT(p.seq), COUNT(DISTINCT p.asset_key) FROM groups g "
+                "LEFT JOIN placements p ON p.kind = g.kind AND p.grp = g.grp "
+                "GROUP BY g.kind, g.grp ORDER BY g.kind, g.pos"):
+            print(f"  {kind:<18} {grp or '-':<28} {n_rows:6d} entries {n_assets:5d} asset_key(s)")
+        return 0
+    if args.cmd == "export":
+        print(f"[placements] {args.json} {'written' if export(con, args.json) else 'already up to date'}")
+        return 0
+    hits = near(con, args.x, args.y, args.radius, args.kind) if args.cmd == "near" else by_asset(con, args.asset_key)
+    for e in hits:
+        k, g, s = e.pop("_store")
+        print(f"  {k}/{g or '-'}[{s}]  {e.get('asset_key') or e.get('delivery_key') or e.get('vehicle_key', '')}"
+              f"  ({e.get('X')}, {e.get('Y')}, {e.get('Z')})")
+    print(f"  {len(hits)} entr{'y' if len(hits) == 1 else 'ies'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,343 @@
+"""
+Per-tile budget report for everything the mod places.
+
+Nothing used to warn that a placement pass was about to stream 400
+actors into one tile of the custom island. You found out from the frame
+rate in game. This reads the final placement set before pack and buckets
+it on the World Partition grid (12800-unit L-1 tiles, the same grid
+clone_bp_actors homes created cells on):
+
+  static meshes   map_work_changes.json static_meshes (one StaticMeshActor
+                  + one StaticMeshComponent each)
+  dealers         dealerships (one actor + its root SceneComponent)
+  BP clones       blueprint_actors + delivery_points (the components of
+                  the source BP class, counted from its package header)
+  created cells   the L-1 cells the last actors run registered
+
+Per tile it counts actors, components, static-mesh instances, distinct
+meshes and the most-repeated mesh. It also counts BP clones and created
+cells, and estimates memory: each distinct mesh's cooked .uexp + .ubulk
+(what streams in with the tile), each BP class's package, plus a small
+per-actor overhead. Assets missing from the extracted game and from the
+mod tree count as 0 bytes. Those tiles are marked "partial".
+
+    python scene_report.py                      # report + flag over-budget tiles
+    python scene_report.py --max-actors 120 --strict
+    python scene_report.py --metric mem_mb --scale 16
+
+One map is reported per run: --map NAME (maps.py), else the default map.
+Tiles over any budget are listed and flagged in the CSV, and with
+--strict the exit status is 1. Outputs go to .mtmi_cache/scene_report/,
+or scene_report/<map>/ for a map other than the default (or --out):
+
+  tiles.csv     one row per occupied tile
+  heatmap.png   the chosen --metric per tile, relative to its budget:
+                blue (empty budget) -> yellow -> red (at budget), magenta
+                beyond it, with over-budget tiles outlined in white. North
+                (+Y) is up.
+
+The budgets are starting points, not measured limits. Tune them against
+what the game holds up to.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import os
+import struct
+import sys
+import zlib
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import maps
+import mt_paths
+import mt_profile
+import placement_store
+from artifact_cache import CACHE_ROOT
+
+TILE_SIZE = placement_store.TILE_SIZE
+REPORT_DIR = CACHE_ROOT / "scene_report"
+MOD_CONTENT = Path("MapChangeTest_P") / "MotorTown" / "Content"
+KINDS = ("static_meshes", "dealerships", "blueprint_actors", "delivery_points")
+
+BUDGETS = {
+    "actors": 150,
+    "components": 600,
+    "distinct_meshes": 60,
+    "mem_mb": 256.0,
+}
+# Actor/component bookkeeping that isn't in any asset file.
+PER_ACTOR_BYTES = 4 * 1024
+# Components assumed for a BP whose package can't be read.
+DEFAULT_BP_COMPONENTS = 4
+
+COLUMNS = ("tile_x", "tile_y", "center_x", "center_y", "actors", "components",
+           "mesh_instances", "distinct_meshes", "max_instances", "bp_actors", "dealers",
+           "created_cells", "mem_mb", "partial", "over")
+
+
+# ----------------------------------------------------------------------
+# Asset metadata
+# ----------------------------------------------------------------------
+def _disk_path(game_path: str) -> str | None:
+    """'/Game/A/B.B' -> 'A/B' (None outside /Game)."""
+    if not game_path.startswith("/Game/"):
+        return None
+    rel = game_path[len("/Game/"):]
+    return rel.split(".", 1)[0]
+
+
+def _package(rel: str) -> Path | None:
+    for root in (mt_paths.GAME_CONTENT, MOD_CONTENT):
+        p = Path(root) / f"{rel}.uasset"
+        if p.is_file():
+            return p
+    return None
+
+
+@lru_cache(maxsize=None)
+def mesh_bytes(game_path: str) -> int | None:
+    """Cooked render data of a static mesh (.uexp + .ubulk), None when the
+    package isn't on disk."""
+    rel = _disk_path(game_path)
+    p = _package(rel) if rel else None
+    if p is None:
+        return None
+    return sum(q.stat().st_size for q in (p.with_suffix(".uexp"), p.with_suffix(".ubulk")) if q.is_file())
+
+
+@lru_cache(maxsize=None)
+def bp_info(bp_path: str) -> tuple[int, int | None]:
+    """(components, package bytes or None) for a BP class: its component
+    templates from the package header, DEFAULT_BP_COMPONENTS if that
+    can't be read."""
+    from uasset_header import class_name, read_package
+    rel = _disk_path(bp_path)
+    p = _package(rel) if rel else None
+    if p is None:
+        return DEFAULT_BP_COMPONENTS, None
+    size = sum(q.stat().st_size for q in (p, p.with_suffix(".uexp")) if q.is_file())
+    try:
+        pkg = read_package(p)
+    except (OSError, ValueError, IndexError, struct.error):
+        return DEFAULT_BP_COMPONENTS, size
+    n = sum(1 for e in pkg["exports"]
+            if (class_name(pkg, e["class_index"]) or "").endswith("Component")
+            and not e["name"].startswith("Default__"))
+    return n or DEFAULT_BP_COMPONENTS, size
+
+
+def _registry_bp(entry: dict, kind: str) -> str | None:
+    from bp_registry import REGISTRY
+    key = entry.get("asset_key") if kind == "blueprint_actors" else f"DeliveryPoint_{entry.get('delivery_key')}"
+    tpl = REGISTRY.get(key) if key else None
+    return tpl.get("bp_path") if tpl else entry.get("blueprint_path")
+
+
+# ----------------------------------------------------------------------
+# Tiles
+# ----------------------------------------------------------------------
+def tile_of(x: float, y: float) -> tuple[int, int]:
+    return math.floor(x / TILE_SIZE), math.floor(y / TILE_SIZE)
+
+
+def _entries(section) -> list:
+    if isinstance(section, list):
+        return section
+    return [e for items in (section or {}).values() if isinstance(items, list) for e in items]
+
+
+def tally(placements: dict, created_cells: dict[str, tuple[int, int]]) -> dict[tuple[int, int], dict]:
+    """Per-tile counts from {kind: section} (map_work_changes.json shape)
+    and {created cell: tile}."""
+    tiles: dict[tuple[int, int], dict] = defaultdict(lambda: {
+        "actors": 0, "components": 0, "meshes": Counter(), "bp_actors": 0, "dealers": 0,
+        "created_cells": 0, "bp_classes": set(), "bytes": 0, "partial": False})
+
+    def at(e: dict):
+        x, y = e.get("X"), e.get("Y")
+        if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+            return None
+        return tiles[tile_of(x, y)]
+
+    for kind in KINDS:
+        for e in _entries(placements.get(kind)):
+            if not isinstance(e, dict) or all(k.startswith("_") for k in e):
+                continue
+            t = at(e)
+            if t is None:
+                continue
+            t["actors"] += 1
+            if kind == "static_meshes":
+                t["components"] += 1
+                t["meshes"][e.get("asset_path") or e.get("asset_key") or "?"] += 1
+            elif kind == "dealerships":
+                t["components"] += 1
+                t["dealers"] += 1
+            else:
+                bp = _registry_bp(e, kind)
+                comps, _ = bp_info(bp) if bp else (DEFAULT_BP_COMPONENTS, None)
+                t["components"] += comps
+                t["bp_actors"] += 1
+                t["bp_classes"].add(bp)
+    for tile in created_cells.values():
+        tiles[tile]["created_cells"] += 1
+
+    out = {}
+    for tile, t in tiles.items():
+        mem = t["actors"] * PER_ACTOR_BYTES
+        partial = False
+        for mesh in t["meshes"]:
+            b = mesh_bytes(mesh)
+            partial |= b is None
+            mem += b or 0
+        for bp in t["bp_classes"]:
+            b = bp_info(bp)[1] if bp else None
+            partial |= b is None
+            mem += b or 0
+        out[tile] = {
+            "tile_x": tile[0], "tile_y": tile[1],
+            "center_x": (tile[0] + 0.5) * TILE_SIZE, "center_y": (tile[1] + 0.5) * TILE_SIZE,
+            "actors": t["actors"], "components": t["components"],
+            "mesh_instances": sum(t["meshes"].values()), "distinct_meshes": len(t["meshes"]),
+            "max_instances": max(t["meshes"].values(), default=0),
+            "bp_actors": t["bp_actors"], "dealers": t["dealers"], "created_cells": t["created_cells"],
+            "mem_mb": round(mem / (1 << 20), 2), "partial": int(partial),
+        }
+    return out
+
+
+def over_budget(row: dict, budgets: dict) -> list[str]:
+    return [k for k, limit in budgets.items() if limit is not None and row[k] > limit]
+
+
+# ----------------------------------------------------------------------
+# Outputs
+# ----------------------------------------------------------------------
+def write_csv(path: Path, rows: list[dict]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNS)
+        w.writeheader()
+        for r in rows:
+            w.writerow({**r, "over": ";".join(r["over"])})
+
+
+def encode_png(width: int, height: int, rgb_rows: list[bytes]) -> bytes:
+    """8-bit RGB PNG from `height` rows of width*3 bytes (filter 0)."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+    raw = b"".join(b"\x00" + row for row in rgb_rows)
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 9))
+            + chunk(b"IEND", b""))
+
+
+_EMPTY = (24, 24, 28)
+_RAMP = ((40, 70, 200), (250, 220, 40), (225, 30, 30))     # 0, budget/2, budget
+
+
+def heat_color(ratio: float) -> tuple[int, int, int]:
+    if ratio > 1.0:
+        return (230, 40, 230)
+    lo, hi, f = (_RAMP[0], _RAMP[1], ratio * 2) if ratio < 0.5 else (_RAMP[1], _RAMP[2], ratio * 2 - 1)
+    return tuple(round(a + (b - a) * f) for a, b in zip(lo, hi))
+
+
+def heatmap(rows: list[dict], metric: str, budget: float, scale: int) -> tuple[int, int, list[bytes]]:
+    """(width, height, rows) of the heatmap: `scale` px per tile over the
+    occupied tiles' bounding box plus a one-tile margin."""
+    xs = [r["tile_x"] for r in rows]
+    ys = [r["tile_y"] for r in rows]
+    x0, x1, y0, y1 = min(xs) - 1, max(xs) + 1, min(ys) - 1, max(ys) + 1
+    w, h = (x1 - x0 + 1) * scale, (y1 - y0 + 1) * scale
+    by_tile = {(r["tile_x"], r["tile_y"]): r for r in rows}
+    out = []
+    for py in range(h):
+        ty = y1 - py // scale                 # +Y up
+        line = bytearray()
+        for tx in range(x0, x1 + 1):
+            r = by_tile.get((tx, ty))
+            color = _EMPTY if r is None else heat_color(r[metric] / budget if budget else 0.0)
+            px = bytes(color) * scale
+            if r is not None and r["over"] and scale >= 4:
+                edge_row = py % scale in (0, scale - 1)
+                px = b"\xff\xff\xff" * scale if edge_row else b"\xff\xff\xff" + px[3:-3] + b"\xff\xff\xff"
+            line += px
+        out.append(bytes(line))
+    return w, h, out
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Per-tile actor / component / memory budget report.")
+    ap.add_argument("--config", type=Path, default=placement_store.JSON_PATH,
+                    help=f"placements (default {placement_store.JSON_PATH}, read via the placement store)")
+    ap.add_argument("--map", default=None, help="map to report (maps.py; default: the default map)")
+    ap.add_argument("--gen-dir", type=Path, default=None,
+                    help="mod _Generated_ dir (created cells; default: the map's)")
+    ap.add_argument("--out", type=Path, default=None,
+                    help=f"output dir (default {REPORT_DIR}, or a subdir per non-default map)")
+    for key, default in BUDGETS.items():
+        ap.add_argument(f"--max-{key.replace('_', '-')}", dest=key, type=type(default), default=default,
+                        help=f"per-tile {key} budget (default {default:g})")
+    ap.add_argument("--metric", choices=sorted(BUDGETS), default="actors", help="what the heatmap shows")
+    ap.add_argument("--scale", type=int, default=8, help="heatmap pixels per tile (default 8)")
+    ap.add_argument("--top", type=int, default=10, help="busiest tiles to print (default 10)")
+    ap.add_argument("--strict", action="store_true", help="exit 1 when any tile is over budget")
+    args = ap.parse_args(argv)
+    try:
+        m = maps.get(args.map)
+    except KeyError as e:
+        ap.error(e.args[0])
+    args.gen_dir = args.gen_dir or m["gen_dir"]
+    args.out = args.out or (REPORT_DIR if m["name"] == maps.default() else REPORT_DIR / m["name"])
+    mt_paths.resolve()
+
+    try:
+        placements = placement_store.load(args.config, KINDS)
+    except (OSError, ValueError) as e:
+        print(f"[scene] cannot read {args.config}: {e}", file=sys.stderr)
+        return 1
+    placements = {k: maps.split(_entries(v), "placement")[m["name"]] for k, v in placements.items()}
+    from clone_bp_actors import created_cell_tiles
+    budgets = {k: getattr(args, k) for k in BUDGETS}
+    tiles = tally(placements, created_cell_tiles(args.gen_dir))
+    rows = sorted(tiles.values(), key=lambda r: (-r["actors"], r["tile_x"], r["tile_y"]))
+    for r in rows:
+        r["over"] = over_budget(r, budgets)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    write_csv(args.out / "tiles.csv", rows)
+    total = sum(r["actors"] for r in rows)
+    print(f"[scene] {m['name']}: {total} actor(s) in {len(rows)} tile(s); budgets per tile: "
+          + ", ".join(f"{k} {v:g}" for k, v in budgets.items()))
+    if rows:
+        w, h, pixels = heatmap(rows, args.metric, budgets[args.metric], max(1, args.scale))
+        tmp = args.out / f"heatmap.png.{os.getpid()}.tmp"
+        tmp.write_bytes(encode_png(w, h, pixels))
+        os.replace(tmp, args.out / "heatmap.png")
+        print(f"  {'tile':>12} {'actors':>7} {'comps':>6} {'meshes':>7} {'inst':>5} {'bp':>4} "
+              f"{'cells':>5} {'MB':>8}")
+        for r in rows[:args.top]:
+            flag = "  OVER: " + ", ".join(r["over"]) if r["over"] else ""
+            flag += "  (partial)" if r["partial"] else ""
+            print(f"  {r['tile_x']:>5},{r['tile_y']:<6} {r['actors']:>7} {r['components']:>6} "
+                  f"{r['distinct_meshes']:>7} {r['max_instances']:>5} {r['bp_actors']:>4} "
+                  f"{r['created_cells']:>5} {r['mem_mb']:>8.1f}{flag}")
+    hot = [r for r in rows if r["over"]]
+    print(f"  {args.out / 'tiles.csv'}" + (f", {args.out / 'heatmap.png'} ({args.metric})" if rows else ""))
+    if hot:
+        print(f"[scene] {len(hot)} tile(s) over budget: "
+              + "; ".join(f"({r['tile_x']},{r['tile_y']}) {', '.join(r['over'])}" for r in hot[:10])
+              + (" ..." if len(hot) > 10 else ""), file=sys.stderr)
+        return 1 if args.strict else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("scene_report", lambda: _main(sys.argv[1:])))
@@ -0,0 +1,429 @@
+"""
+Build cache shared across machines, as a second tier of artifact_cache.
+
+Everyone on the team builds the same vanilla-derived artifacts: the
+pulled map JSON, the rebuilt map, the mod BP classes cloned from vanilla
+templates, the safety-net DP overrides, Cargos_01 and the unpatched map
+the actors stage keeps. artifact_cache.py keys each of them on the
+content of every input plus the tool build that produces it, never on a
+path, so a key stands for the same bytes on every machine. This module
+lets those entries be fetched from, and published to, a location the
+whole team can reach:
+
+    set MTMI_SHARED_CACHE=\\\\nas\\mtmi-cache              a directory (share, synced folder)
+    set MTMI_SHARED_CACHE=http://buildbox:8765/mtmi     plain HTTP GET/PUT
+
+A local miss asks the shared cache before the producer runs. A fresh
+output is published after it has been stored locally.
+MTMI_SHARED_CACHE_PUSH=0 makes the tier read-only (e.g. on a slow link).
+Both backends use the same layout:
+
+  entries/<aa>/<key>.json    {"format": 1, "files": [[name, sha256, size], ...]}
+  objects/<aa>/<sha256>      file bodies, stored once per distinct content
+
+An entry is published after its objects, so a reader never sees one whose
+bodies aren't there yet. Nothing read back is trusted, though. An entry
+that doesn't parse is a miss. So is an object whose size or sha256 isn't
+the one its entry names, and it never reaches the local store.
+
+The shared tier never fails a build. On the first network or I/O error it
+reports the error and switches itself off for the rest of the run, and
+every step then runs as if there were no shared cache.
+
+    python shared_cache.py info
+    python shared_cache.py check                     # a lookup, plus a write when pushing
+    python shared_cache.py serve --root D:\\mtmi-cache --port 8765
+
+`check` writes only when the tier pushes, and then only the one blob
+check/roundtrip, outside entries/ and objects/.
+
+`serve` is a small GET/PUT server over a directory. It stands in for a
+real one when testing, and is enough for a LAN build box.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+_FORMAT = 1
+_TIMEOUT = 15.0
+_CHUNK = 1 << 20
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class Backend(ABC):
+    """Where shared blobs live, by '/'-separated name. get() returns None
+    for a blob that isn't there; anything else that goes wrong raises
+    OSError (or ValueError)."""
+
+    @abstractmethod
+    def get(self, name: str) -> BinaryIO | None: ...
+
+    @abstractmethod
+    def put(self, name: str, src: Path | bytes) -> None: ...
+
+    @abstractmethod
+    def exists(self, name: str) -> bool: ...
+
+    @abstractmethod
+    def describe(self) -> str: ...
+
+
+class DirBackend(Backend):
+    """A directory, local or on a network share. Writes are atomic."""
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    def _path(self, name: str) -> Path:
+        return self.root.joinpath(*name.split("/"))
+
+    def get(self, name: str) -> BinaryIO | None:
+        try:
+            return open(self._path(name), "rb")
+        except FileNotFoundError:
+            return None
+
+    def put(self, name: str, src: Path | bytes) -> None:
+        dst = self._path(name)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f"{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            if isinstance(src, bytes):
+                tmp.write_bytes(src)
+            else:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).is_file()
+
+    def describe(self) -> str:
+        return str(self.root)
+
+
+class HttpBackend(Backend):
+    """Plain HTTP: GET/HEAD to read, PUT to write, 404 for a missing blob.
+    Any server that stores PUT bodies at their URL will do (see serve)."""
+
+    def __init__(self, url: str, timeout: float = _TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, name: str, method: str, data=None, headers=None):
+        import urllib.error
+        import urllib.request
+        req = urllib.request.Request(f"{self.url}/{name}", data=data, method=method, headers=headers or {})
+        try:
+            return urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 404 and method in ("GET", "HEAD"):
+                return None
+            raise OSError(f"{method} {req.full_url}: HTTP {e.code} {e.reason}") from None
+
+    def get(self, name: str) -> BinaryIO | None:
+        return self._request(name, "GET")
+
+    def put(self, name: str, src: Path | bytes) -> None:
+        if isinstance(src, bytes):
+            resp = self._request(name, "PUT", src, {"Content-Length": str(len(src))})
+        else:
+            with open(src, "rb") as f:
+                resp = self._request(name, "PUT", f, {"Content-Length": str(os.fstat(f.fileno()).st_size)})
+        resp.close()
+
+    def exists(self, name: str) -> bool:
+        resp = self._request(name, "HEAD")
+        if resp is None:
+            return False
+        resp.close()
+        return True
+
+    def describe(self) -> str:
+        return self.url
+
+
+def backend_for(location: str) -> Backend:
+    if location.lower().startswith(("http://", "https://")):
+        return HttpBackend(location)
+    return DirBackend(location)
+
+
+# ----------------------------------------------------------------------
+# Shared cache
+# ----------------------------------------------------------------------
+def _entry_name(key: str) -> str:
+    return f"entries/{key[:2]}/{key}.json"
+
+
+def _object_name(digest: str) -> str:
+    return f"objects/{digest[:2]}/{digest}"
+
+
+_CHECK_NAME = "check/roundtrip"
+
+
+class SharedCache:
+    """Entries and objects on a Backend, verified on every read."""
+
+    def __init__(self, backend: Backend, push: bool = True):
+        self.backend = backend
+        self.push = push
+        self.enabled = True
+        self.fetched = 0
+        self.published = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _fail(self, what: str, e: Exception) -> None:
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+        print(f"  [shared-cache] {what} failed ({e}); continuing without "
+              f"{self.backend.describe()} for this run", file=sys.stderr)
+
+    def _reject(self, what: str) -> None:
+        with self._lock:
+            self.rejected += 1
+        print(f"  [shared-cache] ignoring {what}", file=sys.stderr)
+
+    def entry(self, key: str) -> list[list] | None:
+        """[[name, sha256, size], ...] stored under `key`, or None."""
+        if not self.enabled:
+            return None
+        try:
+            f = self.backend.get(_entry_name(key))
+            if f is None:
+                return None
+            with f:
+                raw = f.read()
+        except (OSError, ValueError) as e:
+            self._fail(f"reading entry {key[:12]}", e)
+            return None
+        try:
+            data = json.loads(raw)
+            files = data["files"]
+            if data.get("format") != _FORMAT or not all(
+                    isinstance(n, str) and isinstance(d, str) and len(d) == 64 and isinstance(s, int)
+                    for n, d, s in files):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self._reject(f"malformed entry {key[:12]}")
+            return None
+        return [list(x) for x in files]
+
+    def download(self, digest: str, size: int, dst: Path) -> bool:
+        """Fetch object `digest` into `dst` (atomically), checking its size
+        and sha256 on the way. False, with `dst` untouched, otherwise."""
+        if not self.enabled:
+            return False
+        dst = Path(dst)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f"{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        h = hashlib.sha256()
+        n = 0
+        try:
+            f = self.backend.get(_object_name(digest))
+            if f is None:
+                self._reject(f"entry naming missing object {digest[:12]}")
+                return False
+            with f, open(tmp, "wb") as out:
+                for chunk in iter(lambda: f.read(_CHUNK), b""):
+                    h.update(chunk)
+                    n += len(chunk)
+                    out.write(chunk)
+            if n != size or h.hexdigest() != digest:
+                self._reject(f"object {digest[:12]} ({n} bytes, sha256 {h.hexdigest()[:12]})")
+                return False
+            os.replace(tmp, dst)
+        except (OSError, ValueError) as e:
+            self._fail(f"downloading object {digest[:12]}", e)
+            return False
+        finally:
+            tmp.unlink(missing_ok=True)
+        with self._lock:
+            self.fetched += 1
+        return True
+
+    def publish(self, key: str, files: list[list], object_path) -> None:
+        """Upload the objects the shared cache lacks (from object_path(digest)),
+        then the entry."""
+        if not (self.enabled and self.push):
+            return
+        try:
+            for _, digest, _ in files:
+                name = _object_name(digest)
+                if not self.backend.exists(name):
+                    self.backend.put(name, Path(object_path(digest)))
+            blob = json.dumps({"format": _FORMAT, "files": files}, separators=(",", ":")).encode("utf-8")
+            self.backend.put(_entry_name(key), blob)
+        except (OSError, ValueError) as e:
+            self._fail(f"publishing entry {key[:12]}", e)
+            return
+        with self._lock:
+            self.published += 1
+
+    def summary(self) -> str:
+        s = f"[shared-cache] {self.backend.describe()}: {self.fetched} object(s) fetched, {self.published} entr(ies) published"
+        if self.rejected:
+            s += f", {self.rejected} rejected"
+        if not self.enabled:
+            s += " (switched off after an error)"
+        return s
+
+
+@lru_cache(maxsize=None)
+def shared() -> SharedCache | None:
+    """The shared cache MTMI_SHARED_CACHE names, or None when it's unset."""
+    location = os.environ.get("MTMI_SHARED_CACHE", "").strip().strip('"')
+    if not location:
+        return None
+    return SharedCache(backend_for(location), push=os.environ.get("MTMI_SHARED_CACHE_PUSH", "1") != "0")
+
+
+# ----------------------------------------------------------------------
+# Stand-in server
+# ----------------------------------------------------------------------
+def make_server(root: Path, host: str = "127.0.0.1", port: int = 8765):
+    """A ThreadingHTTPServer serving `root` over GET/HEAD/PUT, bound but not
+    yet serving (port 0 picks one: see .server_port)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    store = DirBackend(root)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _name(self) -> str | None:
+            parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+            if not parts or any(p in (".", "..") or "\\" in p or ":" in p for p in parts):
+                self.send_error(400)
+                return None
+            return "/".join(parts)
+
+        def _send(self, head: bool) -> None:
+            name = self._name()
+            if name is None:
+                return
+            f = store.get(name)
+            if f is None:
+                self.send_error(404)
+                return
+            with f:
+                self.send_response(200)
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.end_headers()
+                if not head:
+                    shutil.copyfileobj(f, self.wfile, _CHUNK)
+
+        def do_GET(self):
+            self._send(head=False)
+
+        def do_HEAD(self):
+            self._send(head=True)
+
+        def do_PUT(self):
+            name = self._name()
+            if name is None:
+                return
+            length = int(self.headers.get("Content-Length") or -1)
+            if length < 0:
+                self.send_error(411)
+                return
+            dst = store._path(name)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f"{dst.name}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp, "wb") as out:
+                    while length:
+                        chunk = self.rfile.read(min(length, _CHUNK))
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        length -= len(chunk)
+                if length:
+                    self.send_error(400, "short body")
+                    return
+                os.replace(tmp, dst)
+            finally:
+                tmp.unlink(missing_ok=True)
+            self.send_response(201)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, fmt, *args):
+            print(f"  [serve] {self.address_string()} {fmt % args}", file=sys.stderr)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(root: Path, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Serve `root` over GET/HEAD/PUT until interrupted."""
+    httpd = make_server(root, host, port)
+    print(f"[shared-cache] serving {Path(root).resolve()} on http://{host}:{httpd.server_port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect, test or serve the shared build cache.")
+    ap.add_argument("command", choices=("info", "check", "serve"))
+    ap.add_argument("--root", type=Path, default=Path("shared_cache"), help="serve: directory to serve")
+    ap.add_argument("--host", default="127.0.0.1", help="serve: address to bind")
+    ap.add_argument("--port", type=int, default=8765, help="serve: port (0 picks one)")
+    args = ap.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.root, args.host, args.port)
+        return 0
+    cache = shared()
+    if cache is None:
+        print("MTMI_SHARED_CACHE is not set; builds use the local cache only")
+        return 0 if args.command == "info" else 1
+    print(f"shared cache: {cache.backend.describe()} ({'read/write' if cache.push else 'read-only'})")
+    if args.command == "info":
+        return 0
+
+    # A lookup through the same checks a build uses: a miss is fine, an
+    # error switches the cache off. Read-only stops there.
+    cache.entry(hashlib.sha256(b"shared-cache-check").hexdigest())
+    ok = cache.enabled
+    if ok and cache.push:
+        # Write a blob and read it back under check/, away from entries/
+        # and objects/; every check overwrites the last one's.
+        body = f"mtmi shared-cache check {os.getpid()} {os.urandom(8).hex()}\n".encode("utf-8")
+        try:
+            cache.backend.put(_CHECK_NAME, body)
+            f = cache.backend.get(_CHECK_NAME)
+            if f is None:
+                ok = False
+            else:
+                with f:
+                    ok = f.read() == body
+        except (OSError, ValueError) as e:
+            print(f"  [shared-cache] {e}", file=sys.stderr)
+            ok = False
+    what = "read/write" if cache.push else "read"
+    print(f"{what} ok" if ok else f"{what} FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,43 @@
+"""Shared by the tests that run the pipeline's scripts: a throwaway repo +
+fake game tree built from the benchmark fixtures, and a stand-in
+UAssetGUI."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from benchmarks import fixtures  # noqa: E402
+
+# tojson/fromjson <src> <dst> <engine> <tag>: the "vanilla umap" the
+# workdir holds is already level JSON, so a copy is a conversion.
+STAND_IN_UASSETGUI = """\
+import shutil, sys
+verb, src, dst = sys.argv[1:4]
+shutil.copyfile(src, dst)
+"""
+
+
+def workdir(root: Path, scale: str = "small") -> dict[str, str]:
+    """Lay out a runnable tree under `root`: the fixtures, the repo's
+    scripts and maps.json, a vanilla Jeju_World.umap and
+    fake_uassetgui.py. Returns the environment to run it with."""
+    paths = fixtures.write_workdir(root, fixtures.SCALES[scale])
+    for script in REPO.glob("*.py"):
+        shutil.copy(script, root)
+    shutil.copy(REPO / "maps.json", root)
+    umap = paths["content"] / "Maps" / "Jeju" / "Jeju_World.umap"
+    shutil.copy(paths["asset"], umap)
+    umap.with_suffix(".uexp").write_bytes(b"")
+    (root / "fake_uassetgui.py").write_text(STAND_IN_UASSETGUI, encoding="utf-8")
+    env = {k: v for k, v in os.environ.items() if not k.startswith("MTMI_")}
+    env.update(fixtures.env(root))
+    env["MTMI_UASSETGUI"] = "fake_uassetgui.py"
+    env["PYTHONIOENCODING"] = "utf-8"
+    return env
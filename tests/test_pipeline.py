@@ -0,0 +1,93 @@
+"""pipeline.py end to end on a fixture tree: pull, meshes, convert and map
+run for real, with UAssetGUI replaced by a stand-in (--tool), and are
+skipped again when nothing they read changed."""
+
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import workdir
+
+STAGES = ["pull", "meshes", "convert", "map"]
+
+
+class MeshesConvert(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.root = Path(cls._tmp.name)
+        cls.env = workdir(cls.root)
+        del cls.env["MTMI_UASSETGUI"]       # only --tool names the stand-in
+        cls.first = cls.pipeline()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    @classmethod
+    def pipeline(cls, *extra: str) -> str:
+        proc = subprocess.run(
+            [sys.executable, "pipeline.py", "--tool", "uassetgui=fake_uassetgui.py",
+             "--only", *STAGES, "--jobs", "2", *extra],
+            cwd=cls.root, env=cls.env, capture_output=True, text=True, encoding="utf-8")
+        if proc.returncode != 0:
+            raise AssertionError(f"pipeline.py exit {proc.returncode}:\n{proc.stdout}\n{proc.stderr}")
+        return proc.stdout
+
+    def state(self) -> dict:
+        return json.loads((self.root / "cache" / "pipeline.json").read_text(encoding="utf-8"))["stages"]
+
+    def test_first_run_builds_everything(self):
+        for stage in STAGES:
+            self.assertIn(f"[{stage}] no previous run", self.first)
+        changes = json.loads((self.root / "map_work_changes.json").read_text(encoding="utf-8"))
+        self.assertTrue(any(changes["static_meshes"].values()))
+        level = json.loads((self.root / "Jeju_World.json").read_text(encoding="utf-8"))
+        vanilla = json.loads((self.root / "Jeju_Worldaa.json").read_text(encoding="utf-8"))
+        self.assertGreater(len(level["Exports"]), len(vanilla["Exports"]))
+        umap = self.root / "MapChangeTest_P" / "MotorTown" / "Content" / "Maps" / "Jeju" / "Jeju_World.umap"
+        self.assertEqual(umap.read_bytes(), (self.root / "Jeju_World.json").read_bytes())
+        self.assertLessEqual(set(STAGES), set(self.state()))
+
+    def test_unchanged_inputs_skip(self):
+        out = self.pipeline()
+        for stage in STAGES:
+            self.assertIn(f"[{stage}] up to date", out)
+
+    def test_scene_edit_reruns_downstream_only(self):
+        scene = self.root / "static_meshes.json"
+        before = scene.read_text(encoding="utf-8")
+        cfg = json.loads(before)
+        cfg["_test_moved"] = True
+        scene.write_text(json.dumps(cfg), encoding="utf-8")
+        try:
+            plan = self.pipeline("--dry-run")
+            self.assertRegex(plan, r"run +meshes +inputs changed: static_meshes\.json")
+            self.assertRegex(plan, r"pending +convert +after meshes")
+            self.assertRegex(plan, r"fresh +pull")
+            out = self.pipeline()
+            self.assertIn("[pull] up to date", out)
+            self.assertIn("[meshes] inputs changed: static_meshes.json", out)
+            # An ignored key leaves map_work_changes.json byte-identical, so
+            # convert (and map after it) are skipped despite meshes re-running.
+            self.assertIn("[convert] up to date", out)
+            self.assertIn("[map] up to date", out)
+        finally:
+            scene.write_text(before, encoding="utf-8")
+            self.pipeline()
+
+    def test_hand_edited_output_reruns(self):
+        out_json = self.root / "Jeju_World.json"
+        out_json.write_text(out_json.read_text(encoding="utf-8") + " ", encoding="utf-8")
+        out = self.pipeline()
+        self.assertIn("[convert] outputs modified: Jeju_World.json", out)
+        # convert gives injected actors fresh GUIDs, so map follows.
+        self.assertIn("[map] inputs changed: Jeju_World.json", out)
+        self.assertIn("[meshes] up to date", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
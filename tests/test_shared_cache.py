@@ -0,0 +1,137 @@
+"""shared_cache.py against a DirBackend and against the stand-in server
+(make_server on port 0, serving from a thread)."""
+
+import hashlib
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import shared_cache
+from shared_cache import DirBackend, HttpBackend, SharedCache
+
+KEY = hashlib.sha256(b"test-entry").hexdigest()
+BODY = b"cooked map bytes\n" * 100
+
+
+def _publish(cache: SharedCache, objects: Path, body: bytes = BODY) -> list[list]:
+    digest = hashlib.sha256(body).hexdigest()
+    (objects / digest).write_bytes(body)
+    files = [["Jeju_World.umap", digest, len(body)]]
+    cache.publish(KEY, files, lambda d: objects / d)
+    return files
+
+
+class _Tier:
+    """The tests every backend runs; the TestCases below say which backend."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.root = self.tmp / "shared"
+        self.objects = self.tmp / "local"
+        self.objects.mkdir()
+
+    def cache(self) -> SharedCache:
+        return SharedCache(self.backend())
+
+    def test_roundtrip(self):
+        writer = self.cache()
+        files = _publish(writer, self.objects)
+        self.assertEqual((writer.published, writer.enabled), (1, True))
+
+        reader = self.cache()
+        self.assertEqual(reader.entry(KEY), files)
+        dst = self.tmp / "out" / "Jeju_World.umap"
+        self.assertTrue(reader.download(files[0][1], files[0][2], dst))
+        self.assertEqual(dst.read_bytes(), BODY)
+        self.assertEqual((reader.fetched, reader.rejected), (1, 0))
+
+    def test_miss(self):
+        self.assertIsNone(self.cache().entry(hashlib.sha256(b"absent").hexdigest()))
+
+    def test_corrupt_object_rejected(self):
+        [[_, digest, size]] = _publish(self.cache(), self.objects)
+        obj = self.root / "objects" / digest[:2] / digest
+        for body in (b"x" * size, BODY + b"tail"):      # wrong sha256, wrong size
+            with self.subTest(size=len(body)):
+                obj.write_bytes(body)
+                reader = self.cache()
+                dst = self.tmp / "out" / "Jeju_World.umap"
+                self.assertFalse(reader.download(digest, size, dst))
+                self.assertFalse(dst.exists())
+                self.assertEqual(list(dst.parent.iterdir()), [])
+                self.assertEqual((reader.rejected, reader.enabled), (1, True))
+
+    def test_malformed_entry_is_a_miss(self):
+        bad = [b"{not json", b'{"format": 1}', b'{"format": 2, "files": []}',
+               b'{"format": 1, "files": [["a", "short", 1]]}']
+        for blob in bad:
+            with self.subTest(blob=blob):
+                DirBackend(self.root).put(shared_cache._entry_name(KEY), blob)
+                reader = self.cache()
+                self.assertIsNone(reader.entry(KEY))
+                self.assertEqual((reader.rejected, reader.enabled), (1, True))
+
+
+class DirTier(_Tier, unittest.TestCase):
+    def backend(self):
+        return DirBackend(self.root)
+
+
+class HttpTier(_Tier, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        httpd = shared_cache.make_server(self.root, port=0)
+        httpd.RequestHandlerClass.log_message = lambda *a: None
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        self.url = f"http://127.0.0.1:{httpd.server_port}"
+
+    def backend(self):
+        return HttpBackend(self.url, timeout=5)
+
+
+class SwitchOff(unittest.TestCase):
+    def test_connection_error_switches_the_tier_off(self):
+        with socket.socket() as s:                      # a port nothing listens on
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        calls = []
+
+        class Counting(HttpBackend):
+            def _request(self, name, method, data=None, headers=None):
+                calls.append((method, name))
+                return super()._request(name, method, data, headers)
+
+        cache = SharedCache(Counting(f"http://127.0.0.1:{port}", timeout=5))
+        self.assertIsNone(cache.entry(KEY))
+        self.assertFalse(cache.enabled)
+        self.assertEqual(len(calls), 1)
+
+        # Off for the rest of the run: nothing else reaches the backend.
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(cache.entry(KEY))
+            self.assertFalse(cache.download("0" * 64, 1, Path(tmp) / "x"))
+            cache.publish(KEY, [["x", "0" * 64, 1]], lambda d: Path(tmp) / d)
+        self.assertEqual(len(calls), 1)
+        self.assertIn("switched off", cache.summary())
+
+
+class BackendIsAbstract(unittest.TestCase):
+    def test_incomplete_backend_cannot_be_made(self):
+        class GetOnly(shared_cache.Backend):
+            def get(self, name):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnly()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""uassetgui.py's conversion pool, driven by stand-in converters
+(MTMI_UASSETGUI pointing at a .py script)."""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import uassetgui
+
+# Every stand-in gets `<verb> <src> <dst> <engine> <tag>`. The source's
+# text picks the behaviour, so one script covers a whole pool.
+STAND_IN = """\
+import subprocess, sys, time
+verb, src, dst, engine, tag = sys.argv[1:6]
+mode = open(src).read().strip()
+if mode == "fail":
+    open(dst, "w").write("partial")
+    sys.exit(3)
+if mode == "silent":
+    sys.exit(0)
+if mode == "hang":
+    time.sleep(30)
+if mode == "handoff":
+    # Exit at once and leave the write to a child, like a converter that
+    # spawns a worker: completion has to come from the size check.
+    subprocess.Popen([sys.executable, "-c",
+                      "import sys, time; time.sleep(0.3); open(sys.argv[1], 'w').write('{}' * 500)", dst])
+    sys.exit(0)
+if mode.startswith("sleep"):
+    time.sleep(float(mode.split()[1]))
+open(dst, "w").write(f'{{"verb": "{verb}", "engine": "{engine}", "tag": "{tag}"}}')
+"""
+
+
+class Pool(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        script = self.tmp / "stand_in.py"
+        script.write_text(STAND_IN, encoding="utf-8")
+        patch = mock.patch.dict(os.environ, {"MTMI_UASSETGUI": str(script)})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def src(self, name: str, mode: str = "ok") -> tuple[Path, Path]:
+        src = self.tmp / f"{name}.uasset"
+        src.write_text(mode, encoding="utf-8")
+        return src, self.tmp / f"{name}.json"
+
+    def test_converter_cmd_runs_py_under_this_interpreter(self):
+        cmd = uassetgui.converter_cmd()
+        self.assertEqual(Path(cmd[-1]).name, "stand_in.py")
+        self.assertEqual(len(cmd), 2)
+
+    def test_to_json(self):
+        src, dst = self.src("Cargos")
+        self.assertTrue(uassetgui.to_json(src, dst, "MotorTown718P1"))
+        self.assertEqual(dst.read_text(),
+                         f'{{"verb": "tojson", "engine": "{uassetgui.ENGINE_VERSION}", "tag": "MotorTown718P1"}}')
+
+    def test_stale_output_is_not_taken_for_a_result(self):
+        src, dst = self.src("Cargos", "silent")
+        dst.write_text("from last time")
+        self.assertFalse(uassetgui.to_json(src, dst, "t", timeout=1))
+        self.assertFalse(dst.exists())
+
+    def test_nonzero_exit_fails_at_once(self):
+        src, dst = self.src("Cargos", "fail")
+        t0 = time.monotonic()
+        self.assertFalse(uassetgui.to_json(src, dst, "t", timeout=20))
+        self.assertLess(time.monotonic() - t0, 10)
+
+    def test_timeout(self):
+        src, dst = self.src("Cargos", "hang")
+        t0 = time.monotonic()
+        self.assertFalse(uassetgui.to_json(src, dst, "t", timeout=1))
+        self.assertLess(time.monotonic() - t0, 10)
+
+    def test_handoff_waits_for_the_file(self):
+        src, dst = self.src("Cargos", "handoff")
+        self.assertTrue(uassetgui.to_json(src, dst, "t", timeout=20))
+        self.assertEqual(dst.stat().st_size, 1000)
+
+    def test_many_runs_concurrently_and_isolates_failures(self):
+        pairs = [self.src(f"DP{i}", "sleep 1") for i in range(4)] + [self.src("Broken", "fail")]
+        t0 = time.monotonic()
+        results = uassetgui.to_json_many(pairs, "t", jobs=5)
+        elapsed = time.monotonic() - t0
+        self.assertEqual(results, {dst: not dst.name.startswith("Broken") for _, dst in pairs})
+        # One at a time this is 4 s of sleeping alone.
+        self.assertLess(elapsed, 3.0)
+
+    def test_many_empty(self):
+        self.assertEqual(uassetgui.to_json_many([], "t"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
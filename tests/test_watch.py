@@ -0,0 +1,188 @@
+"""watch.py: stage selection, the debounce under a fake clock, and the
+loop itself (--dry-run --max-builds) against a fixture tree."""
+
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from _support import workdir
+
+import watch
+
+
+class SelectStages(unittest.TestCase):
+    def test_static_meshes(self):
+        self.assertEqual(watch.select_stages("static_meshes.json", '{"a": 1}', '{"a": 2}'),
+                         {"meshes", "convert", "map", "actors"})
+
+    def test_same_json_rebuilds_nothing(self):
+        self.assertEqual(watch.select_stages("static_meshes.json", '{"a": 1}', '{ "a" : 1 }\n'), set())
+
+    def test_invalid_json_raises(self):
+        with self.assertRaises(ValueError):
+            watch.select_stages("static_meshes.json", '{"a": 1}', '{"a": ')
+
+    def test_work_changes_sections(self):
+        name = str(watch.pipeline.WORK_CHANGES)
+        old = {"static_meshes": {}, "dealerships": {}, "blueprint_actors": {}, "delivery_points": []}
+        for key, want in (("static_meshes", {"convert", "map", "actors"}),
+                          ("dealerships", {"convert", "map", "actors"}),
+                          ("blueprint_actors", {"actors"}),
+                          ("delivery_points", {"actors"})):
+            with self.subTest(key=key):
+                new = dict(old, **{key: {"x": [1]}})
+                self.assertEqual(watch.select_stages(name, json.dumps(old), json.dumps(new)), want)
+
+    def test_delivery_points(self):
+        base = {"new_cargos": [], "DP1": {"template": "A", "payout": 1}}
+
+        def sel(**change):
+            new = json.loads(json.dumps(base))
+            for k, v in change.items():
+                new["DP1"][k] = v
+            return watch.select_stages("delivery_points.json", json.dumps(base), json.dumps(new))
+
+        self.assertEqual(sel(payout=2), {"actors"})
+        self.assertEqual(sel(template="B"), {"meshes", "actors"})
+        added = dict(base, DP2={"template": "A"})
+        self.assertEqual(watch.select_stages("delivery_points.json", json.dumps(base), json.dumps(added)),
+                         {"meshes", "convert", "map", "actors"})
+        cargo = dict(base, new_cargos=[{"name": "C"}])
+        self.assertEqual(watch.select_stages("delivery_points.json", json.dumps(base), json.dumps(cargo)),
+                         {"cargos"})
+
+    def test_code(self):
+        self.assertEqual(watch.select_stages("convert2.py", "a", "b"), {"convert", "map", "actors"})
+        self.assertEqual(watch.select_stages("clone_bp_actors.py", "a", "b"), {"actors"})
+
+    def test_plan_rebuild(self):
+        self.assertEqual(watch.plan_rebuild({"actors", "cargos"}, deploy=True), {"actors", "report", "pack"})
+        self.assertEqual(watch.plan_rebuild({"cargos"}, deploy=True), {"cargos", "pack"})
+        self.assertEqual(watch.plan_rebuild({"cargos"}, deploy=False), {"cargos"})
+        self.assertEqual(watch.plan_rebuild(set(), deploy=True), set())
+
+
+class FakeTime:
+    """clock/sleep for Watcher: sleep() advances the clock and fires the
+    writes scheduled up to the new time."""
+
+    def __init__(self, events):
+        self.now = 0.0
+        self.events = sorted(events, key=lambda e: e[0])
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        while self.events and self.events[0][0] <= self.now:
+            self.events.pop(0)[1]()
+
+
+class Debounce(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.a, self.b = Path(tmp.name) / "a.json", Path(tmp.name) / "b.json"
+        self.a.write_text("{}")
+        self.writes = 0
+
+    def write(self, path):
+        # A longer body each time: the stamp is (mtime, size), and two
+        # writes can land within one mtime tick.
+        self.writes += 1
+        return lambda: path.write_text("x" * self.writes)
+
+    def watcher(self, events):
+        t = FakeTime(events)
+        return watch.Watcher([self.a, self.b], interval=0.1, debounce=0.5,
+                             clock=t.clock, sleep=t.sleep), t
+
+    def test_burst_is_one_batch(self):
+        w, t = self.watcher([(0.1, self.write(self.a)), (0.3, self.write(self.b)),
+                             (0.6, self.write(self.a))])
+        self.assertEqual(w.wait(), {self.a, self.b})
+        # Returned once 0.5 s passed after the last write, not before.
+        self.assertGreaterEqual(t.now, 0.6 + 0.5 - 1e-9)
+        self.assertLess(t.now, 0.6 + 0.5 + 0.2)
+
+    def test_quiet_timeout(self):
+        w, t = self.watcher([])
+        self.assertEqual(w.wait(timeout=2.0), set())
+        self.assertGreaterEqual(t.now, 2.0 - 1e-9)
+
+    def test_rebase_ignores_own_writes(self):
+        w, t = self.watcher([(0.1, self.write(self.b))])
+        self.a.write_text("written by a rebuild")
+        w.rebase([self.a])
+        self.assertEqual(w.wait(), {self.b})
+
+    def test_created_file_counts(self):
+        self.assertFalse(self.b.exists())
+        w, _ = self.watcher([(0.2, self.write(self.b))])
+        self.assertEqual(w.wait(), {self.b})
+
+
+class Loop(unittest.TestCase):
+    """python watch.py --dry-run --max-builds 2, fed real saves."""
+
+    def test_two_rebuilds_then_exit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            env = workdir(root)
+            proc = subprocess.Popen(
+                [sys.executable, "-u", "watch.py", "--dry-run", "--max-builds", "2",
+                 "--interval", "0.02", "--debounce", "0.2"],
+                cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8")
+            killer = threading.Timer(60, proc.kill)
+            killer.start()
+            try:
+                lines = self._drive(root, proc)
+            finally:
+                killer.cancel()
+                proc.stdout.close()
+                rc = proc.wait()
+        self.assertEqual(rc, 0, "\n".join(lines))
+        rebuilds = [ln for ln in lines if ln.startswith("[watch] rebuild")]
+        self.assertEqual(rebuilds, ["[watch] rebuild 1: actors -> report -> pack",
+                                    "[watch] rebuild 2: meshes -> convert -> map -> actors -> report -> pack"])
+        self.assertTrue(any("not valid JSON yet" in ln for ln in lines))
+
+    def _drive(self, root: Path, proc) -> list[str]:
+        dps = root / "delivery_points.json"
+        scene = root / "static_meshes.json"
+        lines = []
+
+        def until(prefix):
+            for line in proc.stdout:
+                lines.append(line.rstrip("\n"))
+                if line.startswith(prefix):
+                    return
+            self.fail(f"watch.py exited before {prefix!r}:\n" + "\n".join(lines))
+
+        until("[watch] watching")
+        # A DP field that isn't baked into the placements: actors only.
+        cfg = json.loads(dps.read_text(encoding="utf-8"))
+        key = next(k for k, v in cfg.items() if not k.startswith("_") and isinstance(v, dict))
+        cfg[key]["test_note"] = "edited"
+        dps.write_text(json.dumps(cfg, indent=2), encoding="utf-8")
+        until("[watch] rebuild 1")
+        # A half-written save rebuilds nothing; the finished one does.
+        text = scene.read_text(encoding="utf-8")
+        scene.write_text(text[: len(text) // 2], encoding="utf-8")
+        until("  [watch] static_meshes.json: not valid JSON yet")
+        cfg = json.loads(text)
+        cfg["_test_moved"] = True
+        scene.write_text(json.dumps(cfg), encoding="utf-8")
+        until("[watch] rebuild 2")
+        lines += [ln.rstrip("\n") for ln in proc.stdout]
+        return lines
+
+
+if __name__ == "__main__":
+    unittest.main()
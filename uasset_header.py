@@ -0,0 +1,213 @@
+"""
+Minimal reader for cooked UE5 package headers (.uasset / .umap).
+
+Reads the package summary, name map, import table and export table straight
+from the file bytes — no mappings, no UAssetAPI, no .NET process. That's all
+the catalog-style questions the pipeline asks need ("which classes does this
+cell contain?", "what's actor #3 called?"); property data stays the
+injector's job.
+
+Only the layout Motor Town ships is exercised: cooked, unversioned
+(FileVersionUE4/UE5 == 0), LegacyFileVersion -8, split .uasset/.uexp. The
+few summary fields whose presence depends on the engine version are
+resolved by cross-checking table offsets rather than trusted blindly:
+
+  - LegacyFileVersion <= -9 moves SavedHash + TotalHeaderSize in front of
+    the custom-version container (UE 5.4+ editor saves).
+  - UE 5.5 may append Verse cell import/export tables + MetaDataOffset
+    before DependsOffset; whichever candidate makes DependsOffset land
+    exactly ExportCount * stride past ExportOffset wins.
+
+    pkg = read_package(Path(".../_Generated_/0V18V8JBXKXUL8YILWZKCSMB4.umap"))
+    for e in pkg["exports"]:
+        print(e["name"], class_name(pkg, e["class_index"]))
+
+Package indexes follow UE: 0 = null, -n = imports[n-1], +n = exports[n-1].
+Export serial offsets are relative to the combined package; subtract
+summary["total_header_size"] to index into the .uexp.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+
+PACKAGE_FILE_TAG = 0x9E2A83C1
+PKG_FILTER_EDITOR_ONLY = 0x80000000
+
+# Export-table entry sizes seen in UE5 cooked packages: 96 (5.1-5.3 layout,
+# no script-serialization offsets), 112 (with them), plus the older 100/104
+# variants that still carried IsInheritedInstance / PackageGuid fields.
+_EXPORT_STRIDES = (96, 112, 104, 100)
+
+
+class _Reader:
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf, pos: int = 0):
+        self.buf = buf
+        self.pos = pos
+
+    def i32(self) -> int:
+        v = struct.unpack_from("<i", self.buf, self.pos)[0]
+        self.pos += 4
+        return v
+
+    def u32(self) -> int:
+        v = struct.unpack_from("<I", self.buf, self.pos)[0]
+        self.pos += 4
+        return v
+
+    def i64(self) -> int:
+        v = struct.unpack_from("<q", self.buf, self.pos)[0]
+        self.pos += 8
+        return v
+
+    def skip(self, n: int) -> None:
+        self.pos += n
+
+    def fstring(self) -> str:
+        n = self.i32()
+        if n == 0:
+            return ""
+        if n < 0:
+            raw = bytes(self.buf[self.pos:self.pos - 2 * n])
+            self.pos -= 2 * n
+            return raw.decode("utf-16-le").rstrip("\0")
+        raw = bytes(self.buf[self.pos:self.pos + n])
+        self.pos += n
+        return raw.decode("latin-1").rstrip("\0")
+
+
+def read_summary(buf) -> dict:
+    """Parse FPackageFileSummary up to DependsOffset. Raises ValueError on
+    anything that isn't a UE package."""
+    r = _Reader(buf)
+    if len(buf) < 32 or r.u32() != PACKAGE_FILE_TAG:
+        raise ValueError("not a UE package (bad file tag)")
+    legacy = r.i32()
+    if legacy >= 0 or legacy < -9:
+        raise ValueError(f"unsupported LegacyFileVersion {legacy}")
+    if legacy != -4:
+        r.skip(4)                               # LegacyUE3Version
+    ue4 = r.i32()
+    ue5 = r.i32() if legacy <= -8 else 0
+    r.skip(4)                                   # FileVersionLicenseeUE
+    total_header = None
+    if legacy <= -9:
+        r.skip(20)                              # SavedHash
+        total_header = r.i32()
+    n_custom = r.i32()
+    if not 0 <= n_custom < 1024:
+        raise ValueError(f"implausible custom-version count {n_custom}")
+    r.skip(20 * n_custom)
+    if total_header is None:
+        total_header = r.i32()
+    s = {
+        "legacy_version": legacy, "ue4_version": ue4, "ue5_version": ue5,
+        "total_header_size": total_header,
+        "folder_name": r.fstring(),
+        "package_flags": r.u32(),
+    }
+    s["name_count"], s["name_offset"] = r.i32(), r.i32()
+    s["soft_object_paths_count"], s["soft_object_paths_offset"] = r.i32(), r.i32()
+    if not s["package_flags"] & PKG_FILTER_EDITOR_ONLY:
+        s["localization_id"] = r.fstring()
+    s["gatherable_text_count"], s["gatherable_text_offset"] = r.i32(), r.i32()
+    s["export_count"], s["export_offset"] = r.i32(), r.i32()
+    s["import_count"], s["import_offset"] = r.i32(), r.i32()
+
+    # DependsOffset directly, or after 4 Verse-cell ints + MetaDataOffset.
+    after = r.pos
+    n_exp, exp_off = s["export_count"], s["export_offset"]
+    for skip in (0, 20, 4, 16):
+        depends = struct.unpack_from("<i", buf, after + skip)[0]
+        stride = next((st for st in _EXPORT_STRIDES
+                       if depends == exp_off + n_exp * st), None)
+        if stride is not None or (n_exp == 0 and depends >= exp_off):
+            s["depends_offset"] = depends
+            s["export_stride"] = stride or _EXPORT_STRIDES[0]
+            break
+    else:
+        raise ValueError("could not locate DependsOffset (unknown summary layout)")
+
+    n_imp = s["import_count"]
+    gap = exp_off - s["import_offset"]
+    s["import_stride"] = gap // n_imp if n_imp and gap % n_imp == 0 and 28 <= gap // n_imp <= 40 else 32
+    return s
+
+
+def _read_names(buf, s: dict) -> list[str]:
+    r = _Reader(buf, s["name_offset"])
+    names = []
+    for _ in range(s["name_count"]):
+        names.append(r.fstring())
+        r.skip(4)                               # non-case-preserving + case-preserving hashes
+    return names
+
+
+def _fname(names: list[str], buf, pos: int) -> str:
+    idx, num = struct.unpack_from("<ii", buf, pos)
+    base = names[idx] if 0 <= idx < len(names) else f"<name#{idx}>"
+    return base if num == 0 else f"{base}_{num - 1}"
+
+
+def read_package(path: Path | str, want_exports: bool = True) -> dict:
+    """Summary + name map + imports (+ exports) of one package file.
+    Imports: {class_package, class_name, outer_index, name}.
+    Exports: {class_index, super_index, template_index, outer_index, name,
+    object_flags, serial_size, serial_offset}."""
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            raise ValueError("empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            s = read_summary(buf)
+            names = _read_names(buf, s)
+            imports = []
+            base, stride = s["import_offset"], s["import_stride"]
+            for i in range(s["import_count"]):
+                o = base + i * stride
+                imports.append({
+                    "class_package": _fname(names, buf, o),
+                    "class_name":    _fname(names, buf, o + 8),
+                    "outer_index":   struct.unpack_from("<i", buf, o + 16)[0],
+                    "name":          _fname(names, buf, o + 20),
+                })
+            exports = []
+            if want_exports:
+                base, stride = s["export_offset"], s["export_stride"]
+                for i in range(s["export_count"]):
+                    o = base + i * stride
+                    cls, sup, tpl, outer = struct.unpack_from("<iiii", buf, o)
+                    flags, ssize, soff = struct.unpack_from("<Iqq", buf, o + 24)
+                    exports.append({
+                        "class_index": cls, "super_index": sup,
+                        "template_index": tpl, "outer_index": outer,
+                        "name": _fname(names, buf, o + 16),
+                        "object_flags": flags,
+                        "serial_size": ssize, "serial_offset": soff,
+                    })
+    return {"summary": s, "names": names, "imports": imports, "exports": exports}
+
+
+def object_name(pkg: dict, index: int) -> str | None:
+    """Name of the object a package index points at (None for 0)."""
+    if index < 0:
+        return pkg["imports"][-index - 1]["name"]
+    if index > 0:
+        return pkg["exports"][index - 1]["name"]
+    return None
+
+
+def class_name(pkg: dict, class_index: int) -> str | None:
+    """Class of an export, from its class_index. Cooked packages reference
+    native and BP classes alike through imports."""
+    return object_name(pkg, class_index)
+
+
+def export_body(pkg: dict, export: dict, uexp_buf) -> memoryview:
+    """Slice of a .uexp buffer holding `export`'s serialized data."""
+    start = export["serial_offset"] - pkg["summary"]["total_header_size"]
+    return memoryview(uexp_buf)[start:start + export["serial_size"]]
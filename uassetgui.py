@@ -0,0 +1,117 @@
+"""
+Run UAssetGUI conversions in parallel.
+
+`UAssetGUI tojson <in> <out> <engine> <mappings>` converts one asset per
+process, and most of each call is process startup + mappings parse, not
+the conversion. import_cargo_data.py used to run them one at a time with
+fixed sleeps around each; this module runs up to K at once:
+
+    results = to_json_many([(src1, dst1), (src2, dst2), ...], MAPPINGS_TAG)
+    ok = results[dst1]          # True once dst1 is complete
+
+Completion is event-driven: a worker thread blocks on the converter's exit
+(no polling). A non-zero exit fails the conversion at once; otherwise the
+output must exist and its size must hold still across one short re-check,
+which covers a converter that hands the write off to a child before
+exiting. Only that re-check sleeps, and only while the file is still
+missing or growing.
+
+The converter is pluggable via MTMI_UASSETGUI (default `UAssetGUI.exe` on
+PATH / in the repo root). A path ending in `.py` runs under the current
+interpreter, so a local stand-in script that writes canned JSON can drive
+the pipeline on machines without UAssetGUI. Any stand-in takes the same
+argv: `tojson|fromjson <src> <dst> <engine-version> <mappings-tag>`.
+
+Pool size: MTMI_UASSETGUI_JOBS, else min(8, CPUs).
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import mt_trace
+
+ENGINE_VERSION = "VER_UE5_5"
+DEFAULT_TIMEOUT = 60.0
+_STABLE_CHECK = 0.05   # seconds between the two size reads
+
+
+def converter_cmd() -> list[str]:
+    exe = os.environ.get("MTMI_UASSETGUI", "").strip().strip('"') or "UAssetGUI.exe"
+    if exe.lower().endswith(".py"):
+        return [sys.executable, exe]
+    return [exe]
+
+
+def default_jobs() -> int:
+    raw = os.environ.get("MTMI_UASSETGUI_JOBS", "").strip()
+    if raw.isdigit() and int(raw) > 0:
+        return int(raw)
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _wait_stable(dst: Path, deadline: float) -> bool:
+    last = -1
+    while time.monotonic() < deadline:
+        try:
+            size = dst.stat().st_size
+        except OSError:
+            size = -1
+        if size > 0 and size == last:
+            return True
+        last = size
+        time.sleep(_STABLE_CHECK)
+    return False
+
+
+def to_json(src: Path, dst: Path, mappings_tag: str,
+            timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Convert one asset; True once `dst` is fully written."""
+    return convert("tojson", src, dst, mappings_tag, timeout)
+
+
+def from_json(src: Path, dst: Path, mappings_tag: str,
+              timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Rebuild one asset from its JSON; True once `dst` is fully written."""
+    return convert("fromjson", src, dst, mappings_tag, timeout)
+
+
+def convert(verb: str, src: Path, dst: Path, mappings_tag: str,
+            timeout: float = DEFAULT_TIMEOUT, cmd: list[str] | None = None) -> bool:
+    """Run `<converter> <verb> <src> <dst> <engine> <mappings-tag>` (cmd
+    defaults to converter_cmd()) and wait for `dst`."""
+    dst = Path(dst)
+    cmd = cmd or converter_cmd()
+    if dst.exists():
+        dst.unlink()
+    deadline = time.monotonic() + timeout
+    try:
+        proc = mt_trace.run(
+            cmd + [verb, str(src), str(dst), ENGINE_VERSION, mappings_tag],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+    except OSError as e:
+        print(f"  [uassetgui] cannot start {cmd[-1]}: {e}", file=sys.stderr)
+        return False
+    except subprocess.TimeoutExpired:
+        return False
+    if proc.returncode != 0:
+        return False
+    return _wait_stable(dst, deadline)
+
+
+def to_json_many(pairs: list[tuple[Path, Path]], mappings_tag: str,
+                 jobs: int | None = None, timeout: float = DEFAULT_TIMEOUT) -> dict[Path, bool]:
+    """Convert every (src, dst) pair on a pool of `jobs` converter
+    processes. Returns {dst: ok}; a failed conversion doesn't stop the rest."""
+    if not pairs:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(jobs or default_jobs(), len(pairs))) as pool:
+        futs = {Path(dst): pool.submit(to_json, src, dst, mappings_tag, timeout)
+                for src, dst in pairs}
+        return {dst: f.result() for dst, f in futs.items()}
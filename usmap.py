@@ -0,0 +1,373 @@
+"""
+Pure-Python .usmap reader + unversioned-property schema lookup.
+
+Motor Town ships cooked assets with unversioned properties: a property
+body carries no names or types, only a compact header saying WHICH schema
+indexes of the struct follow. Decoding one needs the struct layouts from
+the MTMI_MAPPINGS .usmap — which UAssetGUI and every MTBPInjector verb
+re-parse from scratch (30 MB) on each call. This module parses the file
+once, caches a compact pre-indexed form, and answers schema questions:
+
+    m = load_mappings()                      # MTMI_MAPPINGS, cached
+    m.property("Vector", 1)                  # -> ("Y", 0, "DoubleProperty")
+    m.properties("Transform")                # full flattened list, super last
+    m.enum("EDeliveryCargoType")             # -> {0: "General", ...}
+
+    indexes, pos = read_unversioned_header(buf, pos)   # [(schema idx, is_zero)]
+
+Types come back as a plain string ("IntProperty") or a list for the
+parameterised ones: ["StructProperty", struct], ["EnumProperty", inner,
+enum], ["ArrayProperty", inner], ["SetProperty", inner], ["OptionalProperty",
+inner], ["MapProperty", key, value].
+
+Schema index order follows the engine (and CUE4Parse): a struct's own
+properties first — each static-array element taking its own index — then
+its super's, recursively. The cache stores each struct's own list already
+expanded to that order plus its super, so a lookup is one list index per
+level of inheritance; properties() flattens the chain on demand.
+
+File format versions handled: Initial through ExplicitEnumValues
+(PackageVersioning, LongFName, LargeEnums). Compression: none, Oodle,
+Brotli, Zstandard. Oodle needs the game's oo2core_9_win64.dll (or any
+liboo2core) via MTMI_OODLE_DLL or next to the mappings; Brotli and
+Zstandard need the optional `brotli` / `zstandard` packages and are only
+imported when a file actually uses them.
+
+The compact form lives at .mtmi_cache/usmap/<sha256 of the .usmap>.json.
+`python usmap.py info [path]` prints a summary; `struct <Name>` one schema.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import json
+import os
+import struct
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from artifact_cache import CACHE_ROOT, file_digest
+
+USMAP_MAGIC = 0x30C4
+_CACHE_FORMAT = 1
+
+# EUsmapVersion
+V_INITIAL, V_PACKAGE_VERSIONING, V_LONG_FNAME, V_LARGE_ENUMS, V_EXPLICIT_ENUM_VALUES = range(5)
+
+# EUsmapCompressionMethod
+_COMPRESSION = {0: "none", 1: "oodle", 2: "brotli", 3: "zstd"}
+
+# EPropertyType, by id.
+PROPERTY_TYPES = [
+    "ByteProperty", "BoolProperty", "IntProperty", "FloatProperty", "ObjectProperty",
+    "NameProperty", "DelegateProperty", "DoubleProperty", "ArrayProperty", "StructProperty",
+    "StrProperty", "TextProperty", "InterfaceProperty", "MulticastDelegateProperty",
+    "WeakObjectProperty", "LazyObjectProperty", "AssetObjectProperty", "SoftObjectProperty",
+    "UInt64Property", "UInt32Property", "UInt16Property", "Int64Property", "Int16Property",
+    "Int8Property", "MapProperty", "SetProperty", "EnumProperty", "FieldPathProperty",
+    "OptionalProperty", "Utf8StrProperty", "AnsiStrProperty",
+]
+
+
+class _Reader:
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf: bytes, pos: int = 0):
+        self.buf = buf
+        self.pos = pos
+
+    def read(self, fmt: str):
+        v = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return v[0] if len(v) == 1 else v
+
+    def take(self, n: int) -> bytes:
+        b = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return b
+
+
+# ----------------------------------------------------------------------
+# Decompression
+# ----------------------------------------------------------------------
+def _oodle_decompress(data: bytes, size: int, hint_dir: Path) -> bytes:
+    names = ("oo2core_9_win64.dll", "oo2core_8_win64.dll", "liboo2corelinux64.so.9", "liboo2core.so")
+    env = os.environ.get("MTMI_OODLE_DLL", "").strip().strip('"')
+    candidates = [Path(env)] if env else []
+    candidates += [hint_dir / n for n in names] + [Path(__file__).with_name(n) for n in names]
+    lib = None
+    for c in candidates:
+        if c.is_file():
+            lib = ctypes.CDLL(str(c))
+            break
+    if lib is None:
+        raise RuntimeError("usmap is Oodle-compressed: set MTMI_OODLE_DLL to the game's "
+                           "oo2core_9_win64.dll (MotorTown/Binaries/Win64) or copy it next to the mappings")
+    fn = lib.OodleLZ_Decompress
+    fn.restype = ctypes.c_ssize_t
+    fn.argtypes = [ctypes.c_char_p, ctypes.c_ssize_t, ctypes.c_void_p, ctypes.c_ssize_t,
+                   ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_ssize_t,
+                   ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ssize_t, ctypes.c_int]
+    out = ctypes.create_string_buffer(size)
+    n = fn(data, len(data), out, size, 1, 0, 0, None, 0, None, None, None, 0, 3)
+    if n != size:
+        raise RuntimeError(f"Oodle decompression returned {n} bytes, expected {size}")
+    return out.raw
+
+
+def _decompress(method: int, data: bytes, size: int, hint_dir: Path) -> bytes:
+    kind = _COMPRESSION.get(method)
+    if kind == "none":
+        return data
+    if kind == "oodle":
+        return _oodle_decompress(data, size, hint_dir)
+    if kind == "brotli":
+        try:
+            import brotli
+        except ImportError:
+            raise RuntimeError("usmap is Brotli-compressed: pip install brotli") from None
+        return brotli.decompress(data)
+    if kind == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("usmap is Zstandard-compressed: pip install zstandard") from None
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    raise ValueError(f"unknown usmap compression method {method}")
+
+
+# ----------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------
+def _read_type(r: _Reader, names: list[str]):
+    tid = r.read("<B")
+    t = PROPERTY_TYPES[tid] if tid < len(PROPERTY_TYPES) else f"Unknown{tid}"
+    if t == "EnumProperty":
+        inner = _read_type(r, names)
+        return [t, inner, names[r.read("<i")]]
+    if t == "StructProperty":
+        return [t, names[r.read("<i")]]
+    if t in ("ArrayProperty", "SetProperty", "OptionalProperty"):
+        return [t, _read_type(r, names)]
+    if t == "MapProperty":
+        key = _read_type(r, names)
+        return [t, key, _read_type(r, names)]
+    return t
+
+
+def parse_usmap(path: Path | str) -> dict:
+    """Parse a .usmap into the compact form:
+    {"version", "enums": {name: {value: entry}}, "structs": {name:
+    {"super", "count", "props": [[name, array_index, type] | None, ...]}}}.
+    `props` is indexed by schema index (own properties only)."""
+    path = Path(path)
+    raw = path.read_bytes()
+    r = _Reader(raw)
+    if r.read("<H") != USMAP_MAGIC:
+        raise ValueError(f"{path.name}: not a .usmap (bad magic)")
+    version = r.read("<B")
+    if version > V_EXPLICIT_ENUM_VALUES:
+        raise ValueError(f"{path.name}: usmap version {version} is newer than this reader")
+    if version >= V_PACKAGE_VERSIONING and r.read("<i"):
+        r.read("<ii")                                   # FPackageFileVersion UE4/UE5
+        r.pos += 20 * r.read("<i")                      # custom versions
+        r.read("<I")                                    # NetCL
+    method, comp_size, size = r.read("<BII")
+    data = _decompress(method, r.take(comp_size), size, path.parent)
+    if len(data) != size:
+        raise ValueError(f"{path.name}: payload is {len(data)} bytes, header says {size}")
+
+    r = _Reader(data)
+    name_len = "<H" if version >= V_LONG_FNAME else "<B"
+    names = []
+    for _ in range(r.read("<I")):
+        names.append(r.take(r.read(name_len)).decode("utf-8"))
+
+    enums: dict[str, dict[int, str]] = {}
+    entry_count = "<H" if version >= V_LARGE_ENUMS else "<B"
+    for _ in range(r.read("<I")):
+        ename = names[r.read("<i")]
+        entries = {}
+        for i in range(r.read(entry_count)):
+            if version >= V_EXPLICIT_ENUM_VALUES:
+                value = r.read("<Q")
+                entries[value] = names[r.read("<i")]
+            else:
+                entries[i] = names[r.read("<i")]
+        enums[ename] = entries
+
+    structs: dict[str, dict] = {}
+    for _ in range(r.read("<I")):
+        sname = names[r.read("<i")]
+        sup = r.read("<i")
+        count, serializable = r.read("<HH")
+        props: list = [None] * count
+        for _ in range(serializable):
+            idx, dim = r.read("<HB")
+            pname = names[r.read("<i")]
+            ptype = _read_type(r, names)
+            for k in range(dim):
+                if idx + k < count:
+                    props[idx + k] = [pname, k, ptype]
+        structs[sname] = {"super": names[sup] if 0 <= sup < len(names) else None,
+                          "count": count, "props": props}
+    # Anything after the structs is an optional extension block (CppEnumName,
+    # enum flags, ...) that schema lookups don't need.
+    return {"version": version, "enums": enums, "structs": structs}
+
+
+# ----------------------------------------------------------------------
+# Lookup API
+# ----------------------------------------------------------------------
+class Mappings:
+    """Schema lookups over a parsed (or cache-loaded) .usmap."""
+
+    def __init__(self, data: dict):
+        self.version = data["version"]
+        # JSON turns int enum keys into strings; normalise once.
+        self.enums = {n: {int(k): v for k, v in e.items()} for n, e in data["enums"].items()}
+        self.structs = data["structs"]
+        self._flat: dict[str, list] = {}
+
+    def has_struct(self, name: str) -> bool:
+        return name in self.structs
+
+    def super_of(self, name: str) -> str | None:
+        return self.structs[name]["super"]
+
+    def property(self, struct_name: str, index: int) -> tuple | None:
+        """(name, array_index, type) at schema `index` of `struct_name`,
+        walking into supers past the struct's own count."""
+        s = self.structs.get(struct_name)
+        while s is not None:
+            if index < s["count"]:
+                p = s["props"][index]
+                return tuple(p) if p else None
+            index -= s["count"]
+            s = self.structs.get(s["super"]) if s["super"] else None
+        return None
+
+    def properties(self, struct_name: str) -> list[tuple | None]:
+        """Every schema index of `struct_name`, supers included, in order.
+        Memoized per struct; the full chain is only built when asked for."""
+        flat = self._flat.get(struct_name)
+        if flat is None:
+            flat = []
+            s = self.structs.get(struct_name)
+            while s is not None:
+                flat.extend(tuple(p) if p else None for p in s["props"])
+                s = self.structs.get(s["super"]) if s["super"] else None
+            self._flat[struct_name] = flat
+        return list(flat)
+
+    def enum(self, name: str) -> dict[int, str]:
+        return self.enums[name]
+
+
+@lru_cache(maxsize=None)
+def _load(path: str) -> Mappings:
+    p = Path(path)
+    digest = file_digest(p)
+    if digest is None:
+        raise FileNotFoundError(path)
+    cached = CACHE_ROOT / "usmap" / f"{digest}.json"
+    try:
+        data = json.loads(cached.read_text(encoding="utf-8"))
+        if data.get("format") == _CACHE_FORMAT:
+            return Mappings(data)
+    except (OSError, ValueError):
+        pass
+    data = parse_usmap(p)
+    data["format"] = _CACHE_FORMAT
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, cached)
+    return Mappings(data)
+
+
+def load_mappings(path: Path | str | None = None) -> Mappings:
+    """Mappings for `path` (default MTMI_MAPPINGS), from the compact cache
+    when the file's hash matches; memoized per process."""
+    if path is None:
+        from mt_paths import MAPPINGS
+        path = MAPPINGS
+    return _load(str(Path(path).resolve()))
+
+
+# ----------------------------------------------------------------------
+# Unversioned property header
+# ----------------------------------------------------------------------
+def read_unversioned_header(buf, pos: int) -> tuple[list[tuple[int, bool]], int]:
+    """Decode an FUnversionedHeader at `pos`. Returns ([(schema index,
+    is_zero)], position after the header). Zero-flagged properties have
+    no serialized body — they hold their type's zero value."""
+    frags = []
+    zero_bits = 0
+    while True:
+        v = struct.unpack_from("<H", buf, pos)[0]
+        pos += 2
+        skip, has_zero, last, num = v & 0x7F, bool(v & 0x80), bool(v & 0x100), v >> 9
+        frags.append((skip, has_zero, num))
+        if has_zero:
+            zero_bits += num
+        if last:
+            break
+    mask = 0
+    if zero_bits:
+        if zero_bits <= 8:
+            mask, pos = buf[pos], pos + 1
+        elif zero_bits <= 16:
+            mask, pos = struct.unpack_from("<H", buf, pos)[0], pos + 2
+        else:
+            words = (zero_bits + 31) // 32
+            for w in range(words):
+                mask |= struct.unpack_from("<I", buf, pos + 4 * w)[0] << (32 * w)
+            pos += 4 * words
+    out = []
+    index = bit = 0
+    for skip, has_zero, num in frags:
+        index += skip
+        for _ in range(num):
+            zero = False
+            if has_zero:
+                zero = bool(mask >> bit & 1)
+                bit += 1
+            out.append((index, zero))
+            index += 1
+    return out, pos
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect a .usmap (default MTMI_MAPPINGS).")
+    ap.add_argument("command", choices=("info", "struct", "enum"))
+    ap.add_argument("name", nargs="?")
+    ap.add_argument("--usmap", default=None)
+    args = ap.parse_args(argv)
+    m = load_mappings(args.usmap)
+    if args.command == "info":
+        print(f"usmap v{m.version}: {len(m.structs)} structs, {len(m.enums)} enums")
+        return 0
+    if not args.name:
+        ap.error(f"{args.command} needs a name")
+    if args.command == "enum":
+        for v, n in m.enum(args.name).items():
+            print(f"  {v:6d}  {n}")
+        return 0
+    if not m.has_struct(args.name):
+        print(f"no struct {args.name}", file=sys.stderr)
+        return 1
+    for i, p in enumerate(m.properties(args.name)):
+        if p is None:
+            print(f"  [{i:3d}] <not serialized>")
+            continue
+        name, dim, ptype = p
+        label = f"{name}[{dim}]" if dim else name
+        print(f"  [{i:3d}] {label:32s} {json.dumps(ptype)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
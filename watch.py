@@ -0,0 +1,399 @@
+"""
+Watch mode: rebuild and redeploy on every save.
+
+Iterating on a placement used to mean save static_meshes.json, run
+fulltest.bat (or pipeline.py), wait for the vanilla Jeju_World.json to be
+parsed again, the registry and the cell catalog to be loaded again, and
+repack. This keeps one process running instead:
+
+    python watch.py                  # catch up, then rebuild on every save
+    python watch.py --no-deploy      # rebuild only, never pack
+    python watch.py --dry-run        # print what each save would rebuild
+
+It polls these files (mtime + size, every --interval seconds; no
+platform notification API, so it behaves the same on Windows and Linux):
+
+  static_meshes.json      placements        -> meshes, convert, map, actors
+  map_work_changes.json   static_meshes / dealerships (hand edits)
+                                            -> convert, map, actors
+                          blueprint_actors / delivery_points
+                                            -> actors
+  delivery_points.json    DP added/removed  -> meshes, convert, map, actors
+                          template / source -> meshes, actors
+                          any other DP field -> actors
+                          new_cargos        -> cargo mutation only
+  bp_registry.py, import_meshes.py, convert2.py, clone_bp_actors.py
+                          reloaded, then their stage and what follows
+
+and the scene report and pack follow whatever ran, so tile budgets are
+re-checked and the game picks up the new pak on its next world load. A burst of saves (an editor writing several files, or
+one file twice) is collected until nothing has changed for --debounce
+seconds and becomes one rebuild. Edits that parse to the same JSON, and
+files that don't parse yet, rebuild nothing.
+
+The selected stages run through pipeline.run(), so every one of them is
+still skipped when its inputs hash the same as last time and
+.mtmi_cache/pipeline.json stays valid for plain pipeline.py runs. meshes,
+convert and actors run in this process rather than as `python <script>`,
+which is what keeps their expensive state warm between rebuilds: each
+map's parsed vanilla JSON (re-read only when its Jeju_Worldaa.json
+changes; convert gets a fresh copy each time), the compiled registry (re-checked, and
+recompiled only when delivery_points.json or bp_registry.py changed), the
+cell catalog and template cell, and the cargo index. map and pack still
+run UAssetGUI and modp.bat, injectable with --tool like pipeline.py's. A
+new_cargos edit rebuilds just Cargos_01 and the safety-net DP overrides;
+their stale predecessors are swept by the next actors run.
+
+Startup runs whatever pipeline.py would (skip with --no-initial).
+--max-builds N exits after N rebuilds; with --dry-run and stand-in tools
+that is enough to drive the loop from a test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import build_manifest
+import maps
+import mt_paths
+import mt_profile
+import mt_trace
+import pipeline
+import placement_store
+from artifact_cache import file_digest
+from phase_runner import run_phases
+
+MAP_CHAIN = ["meshes", "convert", "map", "actors"]
+
+# Scripts that run in-process, and the first stage that runs each.
+# bp_registry.py is imported by import_meshes and clone_bp_actors.
+CODE = {
+    "bp_registry.py": "meshes",
+    "import_meshes.py": "meshes",
+    "convert2.py": "convert",
+    "clone_bp_actors.py": "actors",
+}
+WATCHED = ["static_meshes.json", "delivery_points.json", str(pipeline.WORK_CHANGES)] + list(CODE)
+
+# delivery_points.json fields that import_meshes bakes into
+# map_work_changes.json (via the registry's bp_path / bp_class).
+_DP_SOURCE_FIELDS = ("template", "source_class", "source_actor")
+
+
+# ----------------------------------------------------------------------
+# What to rebuild
+# ----------------------------------------------------------------------
+def _downstream(stage: str) -> set[str]:
+    return set(MAP_CHAIN[MAP_CHAIN.index(stage):])
+
+
+def _parse(text: str | None) -> dict:
+    if text is None:
+        return {}
+    cfg = json.loads(text)
+    if not isinstance(cfg, dict):
+        raise ValueError("top level is not an object")
+    return cfg
+
+
+def _dp_entries(cfg: dict) -> dict[str, dict]:
+    return {k: v for k, v in cfg.items() if not k.startswith("_") and isinstance(v, dict)}
+
+
+def select_stages(name: str, old: str | None, new: str | None) -> set[str]:
+    """Stages made stale by `name` going from `old` to `new` (file text,
+    None while missing). "cargos" stands for the cargo mutation alone.
+    Raises ValueError when `new` is not valid JSON yet."""
+    if old == new:
+        return set()
+    if name in CODE:
+        return _downstream(CODE[name])
+    before, after = _parse(old), _parse(new)
+    if before == after:
+        return set()
+    if name == "static_meshes.json":
+        return _downstream("meshes")
+    if name == str(pipeline.WORK_CHANGES):
+        out = set()
+        if any(before.get(k) != after.get(k) for k in ("static_meshes", "dealerships")):
+            out |= _downstream("convert")
+        if any(before.get(k) != after.get(k) for k in ("blueprint_actors", "delivery_points")):
+            out.add("actors")
+        return out
+    if name == "delivery_points.json":
+        out = {"cargos"} if before.get("new_cargos") != after.get("new_cargos") else set()
+        old_dps, new_dps = _dp_entries(before), _dp_entries(after)
+        if old_dps.keys() != new_dps.keys():
+            out |= _downstream("meshes")
+        elif any(old_dps[k].get(f) != new_dps[k].get(f) for k in new_dps for f in _DP_SOURCE_FIELDS):
+            out |= {"meshes", "actors"}
+        elif old_dps != new_dps:
+            out.add("actors")
+        return out
+    return set()
+
+
+def plan_rebuild(selected: set[str], deploy: bool) -> set[str]:
+    """Final step set: actors already rebuilds the cargos, the scene
+    report follows any placement change, and pack follows anything that
+    ran."""
+    out = set(selected)
+    if "actors" in out:
+        out.discard("cargos")
+    if out & set(MAP_CHAIN):
+        out.add("report")
+    if out and deploy:
+        out.add("pack")
+    return out
+
+
+# ----------------------------------------------------------------------
+# Polling
+# ----------------------------------------------------------------------
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    """Polls a fixed set of files. clock/sleep are injectable so the
+    debounce can be driven without waiting."""
+
+    def __init__(self, paths, interval: float = 0.25, debounce: float = 0.5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.paths = [Path(p) for p in paths]
+        self.interval, self.debounce = interval, debounce
+        self._clock, self._sleep = clock, sleep
+        self._seen = {p: _stamp(p) for p in self.paths}
+
+    def poll(self) -> set[Path]:
+        """Paths whose stamp changed since the last poll."""
+        changed = set()
+        for p in self.paths:
+            st = _stamp(p)
+            if st != self._seen[p]:
+                self._seen[p] = st
+                changed.add(p)
+        return changed
+
+    def rebase(self, paths) -> None:
+        """Accept the current state of `paths` (our own writes)."""
+        for p in paths:
+            self._seen[Path(p)] = _stamp(Path(p))
+
+    def wait(self, timeout: float | None = None) -> set[Path]:
+        """Block until something changed and then stayed quiet for
+        `debounce` seconds; every path touched in that burst. Empty when
+        `timeout` passes with no change at all."""
+        start = last = self._clock()
+        batch: set[Path] = set()
+        while True:
+            hit = self.poll()
+            now = self._clock()
+            if hit:
+                batch |= hit
+                last = now
+            elif batch and now - last >= self.debounce:
+                return batch
+            elif not batch and timeout is not None and now - start >= timeout:
+                return batch
+            self._sleep(self.interval)
+
+
+# ----------------------------------------------------------------------
+# Warm rebuilds
+# ----------------------------------------------------------------------
+class Session:
+    """The pipeline graph with meshes / convert / actors running in this
+    process, and the state they keep between rebuilds."""
+
+    def __init__(self, tools: dict[str, list[str]], jobs: int | None, deploy: bool):
+        import bp_registry
+        import clone_bp_actors
+        import convert2
+        import import_meshes
+        self.modules = {"bp_registry.py": bp_registry, "import_meshes.py": import_meshes,
+                        "convert2.py": convert2, "clone_bp_actors.py": clone_bp_actors}
+        self.jobs, self.deploy = jobs, deploy
+        self.graph = pipeline.stages(tools)
+        by_name = {st["name"]: st for st in self.graph}
+        by_name["meshes"]["run"] = self._meshes
+        by_name["actors"]["run"] = self._actors
+        for st in self.graph:
+            if st["name"].partition(":")[0] == "convert":
+                st["run"] = lambda name=st["map"]: self._convert(name)
+        # map -> (digest, pickled parse) of its vanilla JSON
+        self._vanilla: dict[str, tuple[str | None, bytes]] = {}
+
+    def reload(self, script: str) -> None:
+        """Re-import an edited script (and what binds names from it)."""
+        names = list(CODE) if script == "bp_registry.py" else [script]
+        for name in names:
+            self.modules[name] = importlib.reload(self.modules[name])
+        print(f"  [watch] reloaded {', '.join(names)}")
+
+    def vanilla(self, name: str) -> dict:
+        """A private copy of a map's parsed Jeju_Worldaa.json. Parsed once
+        per content digest; later copies come from a pickle, several times
+        faster than json.loads on a map this size."""
+        cache_json = maps.get(name)["cache_json"]
+        digest = file_digest(cache_json)
+        known, blob = self._vanilla.get(name, (None, b""))
+        if digest != known:
+            with mt_trace.span("parse vanilla map", file=str(cache_json)):
+                asset = json.loads(cache_json.read_text(encoding="utf-8"))
+            self._vanilla[name] = (digest, pickle.dumps(asset, protocol=pickle.HIGHEST_PROTOCOL))
+            return asset
+        return pickle.loads(blob)
+
+    def _meshes(self) -> bool:
+        m = self.modules
+        m["bp_registry.py"].invalidate()
+        m["import_meshes.py"].OUTPUTS.reset()
+        m["import_meshes.py"].main()
+        return True
+
+    def _convert(self, name: str) -> bool:
+        convert2 = self.modules["convert2.py"]
+        convert2.outputs_for(name).reset()
+        mods = placement_store.load(pipeline.WORK_CHANGES, convert2.MOD_KINDS)
+        script_dir = os.path.dirname(os.path.abspath(convert2.__file__))
+        return convert2.inject(self.vanilla(name), mods, str(maps.get(name)["map_json"]),
+                               script_dir, name) == 0
+
+    def _clone_module(self):
+        clone = self.modules["clone_bp_actors.py"]
+        self.modules["bp_registry.py"].invalidate()
+        clone.OUTPUTS.reset()
+        clone.CARGO_OUTPUTS.reset()
+        clone.injector_version.cache_clear()     # the injector may have been rebuilt
+        return clone
+
+    def _actors(self) -> bool:
+        if self._clone_module().main(pipeline.CLONE_ARGS) != 0:
+            return False
+        gone = build_manifest.gc()
+        print(f"  [clean] {len(gone)} orphaned file(s) removed")
+        return True
+
+    def _cargos(self) -> bool:
+        clone = self._clone_module()
+        new_cargos = clone.load_new_cargos()
+        ok, _ = run_phases([
+            ("new-cargos", lambda: clone.materialize_new_cargos(new_cargos)),
+            ("safety-dps", lambda: clone.inject_new_cargos_into_safety_dps(new_cargos)),
+        ], jobs=self.jobs, label="cargos")
+        # The overrides written here are claimed by the next actors run;
+        # committing this partial set would orphan the rest of the mod.
+        clone.OUTPUTS.reset()
+        return ok
+
+    def build(self, steps: set[str] | None) -> bool:
+        """Run `steps` (None: everything stale, like pipeline.py)."""
+        skip = [] if self.deploy else ["pack"]
+        if steps is None:
+            return pipeline.run(self.graph, pipeline.load_state(), [], skip, [], self.jobs)
+        ok = self._cargos() if "cargos" in steps else True
+        only = sorted({st["name"].partition(":")[0] for st in self.graph} & steps)
+        if ok and only:
+            ok = pipeline.run(self.graph, pipeline.load_state(), only, skip, [], self.jobs)
+        return ok
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Rebuild and redeploy the mod whenever its inputs change.")
+    ap.add_argument("--no-deploy", action="store_true", help="never run the pack stage")
+    ap.add_argument("--no-initial", action="store_true",
+                    help="don't bring stale stages up to date before watching")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="print the stages each change would rebuild, build nothing")
+    ap.add_argument("--interval", type=float, default=0.25, help="seconds between polls (default 0.25)")
+    ap.add_argument("--debounce", type=float, default=0.5,
+                    help="quiet seconds that end a burst of saves (default 0.5)")
+    ap.add_argument("--max-builds", type=int, default=0, metavar="N",
+                    help="exit after N rebuilds (default: run until Ctrl+C)")
+    ap.add_argument("--tool", action="append", default=[], metavar="NAME=CMD",
+                    help=f"override an external tool ({', '.join(pipeline.TOOL_NAMES)})")
+    ap.add_argument("--jobs", type=int, default=None, help="stages run at once (see pipeline.py)")
+    args = ap.parse_args(argv)
+    mt_paths.resolve()
+
+    tools = pipeline.default_tools()
+    for spec in args.tool:
+        name, sep, cmd = spec.partition("=")
+        if not sep or name not in pipeline.TOOL_NAMES or not cmd.strip():
+            ap.error(f"--tool expects NAME=CMD with NAME in {', '.join(pipeline.TOOL_NAMES)}, got {spec!r}")
+        tools[name] = pipeline._tool_cmd(cmd)
+
+    session = None if args.dry_run else Session(tools, args.jobs, not args.no_deploy)
+    watcher = Watcher(WATCHED, args.interval, args.debounce)
+    texts = {p: _read(p) for p in watcher.paths}
+    if session and not args.no_initial:
+        print("[watch] bringing stale stages up to date")
+        session.build(None)
+        texts[pipeline.WORK_CHANGES] = _read(pipeline.WORK_CHANGES)
+        watcher.rebase([pipeline.WORK_CHANGES])
+    print(f"[watch] watching {', '.join(WATCHED)} (Ctrl+C to stop)")
+
+    builds = 0
+    try:
+        while not args.max_builds or builds < args.max_builds:
+            selected: set[str] = set()
+            reload: list[str] = []
+            for path in sorted(watcher.wait()):
+                new = _read(path)
+                try:
+                    stages = select_stages(str(path), texts[path], new)
+                except ValueError as e:
+                    print(f"  [watch] {path}: not valid JSON yet ({e}) — waiting for the next save",
+                          file=sys.stderr)
+                    continue
+                texts[path] = new
+                if stages and str(path) in CODE:
+                    reload.append(str(path))
+                print(f"  [watch] {path}: {', '.join(s for s in MAP_CHAIN + ['cargos'] if s in stages) or 'no change'}")
+                selected |= stages
+            steps = plan_rebuild(selected, not args.no_deploy)
+            if not steps:
+                continue
+            builds += 1
+            order = [s for s in ["cargos"] + MAP_CHAIN + ["report", "pack"] if s in steps]
+            print(f"[watch] rebuild {builds}: {' -> '.join(order)}")
+            if session is None:
+                continue
+            try:
+                for script in reload:
+                    session.reload(script)
+            except Exception as e:       # a half-finished edit; the next save retries
+                print(f"[watch] rebuild {builds} skipped: cannot reload {script}: {e}", file=sys.stderr)
+                continue
+            t0 = time.perf_counter()
+            ok = session.build(steps)
+            print(f"[watch] rebuild {builds} {'done' if ok else 'FAILED'} in {time.perf_counter() - t0:.1f}s")
+            # meshes rewrites map_work_changes.json; don't rebuild for that.
+            texts[pipeline.WORK_CHANGES] = _read(pipeline.WORK_CHANGES)
+            watcher.rebase([pipeline.WORK_CHANGES])
+    except KeyboardInterrupt:
+        print("[watch] stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mt_profile.run("watch", lambda: _main(sys.argv[1:])))